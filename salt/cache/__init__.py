@@ -181,6 +181,60 @@ class Cache(object):
         fun = "{0}.fetch".format(self.driver)
         return self.modules[fun](bank, key, **self._kwargs)
 
+    def fetch_many(self, bank_key_pairs):
+        """
+        Fetch data for several keys at once using the specified module
+
+        Drivers can implement ``fetch_many`` to retrieve all the keys in as
+        few round trips as possible. For drivers which don't, the keys are
+        fetched one by one.
+
+        .. versionadded:: 3003
+
+        :param bank_key_pairs:
+            An iterable of ``(bank, key)`` tuples to fetch.
+
+        :return:
+            Return a dict mapping each ``(bank, key)`` tuple to the python
+            object fetched from the cache, or an empty dict if the key was not
+            found.
+
+        :raises SaltCacheError:
+            Raises an exception if cache driver detected an error accessing data
+            in the cache backend (auth, permissions, etc).
+        """
+        bank_key_pairs = [(bank, key) for bank, key in bank_key_pairs]
+        fun = "{0}.fetch_many".format(self.driver)
+        if fun in self.modules:
+            return self.modules[fun](bank_key_pairs, **self._kwargs)
+        return {
+            (bank, key): Cache.fetch(self, bank, key) for bank, key in bank_key_pairs
+        }
+
+    def store_many(self, data):
+        """
+        Store data for several keys at once using the specified module
+
+        Drivers can implement ``store_many`` to write all the keys in as few
+        round trips (or a single transaction) as possible. For drivers which
+        don't, the keys are stored one by one.
+
+        .. versionadded:: 3003
+
+        :param data:
+            A dict mapping ``(bank, key)`` tuples to the data to store under
+            that key.
+
+        :raises SaltCacheError:
+            Raises an exception if cache driver detected an error accessing data
+            in the cache backend (auth, permissions, etc).
+        """
+        fun = "{0}.store_many".format(self.driver)
+        if fun in self.modules:
+            return self.modules[fun](data, **self._kwargs)
+        for (bank, key), value in six.iteritems(data):
+            Cache.store(self, bank, key, value)
+
     def updated(self, bank, key):
         """
         Get the last updated epoch for the specified key
@@ -317,6 +371,14 @@ class MemCache(Cache):
             self._storage = MemCache.data[storage_id]
         return self._storage
 
+    def _put(self, bank, key, data, now):
+        if len(self.storage) >= self.max:
+            if self.cleanup:
+                MemCache.__cleanup(self.expire)
+            if len(self.storage) >= self.max:
+                self.storage.popitem(last=False)
+        self.storage[(bank, key)] = [now, data]
+
     def fetch(self, bank, key):
         if self.debug:
             self.call += 1
@@ -339,23 +401,52 @@ class MemCache(Cache):
 
         # Have no value for the key or value is expired
         data = super(MemCache, self).fetch(bank, key)
-        if len(self.storage) >= self.max:
-            if self.cleanup:
-                MemCache.__cleanup(self.expire)
-            if len(self.storage) >= self.max:
-                self.storage.popitem(last=False)
-        self.storage[(bank, key)] = [now, data]
+        self._put(bank, key, data, now)
         return data
 
+    def fetch_many(self, bank_key_pairs):
+        now = time.time()
+        ret = {}
+        missing = []
+        for bank, key in bank_key_pairs:
+            if self.debug:
+                self.call += 1
+            record = self.storage.pop((bank, key), None)
+            if record is not None and record[0] + self.expire >= now:
+                if self.debug:
+                    self.hit += 1
+                record[0] = now
+                self.storage[(bank, key)] = record
+                ret[(bank, key)] = record[1]
+            else:
+                missing.append((bank, key))
+        if self.debug and self.call:
+            log.debug(
+                "MemCache stats (call/hit/rate): %s/%s/%s",
+                self.call,
+                self.hit,
+                float(self.hit) / self.call,
+            )
+        if missing:
+            for (bank, key), data in six.iteritems(
+                super(MemCache, self).fetch_many(missing)
+            ):
+                self._put(bank, key, data, now)
+                ret[(bank, key)] = data
+        return ret
+
     def store(self, bank, key, data):
         self.storage.pop((bank, key), None)
         super(MemCache, self).store(bank, key, data)
-        if len(self.storage) >= self.max:
-            if self.cleanup:
-                MemCache.__cleanup(self.expire)
-            if len(self.storage) >= self.max:
-                self.storage.popitem(last=False)
-        self.storage[(bank, key)] = [time.time(), data]
+        self._put(bank, key, data, time.time())
+
+    def store_many(self, data):
+        for bank_key in data:
+            self.storage.pop(bank_key, None)
+        super(MemCache, self).store_many(data)
+        now = time.time()
+        for (bank, key), value in six.iteritems(data):
+            self._put(bank, key, value, now)
 
     def flush(self, bank, key=None):
         self.storage.pop((bank, key), None)
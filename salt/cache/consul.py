@@ -48,9 +48,12 @@ value to ``consul``:
 """
 from __future__ import absolute_import, print_function, unicode_literals
 
+import base64
 import logging
 
 from salt.exceptions import SaltCacheError
+from salt.ext import six
+from salt.ext.six.moves import range
 
 try:
     import consul
@@ -63,6 +66,9 @@ except ImportError:
 log = logging.getLogger(__name__)
 api = None
 
+# Maximum number of operations Consul accepts in a single transaction
+_TXN_MAX_OPERATIONS = 64
+
 
 # Define the module's virtual name
 __virtualname__ = "consul"
@@ -132,6 +138,129 @@ def fetch(bank, key):
         )
 
 
+def store_many(data):
+    """
+    Store several key values using Consul transactions.
+
+    .. versionadded:: 3003
+    """
+    if not hasattr(api, "txn"):
+        # python-consul < 1.0 has no transaction support
+        for (bank, key), value in six.iteritems(data):
+            store(bank, key, value)
+        return
+    operations = []
+    for (bank, key), value in six.iteritems(data):
+        operations.append(
+            {
+                "KV": {
+                    "Verb": "set",
+                    "Key": "{0}/{1}".format(bank, key),
+                    "Value": base64.b64encode(
+                        __context__["serial"].dumps(value)
+                    ).decode("ascii"),
+                }
+            }
+        )
+    try:
+        # Consul limits the number of operations in a single transaction
+        for idx in range(0, len(operations), _TXN_MAX_OPERATIONS):
+            api.txn.put(operations[idx : idx + _TXN_MAX_OPERATIONS])
+    except Exception as exc:  # pylint: disable=broad-except
+        raise SaltCacheError(
+            "There was an error writing {0} keys: {1}".format(len(operations), exc)
+        )
+
+
+def _parent_bank(bank_key_pairs):
+    """
+    Return the parent bank shared by all the banks, or None
+    """
+    parents = set(bank.rsplit("/", 1)[0] for bank, _ in bank_key_pairs if "/" in bank)
+    if len(parents) != 1 or any("/" not in bank for bank, _ in bank_key_pairs):
+        return None
+    return parents.pop()
+
+
+def _covers_parent(bank_key_pairs, parent):
+    """
+    Check whether the banks are most of the banks in their parent bank, so
+    that reading the whole parent does not fetch much more than requested
+    """
+    _, banks = api.kv.get(parent + "/", keys=True, separator="/")
+    requested = set(bank for bank, _ in bank_key_pairs)
+    return len(requested) * 2 > len(banks or [])
+
+
+def _fetch_parent(bank_key_pairs, parent):
+    """
+    Fetch the keys from a recursive read of their parent bank
+    """
+    ret = {}
+    _, values = api.kv.get(parent + "/", recurse=True)
+    values = dict((value["Key"], value["Value"]) for value in values or [])
+    for bank, key in bank_key_pairs:
+        value = values.get("{0}/{1}".format(bank, key))
+        if value is None:
+            ret[(bank, key)] = {}
+        else:
+            ret[(bank, key)] = __context__["serial"].loads(value)
+    return ret
+
+
+def _fetch_txn(bank_key_pairs):
+    """
+    Fetch the keys with transactions of get-tree operations, which unlike get
+    operations do not fail the transaction when a key is missing
+    """
+    ret = {}
+    c_keys = ["{0}/{1}".format(bank, key) for bank, key in bank_key_pairs]
+    values = {}
+    # Consul limits the number of operations in a single transaction
+    for idx in range(0, len(c_keys), _TXN_MAX_OPERATIONS):
+        result = api.txn.put(
+            [
+                {"KV": {"Verb": "get-tree", "Key": c_key}}
+                for c_key in c_keys[idx : idx + _TXN_MAX_OPERATIONS]
+            ]
+        )
+        for item in result.get("Results") or []:
+            values[item["KV"]["Key"]] = item["KV"].get("Value")
+    for (bank, key), c_key in zip(bank_key_pairs, c_keys):
+        # get-tree also returns the keys the key is a prefix of
+        value = values.get(c_key)
+        if value is None:
+            ret[(bank, key)] = {}
+        else:
+            ret[(bank, key)] = __context__["serial"].loads(base64.b64decode(value))
+    return ret
+
+
+def fetch_many(bank_key_pairs):
+    """
+    Fetch several key values.
+
+    The keys are read with Consul transactions. When the banks share a parent
+    bank and are most of its banks (e.g. the ``minions/<id>`` banks of most
+    minions), the parent is read with a single recursive request instead.
+    Without transaction support the keys are fetched one by one.
+
+    .. versionadded:: 3003
+    """
+    bank_key_pairs = list(bank_key_pairs)
+    if len(bank_key_pairs) < 2 or not hasattr(api, "txn"):
+        return dict(((bank, key), fetch(bank, key)) for bank, key in bank_key_pairs)
+    parent = _parent_bank(bank_key_pairs)
+    try:
+        if parent is not None and _covers_parent(bank_key_pairs, parent):
+            return _fetch_parent(bank_key_pairs, parent)
+        return _fetch_txn(bank_key_pairs)
+    except Exception as exc:  # pylint: disable=broad-except
+        raise SaltCacheError(
+            "There was an error reading {0} keys: {1}".format(len(bank_key_pairs), exc)
+        )
+
+
 def flush(bank, key=None):
     """
     Remove the key from the cache bank with all the key content.
@@ -157,6 +157,82 @@ def fetch(bank, key):
         )
 
 
+def _parent_bank(bank_key_pairs):
+    """
+    Return the parent bank shared by all the banks, or None
+    """
+    parents = set(bank.rsplit("/", 1)[0] for bank, _ in bank_key_pairs if "/" in bank)
+    if len(parents) != 1 or any("/" not in bank for bank, _ in bank_key_pairs):
+        return None
+    return parents.pop()
+
+
+def _covers_parent(bank_key_pairs, etcd_dir):
+    """
+    Check whether the banks are most of the banks in their parent directory,
+    so that reading the whole directory does not fetch much more than
+    requested
+    """
+    try:
+        result = client.read(etcd_dir)
+    except etcd.EtcdKeyNotFound:
+        return False
+    # An empty directory is returned as its only leaf
+    banks = [node for node in result.leaves if node.key != result.key]
+    requested = set(bank for bank, _ in bank_key_pairs)
+    return len(requested) * 2 > len(banks)
+
+
+def _fetch_parent(bank_key_pairs, etcd_dir):
+    """
+    Fetch the keys from a recursive read of their parent directory
+    """
+    ret = {}
+    try:
+        leaves = dict(
+            (leaf.key, leaf.value)
+            for leaf in client.read(etcd_dir, recursive=True).leaves
+            if not leaf.dir
+        )
+    except etcd.EtcdKeyNotFound:
+        leaves = {}
+    for bank, key in bank_key_pairs:
+        value = leaves.get("{0}/{1}/{2}".format(path_prefix, bank, key))
+        if value is None:
+            ret[(bank, key)] = {}
+        else:
+            ret[(bank, key)] = __context__["serial"].loads(base64.b64decode(value))
+    return ret
+
+
+def fetch_many(bank_key_pairs):
+    """
+    Fetch several key values.
+
+    The keys are fetched one by one, unless the banks share a parent bank and
+    are most of its banks (e.g. the ``minions/<id>`` banks of most minions):
+    the parent directory is then read recursively in a single request and the
+    requested keys are picked from its leaves.
+
+    .. versionadded:: 3003
+    """
+    _init_client()
+    bank_key_pairs = list(bank_key_pairs)
+    parent = _parent_bank(bank_key_pairs) if len(bank_key_pairs) > 1 else None
+    if parent is not None:
+        etcd_dir = "{0}/{1}".format(path_prefix, parent)
+        try:
+            if _covers_parent(bank_key_pairs, etcd_dir):
+                return _fetch_parent(bank_key_pairs, etcd_dir)
+        except Exception as exc:  # pylint: disable=broad-except
+            raise SaltCacheError(
+                "There was an error reading the keys under {0}: {1}".format(
+                    etcd_dir, exc
+                )
+            )
+    return dict(((bank, key), fetch(bank, key)) for bank, key in bank_key_pairs)
+
+
 def flush(bank, key=None):
     """
     Remove the key from the cache bank with all the key content.
@@ -40,11 +40,7 @@ def get_storage_id(kwargs):
     return ("localfs", __cachedir(kwargs))
 
 
-def store(bank, key, data, cachedir):
-    """
-    Store information in a file.
-    """
-    base = os.path.join(cachedir, os.path.normpath(bank))
+def _make_bank(base):
     try:
         os.makedirs(base)
     except OSError as exc:
@@ -53,6 +49,8 @@ def store(bank, key, data, cachedir):
                 "The cache directory, {}, could not be created: {}".format(base, exc)
             )
 
+
+def _write(base, key, data):
     outfile = os.path.join(base, "{}.p".format(key))
     tmpfh, tmpfname = tempfile.mkstemp(dir=base)
     os.close(tmpfh)
@@ -67,6 +65,30 @@ def store(bank, key, data, cachedir):
         )
 
 
+def store(bank, key, data, cachedir):
+    """
+    Store information in a file.
+    """
+    base = os.path.join(cachedir, os.path.normpath(bank))
+    _make_bank(base)
+    _write(base, key, data)
+
+
+def store_many(data, cachedir):
+    """
+    Store information for several keys, creating each bank directory once.
+
+    .. versionadded:: 3003
+    """
+    bases = {}
+    for (bank, key), value in data.items():
+        base = bases.get(bank)
+        if base is None:
+            base = bases[bank] = os.path.join(cachedir, os.path.normpath(bank))
+            _make_bank(base)
+        _write(base, key, value)
+
+
 def fetch(bank, key, cachedir):
     """
     Fetch information from a file.
@@ -93,6 +115,32 @@ def fetch(bank, key, cachedir):
         )
 
 
+def fetch_many(bank_key_pairs, cachedir):
+    """
+    Fetch information for several keys.
+
+    The key files are opened directly instead of checking that each one exists
+    first, falling back to ``fetch`` only for the keys which are not found.
+
+    .. versionadded:: 3003
+    """
+    ret = {}
+    for bank, key in bank_key_pairs:
+        key_file = os.path.join(cachedir, os.path.normpath(bank), "{}.p".format(key))
+        try:
+            with salt.utils.files.fopen(key_file, "rb") as fh_:
+                ret[(bank, key)] = __context__["serial"].load(fh_)
+        except OSError as exc:
+            if exc.errno not in (errno.ENOENT, errno.EISDIR):
+                raise SaltCacheError(
+                    'There was an error reading the cache file "{}": {}'.format(
+                        key_file, exc
+                    )
+                )
+            ret[(bank, key)] = fetch(bank, key, cachedir)
+    return ret
+
+
 def updated(bank, key, cachedir):
     """
     Return the epoch of the mtime for this cache file
@@ -92,16 +92,17 @@ def __virtual__():
     return bool(MySQLdb), "No python mysql client installed." if MySQLdb is None else ""
 
 
-def run_query(conn, query, retries=3):
+def run_query(conn, query, retries=3, args=None):
     """
     Get a cursor and run a query. Reconnect up to `retries` times if
-    needed.
+    needed. Optional `args` are passed to the driver to be escaped and
+    interpolated into the query.
     Returns: cursor, affected rows counter
     Raises: SaltCacheError, AttributeError, OperationalError
     """
     try:
         cur = conn.cursor()
-        out = cur.execute(query)
+        out = cur.execute(query, args)
         return cur, out
     except (AttributeError, OperationalError) as e:
         if retries == 0:
@@ -114,7 +115,7 @@ def run_query(conn, query, retries=3):
             log.info("mysql_cache: recreating db connection due to: %r", e)
         global client
         client = MySQLdb.connect(**_mysql_kwargs)
-        return run_query(client, query, retries - 1)
+        return run_query(client, query, retries - 1, args=args)
     except Exception as e:  # pylint: disable=broad-except
         if len(query) > 150:
             query = query[:150] + "<...>"
@@ -215,6 +216,52 @@ def fetch(bank, key):
     return __context__["serial"].loads(r[0])
 
 
+def store_many(data):
+    """
+    Store several key values with a single multi-row ``REPLACE`` query.
+
+    .. versionadded:: 3003
+    """
+    if not data:
+        return
+    _init_client()
+    args = []
+    for (bank, key), value in data.items():
+        args.extend((bank, key, __context__["serial"].dumps(value)))
+    query = "REPLACE INTO {0} (bank, etcd_key, data) values {1}".format(
+        _table_name, ", ".join(["(%s, %s, %s)"] * len(data))
+    )
+    cur, cnt = run_query(client, query, args=args)
+    cur.close()
+    if cnt < len(data):
+        raise SaltCacheError(
+            "Error storing {0} keys, {1} rows affected".format(len(data), cnt)
+        )
+
+
+def fetch_many(bank_key_pairs):
+    """
+    Fetch several key values with a single ``SELECT ... IN`` query.
+
+    .. versionadded:: 3003
+    """
+    ret = {bank_key: {} for bank_key in bank_key_pairs}
+    if not ret:
+        return ret
+    _init_client()
+    args = []
+    for bank, key in ret:
+        args.extend((bank, key))
+    query = "SELECT bank, etcd_key, data FROM {0} WHERE (bank, etcd_key) IN ({1})".format(
+        _table_name, ", ".join(["(%s, %s)"] * len(ret))
+    )
+    cur, _ = run_query(client, query, args=args)
+    for bank, key, data in cur.fetchall():
+        ret[(bank, key)] = __context__["serial"].loads(data)
+    cur.close()
+    return ret
+
+
 def flush(bank, key=None):
     """
     Remove the key from the cache bank with all the key content.
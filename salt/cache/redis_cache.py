@@ -144,6 +144,7 @@ import logging
 from salt.exceptions import SaltCacheError
 
 # Import salt
+from salt.ext import six
 from salt.ext.six.moves import range
 
 # Import third party libs
@@ -389,6 +390,69 @@ def fetch(bank, key):
     return __context__["serial"].loads(redis_value)
 
 
+def store_many(data):
+    """
+    Store the data for several keys using a single Redis pipeline.
+
+    .. versionadded:: 3003
+    """
+    redis_server = _get_redis_server()
+    redis_pipe = redis_server.pipeline()
+    banks = set()
+    try:
+        for (bank, key), value in six.iteritems(data):
+            if bank not in banks:
+                banks.add(bank)
+                _build_bank_hier(bank, redis_pipe)
+            redis_pipe.set(
+                _get_key_redis_key(bank, key), __context__["serial"].dumps(value)
+            )
+            redis_pipe.sadd(_get_bank_keys_redis_key(bank), key)
+        log.debug("Setting the values for %d keys", len(data))
+        redis_pipe.execute()
+    except (RedisConnectionError, RedisResponseError) as rerr:
+        mesg = "Cannot set the Redis cache keys under {rbanks}: {rerr}".format(
+            rbanks=", ".join(sorted(banks)), rerr=rerr
+        )
+        log.error(mesg)
+        raise SaltCacheError(mesg)
+
+
+def fetch_many(bank_key_pairs):
+    """
+    Fetch data for several keys from the Redis cache with a single ``MGET``
+    (or a pipeline of ``GET`` commands in cluster mode, where the keys may be
+    spread over several nodes).
+
+    .. versionadded:: 3003
+    """
+    if not bank_key_pairs:
+        return {}
+    redis_server = _get_redis_server()
+    redis_keys = [_get_key_redis_key(bank, key) for bank, key in bank_key_pairs]
+    try:
+        if _get_redis_cache_opts()["cluster_mode"]:
+            redis_pipe = redis_server.pipeline()
+            for redis_key in redis_keys:
+                redis_pipe.get(redis_key)
+            redis_values = redis_pipe.execute()
+        else:
+            redis_values = redis_server.mget(redis_keys)
+    except (RedisConnectionError, RedisResponseError) as rerr:
+        mesg = "Cannot fetch the Redis cache keys {rkeys}: {rerr}".format(
+            rkeys=", ".join(redis_keys), rerr=rerr
+        )
+        log.error(mesg)
+        raise SaltCacheError(mesg)
+    ret = {}
+    for bank_key, redis_value in zip(bank_key_pairs, redis_values):
+        if redis_value is None:
+            ret[bank_key] = {}
+        else:
+            ret[bank_key] = __context__["serial"].loads(redis_value)
+    return ret
+
+
 def flush(bank, key=None):
     """
     Remove the key from the cache bank with all the key content. If no key is specified, remove
@@ -0,0 +1,286 @@
+"""
+Minion data cache plugin for an embedded SQLite database.
+
+.. versionadded:: 3003
+
+All banks and keys are stored as rows of a single SQLite database file instead
+of one file per key as done by the ``localfs`` cache module. This keeps the
+number of inodes constant however many minions are cached, lists bank entries
+with an index range scan instead of a directory listing, and stores the last
+update time of each key in its row.
+
+Writes are transactional: ``store_many`` writes all of its keys in a single
+transaction. The database is opened in WAL mode so the master worker processes
+can read while another one writes.
+
+The module only depends on the ``sqlite3`` module of the Python standard
+library. Optionally, the following values can be set in the master config.
+These are the defaults:
+
+.. code-block:: yaml
+
+    cache.sqlite.database: <cachedir>/cache.sqlite
+    cache.sqlite.timeout: 30
+
+``cache.sqlite.timeout`` is the number of seconds to wait for a lock held by
+another process before giving up.
+
+To use the SQLite database as the minion data cache backend, set the master
+``cache`` config value to ``sqlite``:
+
+.. code-block:: yaml
+
+    cache: sqlite
+"""
+
+import logging
+import os
+import threading
+import time
+
+import salt.syspaths
+from salt.exceptions import SaltCacheError
+
+try:
+    import sqlite3
+
+    HAS_SQLITE3 = True
+except ImportError:
+    HAS_SQLITE3 = False
+
+log = logging.getLogger(__name__)
+
+__virtualname__ = "sqlite"
+__func_alias__ = {"list_": "list"}
+
+# {database: (pid, connection, lock)}
+_CONNECTIONS = {}
+
+_SCHEMA = """CREATE TABLE IF NOT EXISTS cache (
+    bank TEXT NOT NULL,
+    key TEXT NOT NULL,
+    data BLOB,
+    updated INTEGER NOT NULL,
+    PRIMARY KEY (bank, key)
+)"""
+
+
+def __virtual__():
+    """
+    Confirm that the sqlite3 module is available.
+    """
+    if not HAS_SQLITE3:
+        return (False, "The sqlite3 python module is not available")
+    return __virtualname__
+
+
+def __cachedir(kwargs=None):
+    if kwargs and "cachedir" in kwargs:
+        return kwargs["cachedir"]
+    return __opts__.get("cachedir", salt.syspaths.CACHE_DIR)
+
+
+def init_kwargs(kwargs):
+    return {"cachedir": __cachedir(kwargs)}
+
+
+def _connect(cachedir):
+    """
+    Return the connection to the database and the lock serializing its use,
+    opening the database on first use in this process.
+    """
+    database = __opts__.get("cache.sqlite.database") or os.path.join(
+        cachedir, "cache.sqlite"
+    )
+    pid = os.getpid()
+    cached = _CONNECTIONS.get(database)
+    # Connections must not be shared with forked processes
+    if cached is not None and cached[0] == pid:
+        return cached[1], cached[2]
+    try:
+        dirname = os.path.dirname(database)
+        if dirname and not os.path.isdir(dirname):
+            os.makedirs(dirname)
+        conn = sqlite3.connect(
+            database,
+            timeout=__opts__.get("cache.sqlite.timeout", 30),
+            check_same_thread=False,
+        )
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        with conn:
+            conn.execute(_SCHEMA)
+    except (OSError, sqlite3.Error) as exc:
+        raise SaltCacheError(
+            "Unable to open the cache database {}: {}".format(database, exc)
+        )
+    lock = threading.Lock()
+    _CONNECTIONS[database] = (pid, conn, lock)
+    return conn, lock
+
+
+def _bank_range(bank):
+    """
+    Return the bounds of the range of bank names nested under ``bank``
+    """
+    # "0" is the character following "/"
+    return bank + "/", bank + "0"
+
+
+def store(bank, key, data, cachedir):
+    """
+    Store information in the database.
+    """
+    store_many({(bank, key): data}, cachedir)
+
+
+def store_many(data, cachedir):
+    """
+    Store information for several keys in a single transaction.
+    """
+    now = int(time.time())
+    rows = [
+        (bank.rstrip("/"), key, __context__["serial"].dumps(value), now)
+        for (bank, key), value in data.items()
+    ]
+    conn, lock = _connect(cachedir)
+    try:
+        with lock, conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO cache (bank, key, data, updated) "
+                "VALUES (?, ?, ?, ?)",
+                rows,
+            )
+    except sqlite3.Error as exc:
+        raise SaltCacheError(
+            "There was an error writing {} keys to the cache: {}".format(len(rows), exc)
+        )
+
+
+def fetch(bank, key, cachedir):
+    """
+    Fetch information from the database.
+    """
+    return fetch_many([(bank, key)], cachedir)[(bank, key)]
+
+
+def fetch_many(bank_key_pairs, cachedir):
+    """
+    Fetch information for several keys.
+    """
+    ret = {}
+    conn, lock = _connect(cachedir)
+    try:
+        with lock:
+            for bank, key in bank_key_pairs:
+                row = conn.execute(
+                    "SELECT data FROM cache WHERE bank = ? AND key = ?",
+                    (bank.rstrip("/"), key),
+                ).fetchone()
+                ret[(bank, key)] = row
+    except sqlite3.Error as exc:
+        raise SaltCacheError("There was an error reading the cache: {}".format(exc))
+    for bank_key, row in ret.items():
+        if row is None:
+            ret[bank_key] = {}
+        else:
+            ret[bank_key] = __context__["serial"].loads(row[0])
+    return ret
+
+
+def updated(bank, key, cachedir):
+    """
+    Return the epoch of the last update of this key
+    """
+    conn, lock = _connect(cachedir)
+    try:
+        with lock:
+            row = conn.execute(
+                "SELECT updated FROM cache WHERE bank = ? AND key = ?",
+                (bank.rstrip("/"), key),
+            ).fetchone()
+    except sqlite3.Error as exc:
+        raise SaltCacheError(
+            'There was an error reading the update time of "{}/{}": {}'.format(
+                bank, key, exc
+            )
+        )
+    if row is None:
+        return None
+    return row[0]
+
+
+def flush(bank, key=None, cachedir=None):
+    """
+    Remove the key from the cache bank with all the key content. If no key is
+    specified remove the entire bank with all keys and sub-banks inside.
+    """
+    if cachedir is None:
+        cachedir = __cachedir()
+    bank = bank.rstrip("/")
+    conn, lock = _connect(cachedir)
+    try:
+        with lock, conn:
+            if key is None:
+                cur = conn.execute(
+                    "DELETE FROM cache WHERE bank = ? OR (bank >= ? AND bank < ?)",
+                    (bank,) + _bank_range(bank),
+                )
+            else:
+                cur = conn.execute(
+                    "DELETE FROM cache WHERE bank = ? AND key = ?", (bank, key)
+                )
+    except sqlite3.Error as exc:
+        raise SaltCacheError('There was an error removing "{}": {}'.format(bank, exc))
+    return cur.rowcount > 0
+
+
+def list_(bank, cachedir):
+    """
+    Return the sorted list of the keys and sub-banks stored in the specified
+    bank.
+    """
+    bank = bank.rstrip("/")
+    lower, upper = _bank_range(bank)
+    conn, lock = _connect(cachedir)
+    try:
+        with lock:
+            keys = conn.execute(
+                "SELECT key FROM cache WHERE bank = ?", (bank,)
+            ).fetchall()
+            banks = conn.execute(
+                "SELECT DISTINCT bank FROM cache WHERE bank >= ? AND bank < ?",
+                (lower, upper),
+            ).fetchall()
+    except sqlite3.Error as exc:
+        raise SaltCacheError(
+            'There was an error listing the bank "{}": {}'.format(bank, exc)
+        )
+    ret = {row[0] for row in keys}
+    ret.update(row[0][len(lower) :].split("/", 1)[0] for row in banks)
+    return sorted(ret)
+
+
+def contains(bank, key, cachedir):
+    """
+    Checks if the specified bank contains the specified key.
+    """
+    bank = bank.rstrip("/")
+    conn, lock = _connect(cachedir)
+    try:
+        with lock:
+            if key is None:
+                row = conn.execute(
+                    "SELECT 1 FROM cache WHERE bank = ? OR (bank >= ? AND bank < ?) "
+                    "LIMIT 1",
+                    (bank,) + _bank_range(bank),
+                ).fetchone()
+            else:
+                row = conn.execute(
+                    "SELECT 1 FROM cache WHERE bank = ? AND key = ?", (bank, key)
+                ).fetchone()
+    except sqlite3.Error as exc:
+        raise SaltCacheError(
+            'There was an error checking "{}/{}": {}'.format(bank, key, exc)
+        )
+    return row is not None
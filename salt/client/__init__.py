@@ -1099,6 +1099,9 @@ class LocalClient(object):
 
         # timeouts per minion, id_ -> timeout time
         minion_timeouts = {}
+        # minions sending heartbeats for the job, id_ -> time until which
+        # they are known to be running it
+        heartbeats = {}
 
         found = set()
         missing = set()
@@ -1154,6 +1157,15 @@ class LocalClient(object):
                     if "missing" in raw.get("data", {}):
                         missing.update(raw["data"]["missing"])
                     continue
+                if "heartbeat" in raw["data"] and "return" not in raw["data"]:
+                    # the minion is still running the job, wait for two
+                    # more of its heartbeats before asking it with find_job
+                    id_ = raw["data"].get("id")
+                    if id_ in minions and id_ not in found:
+                        heartbeats[id_] = time.time() + 2 * raw["data"]["heartbeat"]
+                        minion_timeouts[id_] = time.time() + timeout
+                        minions_running = True
+                    continue
                 if "return" not in raw["data"]:
                     continue
                 if kwargs.get("raw", False):
@@ -1209,11 +1221,17 @@ class LocalClient(object):
             # if the jinfo has timed out and some minions are still running the job
             # re-do the ping
             if time.time() > timeout_at and minions_running:
+                # the minions which sent a heartbeat lately are still running
+                # the job, only ping the others
+                now = time.time()
+                alive = set(id_ for id_, until in heartbeats.items() if until > now)
+                pending = minions - found - alive
                 # since this is a new ping, no one has responded yet
-                jinfo = self.gather_job_info(
-                    jid, list(minions - found), "list", **kwargs
-                )
-                minions_running = False
+                minions_running = bool(alive - found)
+                if pending:
+                    jinfo = self.gather_job_info(jid, list(pending), "list", **kwargs)
+                else:
+                    jinfo = {}
                 # if we weren't assigned any jid that means the master thinks
                 # we have nothing to send
                 if "jid" not in jinfo:
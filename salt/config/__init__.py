@@ -351,6 +351,8 @@ VALID_OPTS = immutabletypes.freeze(
         "test": bool,
         # Tell the loader to attempt to import *.pyx cython files if cython is available
         "cython_enable": bool,
+        # Keep an index of the module files and of the outcome of loading them in the cachedir
+        "loader_index": bool,
         # Whether or not to load grains for FQDNs
         "enable_fqdns_grains": bool,
         # Whether or not to load grains for the GPU
@@ -376,6 +378,16 @@ VALID_OPTS = immutabletypes.freeze(
         "state_auto_order": bool,
         # Fire events as state chunks are processed by the state compiler
         "state_events": bool,
+        # The number of state chunks to run at once in worker processes, as their requisites allow
+        "state_concurrency": int,
+        # The state modules whose chunks are not run in the state_concurrency workers
+        "state_concurrency_exclude": list,
+        # Cache the low chunks compiled from the highstate, and run them while the files, options,
+        # grains and pillar they were compiled from are unchanged
+        "state_compile_cache": bool,
+        # The number of persistent shells running the onlyif and unless commands of the states, 0
+        # to run each command with cmd.retcode
+        "state_check_shells": int,
         # The number of seconds a minion should wait before retry when attempting authentication
         "acceptance_wait_time": float,
         # The number of seconds a minion should wait before giving up during authentication
@@ -420,6 +432,9 @@ VALID_OPTS = immutabletypes.freeze(
         "recon_randomize": bool,
         "return_retry_timer": int,
         "return_retry_timer_max": int,
+        # The number of seconds between the heartbeat events fired by the minion on the master
+        # while a job runs. 0 disables the heartbeats.
+        "job_heartbeat_interval": int,
         # Specify one or more returners in which all events will be sent to. Requires that the returners
         # in question have an event_return(event) function!
         "event_return": (list, str),
@@ -430,6 +445,16 @@ VALID_OPTS = immutabletypes.freeze(
         # The goal here is to ensure that if the bus is not busy enough to reach a total
         # `event_return_queue` events won't get stale.
         "event_return_queue_max_seconds": int,
+        # Flush the events to each event returner from its own thread, with its own bounded queue
+        "event_return_async": bool,
+        # The maximum number of events queued for each event returner when event_return_async is set
+        "event_return_async_queue_size": int,
+        # The number of times to retry a failed flush of events to an event returner
+        "event_return_retries": int,
+        # The number of seconds to wait before the first retry, doubled for each next retry
+        "event_return_retry_backoff": float,
+        # What to do with the events which cannot be queued or returned: drop or spill
+        "event_return_overflow": str,
         # Only forward events to an event returner if it matches one of the tags in this list
         "event_return_whitelist": list,
         # Events matching a tag in this list should never be sent to an event returner.
@@ -588,6 +613,12 @@ VALID_OPTS = immutabletypes.freeze(
         "pillar_cache_ttl": int,
         # Pillar cache backend. Defaults to `disk` which stores caches in the master cache
         "pillar_cache_backend": str,
+        # Cache the compiled pillars until one of the inputs of their compilation changes
+        "pillar_compile_cache": bool,
+        # Versions of the external pillars whose data can be kept in the compiled pillar cache
+        "pillar_compile_cache_ext_pillar_versions": dict,
+        # Share the merged pillar top files across the pillar compilations of the minions
+        "pillar_top_cache": bool,
         # Cache the GPG data to avoid having to pass through the gpg renderer
         "gpg_cache": bool,
         # GPG data cache TTL, in seconds. Has no effect unless `gpg_cache` is True
@@ -673,13 +704,41 @@ VALID_OPTS = immutabletypes.freeze(
         "master_job_cache": str,
         # Specify whether the master should store end times for jobs as returns come in
         "job_cache_store_endtime": bool,
+        # Keep an index of the jobs stored by the local_cache returner to list and expire them
+        # without walking the job cache directory
+        "job_cache_index": bool,
+        # The maximum number of minion returns written to the master job cache in one batch by a
+        # background thread of each master worker. 0 writes each return before replying to the minion
+        "return_batch_size": int,
+        # The maximum number of seconds a minion return waits for its batch to fill up
+        "return_batch_interval": float,
+        # The maximum number of minion returns waiting to be written by each master worker
+        "return_batch_queue_size": int,
+        # Record the queued minion returns in a journal synced to disk before replying to the minion,
+        # to write them after the master is killed
+        "return_batch_journal": bool,
+        # The maximum number of old jobs removed from the indexed job cache per cleanup run
+        "job_cache_clean_limit": int,
         # The minion data cache is a cache of information about the minions stored on the master.
         # This information is primarily the pillar and grains data. The data is cached in the master
         # cachedir under the name of the minion and used to predetermine what minions are expected to
         # reply from executions.
         "minion_data_cache": bool,
+        # Keep an in-memory inverted index of the grains and pillar in the minion data cache and
+        # use it to resolve grain and pillar targets
+        "minion_data_index": bool,
+        # The minimum number of seconds between two synchronizations of the minion data index with
+        # the minion data cache
+        "minion_data_index_refresh": int,
+        # The number of seconds the master processes keep the minions matched by a target in memory
+        "target_cache_ttl": int,
         # The number of seconds between AES key rotations on the master
         "publish_session": int,
+        # The number of seconds over which the minions spread their authentication after an AES
+        # key rotation
+        "rotate_aes_key_spread": int,
+        # Send the next AES key to the minions ahead of the rotations of the publish_session
+        "rotate_aes_key_predistribute": bool,
         # Defines a salt reactor. See http://docs.saltstack.com/en/latest/topics/reactor/
         "reactor": list,
         # The TTL for the cache of the reactor configuration
@@ -815,6 +874,9 @@ VALID_OPTS = immutabletypes.freeze(
         # The maximum number of minion connections allowed by the master. Can have performance
         # implications in large setups.
         "max_minions": int,
+        # The maximum number of master workers authenticating minions at the same time, the
+        # other auth requests being told to retry. 0 means no limit.
+        "auth_workers": int,
         "username": (type(None), str),
         "password": (type(None), str),
         # Use zmq.SUSCRIBE to limit listening sockets to only process messages bound for them
@@ -1006,6 +1068,9 @@ DEFAULT_MINION_OPTS = immutabletypes.freeze(
         "pillar_cache": False,
         "pillar_cache_ttl": 3600,
         "pillar_cache_backend": "disk",
+        "pillar_compile_cache": False,
+        "pillar_compile_cache_ext_pillar_versions": {},
+        "pillar_top_cache": False,
         "gpg_cache": False,
         "gpg_cache_ttl": 86400,
         "gpg_cache_backend": "disk",
@@ -1136,6 +1201,7 @@ DEFAULT_MINION_OPTS = immutabletypes.freeze(
         "test": False,
         "ext_job_cache": "",
         "cython_enable": False,
+        "loader_index": False,
         "enable_fqdns_grains": _DFLT_FQDNS_GRAINS,
         "enable_gpu_grains": True,
         "enable_zip_modules": False,
@@ -1145,6 +1211,10 @@ DEFAULT_MINION_OPTS = immutabletypes.freeze(
         "state_auto_order": True,
         "state_events": False,
         "state_aggregate": False,
+        "state_concurrency": 0,
+        "state_concurrency_exclude": ["pkg", "pkgrepo", "pip", "ports"],
+        "state_compile_cache": False,
+        "state_check_shells": 0,
         "snapper_states": False,
         "snapper_states_config": "root",
         "acceptance_wait_time": 10,
@@ -1165,6 +1235,7 @@ DEFAULT_MINION_OPTS = immutabletypes.freeze(
         "recon_randomize": True,
         "return_retry_timer": 5,
         "return_retry_timer_max": 10,
+        "job_heartbeat_interval": 0,
         "random_reauth_delay": 10,
         "winrepo_source_dir": "salt://win/repo-ng/",
         "winrepo_dir": os.path.join(salt.syspaths.BASE_FILE_ROOTS_DIR, "win", "repo"),
@@ -1368,6 +1439,9 @@ DEFAULT_MASTER_OPTS = immutabletypes.freeze(
         "pillar_cache": False,
         "pillar_cache_ttl": 3600,
         "pillar_cache_backend": "disk",
+        "pillar_compile_cache": False,
+        "pillar_compile_cache_ext_pillar_versions": {},
+        "pillar_top_cache": False,
         "gpg_cache": False,
         "gpg_cache_ttl": 86400,
         "gpg_cache_backend": "disk",
@@ -1424,7 +1498,16 @@ DEFAULT_MASTER_OPTS = immutabletypes.freeze(
         "ext_job_cache": "",
         "master_job_cache": "local_cache",
         "job_cache_store_endtime": False,
+        "job_cache_index": False,
+        "job_cache_clean_limit": 10000,
+        "return_batch_size": 0,
+        "return_batch_interval": 0.1,
+        "return_batch_queue_size": 10000,
+        "return_batch_journal": False,
         "minion_data_cache": True,
+        "minion_data_index": False,
+        "minion_data_index_refresh": 0,
+        "target_cache_ttl": 0,
         "enforce_mine_cache": False,
         "ipc_mode": _DFLT_IPC_MODE,
         "ipc_write_buffer": _DFLT_IPC_WBUFFER,
@@ -1456,6 +1539,8 @@ DEFAULT_MASTER_OPTS = immutabletypes.freeze(
         "log_rotate_backup_count": 0,
         "pidfile": os.path.join(salt.syspaths.PIDFILE_DIR, "salt-master.pid"),
         "publish_session": 86400,
+        "rotate_aes_key_spread": 0,
+        "rotate_aes_key_predistribute": False,
         "range_server": "range:80",
         "reactor": [],
         "reactor_refresh_interval": 60,
@@ -1464,6 +1549,11 @@ DEFAULT_MASTER_OPTS = immutabletypes.freeze(
         "engines": [],
         "event_return": "",
         "event_return_queue": 0,
+        "event_return_async": False,
+        "event_return_async_queue_size": 10000,
+        "event_return_retries": 3,
+        "event_return_retry_backoff": 1.0,
+        "event_return_overflow": "drop",
         "event_return_whitelist": [],
         "event_return_blacklist": [],
         "event_match_type": "startswith",
@@ -1482,6 +1572,7 @@ DEFAULT_MASTER_OPTS = immutabletypes.freeze(
         "ssh_list_nodegroups": {},
         "ssh_use_home_key": False,
         "cython_enable": False,
+        "loader_index": False,
         "enable_gpu_grains": False,
         # XXX: Remove 'key_logfile' support in 2014.1.0
         "key_logfile": os.path.join(salt.syspaths.LOGS_DIR, "key"),
@@ -1540,6 +1631,7 @@ DEFAULT_MASTER_OPTS = immutabletypes.freeze(
         "queue_dirs": [],
         "cli_summary": False,
         "max_minions": 0,
+        "auth_workers": 0,
         "master_sign_key_name": "master_sign",
         "master_sign_pubkey": False,
         "master_pubkey_signature": "master_pubkey_signature",
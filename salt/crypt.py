@@ -213,15 +213,21 @@ def get_rsa_pub_key(path):
     Read a public key off the disk.
     """
     log.debug("salt.crypt.get_rsa_pub_key: Loading public key")
+    with salt.utils.files.fopen(path, "rb" if HAS_M2 else "r") as f:
+        return load_rsa_pub_key(f.read())
+
+
+def load_rsa_pub_key(data):
+    """
+    Load a public key from its PEM encoded string.
+
+    .. versionadded:: 3003
+    """
     if HAS_M2:
-        with salt.utils.files.fopen(path, "rb") as f:
-            data = f.read().replace(b"RSA ", b"")
+        data = salt.utils.stringutils.to_bytes(data).replace(b"RSA ", b"")
         bio = BIO.MemoryBuffer(data)
-        key = RSA.load_pub_key_bio(bio)
-    else:
-        with salt.utils.files.fopen(path) as f:
-            key = RSA.importKey(f.read())
-    return key
+        return RSA.load_pub_key_bio(bio)
+    return RSA.importKey(data)
 
 
 def sign_message(privkey_path, message, passphrase=None):
@@ -230,6 +236,13 @@ def sign_message(privkey_path, message, passphrase=None):
     """
     key = get_rsa_key(privkey_path, passphrase)
     log.debug("salt.crypt.sign_message: Signing message.")
+    return sign_message_with_key(key, message)
+
+
+def sign_message_with_key(key, message):
+    """
+    Sign a message with an already loaded private key. Returns the signature.
+    """
     if HAS_M2:
         md = EVP.MessageDigest("sha1")
         md.update(salt.utils.stringutils.to_bytes(message))
@@ -337,6 +350,15 @@ def pwdata_decrypt(rsa_key, pwdata):
     return salt.utils.stringutils.to_unicode(password)
 
 
+def _busy_wait_time(acceptance_wait_time):
+    """
+    Return the number of seconds to wait before signing in again when the
+    master is busy, with a jitter spreading the retries of the minions it
+    turned away at the same time
+    """
+    return acceptance_wait_time + random.uniform(0, acceptance_wait_time / 2.0)
+
+
 class MasterKeys(dict):
     """
     The Master Keys class is used to manage the RSA public key pair used for
@@ -614,6 +636,67 @@ class AsyncAuth:
 
         return future
 
+    def rotate_delay(self):
+        """
+        Return the delay before this minion authenticates again after the
+        master rotated its AES key. The delay is derived from the minion id
+        within the ``rotate_aes_key_spread`` window sent by the master, so
+        that the minions spread their sign ins over the window.
+
+        .. versionadded:: 3003
+        """
+        spread = getattr(self, "_creds", None) and self._creds.get("rotate_spread")
+        if not spread:
+            return 0
+        digest = hashlib.sha256(salt.utils.stringutils.to_bytes(self.opts["id"]))
+        slots = int(spread * 1000)
+        return int(digest.hexdigest()[:8], 16) % slots / 1000.0
+
+    def reauthenticate(self, data=None):
+        """
+        Pick up the AES key the master rotated to, once a payload failed to
+        decrypt with the current one. The next key sent ahead by the master
+        is used if it decrypts ``data``, or right away if no data is given,
+        the minion then fetching the key following it in its slot of the
+        rotation spread. Otherwise the minion signs in again once its slot
+        is reached.
+
+        .. versionadded:: 3003
+        """
+        if (
+            hasattr(self, "_authenticate_future")
+            and not self._authenticate_future.done()
+        ):
+            return self._authenticate_future
+        delay = self.rotate_delay()
+        next_aes = getattr(self, "_creds", None) and self._creds.get("next_aes")
+        if next_aes:
+            crypticle = Crypticle(self.opts, next_aes)
+            try:
+                if data is not None:
+                    crypticle.loads(data)
+            except AuthenticationError:
+                pass
+            else:
+                log.debug("Switching to the AES key sent ahead by the master")
+                creds = dict(self._creds, aes=next_aes)
+                del creds["next_aes"]
+                AsyncAuth.creds_map[self.__key(self.opts)] = self._creds = creds
+                self._crypticle = crypticle
+                self.io_loop.call_later(delay, self.authenticate)
+                future = salt.ext.tornado.concurrent.Future()
+                future.set_result(True)
+                return future
+        if not delay:
+            return self.authenticate()
+        log.info(
+            "The master AES key changed, authenticating again in %s seconds", delay
+        )
+        future = salt.ext.tornado.concurrent.Future()
+        self._authenticate_future = future
+        self.io_loop.call_later(delay, self._authenticate)
+        return future
+
     @salt.ext.tornado.gen.coroutine
     def _authenticate(self):
         """
@@ -641,6 +724,15 @@ class AsyncAuth:
                 except SaltClientError as exc:
                     error = exc
                     break
+                if creds == "busy":
+                    # Wait for the master to catch up, whatever the kind of
+                    # minion, salt-call included
+                    wait_time = _busy_wait_time(acceptance_wait_time)
+                    log.info("Waiting %s seconds before retry.", wait_time)
+                    yield salt.ext.tornado.gen.sleep(wait_time)
+                    if acceptance_wait_time < acceptance_wait_time_max:
+                        acceptance_wait_time += acceptance_wait_time
+                    continue
                 if creds == "retry":
                     if self.opts.get("detect_mode") is True:
                         error = SaltClientError("Detect mode is on")
@@ -790,6 +882,15 @@ class AsyncAuth:
                 # has the master returned that its maxed out with minions?
                 elif payload["load"]["ret"] == "full":
                     raise salt.ext.tornado.gen.Return("full")
+                # is the master shedding the auth requests?
+                elif payload["load"]["ret"] == "busy":
+                    log.info(
+                        "The Salt Master is busy authenticating other minions, "
+                        "this salt minion will wait for %s seconds before "
+                        "attempting to re-authenticate",
+                        self.opts["acceptance_wait_time"],
+                    )
+                    raise salt.ext.tornado.gen.Return("busy")
                 else:
                     log.error(
                         "The Salt Master has cached the public key for this "
@@ -834,6 +935,20 @@ class AsyncAuth:
                 ):
                     self._finger_fail(self.opts["master_finger"], m_pub_fn)
         auth["publish_port"] = payload["publish_port"]
+        if payload.get("rotate_spread"):
+            auth["rotate_spread"] = payload["rotate_spread"]
+        if "next_aes" in payload and "next_sig" in payload:
+            try:
+                next_aes = self.decrypt_aes(
+                    {"aes": payload["next_aes"], "sig": payload["next_sig"]},
+                    master_pub=False,
+                )[0]
+            except Exception:  # pylint: disable=broad-except
+                next_aes = ""
+            if next_aes:
+                auth["next_aes"] = next_aes
+            else:
+                log.warning("The next AES key sent by the master did not verify")
         raise salt.ext.tornado.gen.Return(auth)
 
     def get_keys(self):
@@ -882,6 +997,8 @@ class AsyncAuth:
         payload = {}
         payload["cmd"] = "_auth"
         payload["id"] = self.opts["id"]
+        # The master may reply that it is busy, see auth_workers
+        payload["busy_retry"] = True
         if "autosign_grains" in self.opts:
             autosign_grains = {}
             for grain in self.opts["autosign_grains"]:
@@ -1285,6 +1402,15 @@ class SAuth(AsyncAuth):
         ) as channel:
             while True:
                 creds = self.sign_in(channel=channel)
+                if creds == "busy":
+                    # Wait for the master to catch up, whatever the kind of
+                    # minion, salt-call included
+                    wait_time = _busy_wait_time(acceptance_wait_time)
+                    log.info("Waiting %s seconds before retry.", wait_time)
+                    time.sleep(wait_time)
+                    if acceptance_wait_time < acceptance_wait_time_max:
+                        acceptance_wait_time += acceptance_wait_time
+                    continue
                 if creds == "retry":
                     if self.opts.get("caller"):
                         # We have a list of masters, so we should break
@@ -1391,6 +1517,15 @@ class SAuth(AsyncAuth):
                 # has the master returned that its maxed out with minions?
                 elif payload["load"]["ret"] == "full":
                     return "full"
+                # is the master shedding the auth requests?
+                elif payload["load"]["ret"] == "busy":
+                    log.info(
+                        "The Salt Master is busy authenticating other minions, "
+                        "this salt minion will wait for %s seconds before "
+                        "attempting to re-authenticate",
+                        self.opts["acceptance_wait_time"],
+                    )
+                    return "busy"
                 else:
                     log.error(
                         "The Salt Master has cached the public key for this "
@@ -594,8 +594,11 @@ class RemoteFuncs(object):
         _res = checker.check_minions(load["tgt"], match_type, greedy=False)
         minions = _res["minions"]
         minion_side_acl = {}  # Cache minion-side ACL
+        cached_mine_data = self.cache.fetch_many(
+            ("minions/{0}".format(minion), "mine") for minion in minions
+        )
         for minion in minions:
-            mine_data = self.cache.fetch("minions/{0}".format(minion), "mine")
+            mine_data = cached_mine_data[("minions/{0}".format(minion), "mine")]
             if not isinstance(mine_data, dict):
                 continue
             for function in functions_allowed:
@@ -760,11 +763,9 @@ class RemoteFuncs(object):
         )
         data = pillar.compile_pillar()
         if self.opts.get("minion_data_cache", False):
-            self.cache.store(
-                "minions/{0}".format(load["id"]),
-                "data",
-                {"grains": load["grains"], "pillar": data},
-            )
+            mdata = {"grains": load["grains"], "pillar": data}
+            self.cache.store("minions/{0}".format(load["id"]), "data", mdata)
+            self.ckminions.update_minion_data_index(load["id"], mdata)
             if self.opts.get("minion_data_cache_events") is True:
                 self.event.fire_event(
                     {"comment": "Minion data cache refresh"},
@@ -47,6 +47,9 @@ from salt.utils.openstack.swift import SaltSwift
 log = logging.getLogger(__name__)
 MAX_FILENAME_LENGTH = 255
 
+# The dicts filled by record_hashes
+_HASH_RECORDS = []
+
 
 def get_file_client(opts, pillar=False):
     """
@@ -61,6 +64,37 @@ def get_file_client(opts, pillar=False):
     )(opts)
 
 
+@contextlib.contextmanager
+def record_hashes(records=None):
+    """
+    Record the fileserver hashes of the ``salt://`` files looked up by the
+    remote file clients of this process, in a dict mapping the ``(path,
+    saltenv)`` tuples to the hash sums. The files which were not found are
+    recorded with an empty hash sum.
+
+    .. versionadded:: 3003
+    """
+    if records is None:
+        records = {}
+    _HASH_RECORDS.append(records)
+    try:
+        yield records
+    finally:
+        _HASH_RECORDS.remove(records)
+
+
+def hash_sum(hash_result):
+    """
+    Return the hash sum of a ``hash_file`` result, or an empty string if the
+    file was not found
+
+    .. versionadded:: 3003
+    """
+    if isinstance(hash_result, dict):
+        return hash_result.get("hsum", "")
+    return ""
+
+
 def decode_dict_keys_to_str(src):
     """
     Convert top level keys from bytes to strings if possible.
@@ -1375,7 +1409,11 @@ class RemoteClient(Client):
         master file server prepend the path with salt://<file on server>
         otherwise, prepend the file with / for a local file.
         """
-        return self.__hash_and_stat_file(path, saltenv)
+        ret = self.__hash_and_stat_file(path, saltenv)
+        if _HASH_RECORDS and path.startswith("salt://"):
+            for records in _HASH_RECORDS:
+                records[(path, saltenv)] = hash_sum(ret)
+        return ret
 
     def hash_and_stat_file(self, path, saltenv="base"):
         """
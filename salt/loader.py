@@ -22,18 +22,23 @@ from zipimport import zipimporter
 import salt.config
 import salt.defaults.events
 import salt.defaults.exitcodes
+import salt.payload
 import salt.syspaths
 import salt.utils.args
+import salt.utils.atomicfile
 import salt.utils.context
 import salt.utils.data
 import salt.utils.dictupdate
 import salt.utils.event
 import salt.utils.files
+import salt.utils.hashutils
+import salt.utils.json
 import salt.utils.lazy
 import salt.utils.odict
 import salt.utils.platform
 import salt.utils.stringutils
 import salt.utils.versions
+import salt.version
 from salt.exceptions import LoaderError
 from salt.ext import six
 from salt.ext.six.moves import reload_module
@@ -98,6 +103,14 @@ LIBCLOUD_FUNCS_NOT_SUPPORTED = (
     "proxmox.avail_sizes",
 )
 
+# Bumped when the format of the loader index files changes
+LOADER_INDEX_VERSION = 1
+
+# The file mapping is not stored in the loader index while a module directory
+# was modified less than this many seconds ago, as files added within the
+# same modification time would go unnoticed
+LOADER_INDEX_MTIME_GRACE = 2
+
 # Will be set to pyximport module at runtime if cython is enabled in config.
 pyximport = None
 
@@ -1175,6 +1188,24 @@ def _cleanup_module_namespace(loaded_base_name, delete_from_sys_modules=False):
                 del mod
 
 
+def _index_digest(data):
+    return salt.utils.hashutils.sha256_digest(
+        salt.utils.json.dumps(data, sort_keys=True, default=lambda obj: repr(type(obj)))
+    )
+
+
+def _stat_key(path):
+    """
+    Return the modification time and size of ``path``, or None if it does not
+    exist
+    """
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return [stat.st_mtime_ns, stat.st_size]
+
+
 # TODO: move somewhere else?
 class FilterDictWrapper(MutableMapping):
     """
@@ -1326,6 +1357,12 @@ class LazyLoader(salt.utils.lazy.LazyDict):
             self.suffix_map[suffix] = (suffix, mode, kind)
             self.suffix_order.append(suffix)
 
+        # The loader index persisted in the cachedir, see _read_index
+        self._index = None
+        self._index_dirty = False
+        if self.opts.get("loader_index") and self.opts.get("cachedir"):
+            self._index = self._read_index()
+
         self._lock = threading.RLock()
         with self._lock:
             self._refresh_file_mapping()
@@ -1379,6 +1416,7 @@ class LazyLoader(salt.utils.lazy.LazyDict):
                 # if we got what we wanted, we are done
                 if self._load_module(name) and mod_name in self.loaded_modules:
                     break
+            self._save_index()
         if mod_name in self.loaded_modules:
             return self.loaded_modules[mod_name]
         else:
@@ -1442,6 +1480,21 @@ class LazyLoader(salt.utils.lazy.LazyDict):
         else:
             self.suffix_map[""] = ("", "", imp.PKG_DIRECTORY)
 
+        if self._index is not None:
+            mapping_key = [
+                list(self.module_dirs),
+                sorted(self.disabled),
+                self.opts.get("optimization_order"),
+                self.suffix_order,
+            ]
+            if self._load_indexed_file_mapping(mapping_key):
+                return
+            # The modification time of the directories listed, taken before
+            # listing them
+            dir_stamps = []
+        else:
+            dir_stamps = None
+
         # create mapping of filename (without suffix) to (path, suffix)
         # The files are added in order of priority, so order *must* be retained.
         self.file_mapping = salt.utils.odict.OrderedDict()
@@ -1459,6 +1512,10 @@ class LazyLoader(salt.utils.lazy.LazyDict):
             return ""
 
         for mod_dir in self.module_dirs:
+            if dir_stamps is not None:
+                dir_stamps.append([mod_dir, _stat_key(mod_dir)])
+                pycache = os.path.join(mod_dir, "__pycache__")
+                dir_stamps.append([pycache, _stat_key(pycache)])
             try:
                 # Make sure we have a sorted listdir in order to have
                 # expectable override results
@@ -1515,6 +1572,8 @@ class LazyLoader(salt.utils.lazy.LazyDict):
                     fpath = os.path.join(mod_dir, filename)
                     # if its a directory, lets allow us to load that
                     if ext == "":
+                        if dir_stamps is not None:
+                            dir_stamps.append([fpath, _stat_key(fpath)])
                         # is there something __init__?
                         subfiles = os.listdir(fpath)
                         for suffix in self.suffix_order:
@@ -1563,10 +1622,138 @@ class LazyLoader(salt.utils.lazy.LazyDict):
 
                 except OSError:
                     continue
+        if dir_stamps is not None:
+            self._store_file_mapping(mapping_key, dir_stamps)
+        self._add_static_modules()
+
+    def _add_static_modules(self):
         for smod in self.static_modules:
             f_noext = smod.split(".")[-1]
             self.file_mapping[f_noext] = (smod, ".o", 0)
 
+    def _index_path(self):
+        key = _index_digest([self.module_dirs, self.virtual_enable, self.virtual_funcs])
+        return os.path.join(
+            self.opts["cachedir"], "loader", "{}_{}.p".format(self.tag, key[:16])
+        )
+
+    def _index_env(self):
+        """
+        Return a digest of what loading the modules depends on besides their
+        files: the versions of Salt and Python, the grains and options given
+        to the modules, and the directories searched for Python packages and
+        executables, whose modification time changes when something is
+        installed in them.
+        """
+        paths = list(sys.path) + os.environ.get("PATH", "").split(os.pathsep)
+        return _index_digest(
+            {
+                "salt": salt.version.__version__,
+                "python": [sys.executable, sys.version],
+                "grains": dict(self.pack.get("__grains__") or {}),
+                # Leave out what is not configuration, such as the function
+                # and arguments of salt-call, and the data already included
+                "opts": {
+                    key: val
+                    for key, val in self.opts.items()
+                    if key in salt.config.VALID_OPTS and key not in ("grains", "pillar")
+                },
+                "paths": [[path, _stat_key(path)] for path in paths],
+            }
+        )
+
+    def _read_index(self):
+        """
+        Return the loader index of the module directories, which holds the
+        file mapping and the outcome of loading each module. The outcomes are
+        dropped when the environment they were recorded in changed.
+
+        .. versionadded:: 3003
+        """
+        try:
+            env = self._index_env()
+        except Exception as exc:  # pylint: disable=broad-except
+            log.debug("Not using the loader index of the %s modules: %s", self.tag, exc)
+            return None
+        index = None
+        path = self._index_path()
+        try:
+            with salt.utils.files.fopen(path, "rb") as fp_:
+                index = salt.payload.Serial(self.opts).load(fp_)
+        except OSError:
+            pass
+        except Exception as exc:  # pylint: disable=broad-except
+            log.debug("Unable to read the loader index %s: %s", path, exc)
+        if not isinstance(index, dict) or index.get("version") != LOADER_INDEX_VERSION:
+            index = {"version": LOADER_INDEX_VERSION, "mapping": None, "modules": {}}
+        if index.get("env") != env:
+            index["env"] = env
+            index["modules"] = {}
+        return index
+
+    def _save_index(self):
+        """
+        Write the loader index if it changed
+        """
+        if self._index is None or not self._index_dirty:
+            return
+        self._index_dirty = False
+        path = self._index_path()
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with salt.utils.atomicfile.atomic_open(path, "wb") as fp_:
+                salt.payload.Serial(self.opts).dump(self._index, fp_)
+        except OSError as exc:
+            log.debug("Unable to write the loader index %s: %s", path, exc)
+
+    def _load_indexed_file_mapping(self, mapping_key):
+        """
+        Use the file mapping of the loader index if none of the directories
+        listed to build it was modified since
+        """
+        mapping = self._index["mapping"]
+        if not mapping or mapping["key"] != mapping_key:
+            return False
+        for path, stamp in mapping["dirs"]:
+            if _stat_key(path) != stamp:
+                return False
+        self.file_mapping = salt.utils.odict.OrderedDict(
+            (entry[0], tuple(entry[1:])) for entry in mapping["files"]
+        )
+        self._add_static_modules()
+        return True
+
+    def _store_file_mapping(self, mapping_key, dir_stamps):
+        horizon = (time.time() - LOADER_INDEX_MTIME_GRACE) * 1e9
+        if any(stamp and stamp[0] > horizon for _, stamp in dir_stamps):
+            return
+        self._index["mapping"] = {
+            "key": mapping_key,
+            "dirs": dir_stamps,
+            "files": [
+                [name] + list(entry) for name, entry in self.file_mapping.items()
+            ],
+        }
+        self._index_dirty = True
+        self._save_index()
+
+    def _indexed_load(self, name):
+        """
+        Return the outcome of loading the module file ``name`` recorded in the
+        loader index, if the file did not change since, as a list of whether
+        the module was loaded, the names it was loaded or found missing as and
+        the reason it was not loaded.
+        """
+        if self._index is None:
+            return None
+        record = self._index["modules"].get(name)
+        if record is None:
+            return None
+        fpath = self.file_mapping[name][0]
+        if record[0] != fpath or record[1] != _stat_key(fpath):
+            return None
+        return record[2:]
+
     def clear(self):
         """
         Clear the dict
@@ -1607,8 +1794,17 @@ class LazyLoader(salt.utils.lazy.LazyDict):
 
     def _iter_files(self, mod_name):
         """
-        Iterate over all file_mapping files in order of closeness to mod_name
+        Iterate over all file_mapping files in order of closeness to mod_name,
+        skipping the files the loader index knows are loaded under other names
         """
+        for name in self._iter_all_files(mod_name):
+            if self._index is not None and name not in self.loaded_files:
+                outcome = self._indexed_load(name)
+                if outcome is not None and outcome[0] and mod_name not in outcome[1]:
+                    continue
+            yield name
+
+    def _iter_all_files(self, mod_name):
         # do we have an exact match?
         if mod_name in self.file_mapping:
             yield mod_name
@@ -1669,6 +1865,46 @@ class LazyLoader(salt.utils.lazy.LazyDict):
                     del sys.path_importer_cache[directory]
 
     def _load_module(self, name):
+        outcome = self._indexed_load(name)
+        if outcome is not None and not outcome[0]:
+            # The module already failed to load from the same file in the same
+            # environment, do not import it again
+            self.loaded_files.add(name)
+            for mod_name in outcome[1]:
+                self.missing_modules[mod_name] = outcome[2]
+            return False
+        if self._index is None:
+            return bool(self._import_module(name))
+        missing = set(self.missing_modules)
+        mod_names = self._import_module(name)
+        if mod_names:
+            self._record_load(name, True, mod_names)
+            return True
+        error = self.missing_modules.get(name)
+        self._record_load(
+            name,
+            False,
+            [mod_name for mod_name in self.missing_modules if mod_name not in missing],
+            None if error is None else str(error),
+        )
+        return False
+
+    def _record_load(self, name, loaded, mod_names, error=None):
+        fpath = self.file_mapping[name][0]
+        self._index["modules"][name] = [
+            fpath,
+            _stat_key(fpath),
+            loaded,
+            list(mod_names),
+            error,
+        ]
+        self._index_dirty = True
+
+    def _import_module(self, name):
+        """
+        Import the module file ``name`` and load its functions. Return the
+        names the module was loaded as, or False if it was not loaded.
+        """
         mod = None
         fpath, suffix = self.file_mapping[name][:2]
         # if the fpath has `.cpython-3x` in it, but the running Py version
@@ -1965,7 +2201,7 @@ class LazyLoader(salt.utils.lazy.LazyDict):
 
         for tgt_mod in mod_names:
             self.loaded_modules[tgt_mod] = mod_dict[tgt_mod]
-        return True
+        return mod_names
 
     def _load(self, key):
         """
@@ -2020,6 +2256,7 @@ class LazyLoader(salt.utils.lazy.LazyDict):
                         self._refresh_file_mapping()
                         reloaded = True
                     continue
+            self._save_index()
 
         return ret
 
@@ -2032,6 +2269,7 @@ class LazyLoader(salt.utils.lazy.LazyDict):
                 if name in self.loaded_files or name in self.missing_modules:
                     continue
                 self._load_module(name)
+            self._save_index()
 
             self.loaded = True
 
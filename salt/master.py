@@ -5,7 +5,6 @@ involves preparing the three listeners and the workers needed by the master.
 
 # Import python libs
 
-import collections
 import copy
 import ctypes
 import functools
@@ -50,6 +49,7 @@ import salt.utils.gzip_util
 import salt.utils.jid
 import salt.utils.job
 import salt.utils.master
+import salt.utils.metrics
 import salt.utils.minions
 import salt.utils.platform
 import salt.utils.process
@@ -216,6 +216,9 @@ class Maintenance(salt.utils.process.SignalHandlingProcess):
             )
             os.nice(self.opts["maintenance_niceness"])
 
+        if self.opts["master_stats"]:
+            salt.utils.metrics.clear_worker_stats(self.opts)
+
         self.presence_events = False
         if self.opts.get("presence_events", False):
             tcp_only = True
@@ -250,7 +253,7 @@ class Maintenance(salt.utils.process.SignalHandlingProcess):
         while True:
             now = int(time.time())
             if (now - last) >= self.loop_interval:
-                salt.daemons.masterapi.clean_old_jobs(self.opts)
+                self.handle_clean_old_jobs()
                 salt.daemons.masterapi.clean_expired_tokens(self.opts)
                 salt.daemons.masterapi.clean_pub_auth(self.opts)
             if (now - last_git_pillar_update) >= git_pillar_update_interval:
@@ -258,30 +261,66 @@ class Maintenance(salt.utils.process.SignalHandlingProcess):
                 self.handle_git_pillar()
             self.handle_schedule()
             self.handle_key_cache()
+            self.handle_master_stats()
             self.handle_presence(old_present)
             self.handle_key_rotate(now)
             salt.utils.verify.check_max_open_files(self.opts)
             last = now
             time.sleep(self.loop_interval)
 
+    def handle_clean_old_jobs(self):
+        """
+        Clean out the old jobs from the job cache and, if master stats are
+        enabled, fire an event reporting how long it took
+        """
+        start = time.time()
+        salt.daemons.masterapi.clean_old_jobs(self.opts)
+        if self.opts["master_stats"]:
+            duration = time.time() - start
+            self.event.fire_event(
+                {
+                    "time": duration,
+                    "worker": "Maintenance",
+                    "stats": {"clean_old_jobs": {"mean": duration, "runs": 1}},
+                },
+                tagify("Maintenance", "stats"),
+            )
+
+    def handle_master_stats(self):
+        """
+        Aggregate the request statistics of all the master workers, write them
+        in the Prometheus text format to ``<cachedir>/master_stats.prom`` and
+        fire them on the event bus
+        """
+        if not self.opts["master_stats"]:
+            return
+        stats = salt.utils.metrics.load_worker_stats(self.opts)
+        try:
+            with salt.utils.atomicfile.atomic_open(
+                os.path.join(self.opts["cachedir"], "master_stats.prom"), "w"
+            ) as fp_:
+                fp_.write(stats.to_prometheus())
+        except OSError as exc:
+            log.error("Unable to write the master stats: %s", exc)
+        self.event.fire_event(
+            {"worker": "master", "stats": stats.to_dict()}, tagify("master", "stats")
+        )
+
     def handle_key_cache(self):
         """
         Evaluate accepted keys and create a msgpack file
         which contains a list
         """
         if self.opts["key_cache"] == "sched":
-            keys = []
             # TODO DRY from CKMinions
             if self.opts["transport"] in ("zeromq", "tcp"):
                 acc = "minions"
             else:
                 acc = "accepted"
 
-            for fn_ in os.listdir(os.path.join(self.opts["pki_dir"], acc)):
-                if not fn_.startswith(".") and os.path.isfile(
-                    os.path.join(self.opts["pki_dir"], acc, fn_)
-                ):
-                    keys.append(fn_)
+            keys = salt.utils.minions.accepted_minions(
+                os.path.join(self.opts["pki_dir"], acc)
+            )
             log.debug("Writing master key cache")
             # Write a temporary file securely
             with salt.utils.atomicfile.atomic_open(
@@ -294,17 +333,20 @@ class Maintenance(salt.utils.process.SignalHandlingProcess):
         Rotate the AES key rotation
         """
         to_rotate = False
+        # The keys sent ahead to the minions are not used when rotating
+        # because a minion key was removed
+        revoke = False
         dfn = os.path.join(self.opts["cachedir"], ".dfn")
         try:
             stats = os.stat(dfn)
             # Basic Windows permissions don't distinguish between
             # user/group/all. Check for read-only state instead.
             if salt.utils.platform.is_windows() and not os.access(dfn, os.W_OK):
-                to_rotate = True
+                to_rotate = revoke = True
                 # Cannot delete read-only files on Windows.
                 os.chmod(dfn, stat.S_IRUSR | stat.S_IWUSR)
             elif stats.st_mode == 0o100400:
-                to_rotate = True
+                to_rotate = revoke = True
             else:
                 log.error("Found dropfile with incorrect permissions, ignoring...")
             os.remove(dfn)
@@ -320,9 +362,17 @@ class Maintenance(salt.utils.process.SignalHandlingProcess):
             for secret_key, secret_map in SMaster.secrets.items():
                 # should be unnecessary-- since no one else should be modifying
                 with secret_map["secret"].get_lock():
-                    secret_map["secret"].value = salt.utils.stringutils.to_bytes(
-                        secret_map["reload"]()
-                    )
+                    if "next" in secret_map and not revoke:
+                        # Switch to the key the minions already received with
+                        # their auth reply
+                        secret = secret_map["next"].value
+                    else:
+                        secret = salt.utils.stringutils.to_bytes(secret_map["reload"]())
+                    secret_map["secret"].value = secret
+                    if "next" in secret_map:
+                        secret_map["next"].value = salt.utils.stringutils.to_bytes(
+                            secret_map["reload"]()
+                        )
                 self.event.fire_event(
                     {"rotate_{}_key".format(secret_key): True}, tag="key"
                 )
@@ -718,6 +768,13 @@ class Master(SMaster):
                 ),
                 "reload": salt.crypt.Crypticle.generate_key_string,
             }
+            if self.opts.get("rotate_aes_key_predistribute"):
+                SMaster.secrets["aes"]["next"] = multiprocessing.Array(
+                    ctypes.c_char,
+                    salt.utils.stringutils.to_bytes(
+                        salt.crypt.Crypticle.generate_key_string()
+                    ),
+                )
             log.info("Creating master process manager")
             # Since there are children having their own ProcessManager we should wait for kill more time.
             self.process_manager = salt.utils.process.ProcessManager(wait_for_kill=5)
@@ -1050,7 +1107,8 @@ class MWorker(salt.utils.process.SignalHandlingProcess):
         self.mkey = mkey
         self.key = key
         self.k_mtime = 0
-        self.stats = collections.defaultdict(lambda: {"mean": 0, "runs": 0})
+        self.stats = salt.utils.metrics.RequestStats()
+        self.total_stats = salt.utils.metrics.RequestStats()
         self.stat_clock = time.time()
 
     # We need __setstate__ and __getstate__ to also pickle 'SMaster.secrets'.
@@ -1084,6 +1142,9 @@ class MWorker(salt.utils.process.SignalHandlingProcess):
     def _handle_signals(self, signum, sigframe):
         for channel in getattr(self, "req_channels", ()):
             channel.close()
+        aes_funcs = getattr(self, "aes_funcs", None)
+        if aes_funcs is not None:
+            aes_funcs.destroy()
         super()._handle_signals(signum, sigframe)
 
     def __bind(self):
@@ -1128,36 +1189,43 @@ class MWorker(salt.utils.process.SignalHandlingProcess):
         """
         key = payload["enc"]
         load = payload["load"]
-        ret = {"aes": self._handle_aes, "clear": self._handle_clear}[key](load)
+        ret = {"aes": self._handle_aes, "clear": self._handle_clear}[key](
+            load, size=payload.get("size")
+        )
         raise salt.ext.tornado.gen.Return(ret)
 
-    def _post_stats(self, start, cmd):
+    def _post_stats(self, start, cmd, error=False, size=None):
         """
-        Calculate the master stats and fire events with stat info
+        Calculate the master stats and fire events with stat info, ``size``
+        being the size in bytes of the request if known
         """
         end = time.time()
-        duration = end - start
-        self.stats[cmd]["mean"] = (
-            self.stats[cmd]["mean"] * (self.stats[cmd]["runs"] - 1) + duration
-        ) / self.stats[cmd]["runs"]
+        self.stats.observe(cmd, end - start, error=error, size=size)
         if end - self.stat_clock > self.opts["master_stats_event_iter"]:
+            # Add the stages timed while handling the requests, such as the
+            # encoding of the publications
+            self.stats.merge(salt.utils.metrics.pop_stage_stats().to_dict())
+            stats = self.stats.to_dict()
             # Fire the event with the stats and wipe the tracker
             self.aes_funcs.event.fire_event(
-                {
-                    "time": end - self.stat_clock,
-                    "worker": self.name,
-                    "stats": self.stats,
-                },
+                {"time": end - self.stat_clock, "worker": self.name, "stats": stats},
                 tagify(self.name, "stats"),
             )
-            self.stats = collections.defaultdict(lambda: {"mean": 0, "runs": 0})
+            # Hand the stats since the worker started over to the maintenance
+            # process which aggregates them
+            self.total_stats.merge(stats)
+            salt.utils.metrics.store_worker_stats(
+                self.opts, self.name, self.total_stats
+            )
+            self.stats = salt.utils.metrics.RequestStats()
             self.stat_clock = end
 
-    def _handle_clear(self, load):
+    def _handle_clear(self, load, size=None):
         """
         Process a cleartext command
 
         :param dict load: Cleartext payload
+        :param int size: The size in bytes of the request, for the master stats
         :return: The result of passing the load to a function in ClearFuncs corresponding to
                  the command specified in the load's 'cmd' key.
         """
@@ -1166,19 +1234,23 @@ class MWorker(salt.utils.process.SignalHandlingProcess):
         method = self.clear_funcs.get_method(cmd)
         if not method:
             return {}, {"fun": "send_clear"}
-        if self.opts["master_stats"]:
-            start = time.time()
-            self.stats[cmd]["runs"] += 1
-        ret = method(load), {"fun": "send_clear"}
-        if self.opts["master_stats"]:
-            self._post_stats(start, cmd)
+        if not self.opts["master_stats"]:
+            return method(load), {"fun": "send_clear"}
+        start = time.time()
+        try:
+            ret = method(load), {"fun": "send_clear"}
+        except Exception:  # pylint: disable=broad-except
+            self._post_stats(start, cmd, error=True, size=size)
+            raise
+        self._post_stats(start, cmd, size=size)
         return ret
 
-    def _handle_aes(self, data):
+    def _handle_aes(self, data, size=None):
         """
         Process a command sent via an AES key
 
         :param str load: Encrypted payload
+        :param int size: The size in bytes of the request, for the master stats
         :return: The result of passing the load to a function in AESFuncs corresponding to
                  the command specified in the load's 'cmd' key.
         """
@@ -1192,7 +1264,6 @@ class MWorker(salt.utils.process.SignalHandlingProcess):
             return {}, {"fun": "send"}
         if self.opts["master_stats"]:
             start = time.time()
-            self.stats[cmd]["runs"] += 1
 
         def run_func(data):
             return self.aes_funcs.run_func(data["cmd"], data)
@@ -1203,7 +1274,8 @@ class MWorker(salt.utils.process.SignalHandlingProcess):
             ret = run_func(data)
 
         if self.opts["master_stats"]:
-            self._post_stats(start, cmd)
+            # AESFuncs.run_func returns an empty string when the function raised
+            self._post_stats(start, cmd, error=ret[0] == "", size=size)
         return ret
 
     def run(self):
@@ -1326,6 +1398,19 @@ class AESFuncs(TransportMethods):
         )
         self.__setup_fileserver()
         self.masterapi = salt.daemons.masterapi.RemoteFuncs(opts)
+        # Write the minion returns to the job cache in batches
+        self.return_batcher = None
+        if self.opts.get("return_batch_size", 0) > 0:
+            self.return_batcher = salt.utils.job.ReturnBatcher(
+                self.opts, mminion=self.mminion
+            )
+
+    def destroy(self):
+        """
+        Write the returns still queued to the job cache
+        """
+        if self.return_batcher is not None:
+            self.return_batcher.stop()
 
     def __setup_fileserver(self):
         """
@@ -1707,11 +1792,9 @@ class AESFuncs(TransportMethods):
         data = pillar.compile_pillar()
         self.fs_.update_opts()
         if self.opts.get("minion_data_cache", False):
-            self.masterapi.cache.store(
-                "minions/{}".format(load["id"]),
-                "data",
-                {"grains": load["grains"], "pillar": data},
-            )
+            mdata = {"grains": load["grains"], "pillar": data}
+            self.masterapi.cache.store("minions/{}".format(load["id"]), "data", mdata)
+            self.ckminions.update_minion_data_index(load["id"], mdata)
             if self.opts.get("minion_data_cache_events") is True:
                 self.event.fire_event(
                     {"Minion data cache refresh": load["id"]},
@@ -1805,7 +1888,11 @@ class AESFuncs(TransportMethods):
 
         try:
             salt.utils.job.store_job(
-                self.opts, load, event=self.event, mminion=self.mminion
+                self.opts,
+                load,
+                event=self.event,
+                mminion=self.mminion,
+                batcher=self.return_batcher,
             )
         except salt.exceptions.SaltCacheError:
             log.error("Could not store job information for load: %s", load)
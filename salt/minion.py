@@ -1784,7 +1784,38 @@ class Minion(MinionBase):
             functools.partial(RequestContext, {"data": data, "opts": opts})
         ):
             with salt.ext.tornado.stack_context.StackContext(minion_instance.ctx):
-                run_func(minion_instance, opts, data)
+                with minion_instance._job_heartbeat(opts, data):
+                    run_func(minion_instance, opts, data)
+
+    @contextlib.contextmanager
+    def _job_heartbeat(self, opts, data):
+        """
+        Fire a heartbeat event for the job on the master every
+        ``job_heartbeat_interval`` seconds while it runs, for the clients
+        waiting for its return to know that it is still running without
+        publishing ``saltutil.find_job``
+        """
+        interval = opts.get("job_heartbeat_interval")
+        if not interval:
+            yield
+            return
+        stop = threading.Event()
+        tag = tagify([data["jid"], "heartbeat", opts["id"]], "job")
+        load = {"id": opts["id"], "jid": data["jid"], "heartbeat": interval}
+
+        def beat():
+            while not stop.wait(interval):
+                self._fire_master(load, tag, timeout=interval)
+
+        thread = threading.Thread(
+            target=beat, name="JobHeartbeat-{}".format(data["jid"])
+        )
+        thread.daemon = True
+        thread.start()
+        try:
+            yield
+        finally:
+            stop.set()
 
     def _execute_job_function(
         self, function_name, function_args, executors, opts, data
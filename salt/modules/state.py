@@ -9,11 +9,19 @@ When a highstate is called, the minion automatically caches a copy of the last
 high data. If you then run a highstate with cache=True it will use that cached
 highdata and won't hit the fileserver except for ``salt://`` links in the
 states themselves.
+
+When :conf_minion:`state_compile_cache` is enabled, the minion also caches the
+low chunks compiled from the highstate, along with the hashes of the SLS files
+they were rendered from and digests of the options, grains and pillar. The
+next highstate checks these against the fileserver and, when nothing changed,
+executes the cached chunks without rendering the SLS files again. Pass
+``no_cache=True`` to render the highstate anyway.
 """
 
 # Import python libs
 from __future__ import absolute_import, print_function, unicode_literals
 
+import contextlib
 import logging
 import os
 import shutil
@@ -37,6 +45,7 @@ import salt.utils.jid
 import salt.utils.json
 import salt.utils.msgpack
 import salt.utils.platform
+import salt.utils.profile
 import salt.utils.state
 import salt.utils.stringutils
 import salt.utils.url
@@ -112,6 +121,46 @@ def _set_retcode(ret, highstate=None):
         __context__["retcode"] = salt.defaults.exitcodes.EX_STATE_FAILURE
 
 
+def _profile_dir():
+    return os.path.join(__opts__["cachedir"], "state_profile")
+
+
+@contextlib.contextmanager
+def _profile_state_run(name, kwargs):
+    """
+    Record the profile of the state run when profile=True is passed, and save
+    it in the cachedir
+    """
+    if not kwargs.get("profile"):
+        yield
+        return
+    profile = salt.utils.profile.start_phases(name)
+    try:
+        yield
+    finally:
+        salt.utils.profile.stop_phases(profile)
+        jid = kwargs.get("__pub_jid") or salt.utils.jid.gen_jid(__opts__)
+        report = {
+            "jid": jid,
+            "profile": profile.to_dict(),
+            "checks": profile.slowest(len(profile.details)),
+        }
+        profile_dir = _profile_dir()
+        try:
+            if not os.path.isdir(profile_dir):
+                os.makedirs(profile_dir)
+            path = os.path.join(profile_dir, "{0}.json".format(jid))
+            with salt.utils.files.fopen(path, "w") as fp_:
+                salt.utils.json.dump(report, fp_, default=repr)
+            with salt.utils.files.fopen(
+                os.path.join(profile_dir, "{0}.folded".format(jid)), "w"
+            ) as fp_:
+                fp_.write(profile.folded())
+            log.info("The profile of the state run was saved in %s", path)
+        except (IOError, OSError) as exc:
+            log.error("Unable to save the profile of the state run: %s", exc)
+
+
 def _get_pillar_errors(kwargs, pillar=None):
     """
     Checks all pillars (external and internal) for errors.
@@ -1037,6 +1086,23 @@ def highstate(test=None, queue=False, **kwargs):
 
         .. versionadded:: 2015.8.4
 
+    no_cache : False
+        Render the highstate even if the compiled highstate cached by
+        :conf_minion:`state_compile_cache` is still current.
+
+        .. versionadded:: 3003
+
+    profile : False
+        Record the time spent in each phase of the state run: the compilation
+        of the pillar, the loading of the modules, the rendering of each SLS
+        file and renderer, the compilation of the requisites and the execution
+        of the states with their ``onlyif``, ``unless`` and ``creates``
+        checks. The timing tree is saved in the minion cachedir along with a
+        flame graph input file, see :py:func:`state.show_profile
+        <salt.modules.state.show_profile>`.
+
+        .. versionadded:: 3003
+
     CLI Examples:
 
     .. code-block:: bash
@@ -1049,6 +1115,11 @@ def highstate(test=None, queue=False, **kwargs):
 
         salt '*' state.highstate pillar="{foo: 'Foo!', bar: 'Bar!'}"
     """
+    with _profile_state_run("state.highstate", kwargs):
+        return _highstate(test=test, queue=queue, **kwargs)
+
+
+def _highstate(test=None, queue=False, **kwargs):
     if _disabled(["highstate"]):
         log.debug(
             "Salt highstate run is disabled. To re-enable, run state.enable highstate"
@@ -1127,6 +1198,7 @@ def highstate(test=None, queue=False, **kwargs):
             force=kwargs.get("force", False),
             whitelist=kwargs.get("whitelist"),
             orchestration_jid=orchestration_jid,
+            no_cache=kwargs.get("no_cache", False),
         )
     finally:
         st_.pop_active()
@@ -1248,6 +1320,17 @@ def sls(mods, test=None, exclude=None, queue=False, sync_mods=None, **kwargs):
 
         .. versionadded:: 2017.7.8,2018.3.3,2019.2.0
 
+    profile : False
+        Record the time spent in each phase of the state run: the compilation
+        of the pillar, the loading of the modules, the rendering of each SLS
+        file and renderer, the compilation of the requisites and the execution
+        of the states with their ``onlyif``, ``unless`` and ``creates``
+        checks. The timing tree is saved in the minion cachedir along with a
+        flame graph input file, see :py:func:`state.show_profile
+        <salt.modules.state.show_profile>`.
+
+        .. versionadded:: 3003
+
     CLI Example:
 
     .. code-block:: bash
@@ -1265,6 +1348,13 @@ def sls(mods, test=None, exclude=None, queue=False, sync_mods=None, **kwargs):
         salt '*' state.sls core exclude="[{'id': 'id_to_exclude'}, {'sls': 'sls_to_exclude'}]"
         salt '*' state.sls myslsfile pillar="{foo: 'Foo!', bar: 'Bar!'}"
     """
+    with _profile_state_run("state.sls", kwargs):
+        return _sls(
+            mods, test=test, exclude=exclude, queue=queue, sync_mods=sync_mods, **kwargs
+        )
+
+
+def _sls(mods, test=None, exclude=None, queue=False, sync_mods=None, **kwargs):
     concurrent = kwargs.get("concurrent", False)
     if "env" in kwargs:
         # "env" is not supported; Use "saltenv".
@@ -2198,6 +2288,10 @@ def clear_cache():
     Remember that the state cache is completely disabled by default, this
     execution only applies if cache=True is used in states
 
+    .. versionchanged:: 3003
+        The compiled highstates cached with :conf_minion:`state_compile_cache`
+        are removed as well.
+
     CLI Example:
 
     .. code-block:: bash
@@ -2212,9 +2306,58 @@ def clear_cache():
                 continue
             os.remove(path)
             ret.append(fn_)
+    compiled_dir = os.path.join(__opts__["cachedir"], "highstate_compiled")
+    if os.path.isdir(compiled_dir):
+        shutil.rmtree(compiled_dir)
+        ret.append("highstate_compiled")
     return ret
 
 
+def show_profile(jid=None, top=10):
+    """
+    .. versionadded:: 3003
+
+    Return the profile of a state run applied with ``profile=True``: the tree
+    of the phases of the run, with their total duration in seconds and the
+    number of times they were entered, and the ``top`` slowest ``onlyif``,
+    ``unless`` and ``creates`` checks. The profile of the last run is returned
+    unless a ``jid`` is passed.
+
+    The ``flamegraph`` key holds the path of the profile in the folded stacks
+    format, with the own time of the phases in microseconds, which tools such
+    as ``flamegraph.pl`` turn into a flame graph.
+
+    CLI Example:
+
+    .. code-block:: bash
+
+        salt '*' state.apply profile=True
+        salt '*' state.show_profile
+        salt '*' state.show_profile jid=20210101000000000000 top=20
+    """
+    profile_dir = _profile_dir()
+    if jid is None:
+        try:
+            jids = [
+                fn_[:-5] for fn_ in os.listdir(profile_dir) if fn_.endswith(".json")
+            ]
+        except OSError:
+            jids = []
+        if not jids:
+            raise CommandExecutionError("No state run was profiled")
+        # The jids sort in the order they were generated
+        jid = max(jids)
+    path = os.path.join(profile_dir, "{0}.json".format(jid))
+    try:
+        with salt.utils.files.fopen(path, "r") as fp_:
+            report = salt.utils.json.load(fp_)
+    except (IOError, OSError):
+        raise CommandExecutionError("No profile found for job {0}".format(jid))
+    report["checks"] = report["checks"][: int(top)]
+    report["flamegraph"] = os.path.join(profile_dir, "{0}.folded".format(jid))
+    return report
+
+
 def pkg(pkg_path, pkg_sum, hash_type, test=None, **kwargs):
     """
     Execute a packaged state run, the packaged state run will exist in a
@@ -2472,6 +2615,9 @@ def event(
         opts=__opts__,
         listen=True,
     ) as sevent:
+        prefix = salt.utils.event.expr_prefix(tagmatch)
+        if prefix:
+            sevent.subscribe_prefixes([prefix])
 
         while True:
             ret = sevent.get_event(full=True, auto_reconnect=True)
@@ -11,8 +11,10 @@ import inspect
 import logging
 import os
 import sys
+import time
 import traceback
 
+import salt.cache
 import salt.ext.tornado.gen
 import salt.fileclient
 
@@ -25,8 +27,11 @@ import salt.utils.cache
 import salt.utils.crypt
 import salt.utils.data
 import salt.utils.dictupdate
+import salt.utils.hashutils
+import salt.utils.json
+import salt.utils.path
 import salt.utils.url
-from salt.exceptions import SaltClientError
+from salt.exceptions import SaltCacheError, SaltClientError
 
 # Import 3rd-party libs
 from salt.ext import six
@@ -41,6 +46,10 @@ from salt.version import __version__
 
 log = logging.getLogger(__name__)
 
+# The merged top files shared by the Pillar objects of the process when
+# pillar_top_cache is set: {saltenvs: (stamp, top, ignored_pillars)}
+_TOP_CACHE = {}
+
 
 def get_pillar(
     opts,
@@ -87,6 +96,19 @@ def get_pillar(
             pillar_override=pillar_override,
             pillarenv=pillarenv,
         )
+    if opts.get("pillar_compile_cache") and ptype is Pillar:
+        log.debug("get_pillar using the compiled pillar cache")
+        return PillarCompileCache(
+            opts,
+            grains,
+            minion_id,
+            saltenv,
+            ext=ext,
+            functions=funcs,
+            pillar_override=pillar_override,
+            pillarenv=pillarenv,
+            extra_minion_data=extra_minion_data,
+        )
     return ptype(
         opts,
         grains,
@@ -477,6 +499,235 @@ class PillarCache:
             return fresh_pillar
 
 
+# Master options which change the result of compiling a pillar. They are part
+# of the key of the compiled pillar cache since it outlives the master process.
+PILLAR_COMPILE_OPTS = (
+    "decrypt_pillar",
+    "decrypt_pillar_default",
+    "decrypt_pillar_delimiter",
+    "decrypt_pillar_renderers",
+    "default_top",
+    "env_order",
+    "ext_pillar",
+    "ext_pillar_first",
+    "extension_modules",
+    "gpg_keydir",
+    "jinja_env",
+    "jinja_sls_env",
+    "jinja_lstrip_blocks",
+    "jinja_trim_blocks",
+    "nodegroups",
+    "on_demand_ext_pillar",
+    "pillar_includes_override_sls",
+    "pillar_merge_lists",
+    "pillar_opts",
+    "pillar_roots",
+    "pillar_safe_render_error",
+    "pillar_source_merging_strategy",
+    "pillarenv",
+    "pillarenv_from_saltenv",
+    "renderer",
+    "renderer_blacklist",
+    "renderer_whitelist",
+    "state_top",
+    "state_top_saltenv",
+    "top_file_merging_strategy",
+)
+
+# Seconds during which the state of the pillar_roots files is reused instead
+# of walking them again
+PILLAR_ROOTS_STAMP_TTL = 1
+
+# {roots: (time, stamp)}
+_PILLAR_ROOTS_STAMPS = {}
+
+
+def _digest(data):
+    return salt.utils.hashutils.sha256_digest(
+        salt.utils.json.dumps(data, sort_keys=True, default=repr)
+    )
+
+
+def pillar_roots_stamp(pillar_roots):
+    """
+    Return a digest of the path, inode, size and modification time of all the
+    files and directories found in the pillar_roots, which changes whenever a
+    pillar file is added, removed or modified.
+
+    .. versionadded:: 3003
+    """
+    roots = sorted(
+        {root for env_roots in pillar_roots.values() for root in env_roots or ()}
+    )
+    now = time.time()
+    cached = _PILLAR_ROOTS_STAMPS.get(tuple(roots))
+    if cached is not None and now - cached[0] < PILLAR_ROOTS_STAMP_TTL:
+        return cached[1]
+    entries = []
+    for root in roots:
+        for dirpath, dirnames, filenames in salt.utils.path.os_walk(
+            root, followlinks=True
+        ):
+            dirnames.sort()
+            for name in [""] + sorted(filenames):
+                path = os.path.join(dirpath, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    # Removed while walking, the next stamp will differ
+                    continue
+                entries.append((path, stat.st_ino, stat.st_size, stat.st_mtime_ns))
+    stamp = _digest(entries)
+    _PILLAR_ROOTS_STAMPS[tuple(roots)] = (now, stamp)
+    return stamp
+
+
+class PillarCompileCache:
+    """
+    Return the compiled pillar of a minion from the cache if none of the inputs
+    of its compilation changed since it was cached, otherwise compile and cache
+    it.
+
+    .. versionadded:: 3003
+
+    The cached pillar is stored in the ``pillar_compiled/<minion_id>`` bank of
+    the minion data cache, along with the digest of:
+
+    - the minion id, grains, saltenv, pillarenv, pillar override, on-demand
+      ext_pillar and extra minion data sent with the request;
+    - the state of all the files under ``pillar_roots``, see
+      :py:func:`pillar_roots_stamp`;
+    - the master options listed in ``PILLAR_COMPILE_OPTS`` and the Salt
+      version;
+    - the versions set in ``pillar_compile_cache_ext_pillar_versions`` for the
+      configured external pillars.
+
+    The data returned by external pillars cannot be checked for changes. The
+    cache is therefore bypassed unless every configured external pillar is
+    listed in ``pillar_compile_cache_ext_pillar_versions``, bumping its
+    version invalidates the cached pillars.
+    """
+
+    def __init__(
+        self,
+        opts,
+        grains,
+        minion_id,
+        saltenv,
+        ext=None,
+        functions=None,
+        pillar_override=None,
+        pillarenv=None,
+        extra_minion_data=None,
+    ):
+        self.opts = opts
+        self.grains = grains
+        self.minion_id = minion_id
+        self.saltenv = saltenv
+        self.ext = ext
+        self.functions = functions
+        self.pillar_override = pillar_override
+        self.pillarenv = pillarenv
+        self.extra_minion_data = extra_minion_data
+        self.cache = salt.cache.factory(opts)
+
+    def fetch_pillar(self, *args, **kwargs):
+        """
+        Compile the pillar
+        """
+        return Pillar(
+            self.opts,
+            self.grains,
+            self.minion_id,
+            self.saltenv,
+            ext=self.ext,
+            functions=self.functions,
+            pillar_override=self.pillar_override,
+            pillarenv=self.pillarenv,
+            extra_minion_data=self.extra_minion_data,
+        ).compile_pillar(*args, **kwargs)
+
+    def ext_pillar_versions(self):
+        """
+        Return the versions of the configured external pillars, or None if one
+        of them has no version set
+        """
+        versions = self.opts.get("pillar_compile_cache_ext_pillar_versions") or {}
+        ext_pillars = list(self.opts.get("ext_pillar") or [])
+        if self.ext:
+            ext_pillars.append(self.ext)
+        ret = []
+        for ext_pillar in ext_pillars:
+            if not isinstance(ext_pillar, dict):
+                return None
+            for key in ext_pillar:
+                if key not in versions:
+                    return None
+                ret.append([key, versions[key]])
+        return ret
+
+    def cache_key(self, *args, **kwargs):
+        """
+        Return the digest of the inputs of the pillar compilation, or None if
+        the pillar cannot be cached
+        """
+        ext_versions = self.ext_pillar_versions()
+        if ext_versions is None:
+            return None
+        try:
+            return _digest(
+                {
+                    "id": self.minion_id,
+                    "grains": self.grains,
+                    "saltenv": self.saltenv,
+                    "pillarenv": self.pillarenv,
+                    "ext": self.ext,
+                    "pillar_override": self.pillar_override,
+                    "extra_minion_data": self.extra_minion_data,
+                    "ext_pillar_versions": ext_versions,
+                    "roots": pillar_roots_stamp(self.opts.get("pillar_roots") or {}),
+                    "opts": {key: self.opts.get(key) for key in PILLAR_COMPILE_OPTS},
+                    "version": __version__,
+                    "args": [args, kwargs],
+                }
+            )
+        except (TypeError, ValueError) as exc:
+            log.debug("Unable to compute the pillar cache key: %s", exc)
+            return None
+
+    def compile_pillar(self, *args, **kwargs):
+        key = self.cache_key(*args, **kwargs)
+        if key is None:
+            log.debug("Pillar of minion %s cannot be cached", self.minion_id)
+            return self.fetch_pillar(*args, **kwargs)
+        bank = "pillar_compiled/{}".format(self.minion_id)
+        name = self.pillarenv or self.saltenv or "base"
+        try:
+            cached = self.cache.fetch(bank, name)
+        except SaltCacheError as exc:
+            log.warning("Unable to read the pillar cache: %s", exc)
+            cached = None
+        if cached and cached.get("key") == key:
+            log.debug(
+                "Pillar compile cache hit for minion %s and pillarenv %s",
+                self.minion_id,
+                self.pillarenv,
+            )
+            return cached["pillar"]
+        log.debug(
+            "Pillar compile cache miss for minion %s and pillarenv %s",
+            self.minion_id,
+            self.pillarenv,
+        )
+        pillar = self.fetch_pillar(*args, **kwargs)
+        if "_errors" not in pillar:
+            try:
+                self.cache.store(bank, name, {"key": key, "pillar": pillar})
+            except SaltCacheError as exc:
+                log.warning("Unable to write the pillar cache: %s", exc)
+        return pillar
+
+
 class Pillar:
     """
     Read over the pillar top files and render the pillar data
@@ -635,6 +886,29 @@ class Pillar:
             envs.update(list(self.opts["pillar_roots"]))
         return envs
 
+    def _get_top_envs(self):
+        """
+        Return the environments of the top files to render
+        """
+        saltenvs = set()
+        if self.opts["pillarenv"]:
+            # If the specified pillarenv is not present in the available
+            # pillar environments, do not cache the pillar top file.
+            if self.opts["pillarenv"] not in self.opts["pillar_roots"]:
+                log.debug(
+                    "pillarenv '%s' not found in the configured pillar "
+                    "environments (%s)",
+                    self.opts["pillarenv"],
+                    ", ".join(self.opts["pillar_roots"]),
+                )
+            else:
+                saltenvs.add(self.opts["pillarenv"])
+        else:
+            saltenvs = self._get_envs()
+            if self.opts.get("pillar_source_merging_strategy", None) == "none":
+                saltenvs &= {self.saltenv or "base"}
+        return saltenvs
+
     def get_tops(self):
         """
         Gather the top files
@@ -645,25 +919,7 @@ class Pillar:
         errors = []
         # Gather initial top files
         try:
-            saltenvs = set()
-            if self.opts["pillarenv"]:
-                # If the specified pillarenv is not present in the available
-                # pillar environments, do not cache the pillar top file.
-                if self.opts["pillarenv"] not in self.opts["pillar_roots"]:
-                    log.debug(
-                        "pillarenv '%s' not found in the configured pillar "
-                        "environments (%s)",
-                        self.opts["pillarenv"],
-                        ", ".join(self.opts["pillar_roots"]),
-                    )
-                else:
-                    saltenvs.add(self.opts["pillarenv"])
-            else:
-                saltenvs = self._get_envs()
-                if self.opts.get("pillar_source_merging_strategy", None) == "none":
-                    saltenvs &= {self.saltenv or "base"}
-
-            for saltenv in saltenvs:
+            for saltenv in self._get_top_envs():
                 top = self.client.cache_file(self.opts["state_top"], saltenv)
                 if top:
                     tops[saltenv].append(
@@ -781,14 +1037,39 @@ class Pillar:
 
     def get_top(self):
         """
-        Returns the high data derived from the top file
+        Returns the high data derived from the top file.
+
+        When ``pillar_top_cache`` is set, the merged top files are shared by
+        the pillar compilations of all the minions of the process, until a
+        file under ``pillar_roots`` changes.
         """
+        if self.opts.get("pillar_top_cache"):
+            saltenvs = tuple(sorted(self._get_top_envs()))
+            stamp = _digest(
+                {
+                    "state_top": self.opts["state_top"],
+                    "renderer": self.opts["renderer"],
+                    "renderer_blacklist": self.opts["renderer_blacklist"],
+                    "renderer_whitelist": self.opts["renderer_whitelist"],
+                    "roots": pillar_roots_stamp(self.opts["pillar_roots"]),
+                }
+            )
+            cached = _TOP_CACHE.get(saltenvs)
+            if cached is not None and cached[0] == stamp:
+                self.ignored_pillars = copy.deepcopy(cached[2])
+                return copy.deepcopy(cached[1]), []
         tops, errors = self.get_tops()
         try:
             merged_tops = self.merge_tops(tops)
         except TypeError as err:
             merged_tops = OrderedDict()
             errors.append("Error encountered while rendering pillar top file.")
+        if self.opts.get("pillar_top_cache") and not errors:
+            _TOP_CACHE[saltenvs] = (
+                stamp,
+                copy.deepcopy(merged_tops),
+                copy.deepcopy(self.ignored_pillars),
+            )
         return merged_tops, errors
 
     def top_matches(self, top, reload=False):
@@ -1097,8 +1378,8 @@ class Pillar:
             # the git ext_pillar() func is run, but only for masterless.
             if self.ext and "git" in self.ext and self.opts.get("__role") != "minion":
                 # Avoid circular import
-                import salt.utils.gitfs
                 import salt.pillar.git_pillar
+                import salt.utils.gitfs
 
                 git_pillar = salt.utils.gitfs.GitPillar(
                     self.opts,
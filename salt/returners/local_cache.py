@@ -2,10 +2,14 @@
 """
 Return data to local job cache
 
+When :conf_master:`job_cache_index` is set, the jobs are also recorded in an
+index next to the jobs directory, which lists and expires them without walking
+the whole jobs directory.
 """
 from __future__ import absolute_import, print_function, unicode_literals
 
 import bisect
+import collections
 
 # Import python libs
 import errno
@@ -13,7 +17,9 @@ import glob
 import logging
 import os
 import shutil
+import threading
 import time
+import uuid
 
 import salt.exceptions
 
@@ -30,6 +36,13 @@ import salt.utils.stringutils
 from salt.ext import six
 from salt.ext.six.moves import range  # pylint: disable=import-error,redefined-builtin
 
+try:
+    import sqlite3
+
+    HAS_SQLITE3 = True
+except ImportError:
+    HAS_SQLITE3 = False
+
 log = logging.getLogger(__name__)
 
 # load is the published job
@@ -46,6 +59,31 @@ RETURN_P = "return.p"
 OUT_P = "out.p"
 # endtime is the end time for a job, not stored as msgpack
 ENDTIME = "endtime"
+# the job index, kept next to the jobs directory when job_cache_index is set
+JOB_INDEX = "jobs.sqlite"
+# identifies the jobs directory the job index was built for
+JOB_INDEX_ID = ".index_id"
+# number of jobs written or removed per job index transaction
+INDEX_BATCH_SIZE = 500
+
+# {database: (pid, connection, lock)}
+_INDEX_CONNECTIONS = {}
+
+_INDEX_SCHEMA = (
+    """CREATE TABLE IF NOT EXISTS jobs (
+    jid TEXT PRIMARY KEY,
+    start REAL NOT NULL,
+    fun TEXT,
+    tgt TEXT,
+    tgt_type TEXT,
+    user TEXT,
+    minions INTEGER NOT NULL DEFAULT 0,
+    endtime TEXT,
+    job BLOB
+)""",
+    "CREATE INDEX IF NOT EXISTS jobs_start ON jobs (start)",
+    "CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT)",
+)
 
 
 def _job_dir():
@@ -64,7 +102,7 @@ def _walk_through(job_dir):
     for top in os.listdir(job_dir):
         t_path = os.path.join(job_dir, top)
 
-        if not os.path.exists(t_path):
+        if not os.path.isdir(t_path):
             continue
 
         for final in os.listdir(t_path):
@@ -89,6 +127,209 @@ def _walk_through(job_dir):
                 yield jid, job, t_path, final
 
 
+def _index():
+    """
+    Return the connection to the job index and the lock serializing its use,
+    or None if the job index is disabled or cannot be opened.
+    """
+    if not __opts__.get("job_cache_index", False):
+        return None
+    if not HAS_SQLITE3:
+        log.warning("The job cache index requires the sqlite3 python module")
+        return None
+    database = os.path.join(__opts__["cachedir"], JOB_INDEX)
+    pid = os.getpid()
+    cached = _INDEX_CONNECTIONS.get(database)
+    # Connections must not be shared with forked processes
+    if cached is not None and cached[0] == pid:
+        return cached[1], cached[2]
+    try:
+        conn = sqlite3.connect(database, timeout=30, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        with conn:
+            for statement in _INDEX_SCHEMA:
+                conn.execute(statement)
+    except sqlite3.Error as exc:
+        log.error("Unable to open the job cache index %s: %s", database, exc)
+        return None
+    lock = threading.Lock()
+    _INDEX_CONNECTIONS[database] = (pid, conn, lock)
+    return conn, lock
+
+
+def _job_dir_id():
+    """
+    Return the token identifying the jobs directory, to detect that it was
+    removed or replaced since the job index was built.
+    """
+    try:
+        with salt.utils.files.fopen(os.path.join(_job_dir(), JOB_INDEX_ID), "r") as fn_:
+            return salt.utils.stringutils.to_unicode(fn_.read()).strip()
+    except (IOError, OSError):
+        return None
+
+
+def _index_query(index, query, args=()):
+    """
+    Run a read query against the job index, return None on error
+    """
+    conn, lock = index
+    try:
+        with lock:
+            return conn.execute(query, args).fetchall()
+    except sqlite3.Error as exc:
+        log.error("Failed to query the job cache index: %s", exc)
+        return None
+
+
+def _index_ready(index):
+    """
+    Check if the job index was built for the current jobs directory
+    """
+    dir_id = _job_dir_id()
+    if dir_id is None:
+        return False
+    rows = _index_query(index, "SELECT value FROM meta WHERE name = 'job_dir'")
+    return bool(rows) and rows[0][0] == dir_id
+
+
+def _index_fields(load):
+    """
+    Return the job index fields of the published job ``load``
+    """
+    serial = salt.payload.Serial(__opts__)
+    tgt = load.get("tgt")
+    if isinstance(tgt, (list, tuple)):
+        tgt = ",".join(six.text_type(item) for item in tgt)
+    elif tgt is not None:
+        tgt = six.text_type(tgt)
+    return {
+        "fun": load.get("fun"),
+        "tgt": tgt,
+        "tgt_type": load.get("tgt_type"),
+        "user": load.get("user"),
+        "job": serial.dumps(salt.utils.jid.format_job_instance(load)),
+    }
+
+
+def _index_job(jid, extra_minions=0, **fields):
+    """
+    Add the job to the job index if it is not there yet and update its fields
+    """
+    _index_jobs([(jid, extra_minions, fields)])
+
+
+def _index_jobs(jobs):
+    """
+    Add the jobs to the job index if they are not there yet and update their
+    fields, in one transaction. ``jobs`` is a list of
+    ``(jid, extra_minions, fields)`` tuples.
+    """
+    index = _index()
+    if index is None or not jobs:
+        return
+    conn, lock = index
+    try:
+        with lock, conn:
+            for jid, extra_minions, fields in jobs:
+                updates = ["{0} = ?".format(field) for field in fields]
+                args = list(fields.values())
+                if extra_minions:
+                    updates.append("minions = minions + ?")
+                    args.append(extra_minions)
+                conn.execute(
+                    "INSERT OR IGNORE INTO jobs (jid, start) VALUES (?, ?)",
+                    (jid, time.time()),
+                )
+                if updates:
+                    conn.execute(
+                        "UPDATE jobs SET {0} WHERE jid = ?".format(", ".join(updates)),
+                        args + [jid],
+                    )
+    except sqlite3.Error as exc:
+        log.error(
+            "Failed to add jobs %s to the job cache index: %s",
+            ", ".join(job[0] for job in jobs),
+            exc,
+        )
+        # Walk the jobs directory until the index is built again
+        try:
+            with lock, conn:
+                conn.execute("DELETE FROM meta WHERE name = 'job_dir'")
+        except sqlite3.Error:
+            pass
+
+
+def _build_index(index, jid_root):
+    """
+    Clean the old jobs by walking the jobs directory and rebuild the job index
+    from the remaining ones. Return True if the index was built.
+    """
+    conn, lock = index
+    dir_id = uuid.uuid4().hex
+    try:
+        with salt.utils.atomicfile.atomic_open(
+            os.path.join(jid_root, JOB_INDEX_ID), "w"
+        ) as fn_:
+            fn_.write(dir_id)
+    except (IOError, OSError) as exc:
+        log.error("Failed to build the job cache index: %s", exc)
+        return False
+    started = time.time()
+    found = []
+    _clean_old_jobs_walk(jid_root, found)
+    try:
+        # Jobs added while walking were indexed when they were created
+        with lock, conn:
+            conn.execute("DELETE FROM jobs WHERE start < ?", (started,))
+        for pos in range(0, len(found), INDEX_BATCH_SIZE):
+            jobs = []
+            for f_path, jid_ctime in found[pos : pos + INDEX_BATCH_SIZE]:
+                try:
+                    with salt.utils.files.fopen(
+                        os.path.join(f_path, "jid"), "rb"
+                    ) as fn_:
+                        jid = salt.utils.stringutils.to_unicode(fn_.read()).strip()
+                except (IOError, OSError):
+                    continue
+                load = get_load(jid)
+                fields = _index_fields(load) if load else {}
+                jobs.append(
+                    (
+                        jid,
+                        jid_ctime,
+                        fields.get("fun"),
+                        fields.get("tgt"),
+                        fields.get("tgt_type"),
+                        fields.get("user"),
+                        len(load.get("Minions", [])),
+                        get_endtime(jid) or None,
+                        fields.get("job"),
+                    )
+                )
+            with lock, conn:
+                conn.executemany(
+                    "INSERT OR IGNORE INTO jobs (jid, start) VALUES (?, ?)",
+                    [job[:2] for job in jobs],
+                )
+                conn.executemany(
+                    "UPDATE jobs SET fun = ?, tgt = ?, tgt_type = ?, user = ?, "
+                    "minions = ?, endtime = ?, job = ? WHERE jid = ? AND job IS NULL",
+                    [job[2:] + job[:1] for job in jobs],
+                )
+        with lock, conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO meta (name, value) VALUES ('job_dir', ?)",
+                (dir_id,),
+            )
+    except sqlite3.Error as exc:
+        log.error("Failed to build the job cache index: %s", exc)
+        return False
+    log.debug("Built the job cache index with %d jobs", len(found))
+    return True
+
+
 # TODO: add to returner docs-- this is a new one
 def prep_jid(nocache=False, passed_jid=None, recurse_count=0):
     """
@@ -132,6 +373,7 @@ def prep_jid(nocache=False, passed_jid=None, recurse_count=0):
             passed_jid=jid, nocache=nocache, recurse_count=recurse_count + 1
         )
 
+    _index_job(jid)
     return jid
 
 
@@ -149,8 +391,50 @@ def returner(load):
     if os.path.exists(os.path.join(jid_dir, "nocache")):
         return
 
-    hn_dir = os.path.join(jid_dir, load["id"])
+    # A return for a job unknown to the job cache creates its directory
+    new_job = _index() is not None and not os.path.isdir(jid_dir)
+    ret = _write_return(serial, jid_dir, load)
+    if new_job and ret is not False:
+        _index_job(load["jid"])
+    return ret
+
+
+def returner_many(loads):
+    """
+    Return the data of several minions to the local job cache. The directory
+    of each job is checked once, and the jobs new to the job cache are added
+    to the job index in one transaction.
+
+    .. versionadded:: 3003
+    """
+    serial = salt.payload.Serial(__opts__)
+    jobs = collections.OrderedDict()
+    for load in loads:
+        if load["jid"] == "req":
+            returner(load)
+            continue
+        jobs.setdefault(load["jid"], []).append(load)
+    indexed = _index() is not None
+    new_jobs = []
+    for jid, job_loads in six.iteritems(jobs):
+        jid_dir = salt.utils.jid.jid_dir(jid, _job_dir(), __opts__["hash_type"])
+        if os.path.exists(os.path.join(jid_dir, "nocache")):
+            continue
+        new_job = indexed and not os.path.isdir(jid_dir)
+        written = False
+        for load in job_loads:
+            if _write_return(serial, jid_dir, load) is not False:
+                written = True
+        if new_job and written:
+            new_jobs.append((jid, 0, {}))
+    _index_jobs(new_jobs)
 
+
+def _write_return(serial, jid_dir, load):
+    """
+    Write the return of a minion in the directory of its job
+    """
+    hn_dir = os.path.join(jid_dir, load["id"])
     try:
         os.makedirs(hn_dir)
     except OSError as err:
@@ -228,6 +512,8 @@ def save_load(jid, clear_load, minions=None, recurse_count=0):
         return save_load(
             jid=jid, clear_load=clear_load, recurse_count=recurse_count + 1
         )
+    if _index() is not None:
+        _index_job(jid, **_index_fields(clear_load))
 
     # if you have a tgt, save that for the UI etc
     if "tgt" in clear_load and clear_load["tgt"] != "":
@@ -290,6 +576,12 @@ def save_minions(jid, minions, syndic_id=None):
             minions_path,
             exc,
         )
+        return
+
+    if syndic_id is not None:
+        _index_job(jid, extra_minions=len(minions))
+    else:
+        _index_job(jid, minions=len(minions))
 
 
 def get_load(jid):
@@ -377,6 +669,20 @@ def get_jids():
     Return a dict mapping all job ids to job information
     """
     ret = {}
+    index = _index()
+    if index is not None and _index_ready(index):
+        rows = _index_query(
+            index, "SELECT jid, job, endtime FROM jobs WHERE job IS NOT NULL"
+        )
+        if rows is not None:
+            serial = salt.payload.Serial(__opts__)
+            for jid, job, endtime in rows:
+                ret[jid] = serial.loads(job)
+                ret[jid]["StartTime"] = salt.utils.jid.jid_to_time(jid)
+                if endtime and __opts__.get("job_cache_store_endtime"):
+                    ret[jid]["EndTime"] = endtime
+            return ret
+
     for jid, job, _, _ in _walk_through(_job_dir()):
         ret[jid] = salt.utils.jid.format_jid_instance(jid, job)
 
@@ -394,6 +700,25 @@ def get_jids_filter(count, filter_find_job=True):
     :param int count: show not more than the count of most recent jobs
     :param bool filter_find_jobs: filter out 'saltutil.find_job' jobs
     """
+    index = _index()
+    if index is not None and _index_ready(index):
+        query = "SELECT jid, job FROM jobs WHERE job IS NOT NULL"
+        args = []
+        if filter_find_job:
+            query += " AND (fun IS NULL OR fun != ?)"
+            args.append("saltutil.find_job")
+        query += " ORDER BY jid DESC LIMIT ?"
+        args.append(count)
+        rows = _index_query(index, query, args)
+        if rows is not None:
+            serial = salt.payload.Serial(__opts__)
+            ret = []
+            for jid, job in reversed(rows):
+                job = serial.loads(job)
+                job.update({"JID": jid, "StartTime": salt.utils.jid.jid_to_time(jid)})
+                ret.append(job)
+            return ret
+
     keys = []
     ret = []
     for jid, job, _, _ in _walk_through(_job_dir()):
@@ -411,6 +736,95 @@ def get_jids_filter(count, filter_find_job=True):
     return ret
 
 
+def _clean_old_jobs_walk(jid_root, found=None):
+    """
+    Walk the jobs directory and remove the old jobs. The path and the start
+    time of the remaining jobs are appended to ``found`` if it is passed.
+    """
+    # Keep track of any empty t_path dirs that need to be removed later
+    dirs_to_remove = set()
+
+    for top in os.listdir(jid_root):
+        t_path = os.path.join(jid_root, top)
+
+        if not os.path.isdir(t_path):
+            continue
+
+        # Check if there are any stray/empty JID t_path dirs
+        t_path_dirs = os.listdir(t_path)
+        if not t_path_dirs and t_path not in dirs_to_remove:
+            dirs_to_remove.add(t_path)
+            continue
+
+        for final in t_path_dirs:
+            f_path = os.path.join(t_path, final)
+            jid_file = os.path.join(f_path, "jid")
+            if not os.path.isfile(jid_file) and os.path.exists(f_path):
+                # No jid file means corrupted cache entry, scrub it
+                # by removing the entire f_path directory
+                shutil.rmtree(f_path)
+            elif os.path.isfile(jid_file):
+                jid_ctime = os.stat(jid_file).st_ctime
+                hours_difference = (time.time() - jid_ctime) / 3600.0
+                if hours_difference > __opts__["keep_jobs"] and os.path.exists(t_path):
+                    # Remove the entire f_path from the original JID dir
+                    try:
+                        shutil.rmtree(f_path)
+                    except OSError as err:
+                        log.error("Unable to remove %s: %s", f_path, err)
+                elif found is not None:
+                    found.append((f_path, jid_ctime))
+
+    # Remove empty JID dirs from job cache, if they're old enough.
+    # JID dirs may be empty either from a previous cache-clean with the bug
+    # Listed in #29286 still present, or the JID dir was only recently made
+    # And the jid file hasn't been created yet.
+    if dirs_to_remove:
+        for t_path in dirs_to_remove:
+            # Checking the time again prevents a possible race condition where
+            # t_path JID dirs were created, but not yet populated by a jid file.
+            t_path_ctime = os.stat(t_path).st_ctime
+            hours_difference = (time.time() - t_path_ctime) / 3600.0
+            if hours_difference > __opts__["keep_jobs"]:
+                shutil.rmtree(t_path)
+
+
+def _clean_old_indexed_jobs(index):
+    """
+    Remove the jobs which started before the keep_jobs window, as found in
+    the job index, oldest first. At most job_cache_clean_limit jobs are
+    removed per run, the next runs remove the remaining ones.
+    """
+    conn, lock = index
+    cutoff = time.time() - __opts__["keep_jobs"] * 3600.0
+    limit = __opts__.get("job_cache_clean_limit", 0) or -1
+    rows = _index_query(
+        index,
+        "SELECT jid FROM jobs WHERE start < ? ORDER BY start LIMIT ?",
+        (cutoff, limit),
+    )
+    if not rows:
+        return
+    jid_root = _job_dir()
+    for pos in range(0, len(rows), INDEX_BATCH_SIZE):
+        removed = []
+        for (jid,) in rows[pos : pos + INDEX_BATCH_SIZE]:
+            jid_dir = salt.utils.jid.jid_dir(jid, jid_root, __opts__["hash_type"])
+            try:
+                shutil.rmtree(jid_dir)
+            except OSError as err:
+                if err.errno != errno.ENOENT:
+                    log.error("Unable to remove %s: %s", jid_dir, err)
+                    continue
+            removed.append((jid,))
+        try:
+            with lock, conn:
+                conn.executemany("DELETE FROM jobs WHERE jid = ?", removed)
+        except sqlite3.Error as exc:
+            log.error("Failed to remove old jobs from the job cache index: %s", exc)
+            return
+
+
 def clean_old_jobs():
     """
     Clean out the old jobs from the job cache
@@ -421,52 +835,13 @@ def clean_old_jobs():
         if not os.path.exists(jid_root):
             return
 
-        # Keep track of any empty t_path dirs that need to be removed later
-        dirs_to_remove = set()
-
-        for top in os.listdir(jid_root):
-            t_path = os.path.join(jid_root, top)
-
-            if not os.path.exists(t_path):
-                continue
-
-            # Check if there are any stray/empty JID t_path dirs
-            t_path_dirs = os.listdir(t_path)
-            if not t_path_dirs and t_path not in dirs_to_remove:
-                dirs_to_remove.add(t_path)
-                continue
+        index = _index()
+        if index is not None:
+            if _index_ready(index) or _build_index(index, jid_root):
+                _clean_old_indexed_jobs(index)
+                return
 
-            for final in t_path_dirs:
-                f_path = os.path.join(t_path, final)
-                jid_file = os.path.join(f_path, "jid")
-                if not os.path.isfile(jid_file) and os.path.exists(f_path):
-                    # No jid file means corrupted cache entry, scrub it
-                    # by removing the entire f_path directory
-                    shutil.rmtree(f_path)
-                elif os.path.isfile(jid_file):
-                    jid_ctime = os.stat(jid_file).st_ctime
-                    hours_difference = (time.time() - jid_ctime) / 3600.0
-                    if hours_difference > __opts__["keep_jobs"] and os.path.exists(
-                        t_path
-                    ):
-                        # Remove the entire f_path from the original JID dir
-                        try:
-                            shutil.rmtree(f_path)
-                        except OSError as err:
-                            log.error("Unable to remove %s: %s", f_path, err)
-
-        # Remove empty JID dirs from job cache, if they're old enough.
-        # JID dirs may be empty either from a previous cache-clean with the bug
-        # Listed in #29286 still present, or the JID dir was only recently made
-        # And the jid file hasn't been created yet.
-        if dirs_to_remove:
-            for t_path in dirs_to_remove:
-                # Checking the time again prevents a possible race condition where
-                # t_path JID dirs were created, but not yet populated by a jid file.
-                t_path_ctime = os.stat(t_path).st_ctime
-                hours_difference = (time.time() - t_path_ctime) / 3600.0
-                if hours_difference > __opts__["keep_jobs"]:
-                    shutil.rmtree(t_path)
+        _clean_old_jobs_walk(jid_root)
 
 
 def update_endtime(jid, time):
@@ -483,6 +858,30 @@ def update_endtime(jid, time):
             etfile.write(salt.utils.stringutils.to_str(time))
     except IOError as exc:
         log.warning("Could not write job invocation cache file: %s", exc)
+        return
+    _index_job(jid, endtime=salt.utils.stringutils.to_unicode(time))
+
+
+def update_endtime_many(endtimes):
+    """
+    Update (or store) the end times of several jobs, given as a dict of end
+    times by jid, updating the job index in one transaction
+
+    .. versionadded:: 3003
+    """
+    jobs = []
+    for jid, endtime in six.iteritems(endtimes):
+        jid_dir = salt.utils.jid.jid_dir(jid, _job_dir(), __opts__["hash_type"])
+        try:
+            if not os.path.exists(jid_dir):
+                os.makedirs(jid_dir)
+            with salt.utils.files.fopen(os.path.join(jid_dir, ENDTIME), "w") as etfile:
+                etfile.write(salt.utils.stringutils.to_str(endtime))
+        except IOError as exc:
+            log.warning("Could not write job invocation cache file: %s", exc)
+            continue
+        jobs.append((jid, 0, {"endtime": salt.utils.stringutils.to_unicode(endtime)}))
+    _index_jobs(jobs)
 
 
 def get_endtime(jid):
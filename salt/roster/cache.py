@@ -135,12 +135,16 @@ def targets(tgt, tgt_type="glob", **kwargs):  # pylint: disable=W0613
         {"host": ("ipv6-private", "ipv6-global", "ipv4-private", "ipv4-public")},
     )
 
+    # Fetch the cached data of all the targeted minions at once
+    cdata = cache.fetch_many(
+        ("minions/{0}".format(minion_id), key)
+        for minion_id in minions
+        for key in ("data", "mine")
+    )
+
     ret = {}
     for minion_id in minions:
-        try:
-            minion = _load_minion(minion_id, cache)
-        except LookupError:
-            continue
+        minion = _load_minion(minion_id, cdata)
 
         minion_res = copy.deepcopy(__opts__.get("roster_defaults", {}))
         for param, order in roster_order.items():
@@ -162,14 +166,15 @@ def targets(tgt, tgt_type="glob", **kwargs):  # pylint: disable=W0613
     return ret
 
 
-def _load_minion(minion_id, cache):
-    data_minion, grains, pillar = salt.utils.minions.get_minion_data(
-        minion_id, __opts__
-    )
-
-    if minion_id != data_minion:
-        log.error("Asked for minion %s, got %s", minion_id, data_minion)
-        raise LookupError
+def _load_minion(minion_id, cdata):
+    bank = "minions/{0}".format(minion_id)
+    grains = pillar = None
+    if __opts__.get("minion_data_cache", False):
+        data = cdata.get((bank, "data"))
+        if data is not None:
+            grains = data.get("grains", None)
+            pillar = data.get("pillar", None)
+    mine = cdata.get((bank, "mine"))
 
     if not grains:
         log.warning("No grain data for minion id %s", minion_id)
@@ -184,8 +189,6 @@ def _load_minion(minion_id, cache):
         6: sorted([ipaddress.IPv6Address(addr) for addr in grains.get("ipv6", [])]),
     }
 
-    mine = cache.fetch("minions/{0}".format(minion_id), "mine")
-
     return grains, pillar, addrs, mine
 
 
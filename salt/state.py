@@ -15,7 +15,11 @@ The data sent to the state calls is as follows:
 import copy
 import datetime
 import fnmatch
+import functools
+import heapq
 import logging
+import multiprocessing
+import multiprocessing.connection
 import os
 import random
 import re
@@ -24,6 +28,7 @@ import sys
 import time
 import traceback
 
+import salt.config
 import salt.fileclient
 import salt.loader
 import salt.minion
@@ -31,6 +36,8 @@ import salt.pillar
 import salt.syspaths as syspaths
 import salt.transport.client
 import salt.utils.args
+import salt.utils.atomicfile
+import salt.utils.checkshell
 import salt.utils.crypt
 import salt.utils.data
 import salt.utils.decorators.state
@@ -39,13 +46,16 @@ import salt.utils.event
 import salt.utils.files
 import salt.utils.hashutils
 import salt.utils.immutabletypes as immutabletypes
+import salt.utils.json
 import salt.utils.msgpack
 import salt.utils.platform
 import salt.utils.process
+import salt.utils.profile
 import salt.utils.url
 
 # Explicit late import to avoid circular import. DO NOT MOVE THIS.
 import salt.utils.yamlloader as yamlloader
+import salt.version
 from salt.exceptions import CommandExecutionError, SaltRenderError, SaltReqTimeoutError
 
 # pylint: disable=import-error,no-name-in-module,redefined-builtin
@@ -279,6 +289,80 @@ def find_sls_ids(sls, high):
     return ret
 
 
+class RequisiteIndex:
+    """
+    Index of the low chunks of a state run by ID, name and SLS, to find the
+    chunks matched by a requisite without going through all the chunks.
+
+    .. versionadded:: 3003
+    """
+
+    def __init__(self, chunks):
+        self.chunks = chunks
+        self.size = len(chunks)
+        # {normcased value: [position of the chunk, ...]}
+        self._by_id = {}
+        self._by_name = {}
+        self._by_sls = {}
+        self._found = {}
+        for pos, chunk in enumerate(chunks):
+            for index, key in (
+                (self._by_id, "__id__"),
+                (self._by_name, "name"),
+                (self._by_sls, "__sls__"),
+            ):
+                val = chunk.get(key)
+                if isinstance(val, str):
+                    index.setdefault(os.path.normcase(val), []).append(pos)
+
+    def indexes(self, chunks):
+        """
+        Return True if the index is up to date with the list of chunks
+        """
+        return chunks is self.chunks and len(chunks) == self.size
+
+    @staticmethod
+    def _lookup(index, pattern):
+        if "*" in pattern or "?" in pattern or "[" in pattern:
+            return [pos for val in fnmatch.filter(index, pattern) for pos in index[val]]
+        return index.get(os.path.normcase(pattern), [])
+
+    def positions(self, req_key, req_val):
+        """
+        Return the positions in the chunks of the chunks matched by the
+        requisite ``{req_key: req_val}``, in order: the chunks of the SLS files
+        matching the glob for ``sls``, else the chunks whose ID or name match
+        the glob, of the ``req_key`` state unless it is ``id``.
+        """
+        if not isinstance(req_val, str):
+            return []
+        try:
+            return self._found[(req_key, req_val)]
+        except KeyError:
+            pass
+        if req_key == "sls":
+            positions = sorted(self._lookup(self._by_sls, req_val))
+        else:
+            positions = sorted(
+                set(self._lookup(self._by_id, req_val)).union(
+                    self._lookup(self._by_name, req_val)
+                )
+            )
+            if req_key != "id":
+                positions = [
+                    pos for pos in positions if self.chunks[pos]["state"] == req_key
+                ]
+        self._found[(req_key, req_val)] = positions
+        return positions
+
+    def find(self, req_key, req_val):
+        """
+        Return the chunks matched by the requisite ``{req_key: req_val}``, in
+        the order of the chunks
+        """
+        return [self.chunks[pos] for pos in self.positions(req_key, req_val)]
+
+
 def format_log(ret):
     """
     Format the state into a log message
@@ -324,6 +408,39 @@ def format_log(ret):
         log.info(str(ret))
 
 
+def _closing_check_shells(func):
+    """
+    Close the check shells of the state once the outermost of the decorated
+    calls returns, or raises
+    """
+
+    @functools.wraps(func)
+    def wrapper(self, *args, **kwargs):
+        self._check_depth = getattr(self, "_check_depth", 0) + 1
+        try:
+            return func(self, *args, **kwargs)
+        finally:
+            self._check_depth -= 1
+            if not self._check_depth:
+                self._close_check_shells()
+
+    return wrapper
+
+
+def _digest(data):
+    """
+    Return a digest of ``data``, or None if it cannot be serialized
+    """
+    try:
+        return salt.utils.hashutils.sha256_digest(
+            salt.utils.json.dumps(
+                data, sort_keys=True, default=lambda obj: repr(type(obj))
+            )
+        )
+    except (TypeError, ValueError):
+        return None
+
+
 def master_compile(master_opts, minion_opts, grains, id_, saltenv):
     """
     Compile the master side low state data, and build the hidden state file
@@ -757,7 +874,8 @@ class State:
             self.opts["pillar"] = initial_pillar
         else:
             # Compile pillar data
-            self.opts["pillar"] = self._gather_pillar()
+            with salt.utils.profile.phase("pillar"):
+                self.opts["pillar"] = self._gather_pillar()
             # Reapply overrides on top of compiled pillar
             if self._pillar_override:
                 self.opts["pillar"] = salt.utils.dictupdate.merge(
@@ -769,11 +887,21 @@ class State:
                 )
         log.debug("Finished gathering pillar data for state run")
         self.state_con = context or {}
-        self.load_modules()
+        with salt.utils.profile.phase("load_modules"):
+            self.load_modules()
         self.active = set()
         self.mod_init = set()
         self.pre = {}
         self.__run_num = 0
+        # The requisite index of the chunks being run, see _requisite_index
+        self._req_index = None
+        # The number of parallel states whose process was not reconciled yet
+        self._parallel_running = 0
+        # The persistent shells running the onlyif and unless commands, by
+        # shell, see _check_retcodes
+        self._check_shells = {}
+        # The number of running calls closing the check shells as they return
+        self._check_depth = 0
         self.jid = jid
         self.instance_id = str(id(self))
         self.inject_globals = {}
@@ -893,14 +1021,16 @@ class State:
             cmd_opts["shell"] = self.opts["grains"].get("shell")
 
         if "onlyif" in low_data:
-            _ret = self._run_check_onlyif(low_data, cmd_opts)
+            with self._check_phase(low_data, "onlyif"):
+                _ret = self._run_check_onlyif(low_data, cmd_opts)
             ret["result"] = _ret["result"]
             ret["comment"].append(_ret["comment"])
             if "skip_watch" in _ret:
                 ret["skip_watch"] = _ret["skip_watch"]
 
         if "unless" in low_data:
-            _ret = self._run_check_unless(low_data, cmd_opts)
+            with self._check_phase(low_data, "unless"):
+                _ret = self._run_check_unless(low_data, cmd_opts)
             # If either result is True, the returned result should be True
             ret["result"] = _ret["result"] or ret["result"]
             ret["comment"].append(_ret["comment"])
@@ -909,7 +1039,8 @@ class State:
                 ret["skip_watch"] = _ret["skip_watch"] or ret["skip_watch"]
 
         if "creates" in low_data:
-            _ret = self._run_check_creates(low_data)
+            with self._check_phase(low_data, "creates"):
+                _ret = self._run_check_creates(low_data)
             ret["result"] = _ret["result"] or ret["result"]
             ret["comment"].append(_ret["comment"])
             if "skip_watch" in _ret:
@@ -918,6 +1049,94 @@ class State:
 
         return ret
 
+    def _check_phase(self, low_data, check):
+        """
+        Time a check of a state in the profile of the state run
+        """
+        if not salt.utils.profile.recording():
+            return salt.utils.profile.phase(check)
+        return salt.utils.profile.phase(
+            check,
+            {
+                "state": "{0[state]}.{0[fun]}".format(low_data),
+                "id": low_data["__id__"],
+                "name": low_data["name"],
+                "check": check,
+                "command": copy.deepcopy(low_data[check]),
+            },
+        )
+
+    def _check_retcodes(self, entries, cmd_opts):
+        """
+        Return the exit codes of the commands in the ``onlyif`` or ``unless``
+        ``entries`` run in the persistent shells enabled by
+        ``state_check_shells``, by index of the entry. The commands which
+        cannot run there, such as the ones run as another user, are left to
+        ``cmd.retcode``.
+        """
+        commands = {
+            idx: entry for idx, entry in enumerate(entries) if isinstance(entry, str)
+        }
+        if not commands or self.opts.get("state_check_shells", 0) <= 0:
+            return {}
+        shell = cmd_opts.get("shell")
+        cwd = cmd_opts.get("cwd")
+        if (
+            any(
+                cmd_opts.get(opt)
+                for opt in ("root", "runas", "env", "prepend_path", "umask", "timeout")
+            )
+            or (cwd and not (os.path.isabs(cwd) and os.path.isdir(cwd)))
+            or not salt.utils.checkshell.CheckShells.usable(shell)
+        ):
+            return {}
+        success_retcodes = cmd_opts.get("success_retcodes") or [0]
+        try:
+            success_retcodes = [
+                int(i) for i in salt.utils.args.split_input(success_retcodes)
+            ]
+        except (TypeError, ValueError):
+            return {}
+        if shell not in self._check_shells:
+            self._check_shells[shell] = salt.utils.checkshell.CheckShells(
+                shell, self.opts["state_check_shells"]
+            )
+        try:
+            retcodes = self._check_shells[shell].retcodes(
+                list(commands.values()), cwd=cwd
+            )
+        except CommandExecutionError as exc:
+            log.warning("Falling back to cmd.retcode for the checks: %s", exc)
+            return {}
+        return {
+            idx: 0 if retcode in success_retcodes else retcode
+            for idx, retcode in zip(commands, retcodes)
+        }
+
+    def _invalidate_checks(self):
+        """
+        Forget the exit codes of the checks, which may change once a state ran
+        """
+        for shells in self._check_shells.values():
+            shells.invalidate()
+
+    def _close_check_shells(self):
+        for shells in getattr(self, "_check_shells", {}).values():
+            shells.close()
+        self._check_shells = {}
+
+    def destroy(self):
+        """
+        Release the resources of the state run, such as the check shells
+        """
+        self._close_check_shells()
+
+    # pylint: disable=W1701
+    def __del__(self):
+        self.destroy()
+
+    # pylint: enable=W1701
+
     def _run_check_function(self, entry):
         """Format slot args and run unless/onlyif function."""
         fun = entry.pop("fun")
@@ -949,8 +1168,13 @@ class State:
             elif cmd == 0:
                 ret.update({"comment": "onlyif condition is true", "result": False})
 
-        for entry in low_data_onlyif:
-            if isinstance(entry, str):
+        retcodes = self._check_retcodes(low_data_onlyif, cmd_opts)
+        for idx, entry in enumerate(low_data_onlyif):
+            if idx in retcodes:
+                cmd = retcodes[idx]
+                log.debug("Last command return code: %s", cmd)
+                _check_cmd(cmd)
+            elif isinstance(entry, str):
                 try:
                     cmd = self.functions["cmd.retcode"](
                         entry, ignore_retcode=True, python_shell=True, **cmd_opts
@@ -1015,8 +1239,13 @@ class State:
             elif cmd != 0:
                 ret.update({"comment": "unless condition is false", "result": False})
 
-        for entry in low_data_unless:
-            if isinstance(entry, str):
+        retcodes = self._check_retcodes(low_data_unless, cmd_opts)
+        for idx, entry in enumerate(low_data_unless):
+            if idx in retcodes:
+                cmd = retcodes[idx]
+                log.debug("Last command return code: %s", cmd)
+                _check_cmd(cmd)
+            elif isinstance(entry, str):
                 try:
                     cmd = self.functions["cmd.retcode"](
                         entry, ignore_retcode=True, python_shell=True, **cmd_opts
@@ -1593,7 +1822,8 @@ class State:
                     for fun in funcs:
                         live["fun"] = fun
                         chunks.append(live)
-        chunks = self.order_chunks(chunks)
+        with salt.utils.profile.phase("order_chunks"):
+            chunks = self.order_chunks(chunks)
         return chunks
 
     def reconcile_extend(self, high):
@@ -2014,6 +2244,7 @@ class State:
             target=self._call_parallel_target, args=(name, cdata, low)
         )
         proc.start()
+        self._parallel_running += 1
         ret = {
             "name": name,
             "result": None,
@@ -2024,11 +2255,16 @@ class State:
         return ret
 
     @salt.utils.decorators.state.OutputUnifier("content_check", "unify")
+    @_closing_check_shells
     def call(self, low, chunks=None, running=None, retries=1):
         """
         Call a state directly with the low data structure, verify data
         before processing.
         """
+        with salt.utils.profile.phase("{}.{}".format(low.get("state"), low.get("fun"))):
+            return self._call(low, chunks, running, retries)
+
+    def _call(self, low, chunks=None, running=None, retries=1):
         utc_start_time = datetime.datetime.utcnow()
         local_start_time = utc_start_time - (
             datetime.datetime.utcnow() - datetime.datetime.now()
@@ -2140,6 +2376,8 @@ class State:
                 inject_globals["__orchestration_jid__"] = low["__orchestration_jid__"]
 
             if "result" not in ret or ret["result"] is False:
+                # The state may change what the checks of the next states test
+                self._invalidate_checks()
                 self.states.inject_globals = inject_globals
                 if self.mocked:
                     ret = mock_ret(cdata)
@@ -2437,6 +2675,7 @@ class State:
             validated_retry_data = retry_defaults
         return validated_retry_data
 
+    @_closing_check_shells
     def call_chunks(self, chunks):
         """
         Iterate over a list of chunks and call them, checking for requires.
@@ -2464,6 +2703,9 @@ class State:
                         chunks.remove(low)
                         break
         running = {}
+        if self.opts.get("state_concurrency", 0) > 0:
+            running = self.call_chunks_concurrent(chunks, running)
+            chunks = []
         for low in chunks:
             if "__FAILHARD__" in running:
                 running.pop("__FAILHARD__")
@@ -2485,6 +2727,270 @@ class State:
         ret = dict(list(disabled.items()) + list(running.items()))
         return ret
 
+    def _requisite_deps(self, low, chunks):
+        """
+        Return the positions in chunks of the chunks the requisites of the low
+        chunk match, leaving out the prereq requisites
+        """
+        disabled_reqs = self.opts.get("disabled_requisites", [])
+        if not isinstance(disabled_reqs, list):
+            disabled_reqs = [disabled_reqs]
+        index = self._requisite_index(chunks)
+        deps = set()
+        for r_state in STATE_REQUISITE_KEYWORDS:
+            if r_state.startswith("prereq") or r_state in disabled_reqs:
+                continue
+            for req in low.get(r_state) or ():
+                if isinstance(req, str):
+                    req = {"id": req}
+                if not isinstance(req, dict) or not req:
+                    continue
+                req = trim_req(req)
+                req_key = next(iter(req))
+                deps.update(index.positions(req_key, req[req_key]))
+        return deps
+
+    def call_chunks_concurrent(self, chunks, running):
+        """
+        Call the chunks as the requisites between them allow, running up to
+        ``state_concurrency`` chunks at a time in worker processes.
+
+        A chunk is started once all the chunks its requisites match are done,
+        in the order of the chunks. The chunks of the state modules listed in
+        ``state_concurrency_exclude`` and the parallel chunks are called by
+        this process, the chunks with prereq requisites are called once all
+        the workers are done. The parallel chunks are only done once their
+        process is reconciled. If the requisites cannot be satisfied, such as
+        when they are recursive, the first chunk left is called as
+        ``call_chunks`` would.
+
+        .. versionadded:: 3003
+        """
+        workers = self.opts["state_concurrency"]
+        exclude = set(self.opts.get("state_concurrency_exclude") or ())
+        # The number of chunks each chunk waits for, and the reverse
+        waiting = []
+        dependents = [[] for _ in chunks]
+        for pos, low in enumerate(chunks):
+            deps = self._requisite_deps(low, chunks)
+            deps.discard(pos)
+            waiting.append(len(deps))
+            for dep in deps:
+                dependents[dep].append(pos)
+        tags = {}
+        for pos, low in enumerate(chunks):
+            tags.setdefault(_gen_tag(low), []).append(pos)
+        ready = [pos for pos, count in enumerate(waiting) if not count]
+        heapq.heapify(ready)
+        pending = set(range(len(chunks)))
+        # {connection: (position, process)}
+        inflight = {}
+        # The parallel chunks whose process runs, {sentinel: tag}
+        procs = {}
+        stop = False
+
+        def _finish(pos):
+            if pos not in pending:
+                return
+            pending.discard(pos)
+            for dependent in dependents[pos]:
+                waiting[dependent] -= 1
+                if not waiting[dependent]:
+                    heapq.heappush(ready, dependent)
+
+        def _done(new):
+            # Chunks may also be called as the requisite of another chunk
+            for tag, ret in new.items():
+                if isinstance(ret, dict) and ret.get("proc"):
+                    procs[ret["proc"].sentinel] = tag
+                    continue
+                for pos in tags.get(tag, ()):
+                    _finish(pos)
+
+        def _call_here(pos):
+            before = set(running)
+            ret = self.call_chunk(chunks[pos], running, chunks)
+            _done({tag: ret[tag] for tag in ret if tag not in before})
+            if _gen_tag(chunks[pos]) not in procs.values():
+                _finish(pos)
+            return ret
+
+        def _reconcile():
+            # Finish the parallel chunks whose process is done
+            self.reconcile_procs(running)
+            self._invalidate_checks()
+            failhard = False
+            for sentinel, tag in list(procs.items()):
+                if "proc" in running[tag]:
+                    continue
+                del procs[sentinel]
+                for pos in tags.get(tag, ()):
+                    _finish(pos)
+                    failhard = failhard or self.check_failhard(chunks[pos], running)
+            return failhard
+
+        while pending and not stop:
+            while ready and len(inflight) < workers and not stop:
+                pos = ready[0]
+                if pos not in pending:
+                    heapq.heappop(ready)
+                    continue
+                low = chunks[pos]
+                if _gen_tag(low) in running:
+                    heapq.heappop(ready)
+                    _finish(pos)
+                    continue
+                prereq = any(
+                    key in low for key in ("prereq", "prerequired", "__prereq__")
+                )
+                if prereq and inflight:
+                    # Wait for the workers as the prereqs may call other chunks
+                    break
+                heapq.heappop(ready)
+                if self.check_pause(low) == "kill":
+                    stop = True
+                    break
+                if prereq or low.get("parallel") or low["state"] in exclude:
+                    running = _call_here(pos)
+                    stop = self.check_failhard(low, running)
+                else:
+                    inflight.update(self._start_chunk_worker(pos, low, running, chunks))
+            if "__FAILHARD__" in running:
+                running.pop("__FAILHARD__")
+                stop = True
+            if inflight or procs:
+                ended = multiprocessing.connection.wait(list(inflight) + list(procs))
+                if any(sentinel in procs for sentinel in ended) and _reconcile():
+                    stop = True
+                for conn in ended:
+                    if conn not in inflight:
+                        continue
+                    pos, proc = inflight.pop(conn)
+                    low = chunks[pos]
+                    new = self._recv_chunk_worker(low, conn, proc, len(chunks))
+                    running.update(new)
+                    _done(new)
+                    _finish(pos)
+                    if "__FAILHARD__" in new or self.check_failhard(low, running):
+                        running.pop("__FAILHARD__", None)
+                        stop = True
+            elif pending and not ready and not stop:
+                # The requisites left cannot be satisfied by running the
+                # chunks concurrently, such as with a requisite loop
+                pos = min(pending)
+                running = _call_here(pos)
+                stop = self.check_failhard(chunks[pos], running)
+            self.active = set()
+        # Wait for the workers still running
+        while inflight:
+            for conn in multiprocessing.connection.wait(list(inflight)):
+                pos, proc = inflight.pop(conn)
+                running.update(
+                    self._recv_chunk_worker(chunks[pos], conn, proc, len(chunks))
+                )
+        running.pop("__FAILHARD__", None)
+        return running
+
+    def _start_chunk_worker(self, pos, low, running, chunks):
+        """
+        Call a chunk in a worker process, return its connection and process
+        """
+        recv_conn, send_conn = multiprocessing.Pipe(duplex=False)
+        # The processes of the parallel chunks are reconciled by this process
+        running = {
+            tag: {key: val for key, val in ret.items() if key != "proc"}
+            if isinstance(ret, dict) and "proc" in ret
+            else ret
+            for tag, ret in running.items()
+        }
+        proc = salt.utils.process.Process(
+            target=self._chunk_worker, args=(low, running, chunks, send_conn)
+        )
+        proc.start()
+        send_conn.close()
+        return {recv_conn: (pos, proc)}
+
+    def _chunk_worker(self, low, running, chunks, conn):
+        """
+        The target of the chunk worker processes: call the chunk and send back
+        the results it added to running
+        """
+        # The results are numbered and sent as events by the main process
+        self.event = lambda *args, **kwargs: None
+        # The check shells belong to the main process
+        self._check_shells = {}
+        self._check_depth = 0
+        self._parallel_running = 0
+        before = set(running)
+        try:
+            running = self.call_chunk(low, running, chunks)
+            new = {tag: ret for tag, ret in running.items() if tag not in before}
+            data = msgpack_serialize(new)
+        except Exception as exc:  # pylint: disable=broad-except
+            log.error(
+                "Failed to call the state chunk %s in a worker: %s",
+                _gen_tag(low),
+                exc,
+                exc_info_on_loglevel=logging.DEBUG,
+            )
+            data = msgpack_serialize(
+                {
+                    _gen_tag(low): {
+                        "result": False,
+                        "name": low.get("name"),
+                        "changes": {},
+                        "comment": "An exception occurred in the worker of this state: {}".format(
+                            exc
+                        ),
+                        "__sls__": low.get("__sls__"),
+                    }
+                }
+            )
+        conn.send_bytes(data)
+        conn.close()
+
+    def _recv_chunk_worker(self, low, conn, proc, length):
+        """
+        Return the results sent by a chunk worker, numbered in the order they
+        were added by the worker
+        """
+        try:
+            new = msgpack_deserialize(conn.recv_bytes())
+        except (EOFError, OSError):
+            new = {
+                _gen_tag(low): {
+                    "result": False,
+                    "name": low.get("name"),
+                    "changes": {},
+                    "comment": "The worker of this state failed to return",
+                    "__sls__": low.get("__sls__"),
+                }
+            }
+        finally:
+            conn.close()
+            proc.join()
+        self._invalidate_checks()
+        ordered = sorted(
+            (item for item in new.items() if isinstance(item[1], dict)),
+            key=lambda item: item[1].get("__run_num__", 0),
+        )
+        for tag, ret in ordered:
+            ret["__run_num__"] = self.__run_num
+            self.__run_num += 1
+            self.event(ret, length, fire_event=low.get("fire_event"))
+            if "duration" in ret:
+                # Only the durations of the states run by the workers are
+                # added to the profile of the state run
+                salt.utils.profile.add_phase(
+                    "{0[state]}.{0[fun]}".format(split_low_tag(tag)),
+                    ret["duration"] / 1000.0,
+                )
+        tag = _gen_tag(low)
+        if tag in new:
+            # The modules to refresh were only refreshed in the worker
+            self.check_refresh(low, new[tag])
+        return new
+
     def check_failhard(self, low, running):
         """
         Check if the low data chunk should send a failhard signal
@@ -2549,6 +3055,9 @@ class State:
         """
         Check the running dict for processes and resolve them
         """
+        if not self._parallel_running:
+            # No parallel state is running, skip going through the results
+            return True
         retset = set()
         for tag in running:
             proc = running[tag].get("proc")
@@ -2578,10 +3087,20 @@ class State:
                         }
                     running[tag].update(ret)
                     running[tag].pop("proc")
+                    self._parallel_running -= 1
                 else:
                     retset.add(False)
         return False not in retset
 
+    def _requisite_index(self, chunks):
+        """
+        Return the requisite index of the chunks, built once per list of
+        chunks run
+        """
+        if self._req_index is None or not self._req_index.indexes(chunks):
+            self._req_index = RequisiteIndex(chunks)
+        return self._req_index
+
     def check_requisite(self, low, running, chunks, pre=False):
         """
         Look into the running data to check the status of all requisite
@@ -2654,45 +3173,19 @@ class State:
                     if isinstance(req, str):
                         req = {"id": req}
                     req = trim_req(req)
-                    found = False
-                    for chunk in chunks:
-                        req_key = next(iter(req))
-                        req_val = req[req_key]
-                        if req_val is None:
-                            continue
-                        if req_key == "sls":
-                            # Allow requisite tracking of entire sls files
-                            if fnmatch.fnmatch(chunk["__sls__"], req_val):
-                                found = True
-                                reqs[r_state].append(chunk)
-                            continue
-                        try:
-                            if isinstance(req_val, str):
-                                if fnmatch.fnmatch(
-                                    chunk["name"], req_val
-                                ) or fnmatch.fnmatch(chunk["__id__"], req_val):
-                                    if req_key == "id" or chunk["state"] == req_key:
-                                        found = True
-                                        reqs[r_state].append(chunk)
-                            else:
-                                raise KeyError
-                        except KeyError as exc:
-                            raise SaltRenderError(
-                                "Could not locate requisite of [{}] present in state with name [{}]".format(
-                                    req_key, chunk["name"]
-                                )
-                            )
-                        except TypeError:
-                            # On Python 2, the above req_val, being an OrderedDict, will raise a KeyError,
-                            # however on Python 3 it will raise a TypeError
-                            # This was found when running tests.unit.test_state.StateCompilerTestCase.test_render_error_on_invalid_requisite
-                            raise SaltRenderError(
-                                "Could not locate requisite of [{}] present in state with name [{}]".format(
-                                    req_key, chunk["name"]
-                                )
+                    req_key = next(iter(req))
+                    req_val = req[req_key]
+                    if req_val is not None and not isinstance(req_val, str) and chunks:
+                        # Such as {"file": {"test1": "test"}}
+                        raise SaltRenderError(
+                            "Could not locate requisite of [{}] present in state with name [{}]".format(
+                                req_key, chunks[0]["name"]
                             )
+                        )
+                    found = self._requisite_index(chunks).find(req_key, req_val)
                     if not found:
                         return "unmet", ()
+                    reqs[r_state].extend(found)
         fun_stats = set()
         for r_state, chunks in reqs.items():
             req_stats = set()
@@ -2822,6 +3315,7 @@ class State:
             preload = {"jid": self.jid}
             ev_func(ret, tag, preload=preload)
 
+    @_closing_check_shells
     def call_chunk(self, low, running, chunks):
         """
         Check if a chunk has any requires, execute the requires and then
@@ -2859,30 +3353,15 @@ class State:
                     if isinstance(req, str):
                         req = {"id": req}
                     req = trim_req(req)
-                    found = False
                     req_key = next(iter(req))
                     req_val = req[req_key]
-                    for chunk in chunks:
-                        if req_val is None:
-                            continue
-                        if req_key == "sls":
-                            # Allow requisite tracking of entire sls files
-                            if fnmatch.fnmatch(chunk["__sls__"], req_val):
-                                if requisite == "prereq":
-                                    chunk["__prereq__"] = True
-                                reqs.append(chunk)
-                                found = True
-                            continue
-                        if fnmatch.fnmatch(chunk["name"], req_val) or fnmatch.fnmatch(
-                            chunk["__id__"], req_val
-                        ):
-                            if req_key == "id" or chunk["state"] == req_key:
-                                if requisite == "prereq":
-                                    chunk["__prereq__"] = True
-                                elif requisite == "prerequired":
-                                    chunk["__prerequired__"] = True
-                                reqs.append(chunk)
-                                found = True
+                    found = self._requisite_index(chunks).find(req_key, req_val)
+                    for chunk in found:
+                        if requisite == "prereq":
+                            chunk["__prereq__"] = True
+                        elif requisite == "prerequired" and req_key != "sls":
+                            chunk["__prerequired__"] = True
+                        reqs.append(chunk)
                     if not found:
                         lost[requisite].append(req)
             if (
@@ -3089,6 +3568,7 @@ class State:
 
         return running
 
+    @_closing_check_shells
     def call_listen(self, chunks, running):
         """
         Find all of the listen routines and call the associated mod_watch runs
@@ -3191,28 +3671,50 @@ class State:
         """
         Process a high data call and ensure the defined states.
         """
+        chunks, errors = self.compile_high_chunks(high, orchestration_jid)
+        if errors:
+            return errors
+        return self.call_compiled(chunks)
+
+    def compile_high_chunks(self, high, orchestration_jid=None):
+        """
+        Reconcile, verify and compile high data into the low chunks to
+        execute. Return the chunks and the list of errors.
+
+        .. versionadded:: 3003
+        """
         errors = []
         # If there is extension data reconcile it
-        high, ext_errors = self.reconcile_extend(high)
+        with salt.utils.profile.phase("reconcile_extend"):
+            high, ext_errors = self.reconcile_extend(high)
         errors.extend(ext_errors)
-        errors.extend(self.verify_high(high))
+        with salt.utils.profile.phase("verify_high"):
+            errors.extend(self.verify_high(high))
         if errors:
-            return errors
-        high, req_in_errors = self.requisite_in(high)
+            return [], errors
+        with salt.utils.profile.phase("requisite_in"):
+            high, req_in_errors = self.requisite_in(high)
         errors.extend(req_in_errors)
         high = self.apply_exclude(high)
         # Verify that the high data is structurally sound
         if errors:
-            return errors
+            return [], errors
         # Compile and verify the raw chunks
-        chunks = self.compile_high_data(high, orchestration_jid)
+        with salt.utils.profile.phase("compile_high_data"):
+            chunks = self.compile_high_data(high, orchestration_jid)
+        return chunks, errors
 
-        # If there are extensions in the highstate, process them and update
-        # the low data chunks
-        if errors:
-            return errors
-        ret = self.call_chunks(chunks)
-        ret = self.call_listen(chunks, ret)
+    @_closing_check_shells
+    def call_compiled(self, chunks):
+        """
+        Execute the low chunks compiled by ``compile_high_chunks``
+
+        .. versionadded:: 3003
+        """
+        with salt.utils.profile.phase("call_chunks"):
+            ret = self.call_chunks(chunks)
+        with salt.utils.profile.phase("call_listen"):
+            ret = self.call_listen(chunks, ret)
 
         def _cleanup_accumulator_data():
             accum_data_path = os.path.join(
@@ -3386,6 +3888,16 @@ class LazyAvailStates:
             self._avail[saltenv] = self._hs.client.list_states(saltenv)
         return self._avail[saltenv]
 
+    def listed(self):
+        """
+        Return the lists of states of the environments listed so far
+        """
+        return {
+            saltenv: states
+            for saltenv, states in self._avail.items()
+            if states is not None
+        }
+
     def items(self):
         self._fill()
         ret = []
@@ -3956,17 +4468,18 @@ class BaseHighState:
             )
         else:
             try:
-                state = compile_template(
-                    fn_,
-                    self.state.rend,
-                    self.state.opts["renderer"],
-                    self.state.opts["renderer_blacklist"],
-                    self.state.opts["renderer_whitelist"],
-                    saltenv,
-                    sls,
-                    rendered_sls=mods,
-                    context=context,
-                )
+                with salt.utils.profile.phase("sls {}:{}".format(saltenv, sls)):
+                    state = compile_template(
+                        fn_,
+                        self.state.rend,
+                        self.state.opts["renderer"],
+                        self.state.opts["renderer_blacklist"],
+                        self.state.opts["renderer_whitelist"],
+                        saltenv,
+                        sls,
+                        rendered_sls=mods,
+                        context=context,
+                    )
             except SaltRenderError as exc:
                 msg = "Rendering SLS '{}:{}' failed: {}".format(saltenv, sls, exc)
                 log.critical(msg)
@@ -4380,6 +4893,129 @@ class BaseHighState:
                     ret_matches[env].append(sls)
         return ret_matches
 
+    def _compile_cache_path(self, exclude, whitelist):
+        """
+        Return the path of the compiled highstate cache file for the given
+        arguments, or None if they cannot be digested
+        """
+        key = _digest(
+            [
+                exclude,
+                whitelist,
+                self.opts.get("saltenv"),
+                self.opts.get("pillarenv"),
+                self.opts.get("test"),
+            ]
+        )
+        if key is None:
+            return None
+        return os.path.join(
+            self.opts["cachedir"], "highstate_compiled", "{}.p".format(key)
+        )
+
+    def _compile_cache_data(self):
+        """
+        Return a digest of what the rendering of the highstate depends on
+        besides the fileserver: the Salt version, the options, the grains and
+        the pillar
+        """
+        opts = self.state.opts
+        return _digest(
+            [
+                salt.version.__version__,
+                {
+                    key: val
+                    for key, val in opts.items()
+                    if key in salt.config.VALID_OPTS and key not in ("grains", "pillar")
+                },
+                opts.get("grains"),
+                opts.get("pillar"),
+            ]
+        )
+
+    def _compile_cache_sources(self):
+        """
+        Return the environments and the master_tops data the highstate is
+        compiled from
+        """
+        return {
+            "envs": self._get_envs(),
+            "master_tops": _digest(self._master_tops()),
+        }
+
+    def _load_compiled(self, path):
+        """
+        Return the low chunks of the compiled highstate cached in ``path``, or
+        None if the files, the state listings, the master_tops data, the
+        options, the grains or the pillar it was compiled from changed
+        """
+        try:
+            with salt.utils.files.fopen(path, "rb") as fp_:
+                entry = self.serial.load(fp_)
+        except OSError:
+            return None
+        except Exception as exc:  # pylint: disable=broad-except
+            log.warning("Unable to read the compiled highstate %s: %s", path, exc)
+            return None
+        data = self._compile_cache_data()
+        if data is None or entry.get("data") != data:
+            log.debug("The options, grains or pillar changed, rendering highstate")
+            return None
+        if entry.get("sources") != self._compile_cache_sources():
+            log.debug("The environments or master_tops changed, rendering highstate")
+            return None
+        for saltenv, digest in entry["avail"].items():
+            if _digest(self.avail[saltenv]) != digest:
+                log.debug("The states of saltenv '%s' changed", saltenv)
+                return None
+        for fn_, saltenv, hsum in entry["files"]:
+            if salt.fileclient.hash_sum(self.client.hash_file(fn_, saltenv)) != hsum:
+                log.debug("%s changed in saltenv '%s'", fn_, saltenv)
+                return None
+        self.load_dynamic(entry["matches"])
+        if self._compile_cache_data() != data:
+            # The synced grains changed
+            return None
+        log.debug("Using the compiled highstate cached in %s", path)
+        return entry["chunks"]
+
+    def _store_compiled(self, path, data, matches, files, chunks):
+        """
+        Cache the low chunks of the compiled highstate in ``path``, along with
+        what they were compiled from
+        """
+        entry = {
+            "data": data,
+            "sources": self._compile_cache_sources(),
+            "avail": {
+                saltenv: _digest(states)
+                for saltenv, states in self.avail.listed().items()
+            },
+            "files": sorted(
+                [fn_, saltenv, hsum] for (fn_, saltenv), hsum in files.items()
+            ),
+            "matches": list(matches),
+            "chunks": chunks,
+        }
+        try:
+            cache_dir = os.path.dirname(path)
+            if not os.path.isdir(cache_dir):
+                os.makedirs(cache_dir)
+            with salt.utils.files.set_umask(0o077):
+                with salt.utils.atomicfile.atomic_open(path, "wb") as fp_:
+                    self.serial.dump(entry, fp_)
+        except TypeError:
+            # Can't serialize pydsl
+            pass
+        except OSError as exc:
+            log.error("Unable to write the compiled highstate %s: %s", path, exc)
+
+    def _call_compiled(self, chunks, orchestration_jid=None):
+        if orchestration_jid is not None:
+            for chunk in chunks:
+                chunk["__orchestration_jid__"] = orchestration_jid
+        return self.state.call_compiled(chunks)
+
     def call_highstate(
         self,
         exclude=None,
@@ -4388,9 +5024,17 @@ class BaseHighState:
         force=False,
         whitelist=None,
         orchestration_jid=None,
+        no_cache=False,
     ):
         """
         Run the sequence to execute the salt highstate for this minion
+
+        .. versionchanged:: 3003
+            When :conf_minion:`state_compile_cache` is enabled, the low chunks
+            compiled from the highstate are cached and executed directly
+            while none of the files, options, grains and pillar they were
+            compiled from changed. Pass ``no_cache=True`` to render the
+            highstate anyway.
         """
         # Check that top file exists
         tag_name = "no_|-states_|-states_|-None"
@@ -4410,10 +5054,21 @@ class BaseHighState:
                 with salt.utils.files.fopen(cfn, "rb") as fp_:
                     high = self.serial.load(fp_)
                     return self.state.call_high(high, orchestration_jid)
+        compiled_path = compiled_data = None
+        if self.opts.get("state_compile_cache") and self._check_pillar(force):
+            compiled_path = self._compile_cache_path(exclude, whitelist)
+            if compiled_path and not no_cache:
+                with salt.utils.profile.phase("compiled_cache"):
+                    chunks = self._load_compiled(compiled_path)
+                if chunks is not None:
+                    return self._call_compiled(chunks, orchestration_jid)
         # File exists so continue
         err = []
+        # The hashes of the files the highstate is rendered from
+        files = {}
         try:
-            top = self.get_top()
+            with salt.fileclient.record_hashes(files), salt.utils.profile.phase("top"):
+                top = self.get_top()
         except SaltRenderError as err:
             ret[tag_name]["comment"] = "Unable to render top file: "
             ret[tag_name]["comment"] += str(err.error)
@@ -4423,7 +5078,8 @@ class BaseHighState:
             err.append(trb)
             return err
         err += self.verify_tops(top)
-        matches = self.top_matches(top)
+        with salt.utils.profile.phase("top_matches"):
+            matches = self.top_matches(top)
         if not matches:
             msg = (
                 "No Top file or master_tops data matches found. Please see "
@@ -4432,12 +5088,18 @@ class BaseHighState:
             ret[tag_name]["comment"] = msg
             return ret
         matches = self.matches_whitelist(matches, whitelist)
-        self.load_dynamic(matches)
+        with salt.utils.profile.phase("load_dynamic"):
+            self.load_dynamic(matches)
+        if compiled_path:
+            compiled_data = self._compile_cache_data()
         if not self._check_pillar(force):
             err += ["Pillar failed to render with the following messages:"]
             err += self.state.opts["pillar"]["_errors"]
         else:
-            high, errors = self.render_highstate(matches)
+            with salt.fileclient.record_hashes(files), salt.utils.profile.phase(
+                "render"
+            ):
+                high, errors = self.render_highstate(matches)
             if exclude:
                 if isinstance(exclude, str):
                     exclude = exclude.split(",")
@@ -4468,7 +5130,13 @@ class BaseHighState:
             except OSError:
                 log.error('Unable to write to "state.highstate" cache file %s', cfn)
 
-        return self.state.call_high(high, orchestration_jid)
+        if compiled_data is None:
+            return self.state.call_high(high, orchestration_jid)
+        chunks, errors = self.state.compile_high_chunks(high)
+        if errors:
+            return errors
+        self._store_compiled(compiled_path, compiled_data, matches, files, chunks)
+        return self._call_compiled(chunks, orchestration_jid)
 
     def compile_highstate(self):
         """
@@ -10,6 +10,7 @@ import time
 
 import salt.utils.data
 import salt.utils.files
+import salt.utils.profile
 import salt.utils.sanitizers
 import salt.utils.stringio
 import salt.utils.versions
@@ -98,11 +99,13 @@ def compile_template(
         if argline:
             render_kwargs["argline"] = argline
         start = time.time()
-        ret = render(input_data, saltenv, sls, **render_kwargs)
+        renderer = render.__module__.split(".")[-1]
+        with salt.utils.profile.phase("render {}".format(renderer)):
+            ret = render(input_data, saltenv, sls, **render_kwargs)
         log.profile(
             "Time (in seconds) to render '%s' using '%s' renderer: %s",
             template,
-            render.__module__.split(".")[-1],
+            renderer,
             time.time() - start,
         )
         if ret is None:
@@ -22,6 +22,7 @@ import salt.transport.frame
 
 # Import Salt libs
 import salt.utils.msgpack
+import salt.utils.stringutils
 from salt.ext import six
 from salt.ext.tornado.ioloop import IOLoop
 from salt.ext.tornado.ioloop import TimeoutError as TornadoTimeoutError
@@ -512,6 +513,9 @@ class IPCMessagePublisher(object):
         self.io_loop = io_loop or IOLoop.current()
         self._closing = False
         self.streams = set()
+        # Tag prefixes declared by the subscribers which only want the
+        # messages whose tag starts with one of them
+        self.prefixes = {}
 
     def start(self):
         """
@@ -543,23 +547,72 @@ class IPCMessagePublisher(object):
             yield stream.write(pack)
         except StreamClosedError:
             log.trace("Client disconnected from IPC %s", self.socket_path)
-            self.streams.discard(stream)
+            self._discard(stream)
         except Exception as exc:  # pylint: disable=broad-except
             log.error("Exception occurred while handling stream: %s", exc)
             if not stream.closed():
                 stream.close()
-            self.streams.discard(stream)
+            self._discard(stream)
 
-    def publish(self, msg):
+    def _discard(self, stream):
+        self.streams.discard(stream)
+        self.prefixes.pop(stream, None)
+
+    @salt.ext.tornado.gen.coroutine
+    def _read_subscriptions(self, stream):
+        """
+        Read the tag prefixes sent by a subscriber. Subscribers which never
+        send any receive all the messages.
+        """
+        if salt.utils.msgpack.version >= (0, 5, 2):
+            unpacker = salt.utils.msgpack.Unpacker(raw=False)
+        else:
+            unpacker = salt.utils.msgpack.Unpacker(encoding="utf-8")
+        try:
+            while not stream.closed():
+                wire_bytes = yield stream.read_bytes(4096, partial=True)
+                unpacker.feed(wire_bytes)
+                for framed_msg in unpacker:
+                    prefixes = framed_msg["head"].get("subscribe")
+                    if prefixes:
+                        self.prefixes[stream] = tuple(
+                            salt.utils.stringutils.to_bytes(prefix)
+                            for prefix in prefixes
+                        )
+                    else:
+                        self.prefixes.pop(stream, None)
+        except StreamClosedError:
+            pass
+        except Exception as exc:  # pylint: disable=broad-except
+            log.error("Exception occurred while reading subscriptions: %s", exc)
+            self.prefixes.pop(stream, None)
+
+    def publish(self, msg, tag=None):
         """
         Send message to all connected sockets
+
+        When the ``tag`` of the message is given, it is only sent to the
+        sockets which subscribed to a prefix of it, or to no prefix at all.
+        The message is framed once and the same bytes are written to all the
+        sockets.
         """
         if not self.streams:
             return
 
+        streams = self.streams
+        if tag is not None and self.prefixes:
+            tag = salt.utils.stringutils.to_bytes(tag)
+            streams = [
+                stream
+                for stream in self.streams
+                if stream not in self.prefixes or tag.startswith(self.prefixes[stream])
+            ]
+            if not streams:
+                return
+
         pack = salt.transport.frame.frame_msg_ipc(msg, raw_body=True)
 
-        for stream in self.streams:
+        for stream in streams:
             self.io_loop.spawn_callback(self._write, stream, pack)
 
     def handle_connection(self, connection, address):
@@ -577,9 +630,10 @@ class IPCMessagePublisher(object):
             self.streams.add(stream)
 
             def discard_after_closed():
-                self.streams.discard(stream)
+                self._discard(stream)
 
             stream.set_close_callback(discard_after_closed)
+            self.io_loop.spawn_callback(self._read_subscriptions, stream)
         except Exception as exc:  # pylint: disable=broad-except
             log.error("IPC streaming error: %s", exc)
 
@@ -595,6 +649,7 @@ class IPCMessagePublisher(object):
         for stream in self.streams:
             stream.close()
         self.streams.clear()
+        self.prefixes.clear()
         if hasattr(self.sock, "close"):
             self.sock.close()
 
@@ -649,6 +704,31 @@ class IPCMessageSubscriber(IPCClient):
         self._read_stream_future = None
         self._saved_data = []
         self._read_in_progress = Lock()
+        self._prefixes = None
+        self._subscribed_stream = None
+
+    def subscribe(self, prefixes):
+        """
+        Only receive the messages published with a tag starting with one of
+        the given prefixes. An empty list of prefixes subscribes to all the
+        messages again.
+
+        The prefixes are sent to the publisher before the next read, and again
+        after every reconnection. Publishers which do not know about prefixes
+        keep on sending all the messages.
+        """
+        self._prefixes = list(prefixes)
+        self._subscribed_stream = None
+
+    @salt.ext.tornado.gen.coroutine
+    def _send_subscription(self):
+        if self._prefixes is None or self._subscribed_stream is self.stream:
+            return
+        self._subscribed_stream = self.stream
+        pack = salt.transport.frame.frame_msg_ipc(
+            None, header={"subscribe": self._prefixes}
+        )
+        yield self.stream.write(pack)
 
     @salt.ext.tornado.gen.coroutine
     def _read(self, timeout, callback=None):
@@ -660,6 +740,7 @@ class IPCMessageSubscriber(IPCClient):
         exc_to_raise = None
         ret = None
         try:
+            yield self._send_subscription()
             while True:
                 if self._read_stream_future is None:
                     self._read_stream_future = self.stream.read_bytes(
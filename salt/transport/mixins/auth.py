@@ -4,12 +4,14 @@
 from __future__ import absolute_import, print_function, unicode_literals
 
 import binascii
+import collections
 import ctypes
 import hashlib
 import logging
 import multiprocessing
 import os
 import shutil
+import time
 
 # Import Salt Libs
 import salt.crypt
@@ -19,6 +21,7 @@ import salt.payload
 import salt.transport.frame
 import salt.utils.event
 import salt.utils.files
+import salt.utils.metrics
 import salt.utils.minions
 import salt.utils.stringutils
 import salt.utils.verify
@@ -41,6 +44,9 @@ except ImportError:
 
 log = logging.getLogger(__name__)
 
+# Number of parsed minion public keys kept by each master worker
+PUB_KEY_CACHE_SIZE = 10000
+
 
 # TODO: rename
 class AESPubClientMixin(object):
@@ -69,22 +75,88 @@ class AESPubClientMixin(object):
             try:
                 payload["load"] = self.auth.crypticle.loads(payload["load"])
             except salt.crypt.AuthenticationError:
-                yield self.auth.authenticate()
+                yield self.auth.reauthenticate(payload["load"])
                 payload["load"] = self.auth.crypticle.loads(payload["load"])
 
         raise salt.ext.tornado.gen.Return(payload)
 
 
 # TODO: rename?
+class AESPubServerMixin(object):
+    """
+    Encrypt and sign the publications of the master
+    """
+
+    # The Crypticle and the signing key of the current AES key, shared by the
+    # publisher channels of this process: ((secret, key path), crypticle, key)
+    _pub_crypt = None
+
+    def _pub_crypticle(self):
+        """
+        Return the Crypticle encrypting the publications with the current AES
+        key and the private key signing them, only created again once the AES
+        key rotates
+        """
+        secret = salt.master.SMaster.secrets["aes"]["secret"].value
+        key_path = None
+        if self.opts["sign_pub_messages"]:
+            key_path = os.path.join(self.opts["pki_dir"], "master.pem")
+        cached = AESPubServerMixin._pub_crypt
+        if cached is None or cached[0] != (secret, key_path):
+            key = None
+            if key_path is not None:
+                key = salt.crypt.get_rsa_key(key_path, None)
+            cached = ((secret, key_path), salt.crypt.Crypticle(self.opts, secret), key)
+            AESPubServerMixin._pub_crypt = cached
+        return cached[1], cached[2]
+
+    def _encode_publish(self, load):
+        """
+        Return the serialized payload publishing ``load`` to the minions,
+        recording the time spent encrypting and signing it when
+        ``master_stats`` is set
+        """
+        start = time.time()
+        crypticle, key = self._pub_crypticle()
+        payload = {"enc": "aes", "load": crypticle.dumps(load)}
+        signed = encrypted = time.time()
+        if key is not None:
+            log.debug("Signing data packet")
+            payload["sig"] = salt.crypt.sign_message_with_key(key, payload["load"])
+            signed = time.time()
+        payload = self.serial.dumps(payload)
+        if self.opts.get("master_stats"):
+            salt.utils.metrics.observe_stage(
+                "publish_encode", encrypted - start + time.time() - signed
+            )
+            if key is not None:
+                salt.utils.metrics.observe_stage("publish_sign", signed - encrypted)
+        return payload
+
+
 class AESReqServerMixin(object):
     """
     Mixin to house all of the master-side auth crypto
     """
 
+    # Semaphore shared by the master workers, bounding how many of them
+    # authenticate minions at the same time when ``auth_workers`` is set
+    _auth_slots = None
+
+    # Parsed minion public keys, and the signatures of the AES keys and of the
+    # master public key sent in the auth replies by this worker
+    _pub_key_cache = None
+    _aes_sigs = None
+    _pub_sig = None
+
     def pre_fork(self, _):
         """
         Pre-fork we need to create the zmq router device
         """
+        if self.opts.get("auth_workers", 0) > 0:
+            self._auth_slots = multiprocessing.BoundedSemaphore(
+                self.opts["auth_workers"]
+            )
         if "aes" not in salt.master.SMaster.secrets:
             # TODO: This is still needed only for the unit tests
             # 'tcp_test.py' and 'zeromq_test.py'. Fix that. In normal
@@ -122,6 +194,47 @@ class AESReqServerMixin(object):
 
         self.master_key = salt.crypt.MasterKeys(self.opts)
 
+    def _minion_pub(self, pubfn):
+        """
+        Return the text of a minion public key file and the key parsed from
+        it. Both are cached until the file changes, sparing the read and the
+        parsing of the key on each request of the minion.
+        """
+        if self._pub_key_cache is None:
+            self._pub_key_cache = collections.OrderedDict()
+        cache = self._pub_key_cache
+        stat = os.stat(pubfn)
+        stamp = (stat.st_ino, stat.st_size, stat.st_mtime)
+        cached = cache.pop(pubfn, None)
+        if cached is None or cached[0] != stamp:
+            with salt.utils.files.fopen(pubfn, "r") as fp_:
+                text = fp_.read()
+            cached = (stamp, text, salt.crypt.load_rsa_pub_key(text))
+            if len(cache) >= PUB_KEY_CACHE_SIZE:
+                cache.popitem(last=False)
+        cache[pubfn] = cached
+        return cached[1], cached[2]
+
+    def _sign_aes(self, aes):
+        """
+        Return the signature of the digest of ``aes`` sent in the auth reply.
+        The signatures of the current and of the next AES keys of the master
+        are computed once for all the minions receiving them.
+        """
+        secrets = salt.master.SMaster.secrets["aes"]
+        shared = [secrets[name].value for name in ("secret", "next") if name in secrets]
+        sigs = dict(
+            (key, sig) for key, sig in (self._aes_sigs or {}).items() if key in shared
+        )
+        sig = sigs.get(aes)
+        if sig is None:
+            digest = salt.utils.stringutils.to_bytes(hashlib.sha256(aes).hexdigest())
+            sig = salt.crypt.private_encrypt(self.master_key.key, digest)
+            if aes in shared:
+                sigs[aes] = sig
+        self._aes_sigs = sigs
+        return sig
+
     def _encrypt_private(self, ret, dictkey, target):
         """
         The server equivalent of ReqChannel.crypted_transfer_decode_dictentry
@@ -131,7 +244,7 @@ class AESReqServerMixin(object):
         key = salt.crypt.Crypticle.generate_key_string()
         pcrypt = salt.crypt.Crypticle(self.opts, key)
         try:
-            pub = salt.crypt.get_rsa_pub_key(pubfn)
+            pub = self._minion_pub(pubfn)[1]
         except (ValueError, IndexError, TypeError):
             return self.crypticle.dumps({})
         except IOError:
@@ -176,6 +289,38 @@ class AESReqServerMixin(object):
         return payload
 
     def _auth(self, load):
+        """
+        Authenticate the client, unless ``auth_workers`` master workers are
+        already authenticating minions. The minion is then told that the
+        master is busy and retries later, keeping the other workers free to
+        handle the requests of the authenticated minions during auth storms.
+        The clients which do not send ``busy_retry`` in the load would give up
+        on a busy reply, their authentication waits for a free slot instead.
+        """
+        if self._auth_slots is None:
+            return self._auth_minion(load)
+        start = time.time()
+        if not self._auth_slots.acquire(False):
+            if load.get("busy_retry"):
+                log.debug(
+                    "Deferring the authentication of %s, %s workers are already "
+                    "authenticating minions",
+                    load.get("id"),
+                    self.opts["auth_workers"],
+                )
+                if self.opts.get("master_stats"):
+                    salt.utils.metrics.observe_stage("auth_busy", time.time() - start)
+                return {"enc": "clear", "load": {"ret": "busy"}}
+            # Older clients do not retry on a busy reply
+            self._auth_slots.acquire()
+        try:
+            return self._auth_minion(load)
+        finally:
+            self._auth_slots.release()
+            if self.opts.get("master_stats"):
+                salt.utils.metrics.observe_stage("auth", time.time() - start)
+
+    def _auth_minion(self, load):
         """
         Authenticate the client, use the sent public key to encrypt the AES key
         which was generated at start up.
@@ -262,28 +407,31 @@ class AESReqServerMixin(object):
 
         elif os.path.isfile(pubfn):
             # The key has been accepted, check it
-            with salt.utils.files.fopen(pubfn, "r") as pubfn_handle:
-                if pubfn_handle.read().strip() != load["pub"].strip():
-                    log.error(
-                        "Authentication attempt from %s failed, the public "
-                        "keys did not match. This may be an attempt to compromise "
-                        "the Salt cluster.",
-                        load["id"],
-                    )
-                    # put denied minion key into minions_denied
-                    with salt.utils.files.fopen(pubfn_denied, "w+") as fp_:
-                        fp_.write(load["pub"])
-                    eload = {
-                        "result": False,
-                        "id": load["id"],
-                        "act": "denied",
-                        "pub": load["pub"],
-                    }
-                    if self.opts.get("auth_events") is True:
-                        self.event.fire_event(
-                            eload, salt.utils.event.tagify(prefix="auth")
-                        )
-                    return {"enc": "clear", "load": {"ret": False}}
+            try:
+                accepted = self._minion_pub(pubfn)[0]
+            except (ValueError, IndexError, TypeError):
+                # Corrupt keys are reported when the reply is encrypted
+                with salt.utils.files.fopen(pubfn, "r") as pubfn_handle:
+                    accepted = pubfn_handle.read()
+            if accepted.strip() != load["pub"].strip():
+                log.error(
+                    "Authentication attempt from %s failed, the public "
+                    "keys did not match. This may be an attempt to compromise "
+                    "the Salt cluster.",
+                    load["id"],
+                )
+                # put denied minion key into minions_denied
+                with salt.utils.files.fopen(pubfn_denied, "w+") as fp_:
+                    fp_.write(load["pub"])
+                eload = {
+                    "result": False,
+                    "id": load["id"],
+                    "act": "denied",
+                    "pub": load["pub"],
+                }
+                if self.opts.get("auth_events") is True:
+                    self.event.fire_event(eload, salt.utils.event.tagify(prefix="auth"))
+                return {"enc": "clear", "load": {"ret": False}}
 
         elif not os.path.isfile(pubfn_pend):
             # The key has not been accepted, this is a new minion
@@ -459,7 +607,7 @@ class AESReqServerMixin(object):
         # The key payload may sometimes be corrupt when using auto-accept
         # and an empty request comes in
         try:
-            pub = salt.crypt.get_rsa_pub_key(pubfn)
+            pub = self._minion_pub(pubfn)[1]
         except (ValueError, IndexError, TypeError) as err:
             log.error('Corrupt public key "%s": %s', pubfn, err)
             return {"enc": "clear", "load": {"ret": False}}
@@ -482,18 +630,24 @@ class AESReqServerMixin(object):
                 ret.update({"pub_sig": self.master_key.pubkey_signature()})
             else:
                 # the master has its own signing-keypair, compute the master.pub's
-                # signature and append that to the auth-reply
-
-                # get the key_pass for the signing key
-                key_pass = salt.utils.sdb.sdb_get(
-                    self.opts["signing_key_pass"], self.opts
-                )
+                # signature and append that to the auth-reply, computed once
+                # per worker
+                cached = self._pub_sig
+                if cached is None or cached[0] != ret["pub_key"]:
+                    # get the key_pass for the signing key
+                    key_pass = salt.utils.sdb.sdb_get(
+                        self.opts["signing_key_pass"], self.opts
+                    )
 
-                log.debug("Signing master public key before sending")
-                pub_sign = salt.crypt.sign_message(
-                    self.master_key.get_sign_paths()[1], ret["pub_key"], key_pass
-                )
-                ret.update({"pub_sig": binascii.b2a_base64(pub_sign)})
+                    log.debug("Signing master public key before sending")
+                    pub_sign = salt.crypt.sign_message(
+                        self.master_key.get_sign_paths()[1], ret["pub_key"], key_pass
+                    )
+                    cached = self._pub_sig = (
+                        ret["pub_key"],
+                        binascii.b2a_base64(pub_sign),
+                    )
+                ret.update({"pub_sig": cached[1]})
 
         if not HAS_M2:
             mcipher = PKCS1_OAEP.new(self.master_key.key)
@@ -544,8 +698,18 @@ class AESReqServerMixin(object):
             else:
                 ret["aes"] = cipher.encrypt(aes)
         # Be aggressive about the signature
-        digest = salt.utils.stringutils.to_bytes(hashlib.sha256(aes).hexdigest())
-        ret["sig"] = salt.crypt.private_encrypt(self.master_key.key, digest)
+        ret["sig"] = self._sign_aes(aes)
+        if self.opts.get("rotate_aes_key_spread"):
+            ret["rotate_spread"] = self.opts["rotate_aes_key_spread"]
+        if "next" in salt.master.SMaster.secrets["aes"]:
+            # Send the key the master rotates to ahead, so that the minion
+            # does not need to authenticate again to decrypt the publications
+            next_aes = salt.master.SMaster.secrets["aes"]["next"].value
+            if HAS_M2:
+                ret["next_aes"] = pub.public_encrypt(next_aes, RSA.pkcs1_oaep_padding)
+            else:
+                ret["next_aes"] = cipher.encrypt(next_aes)
+            ret["next_sig"] = self._sign_aes(next_aes)
         eload = {"result": True, "act": "accept", "id": load["id"], "pub": load["pub"]}
         if self.opts.get("auth_events") is True:
             self.event.fire_event(eload, salt.utils.event.tagify(prefix="auth"))
@@ -426,8 +426,13 @@ class AsyncTCPReqChannel(salt.transport.client.ReqChannel):
             ret = yield _do_transfer()
             raise salt.ext.tornado.gen.Return(ret)
         except salt.crypt.AuthenticationError:
-            yield self.auth.authenticate()
-            ret = yield _do_transfer()
+            yield self.auth.reauthenticate()
+            try:
+                ret = yield _do_transfer()
+            except salt.crypt.AuthenticationError:
+                # The AES key sent ahead by the master did not match
+                yield self.auth.authenticate()
+                ret = yield _do_transfer()
             raise salt.ext.tornado.gen.Return(ret)
 
     @salt.ext.tornado.gen.coroutine
@@ -755,9 +760,10 @@ class TCPReqServerChannel(
         )
 
     @salt.ext.tornado.gen.coroutine
-    def handle_message(self, stream, header, payload):
+    def handle_message(self, stream, header, payload, size=None):
         """
-        Handle incoming messages from underlying tcp streams
+        Handle incoming messages from underlying tcp streams, of ``size``
+        bytes on the wire if known
         """
         try:
             try:
@@ -803,6 +809,8 @@ class TCPReqServerChannel(
                 )
                 raise salt.ext.tornado.gen.Return()
 
+            if size is not None:
+                payload["size"] = size
             # TODO: test
             try:
                 ret, req_opts = yield self.payload_handler(payload)
@@ -874,6 +882,8 @@ class SaltMessageServer(salt.ext.tornado.tcpserver.TCPServer, object):
         log.trace("Req client %s connected", address)
         self.clients.append((stream, address))
         unpacker = salt.utils.msgpack.Unpacker()
+        # The offset in the stream of the end of the last message
+        offset = 0
         try:
             while True:
                 wire_bytes = yield stream.read_bytes(4096, partial=True)
@@ -884,9 +894,15 @@ class SaltMessageServer(salt.ext.tornado.tcpserver.TCPServer, object):
                             framed_msg
                         )
                     header = framed_msg["head"]
+                    end = unpacker.tell()
                     self.io_loop.spawn_callback(
-                        self.message_handler, stream, header, framed_msg["body"]
+                        self.message_handler,
+                        stream,
+                        header,
+                        framed_msg["body"],
+                        size=end - offset,
                     )
+                    offset = end
 
         except salt.ext.tornado.iostream.StreamClosedError:
             log.trace("req client disconnected %s", address)
@@ -1587,7 +1603,10 @@ class PubServer(salt.ext.tornado.tcpserver.TCPServer, object):
         log.trace("TCP PubServer finished publishing payload")
 
 
-class TCPPubServerChannel(salt.transport.server.PubServerChannel):
+class TCPPubServerChannel(
+    salt.transport.mixins.auth.AESPubServerMixin,
+    salt.transport.server.PubServerChannel,
+):
     # TODO: opts!
     # Based on default used in salt.ext.tornado.netutil.bind_sockets()
     backlog = 128
@@ -1667,16 +1686,7 @@ class TCPPubServerChannel(salt.transport.server.PubServerChannel):
         """
         Publish "load" to minions
         """
-        payload = {"enc": "aes"}
-
-        crypticle = salt.crypt.Crypticle(
-            self.opts, salt.master.SMaster.secrets["aes"]["secret"].value
-        )
-        payload["load"] = crypticle.dumps(load)
-        if self.opts["sign_pub_messages"]:
-            master_pem_path = os.path.join(self.opts["pki_dir"], "master.pem")
-            log.debug("Signing data packet")
-            payload["sig"] = salt.crypt.sign_message(master_pem_path, payload["load"])
+        payload = self._encode_publish(load)
         # Use the Salt IPC server
         if self.opts.get("ipc_mode", "") == "tcp":
             pull_uri = int(self.opts.get("tcp_master_publish_pull", 4514))
@@ -1689,7 +1699,7 @@ class TCPPubServerChannel(salt.transport.server.PubServerChannel):
         )
         pub_sock.connect()
 
-        int_payload = {"payload": self.serial.dumps(payload)}
+        int_payload = {"payload": payload}
 
         # add some targeting stuff for lists only (for now)
         if load["tgt_type"] == "list" and not self.opts.get("order_masters", False):
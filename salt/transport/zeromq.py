@@ -11,6 +11,7 @@ import os
 import signal
 import sys
 import threading
+import time
 import weakref
 from random import randint
 
@@ -27,6 +28,7 @@ import salt.transport.mixins.auth
 import salt.transport.server
 import salt.utils.event
 import salt.utils.files
+import salt.utils.metrics
 import salt.utils.minions
 import salt.utils.process
 import salt.utils.stringutils
@@ -416,8 +418,13 @@ class AsyncZeroMQReqChannel(salt.transport.client.ReqChannel):
             ret = yield _do_transfer()
         except salt.crypt.AuthenticationError:
             # If auth error, return control back to the caller, continue when authentication succeeds
-            yield self.auth.authenticate()
-            ret = yield _do_transfer()
+            yield self.auth.reauthenticate()
+            try:
+                ret = yield _do_transfer()
+            except salt.crypt.AuthenticationError:
+                # The AES key sent ahead by the master did not match
+                yield self.auth.authenticate()
+                ret = yield _do_transfer()
         raise salt.ext.tornado.gen.Return(ret)
 
     @salt.ext.tornado.gen.coroutine
@@ -819,6 +826,8 @@ class ZeroMQReqServerChannel(
 
         :param dict payload: A payload to process
         """
+        # The size of the request on the wire, for the master stats
+        size = len(payload[0])
         try:
             payload = self.serial.loads(payload[0])
             payload = self._decode_payload(payload)
@@ -865,6 +874,7 @@ class ZeroMQReqServerChannel(
             stream.send(self.serial.dumps(self._auth(payload["load"])))
             raise salt.ext.tornado.gen.Return()
 
+        payload["size"] = size
         # TODO: test
         try:
             # Take the payload_handler function that was registered when we created the channel
@@ -933,7 +943,10 @@ def _set_tcp_keepalive(zmq_socket, opts):
             zmq_socket.setsockopt(zmq.TCP_KEEPALIVE_INTVL, opts["tcp_keepalive_intvl"])
 
 
-class ZeroMQPubServerChannel(salt.transport.server.PubServerChannel):
+class ZeroMQPubServerChannel(
+    salt.transport.mixins.auth.AESPubServerMixin,
+    salt.transport.server.PubServerChannel,
+):
     """
     Encapsulate synchronous operations for a publisher channel
     """
@@ -1014,19 +1027,16 @@ class ZeroMQPubServerChannel(salt.transport.server.PubServerChannel):
                 # SIGUSR1 gracefully so we don't choke and die horribly
                 try:
                     log.debug("Publish daemon getting data from puller %s", pull_uri)
-                    package = pull_sock.recv()
-                    log.debug("Publish daemon received payload. size=%d", len(package))
-
-                    unpacked_package = salt.payload.unpackage(package)
-                    unpacked_package = salt.transport.frame.decode_embedded_strs(
-                        unpacked_package
-                    )
-                    payload = unpacked_package["payload"]
-                    log.trace("Accepted unpacked package from puller")
+                    # The payload is sent to the minions as is, followed by
+                    # the serialized list of the targeted minions when the
+                    # publication is filtered
+                    frames = pull_sock.recv_multipart()
+                    payload = frames[0]
+                    log.debug("Publish daemon received payload. size=%d", len(payload))
                     if self.opts["zmq_filtering"]:
                         # if you have a specific topic list, use that
-                        if "topic_lst" in unpacked_package:
-                            for topic in unpacked_package["topic_lst"]:
+                        if len(frames) > 1:
+                            for topic in self.serial.loads(frames[1]):
                                 log.trace(
                                     "Sending filtered data over publisher %s", pub_uri
                                 )
@@ -1138,20 +1148,8 @@ class ZeroMQPubServerChannel(salt.transport.server.PubServerChannel):
 
         :param dict load: A load to be sent across the wire to minions
         """
-        payload = {"enc": "aes"}
-        crypticle = salt.crypt.Crypticle(
-            self.opts, salt.master.SMaster.secrets["aes"]["secret"].value
-        )
-        payload["load"] = crypticle.dumps(load)
-        if self.opts["sign_pub_messages"]:
-            master_pem_path = os.path.join(self.opts["pki_dir"], "master.pem")
-            log.debug("Signing data packet")
-            payload["sig"] = salt.crypt.sign_message(master_pem_path, payload["load"])
-        int_payload = {"payload": self.serial.dumps(payload)}
-
-        # add some targeting stuff for lists only (for now)
-        if load["tgt_type"] == "list":
-            int_payload["topic_lst"] = load["tgt"]
+        payload = self._encode_publish(load)
+        frames = [payload]
 
         # If zmq_filtering is enabled, target matching has to happen master side
         match_targets = ["pcre", "glob", "list"]
@@ -1162,16 +1160,20 @@ class ZeroMQPubServerChannel(salt.transport.server.PubServerChannel):
 
             log.debug("Publish Side Match: %s", match_ids)
             # Send list of miions thru so zmq can target them
-            int_payload["topic_lst"] = match_ids
-        payload = self.serial.dumps(int_payload)
+            frames.append(self.serial.dumps(match_ids))
         log.debug(
             "Sending payload to publish daemon. jid=%s size=%d",
             load.get("jid", None),
             len(payload),
         )
+        start = time.time()
         if not self.pub_sock:
             self.pub_connect()
-        self.pub_sock.send(payload)
+        self.pub_sock.send_multipart(frames)
+        if self.opts.get("master_stats"):
+            salt.utils.metrics.observe_stage(
+                "publish_send", time.time() - start, size=len(payload)
+            )
         log.debug("Sent payload to publish daemon.")
 
 
@@ -0,0 +1,191 @@
+"""
+Persistent shells running the ``onlyif`` and ``unless`` commands of the
+states, sparing a shell process per command.
+
+Each command runs in a subshell of one of the persistent shells, with its
+input and output redirected to ``/dev/null``, so that it cannot change the
+shell it runs in. The shells only write the exit codes of the commands.
+
+.. versionadded:: 3003
+"""
+
+import collections
+import logging
+import os
+import shlex
+import subprocess
+
+import salt.utils.platform
+import salt.utils.stringutils
+from salt.exceptions import CommandExecutionError
+
+log = logging.getLogger(__name__)
+
+# The locale set for the commands, as cmd.run does by default
+_LOCALE_VARS = (
+    "LANGUAGE",
+    "LC_CTYPE",
+    "LC_NUMERIC",
+    "LC_TIME",
+    "LC_COLLATE",
+    "LC_MONETARY",
+    "LC_MESSAGES",
+    "LC_PAPER",
+    "LC_NAME",
+    "LC_ADDRESS",
+    "LC_TELEPHONE",
+    "LC_MEASUREMENT",
+    "LC_IDENTIFICATION",
+)
+
+_MARKER = "__salt_check_retcode__"
+
+
+def _home():
+    home = os.path.expanduser("~")
+    if not os.access(home, os.R_OK):
+        return "/"
+    return home
+
+
+class CheckShell:
+    """
+    A shell process running the commands sent to it one at a time
+    """
+
+    def __init__(self, shell):
+        # The environment of the minion the shell started with
+        self.environ = os.environ.copy()
+        env = self.environ.copy()
+        for var in _LOCALE_VARS:
+            env[var] = "C"
+        self.proc = subprocess.Popen(
+            [shell],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            cwd=_home(),
+            env=env,
+            close_fds=True,
+        )
+
+    def send(self, cmd, cwd=None):
+        """
+        Start running a command, in ``cwd`` if given
+        """
+        script = "eval {}".format(shlex.quote(cmd))
+        if cwd:
+            script = "cd -- {} && {}".format(shlex.quote(cwd), script)
+        line = "( {} ) </dev/null >/dev/null 2>&1; echo {} $?\n".format(script, _MARKER)
+        try:
+            self.proc.stdin.write(salt.utils.stringutils.to_bytes(line))
+            self.proc.stdin.flush()
+        except (OSError, ValueError) as exc:
+            raise CommandExecutionError(
+                "Unable to send the command to the check shell: {}".format(exc)
+            )
+
+    def receive(self):
+        """
+        Return the exit code of the command sent last
+        """
+        try:
+            line = salt.utils.stringutils.to_unicode(self.proc.stdout.readline())
+        except (OSError, ValueError) as exc:
+            raise CommandExecutionError(
+                "Unable to read from the check shell: {}".format(exc)
+            )
+        fields = line.split()
+        if len(fields) != 2 or fields[0] != _MARKER or not fields[1].isdigit():
+            raise CommandExecutionError(
+                "Unexpected output of the check shell: {!r}".format(line)
+            )
+        return int(fields[1])
+
+    def close(self):
+        """
+        Stop the shell
+        """
+        try:
+            self.proc.stdin.close()
+            self.proc.wait(timeout=5)
+        except (OSError, ValueError, subprocess.TimeoutExpired):
+            self.proc.kill()
+            self.proc.wait()
+        self.proc.stdout.close()
+
+
+class CheckShells:
+    """
+    Run commands in up to ``size`` persistent shells concurrently, and cache
+    their exit codes until ``invalidate`` is called. The shells are restarted
+    when the environment of the minion changed, as ``cmd.retcode`` would run
+    the commands in the new one.
+    """
+
+    def __init__(self, shell, size):
+        self.shell = shell
+        self.size = max(1, size)
+        self.shells = []
+        # {(cmd, cwd): retcode}
+        self.cache = {}
+
+    @staticmethod
+    def usable(shell):
+        """
+        Return whether commands can run in persistent shells of ``shell``
+        """
+        return (
+            not salt.utils.platform.is_windows()
+            and bool(shell)
+            and os.path.isabs(shell)
+            and os.access(shell, os.X_OK)
+        )
+
+    def retcodes(self, commands, cwd=None):
+        """
+        Return the exit codes of ``commands``, in their order. The commands
+        whose exit code is not cached are run concurrently, each one once.
+        """
+        if self.shells and self.shells[0].environ != os.environ:
+            log.debug("The environment changed, restarting the check shells")
+            self.close()
+            self.invalidate()
+        pending = list(
+            collections.OrderedDict.fromkeys(
+                cmd for cmd in commands if (cmd, cwd) not in self.cache
+            )
+        )
+        while pending:
+            batch, pending = pending[: self.size], pending[self.size :]
+            while len(self.shells) < len(batch):
+                try:
+                    self.shells.append(CheckShell(self.shell))
+                except OSError as exc:
+                    raise CommandExecutionError(
+                        "Unable to start the check shell {}: {}".format(self.shell, exc)
+                    )
+            try:
+                for shell, cmd in zip(self.shells, batch):
+                    shell.send(cmd, cwd)
+                for shell, cmd in zip(self.shells, batch):
+                    self.cache[(cmd, cwd)] = shell.receive()
+            except CommandExecutionError:
+                # The state of the shells is unknown, start over with new ones
+                self.close()
+                raise
+        return [self.cache[(cmd, cwd)] for cmd in commands]
+
+    def invalidate(self):
+        """
+        Forget the cached exit codes
+        """
+        self.cache.clear()
+
+    def close(self):
+        """
+        Stop the shells
+        """
+        for shell in self.shells:
+            shell.close()
+        self.shells = []
@@ -53,8 +53,11 @@ Namespaced tag
 import datetime
 import fnmatch
 import hashlib
+import itertools
 import logging
 import os
+import queue
+import threading
 import time
 from collections.abc import MutableMapping
 from multiprocessing.util import Finalize
@@ -68,12 +71,16 @@ import salt.payload
 import salt.transport.client
 import salt.transport.ipc
 import salt.utils.asynchronous
+import salt.utils.atomicfile
 import salt.utils.cache
 import salt.utils.dicttrim
 import salt.utils.files
+import salt.utils.metrics
+import salt.utils.msgpack
 import salt.utils.platform
 import salt.utils.process
 import salt.utils.stringutils
+import salt.utils.tagmatch
 import salt.utils.zeromq
 from salt.ext import six
 from salt.ext.six.moves import range
@@ -201,6 +208,134 @@ def tagify(suffix="", prefix="", base=SALT):
     return TAGPARTER.join([part for part in parts if part])
 
 
+def expr_prefix(expr):
+    """
+    Return the literal prefix of all the tags matched by ``expr`` when it is
+    used as a glob or as a regular expression by
+    ``salt.utils.stringutils.expr_match``, to subscribe to it with
+    ``SaltEvent.subscribe_prefixes``. An empty string is returned when the tags
+    may start with anything.
+
+    .. versionadded:: 3003
+    """
+    if salt.utils.platform.is_windows():
+        # Globs are case insensitive on Windows
+        return ""
+    return os.path.commonprefix(
+        [salt.utils.tagmatch.glob_prefix(expr), salt.utils.tagmatch.regex_prefix(expr)]
+    )
+
+
+class LazyEventData(MutableMapping):
+    """
+    The data of an event, kept serialized and deserialized one top level key
+    at a time, when the key is first accessed.
+
+    ``pack`` returns the serialized data again without deserializing the keys
+    which were never accessed, and returns the original bytes when no key was
+    accessed, set or deleted at all.
+
+    .. versionadded:: 3003
+    """
+
+    def __init__(self, raw, serial=None):
+        self.raw = raw
+        self.serial = serial or salt.payload.Serial({"serial": "msgpack"})
+        # {key: (key start, value start, value end) in raw}, None for the keys
+        # added since
+        self._index = None
+        # The values of the keys accessed or set
+        self._values = {}
+        # Whether keys were set or deleted
+        self._changed = False
+
+    @staticmethod
+    def is_map(raw):
+        """
+        Check if the serialized data is a msgpack map
+        """
+        return bool(raw) and (0x80 <= raw[0] <= 0x8F or raw[0] in (0xDE, 0xDF))
+
+    def _load_index(self):
+        if self._index is not None:
+            return self._index
+        index = {}
+        try:
+            unpacker = salt.utils.msgpack.Unpacker(raw=False)
+            unpacker.feed(self.raw)
+            for _ in range(unpacker.read_map_header()):
+                start = unpacker.tell()
+                key = unpacker.unpack()
+                value_start = unpacker.tell()
+                unpacker.skip()
+                index[key] = (start, value_start, unpacker.tell())
+        except Exception:  # pylint: disable=broad-except
+            # Binary keys, or no support for this in msgpack, deserialize it all
+            self._values = self.serial.loads(self.raw, encoding="utf-8")
+            index = dict.fromkeys(self._values)
+        self._index = index
+        return index
+
+    def __getitem__(self, key):
+        try:
+            return self._values[key]
+        except KeyError:
+            pass
+        span = self._load_index()[key]
+        if span is None:
+            raise KeyError(key)
+        value = self._values[key] = self.serial.loads(
+            memoryview(self.raw)[span[1] : span[2]], encoding="utf-8"
+        )
+        return value
+
+    def __setitem__(self, key, value):
+        self._load_index().setdefault(key, None)
+        self._values[key] = value
+        self._changed = True
+
+    def __delitem__(self, key):
+        del self._load_index()[key]
+        self._values.pop(key, None)
+        self._changed = True
+
+    def __iter__(self):
+        return iter(self._load_index())
+
+    def __len__(self):
+        return len(self._load_index())
+
+    def __repr__(self):
+        return repr(self.to_dict())
+
+    def to_dict(self):
+        """
+        Return the data deserialized in a dict
+        """
+        if not self._values and not self._changed:
+            return self.serial.loads(self.raw, encoding="utf-8")
+        return {key: self[key] for key in self}
+
+    def copy(self):
+        return self.to_dict()
+
+    def pack(self):
+        """
+        Return the data serialized. The keys which were accessed are
+        serialized again, as their values may have been changed in place.
+        """
+        if not self._values and not self._changed:
+            return self.raw
+        parts = [salt.utils.msgpack.Packer().pack_map_header(len(self))]
+        for key, span in self._index.items():
+            if key in self._values:
+                parts.append(self.serial.dumps(key, use_bin_type=True))
+                parts.append(self.serial.dumps(self._values[key], use_bin_type=True))
+            else:
+                parts.append(self.raw[span[0] : span[2]])
+        return b"".join(parts)
+
+
 class SaltEvent:
     """
     Warning! Use the get_event function or the code will not be
@@ -259,7 +394,9 @@ class SaltEvent:
             self.opts["ipc_mode"] = "tcp"
         self.puburi, self.pulluri = self.__load_uri(sock_dir, node)
         self.pending_tags = []
+        self._pending_matcher = salt.utils.tagmatch.TagMatcher()
         self.pending_events = []
+        self.tag_prefixes = None
         self.__load_cache_regex()
         if listen and not self.cpub:
             # Only connect to the publisher at initialization time if
@@ -326,7 +463,10 @@ class SaltEvent:
         """
         if tag is None:
             return
+        if match_type is None:
+            match_type = self.opts["event_match_type"]
         match_func = self._get_match_func(match_type)
+        self._pending_matcher.add(tag, match_type)
         self.pending_tags.append([tag, match_func])
 
     def unsubscribe(self, tag, match_type=None):
@@ -335,21 +475,40 @@ class SaltEvent:
         """
         if tag is None:
             return
+        if match_type is None:
+            match_type = self.opts["event_match_type"]
         match_func = self._get_match_func(match_type)
 
         try:
             self.pending_tags.remove([tag, match_func])
         except ValueError:
             pass
+        else:
+            self._pending_matcher.remove(tag, match_type)
 
         old_events = self.pending_events
         self.pending_events = []
         for evt in old_events:
-            if any(
-                pmatch_func(evt["tag"], ptag) for ptag, pmatch_func in self.pending_tags
-            ):
+            if self._match_pending(evt["tag"]):
                 self.pending_events.append(evt)
 
+    def subscribe_prefixes(self, prefixes):
+        """
+        Only receive from the event publisher the events whose tag starts with
+        one of the passed prefixes. The other events are dropped by the
+        publisher instead of being sent to, and deserialized by, this
+        subscriber. Pass an empty list to receive all the events again.
+
+        This does not replace the tag matching of get_event, but all the tags
+        it is called with, and all the subscribed tags, must start with one of
+        the prefixes.
+
+        .. versionadded:: 3003
+        """
+        self.tag_prefixes = list(prefixes)
+        if self.subscriber is not None:
+            self.subscriber.subscribe(self.tag_prefixes)
+
     def connect_pub(self, timeout=None):
         """
         Establish the publish connection
@@ -363,6 +522,8 @@ class SaltEvent:
                     self.subscriber = salt.transport.ipc.IPCMessageSubscriber(
                         self.puburi, io_loop=self.io_loop
                     )
+                    if self.tag_prefixes is not None:
+                        self.subscriber.subscribe(self.tag_prefixes)
                 try:
                     self.io_loop.run_sync(
                         lambda: self.subscriber.connect(timeout=timeout)
@@ -375,6 +536,8 @@ class SaltEvent:
                 self.subscriber = salt.transport.ipc.IPCMessageSubscriber(
                     self.puburi, io_loop=self.io_loop
                 )
+                if self.tag_prefixes is not None:
+                    self.subscriber.subscribe(self.tag_prefixes)
 
             # For the asynchronous case, the connect will be defered to when
             # set_event_handler() is invoked.
@@ -434,16 +597,32 @@ class SaltEvent:
         self.cpush = False
 
     @classmethod
-    def unpack(cls, raw, serial=None):
+    def unpack_tag(cls, raw):
+        """
+        Split the tag of a raw event from its still serialized data
+        """
+        mtag, sep, mdata = salt.utils.stringutils.to_bytes(raw).partition(
+            salt.utils.stringutils.to_bytes(TAGEND)
+        )  # split tag from data
+        return salt.utils.stringutils.to_str(mtag), mdata
+
+    @classmethod
+    def unpack(cls, raw, serial=None, lazy=False):
+        """
+        Split a raw event into its tag and data. With ``lazy``, the data is
+        returned as a LazyEventData when it is a mapping.
+        """
         if serial is None:
             serial = salt.payload.Serial({"serial": "msgpack"})
 
-        mtag, sep, mdata = raw.partition(
-            salt.utils.stringutils.to_bytes(TAGEND)
-        )  # split tag from data
-        mtag = salt.utils.stringutils.to_str(mtag)
-        data = serial.loads(mdata, encoding="utf-8")
-        return mtag, data
+        mtag, mdata = cls.unpack_tag(raw)
+        return mtag, cls._load_data(mdata, serial, lazy)
+
+    @staticmethod
+    def _load_data(mdata, serial, lazy=False):
+        if lazy and LazyEventData.is_map(mdata):
+            return LazyEventData(mdata, serial)
+        return serial.loads(mdata, encoding="utf-8")
 
     def _get_match_func(self, match_type=None):
         if match_type is None:
@@ -471,9 +650,7 @@ class SaltEvent:
                     log.trace("get_event() returning cached event = %s", ret)
                 else:
                     self.pending_events.append(evt)
-            elif any(
-                pmatch_func(evt["tag"], ptag) for ptag, pmatch_func in self.pending_tags
-            ):
+            elif self._match_pending(evt["tag"]):
                 self.pending_events.append(evt)
             else:
                 log.trace(
@@ -525,12 +702,18 @@ class SaltEvent:
         """
         return fnmatch.fnmatch(event_tag, search_tag)
 
+    def _match_pending(self, tag):
+        """
+        Check if the tag matches any of the subscribed tags
+        """
+        return self._pending_matcher.matches(tag)
+
     def _subproxy_match(self, data):
         if self.opts.get("subproxy", False):
             return self.opts["id"] == data.get("proxy_target", None)
         return True
 
-    def _get_event(self, wait, tag, match_func=None, no_block=False):
+    def _get_event(self, wait, tag, match_func=None, no_block=False, lazy=False):
         if match_func is None:
             match_func = self._get_match_func()
         start = time.time()
@@ -556,8 +739,7 @@ class SaltEvent:
                 raw = self.subscriber.read_sync(timeout=wait)
                 if raw is None:
                     break
-                mtag, data = self.unpack(raw, self.serial)
-                ret = {"data": data, "tag": mtag}
+                mtag, mdata = self.unpack_tag(raw)
             except KeyboardInterrupt:
                 return {"tag": "salt/event/exit", "data": {}}
             except salt.ext.tornado.iostream.StreamClosedError:
@@ -568,12 +750,22 @@ class SaltEvent:
             except RuntimeError:
                 return None
 
-            if not match_func(ret["tag"], tag) or not self._subproxy_match(ret["data"]):
+            # Only deserialize the data of the events which are returned or
+            # cached
+            matched = match_func(mtag, tag)
+            pending = not matched and self._match_pending(mtag)
+            if not matched and not pending:
+                if wait:  # only update the wait timeout if we had one
+                    wait = timeout_at - time.time()
+                continue
+            ret = {"data": self._load_data(mdata, self.serial, lazy), "tag": mtag}
+
+            if not matched or not self._subproxy_match(ret["data"]):
                 # tag not match
-                if any(
-                    pmatch_func(ret["tag"], ptag)
-                    for ptag, pmatch_func in self.pending_tags
-                ):
+                if pending or self._match_pending(mtag):
+                    if isinstance(ret["data"], LazyEventData):
+                        # Cached events may be returned to any caller
+                        ret["data"] = ret["data"].to_dict()
                     log.trace("get_event() caching unwanted event = %s", ret)
                     self.pending_events.append(ret)
                 if wait:  # only update the wait timeout if we had one
@@ -593,6 +785,7 @@ class SaltEvent:
         match_type=None,
         no_block=False,
         auto_reconnect=False,
+        lazy=False,
     ):
         """
         Get a single publication.
@@ -625,6 +818,13 @@ class SaltEvent:
 
             .. versionadded:: 2015.8.0
 
+        lazy
+            Return the data of the events as a LazyEventData, only
+            deserializing the keys which are accessed. The events cached by
+            subscriptions are still returned deserialized.
+
+            .. versionadded:: 3003
+
         Notes:
 
         Searches cached publications first. If no cached publications are found
@@ -652,7 +852,7 @@ class SaltEvent:
                     self.raise_errors = True
                     while True:
                         try:
-                            ret = self._get_event(wait, tag, match_func, no_block)
+                            ret = self._get_event(wait, tag, match_func, no_block, lazy)
                             break
                         except salt.ext.tornado.iostream.StreamClosedError:
                             self.close_pub()
@@ -660,7 +860,7 @@ class SaltEvent:
                             continue
                     self.raise_errors = raise_errors
                 else:
-                    ret = self._get_event(wait, tag, match_func, no_block)
+                    ret = self._get_event(wait, tag, match_func, no_block, lazy)
 
         if ret is None or full:
             return ret
@@ -698,13 +898,19 @@ class SaltEvent:
         mtag, data = self.unpack(raw, self.serial)
         return {"data": data, "tag": mtag}
 
-    def iter_events(self, tag="", full=False, match_type=None, auto_reconnect=False):
+    def iter_events(
+        self, tag="", full=False, match_type=None, auto_reconnect=False, lazy=False
+    ):
         """
         Creates a generator that continuously listens for events
         """
         while True:
             data = self.get_event(
-                tag=tag, full=full, match_type=match_type, auto_reconnect=auto_reconnect
+                tag=tag,
+                full=full,
+                match_type=match_type,
+                auto_reconnect=auto_reconnect,
+                lazy=lazy,
             )
             if data is None:
                 continue
@@ -741,7 +947,11 @@ class SaltEvent:
         # it is safe to change the wire protocol. The mechanism
         # that sends events from minion to master is outside this
         # file.
-        dump_data = self.serial.dumps(data, use_bin_type=True)
+        if isinstance(data, LazyEventData):
+            # Only serialize again the keys which were accessed
+            dump_data = data.pack()
+        else:
+            dump_data = self.serial.dumps(data, use_bin_type=True)
 
         serialized_data = salt.utils.dicttrim.trim_dict(
             dump_data,
@@ -1057,7 +1267,7 @@ class AsyncEventPublisher:
         Get something from epull, publish it out epub, and return the package (or None)
         """
         try:
-            self.publisher.publish(package)
+            self.publisher.publish(package, tag=SaltEvent.unpack_tag(package)[0])
             return package
         # Add an extra fallback in case a forked process leeks through
         except Exception:  # pylint: disable=broad-except
@@ -1165,7 +1375,7 @@ class EventPublisher(salt.utils.process.SignalHandlingProcess):
         Get something from epull, publish it out epub, and return the package (or None)
         """
         try:
-            self.publisher.publish(package)
+            self.publisher.publish(package, tag=SaltEvent.unpack_tag(package)[0])
             return package
         # Add an extra fallback in case a forked process leeks through
         except Exception:  # pylint: disable=broad-except
@@ -1194,6 +1404,250 @@ class EventPublisher(salt.utils.process.SignalHandlingProcess):
     # pylint: enable=W1701
 
 
+def _load_events(events):
+    """
+    Return the events with their data deserialized
+    """
+    return [
+        {"tag": event["tag"], "data": event["data"].to_dict()}
+        if isinstance(event["data"], LazyEventData)
+        else event
+        for event in events
+    ]
+
+
+class EventReturnWorker:
+    """
+    Bounded queue of the events of one event returner, flushed to it in
+    batches by a dedicated thread, retrying the failed flushes.
+
+    The events which do not fit in the queue, or which could not be returned,
+    are dropped or spilled to disk according to ``event_return_overflow``.
+    Spilled events are returned again after the next successful flush.
+
+    .. versionadded:: 3003
+    """
+
+    def __init__(self, opts, returner, func):
+        self.opts = opts
+        self.returner = returner
+        self.func = func
+        self.serial = salt.payload.Serial(opts)
+        self.queue = queue.Queue(maxsize=opts["event_return_async_queue_size"])
+        self.batch_size = max(opts["event_return_queue"], 1)
+        self.interval = opts.get("event_return_queue_max_seconds", 0)
+        self.spill = opts["event_return_overflow"] == "spill"
+        self.spill_dir = os.path.join(opts["cachedir"], "event_return_spill", returner)
+        self.spill_seq = itertools.count()
+        self.overflow = []
+        self.dropped = 0
+        self.stats = salt.utils.metrics.RequestStats()
+        self.stats_lock = threading.Lock()
+        self.stats_clock = time.time()
+        self.thread = threading.Thread(
+            target=self._run, name="EventReturn-{}".format(returner)
+        )
+        self.thread.daemon = True
+        self.thread.start()
+
+    def put(self, event):
+        """
+        Queue an event, without blocking
+        """
+        try:
+            self.queue.put_nowait(event)
+            return
+        except queue.Full:
+            pass
+        if self.spill:
+            self.overflow.append(event)
+            if len(self.overflow) >= self.batch_size:
+                self._spill(self.overflow)
+                self.overflow = []
+            return
+        if not self.dropped % 1000:
+            log.warning(
+                "The event queue of the event returner %s is full, dropping events",
+                self.returner,
+            )
+        with self.stats_lock:
+            self.dropped += 1
+
+    def stop(self, timeout=None):
+        """
+        Flush the queued events and stop the thread. The events still queued
+        after the timeout are spilled or dropped.
+        """
+        if self.overflow:
+            self._spill(self.overflow)
+            self.overflow = []
+        try:
+            self.queue.put(None, timeout=timeout)
+        except queue.Full:
+            pass
+        self.thread.join(timeout)
+        left = []
+        while True:
+            try:
+                event = self.queue.get_nowait()
+            except queue.Empty:
+                break
+            if event is not None:
+                left.append(event)
+        if left:
+            if self.spill:
+                self._spill(left)
+            else:
+                log.warning(
+                    "Dropping %d events not returned to the event returner %s",
+                    len(left),
+                    self.returner,
+                )
+
+    def _run(self):
+        stop = False
+        while not stop:
+            event = self.queue.get()
+            if event is None:
+                break
+            batch = [event]
+            deadline = time.time() + self.interval
+            while len(batch) < self.batch_size:
+                timeout = deadline - time.time()
+                try:
+                    if timeout > 0:
+                        event = self.queue.get(timeout=timeout)
+                    else:
+                        event = self.queue.get_nowait()
+                except queue.Empty:
+                    break
+                if event is None:
+                    stop = True
+                    break
+                batch.append(event)
+            if self._flush(batch):
+                self._replay()
+            self._store_stats()
+
+    def _call(self, events):
+        start = time.time()
+        try:
+            self.func(events)
+        except Exception as exc:  # pylint: disable=broad-except
+            with self.stats_lock:
+                self.stats.observe(
+                    "event_return:{}".format(self.returner),
+                    time.time() - start,
+                    error=True,
+                )
+            log.error(
+                "Could not store events - returner '%s' raised exception: %s",
+                self.returner,
+                exc,
+            )
+            return False
+        with self.stats_lock:
+            self.stats.observe(
+                "event_return:{}".format(self.returner), time.time() - start
+            )
+        return True
+
+    def _flush(self, batch):
+        """
+        Return a batch of events, retrying with an exponential backoff
+        """
+        # The events are only deserialized now, in this thread
+        events = _load_events(batch)
+        retries = self.opts["event_return_retries"]
+        for attempt in range(retries + 1):
+            if self._call(events):
+                return True
+            if attempt < retries:
+                time.sleep(
+                    min(self.opts["event_return_retry_backoff"] * 2 ** attempt, 60)
+                )
+        if self.spill:
+            self._spill(events)
+        else:
+            log.error(
+                "Dropping %d events which the event returner %s failed to store",
+                len(events),
+                self.returner,
+            )
+            with self.stats_lock:
+                self.dropped += len(events)
+        return False
+
+    def _spill(self, events):
+        """
+        Write events to a spill file
+        """
+        events = _load_events(events)
+        path = os.path.join(
+            self.spill_dir, "{:017.6f}-{}.p".format(time.time(), next(self.spill_seq)),
+        )
+        try:
+            if not os.path.isdir(self.spill_dir):
+                os.makedirs(self.spill_dir)
+            with salt.utils.atomicfile.atomic_open(path, "wb") as fp_:
+                self.serial.dump(events, fp_)
+        except OSError as exc:
+            log.error(
+                "Unable to spill %d events of the event returner %s: %s",
+                len(events),
+                self.returner,
+                exc,
+            )
+            with self.stats_lock:
+                self.dropped += len(events)
+
+    def _replay(self):
+        """
+        Return the events of the oldest spill file
+        """
+        try:
+            names = sorted(
+                name for name in os.listdir(self.spill_dir) if name.endswith(".p")
+            )
+        except OSError:
+            return
+        if not names:
+            return
+        path = os.path.join(self.spill_dir, names[0])
+        try:
+            with salt.utils.files.fopen(path, "rb") as fp_:
+                events = self.serial.load(fp_)
+        except Exception as exc:  # pylint: disable=broad-except
+            log.error("Unable to read the spilled events in %s: %s", path, exc)
+            events = None
+        if events is None or self._call(events):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def _store_stats(self):
+        """
+        Hand the statistics over to the maintenance process of the master
+        """
+        if not self.opts.get("master_stats"):
+            return
+        now = time.time()
+        if now - self.stats_clock < self.opts["master_stats_event_iter"]:
+            return
+        self.stats_clock = now
+        with self.stats_lock:
+            self.stats.set_gauge(
+                "event_return_queue_depth", self.queue.qsize(), returner=self.returner
+            )
+            self.stats.set_gauge(
+                "event_return_dropped_events", self.dropped, returner=self.returner
+            )
+            salt.utils.metrics.store_worker_stats(
+                self.opts, "EventReturn-{}".format(self.returner), self.stats
+            )
+
+
 class EventReturn(salt.utils.process.SignalHandlingProcess):
     """
     A dedicated process which listens to the master event bus and queues
@@ -1221,6 +1675,7 @@ class EventReturn(salt.utils.process.SignalHandlingProcess):
         local_minion_opts["file_client"] = "local"
         self.minion = salt.minion.MasterMinion(local_minion_opts)
         self.event_queue = []
+        self.workers = []
         self.stop = False
 
     # __setstate__ and __getstate__ are only used on Windows.
@@ -1244,16 +1699,51 @@ class EventReturn(salt.utils.process.SignalHandlingProcess):
         # Flush and terminate
         if self.event_queue:
             self.flush_events()
+        self.stop_workers()
         self.stop = True
         super()._handle_signals(signum, sigframe)
 
+    def start_workers(self):
+        """
+        Start a worker flushing the events to each event returner, when the
+        events are returned asynchronously
+        """
+        if self.workers or not self.opts.get("event_return_async"):
+            return
+        returners = self.opts["event_return"]
+        if not isinstance(returners, list):
+            returners = [returners]
+        for returner in returners:
+            event_return = "{}.event_return".format(returner)
+            if event_return not in self.minion.returners:
+                log.error(
+                    "Could not store return for event(s) - returner " "'%s' not found.",
+                    event_return,
+                )
+                continue
+            self.workers.append(
+                EventReturnWorker(
+                    self.opts, returner, self.minion.returners[event_return]
+                )
+            )
+
+    def stop_workers(self):
+        """
+        Flush the events queued for the event returners and stop the workers
+        """
+        workers, self.workers = self.workers, []
+        for worker in workers:
+            worker.stop(timeout=max(self.event_return_queue_max_seconds, 0) + 10)
+
     def flush_events(self):
+        # The queued events are only deserialized now, for the returners
+        events = _load_events(self.event_queue)
         if isinstance(self.opts["event_return"], list):
             # Multiple event returners
             for r in self.opts["event_return"]:
                 log.debug("Calling event returner %s, one of many.", r)
                 event_return = "{}.event_return".format(r)
-                self._flush_event_single(event_return)
+                self._flush_event_single(event_return, events)
         else:
             # Only a single event returner
             log.debug(
@@ -1261,13 +1751,13 @@ class EventReturn(salt.utils.process.SignalHandlingProcess):
                 self.opts["event_return"],
             )
             event_return = "{}.event_return".format(self.opts["event_return"])
-            self._flush_event_single(event_return)
+            self._flush_event_single(event_return, events)
         del self.event_queue[:]
 
-    def _flush_event_single(self, event_return):
+    def _flush_event_single(self, event_return, events):
         if event_return in self.minion.returners:
             try:
-                self.minion.returners[event_return](self.event_queue)
+                self.minion.returners[event_return](events)
             except Exception as exc:  # pylint: disable=broad-except
                 log.error(
                     "Could not store events - returner '%s' raised " "exception: %s",
@@ -1277,9 +1767,7 @@ class EventReturn(salt.utils.process.SignalHandlingProcess):
                 # don't waste processing power unnecessarily on converting a
                 # potentially huge dataset to a string
                 if log.level <= logging.DEBUG:
-                    log.debug(
-                        "Event data that caused an exception: %s", self.event_queue
-                    )
+                    log.debug("Event data that caused an exception: %s", events)
         else:
             log.error(
                 "Could not store return for event(s) - returner " "'%s' not found.",
@@ -1299,8 +1787,11 @@ class EventReturn(salt.utils.process.SignalHandlingProcess):
             os.nice(self.opts["event_return_niceness"])
 
         self.event = get_event("master", opts=self.opts, listen=True)
-        events = self.event.iter_events(full=True)
+        # Keep the events serialized until they are flushed, the events which
+        # are filtered out are never deserialized
+        events = self.event.iter_events(full=True, lazy=True)
         self.event.fire_event({}, "salt/event_listen/start")
+        self.start_workers()
         try:
             # events below is a generator, we will iterate until we get the salt/event/exit tag
             oldestevent = None
@@ -1309,6 +1800,14 @@ class EventReturn(salt.utils.process.SignalHandlingProcess):
                 if event["tag"] == "salt/event/exit":
                     # We're done eventing
                     self.stop = True
+                if self.workers:
+                    # The workers batch and flush the events by themselves
+                    if self._filter(event):
+                        for worker in self.workers:
+                            worker.put(event)
+                    if self.stop:
+                        break
+                    continue
                 if self._filter(event):
                     # This event passed the filter, add it to the queue
                     self.event_queue.append(event)
@@ -1356,6 +1855,7 @@ class EventReturn(salt.utils.process.SignalHandlingProcess):
                 log.debug("Flushing %s events.", len(self.event_queue))
 
                 self.flush_events()
+            self.stop_workers()
 
     def _filter(self, event):
         """
@@ -7,19 +7,40 @@ Functions for interacting with the job cache
 from __future__ import absolute_import, unicode_literals
 
 import logging
+import os
+import struct
+import tempfile
+import threading
+import time
 
 # Import Salt libs
 import salt.minion
+import salt.payload
 import salt.utils.event
+import salt.utils.files
 import salt.utils.jid
+import salt.utils.platform
 import salt.utils.verify
+from salt.ext import six
+from salt.ext.six.moves import queue
+
+try:
+    import fcntl
+
+    HAS_FCNTL = True
+except ImportError:
+    HAS_FCNTL = False
 
 log = logging.getLogger(__name__)
 
 
-def store_job(opts, load, event=None, mminion=None):
+def store_job(opts, load, event=None, mminion=None, batcher=None):
     """
     Store job information using the configured master_job_cache
+
+    If a :py:class:`ReturnBatcher` is passed, the return is queued to be
+    written to the master job cache in a batch instead of being written before
+    this function returns.
     """
     # Generate EndTime
     endtime = salt.utils.jid.jid_to_time(salt.utils.jid.gen_jid(opts))
@@ -32,6 +53,10 @@ def store_job(opts, load, event=None, mminion=None):
         mminion = salt.minion.MasterMinion(opts, states=False, rend=False)
 
     job_cache = opts["master_job_cache"]
+    # if you have a job_cache, or an ext_job_cache, don't write to
+    # the regular master cache
+    write = opts["job_cache"] and not opts.get("ext_job_cache")
+    prep = False
     if load["jid"] == "req":
         # The minion is returning a standalone job, request a jobid
         load["arg"] = load.get("arg", load.get("fun_args", []))
@@ -69,19 +94,11 @@ def store_job(opts, load, event=None, mminion=None):
                 exc_info=True,
             )
     elif salt.utils.jid.is_jid(load["jid"]):
-        # Store the jid
-        jidstore_fstr = "{0}.prep_jid".format(job_cache)
-        try:
-            mminion.returners[jidstore_fstr](False, passed_jid=load["jid"])
-        except KeyError:
-            emsg = "Returner '{0}' does not support function prep_jid".format(job_cache)
-            log.error(emsg)
-            raise KeyError(emsg)
-        except Exception:  # pylint: disable=broad-except
-            log.critical(
-                "The specified '{0}' returner threw a stack trace:\n".format(job_cache),
-                exc_info=True,
-            )
+        if batcher is not None and write:
+            # Store the jid along with the return
+            prep = True
+        else:
+            _prep_jid(opts, load["jid"], mminion)
 
     if event:
         # If the return data is invalid, just ignore it
@@ -91,9 +108,7 @@ def store_job(opts, load, event=None, mminion=None):
         )
         event.fire_ret_load(load)
 
-    # if you have a job_cache, or an ext_job_cache, don't write to
-    # the regular master cache
-    if not opts["job_cache"] or opts.get("ext_job_cache"):
+    if not write:
         return
 
     # do not cache job results if explicitly requested
@@ -105,11 +120,40 @@ def store_job(opts, load, event=None, mminion=None):
         )
         return
 
-    # otherwise, write to the master cache
-    savefstr = "{0}.save_load".format(job_cache)
-    getfstr = "{0}.get_load".format(job_cache)
-    fstr = "{0}.returner".format(job_cache)
+    if batcher is not None:
+        batcher.put(load, endtime, prep)
+        return
+
+    _write_return(opts, load, mminion)
+
     updateetfstr = "{0}.update_endtime".format(job_cache)
+    if opts.get("job_cache_store_endtime") and updateetfstr in mminion.returners:
+        mminion.returners[updateetfstr](load["jid"], endtime)
+
+
+def _prep_jid(opts, jid, mminion):
+    """
+    Store the jid of a return using the configured master_job_cache
+    """
+    job_cache = opts["master_job_cache"]
+    jidstore_fstr = "{0}.prep_jid".format(job_cache)
+    try:
+        mminion.returners[jidstore_fstr](False, passed_jid=jid)
+    except KeyError:
+        emsg = "Returner '{0}' does not support function prep_jid".format(job_cache)
+        log.error(emsg)
+        raise KeyError(emsg)
+    except Exception:  # pylint: disable=broad-except
+        log.critical(
+            "The specified '{0}' returner threw a stack trace:\n".format(job_cache),
+            exc_info=True,
+        )
+
+
+def _prepare_return(load):
+    """
+    Copy the function and user of a return from its data if missing
+    """
     if "fun" not in load and load.get("return", {}):
         ret_ = load.get("return", {})
         if "fun" in ret_:
@@ -117,6 +161,19 @@ def store_job(opts, load, event=None, mminion=None):
         if "user" in ret_:
             load.update({"user": ret_["user"]})
 
+
+def _write_return(opts, load, mminion, many=False):
+    """
+    Write a return to the configured master_job_cache. With ``many``, the
+    return itself is left to be written by the ``returner_many`` function of
+    the returner.
+    """
+    job_cache = opts["master_job_cache"]
+    savefstr = "{0}.save_load".format(job_cache)
+    getfstr = "{0}.get_load".format(job_cache)
+    fstr = "{0}.returner".format(job_cache)
+    _prepare_return(load)
+
     # Try to reach returner methods
     try:
         savefstr_func = mminion.returners[savefstr]
@@ -138,6 +195,8 @@ def store_job(opts, load, event=None, mminion=None):
                 exc_info=True,
             )
 
+    if many:
+        return
     try:
         mminion.returners[fstr](load)
     except Exception:  # pylint: disable=broad-except
@@ -146,8 +205,313 @@ def store_job(opts, load, event=None, mminion=None):
             exc_info=True,
         )
 
-    if opts.get("job_cache_store_endtime") and updateetfstr in mminion.returners:
-        mminion.returners[updateetfstr](load["jid"], endtime)
+
+def store_returns(opts, returns, mminion=None):
+    """
+    Write a batch of returns queued by :py:func:`store_job` to the configured
+    master_job_cache. ``returns`` is a list of ``(load, endtime, prep)``
+    tuples. The jid and the end time of each job are only stored once per
+    batch. The returners providing ``returner_many`` and
+    ``update_endtime_many``, like ``local_cache``, write all the returns and
+    end times of the batch at once.
+
+    .. versionadded:: 3003
+    """
+    if mminion is None:
+        mminion = salt.minion.MasterMinion(opts, states=False, rend=False)
+    job_cache = opts["master_job_cache"]
+    manyfstr = "{0}.returner_many".format(job_cache)
+    many = manyfstr in mminion.returners
+    prepared = set()
+    endtimes = {}
+    loads = []
+    for load, endtime, prep in returns:
+        jid = load["jid"]
+        if prep and jid not in prepared:
+            _prep_jid(opts, jid, mminion)
+            prepared.add(jid)
+        _write_return(opts, load, mminion, many=many)
+        loads.append(load)
+        endtimes[jid] = endtime
+    if many and loads:
+        try:
+            mminion.returners[manyfstr](loads)
+        except Exception:  # pylint: disable=broad-except
+            log.critical(
+                "The specified '{0}' returner threw a stack trace:\n".format(job_cache),
+                exc_info=True,
+            )
+
+    if not opts.get("job_cache_store_endtime"):
+        return
+    updateetfstr = "{0}.update_endtime".format(job_cache)
+    updatemanyfstr = "{0}.update_endtime_many".format(job_cache)
+    if updatemanyfstr in mminion.returners:
+        mminion.returners[updatemanyfstr](endtimes)
+    elif updateetfstr in mminion.returners:
+        for jid, endtime in six.iteritems(endtimes):
+            mminion.returners[updateetfstr](jid, endtime)
+
+
+class ReturnJournal(object):
+    """
+    Files recording the returns queued by a :py:class:`ReturnBatcher` until
+    they are written to the job cache, so that the returns queued by a master
+    worker which was killed are written by the next master worker starting.
+
+    The returns are appended to segment files of up to ``segment_size``
+    returns, and synced to disk before :py:meth:`append` returns. A segment
+    is removed once all its returns are written to the job cache. The
+    segments are locked by the process using them, so that only the segments
+    left by dead processes are replayed.
+
+    .. versionadded:: 3003
+    """
+
+    def __init__(self, path, segment_size, serial):
+        self.path = path
+        self.segment_size = segment_size
+        self.serial = serial
+        # {name: [file, returns not written to the job cache yet]}
+        self._segments = {}
+        self._current = None
+        self._current_size = 0
+        self._lock = threading.Lock()
+        if not os.path.isdir(path):
+            os.makedirs(path)
+
+    def _open_segment(self):
+        """
+        Create and lock a new segment. It is only given the name replayed
+        segments have once it is locked.
+        """
+        fd_, tmp = tempfile.mkstemp(suffix=".tmp", dir=self.path)
+        fcntl.flock(fd_, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        name = tmp[: -len(".tmp")] + ".p"
+        os.rename(tmp, name)
+        self._segments[name] = [os.fdopen(fd_, "wb"), 0]
+        return name
+
+    def _remove_segment(self, name):
+        fp_ = self._segments.pop(name)[0]
+        try:
+            os.remove(name)
+        except OSError as exc:
+            log.error("Unable to remove the return journal %s: %s", name, exc)
+        fp_.close()
+
+    def append(self, record):
+        """
+        Record a queued return, and return the name of its segment
+        """
+        data = self.serial.dumps(record)
+        with self._lock:
+            if self._current is None or self._current_size >= self.segment_size:
+                previous = self._current
+                self._current = self._open_segment()
+                self._current_size = 0
+                if previous is not None and not self._segments[previous][1]:
+                    self._remove_segment(previous)
+            segment = self._segments[self._current]
+            segment[0].write(struct.pack(">I", len(data)) + data)
+            segment[0].flush()
+            os.fsync(segment[0].fileno())
+            segment[1] += 1
+            self._current_size += 1
+            return self._current
+
+    def done(self, names):
+        """
+        Forget the returns of the segments ``names``, written to the job cache
+        """
+        with self._lock:
+            for name in names:
+                segment = self._segments.get(name)
+                if segment is None:
+                    continue
+                segment[1] -= 1
+                if not segment[1] and name != self._current:
+                    self._remove_segment(name)
+
+    def close(self):
+        """
+        Remove the segments whose returns were all written, and release the
+        others to be replayed
+        """
+        with self._lock:
+            for name, segment in list(self._segments.items()):
+                if segment[1]:
+                    segment[0].close()
+                    del self._segments[name]
+                else:
+                    self._remove_segment(name)
+            self._current = None
+
+    def _records(self, fp_):
+        while True:
+            header = fp_.read(4)
+            if len(header) < 4:
+                return
+            size = struct.unpack(">I", header)[0]
+            data = fp_.read(size)
+            if len(data) < size:
+                # The process was killed while writing this return, which
+                # it did not reply to
+                return
+            yield self.serial.loads(data)
+
+    def replay(self, store):
+        """
+        Pass the returns of the segments left by dead processes to ``store``,
+        and remove the segments
+        """
+        for name in sorted(os.listdir(self.path)):
+            if not name.endswith(".p"):
+                continue
+            path = os.path.join(self.path, name)
+            try:
+                fp_ = salt.utils.files.fopen(path, "rb")
+            except (IOError, OSError):
+                continue
+            with fp_:
+                try:
+                    fcntl.flock(fp_.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except (IOError, OSError):
+                    # Still used by a running process
+                    continue
+                if not os.fstat(fp_.fileno()).st_nlink:
+                    # Already replayed by another process
+                    continue
+                try:
+                    records = [tuple(record) for record in self._records(fp_)]
+                    if records:
+                        log.info(
+                            "Writing %d returns left in the return journal %s",
+                            len(records),
+                            path,
+                        )
+                        store(records)
+                except Exception:  # pylint: disable=broad-except
+                    log.critical(
+                        "Unable to replay the return journal %s", path, exc_info=True
+                    )
+                    continue
+                os.remove(path)
+
+
+class ReturnBatcher(object):
+    """
+    Write the minion returns to the master job cache in batches, from a
+    background thread, so that the master worker can reply to the minion as
+    soon as the return is queued.
+
+    At most ``return_batch_size`` returns are written per batch, and a return
+    waits at most ``return_batch_interval`` seconds for its batch to fill up.
+    When ``return_batch_queue_size`` returns are waiting to be written,
+    :py:meth:`put` blocks until the writer catches up, which in turn delays
+    the replies to the minions.
+
+    With ``return_batch_journal`` set, the returns are also recorded in a
+    :py:class:`ReturnJournal` before being queued, and the returns left in
+    the journal by killed master workers are written when the batcher is
+    created.
+
+    .. versionadded:: 3003
+    """
+
+    def __init__(self, opts, mminion=None):
+        self.opts = opts
+        self.mminion = mminion
+        self.batch_size = max(opts.get("return_batch_size", 0), 1)
+        self.interval = opts.get("return_batch_interval", 0.1)
+        self.queue = queue.Queue(maxsize=opts.get("return_batch_queue_size", 10000))
+        self._thread = None
+        self._lock = threading.Lock()
+        self.journal = None
+        if opts.get("return_batch_journal", False):
+            if salt.utils.platform.is_windows() or not HAS_FCNTL:
+                log.warning("The return batch journal is not supported on Windows")
+            else:
+                self.journal = ReturnJournal(
+                    os.path.join(opts["cachedir"], "return_journal"),
+                    self.batch_size,
+                    salt.payload.Serial(opts),
+                )
+                self.journal.replay(
+                    lambda returns: store_returns(
+                        self.opts, returns, mminion=self.mminion
+                    )
+                )
+
+    def put(self, load, endtime, prep):
+        """
+        Queue a return to be written, after recording it in the journal if
+        enabled
+        """
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(
+                        target=self._run, name="ReturnBatcher"
+                    )
+                    self._thread.daemon = True
+                    self._thread.start()
+        segment = None
+        if self.journal is not None:
+            segment = self.journal.append((load, endtime, prep))
+        self.queue.put((load, endtime, prep, segment))
+
+    def _run(self):
+        stop = False
+        while not stop:
+            item = self.queue.get()
+            if item is None:
+                break
+            batch = [item]
+            deadline = time.time() + self.interval
+            while len(batch) < self.batch_size:
+                timeout = deadline - time.time()
+                if timeout <= 0:
+                    break
+                try:
+                    item = self.queue.get(timeout=timeout)
+                except queue.Empty:
+                    break
+                if item is None:
+                    stop = True
+                    break
+                batch.append(item)
+            start = time.time()
+            try:
+                store_returns(
+                    self.opts, [item[:3] for item in batch], mminion=self.mminion
+                )
+            except Exception:  # pylint: disable=broad-except
+                log.critical(
+                    "Unable to write %d returns to the job cache",
+                    len(batch),
+                    exc_info=True,
+                )
+            else:
+                if self.journal is not None:
+                    self.journal.done([item[3] for item in batch])
+            log.debug(
+                "Wrote %d returns to the job cache in %.3f seconds",
+                len(batch),
+                time.time() - start,
+            )
+
+    def stop(self, timeout=None):
+        """
+        Write the queued returns and stop the writer thread
+        """
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            self.queue.put(None)
+            thread.join(timeout)
+        if self.journal is not None:
+            self.journal.close()
 
 
 def store_minions(opts, jid, minions, mminion=None, syndic_id=None):
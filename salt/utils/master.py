@@ -211,10 +211,16 @@ class MasterPillarUtil(object):
             return mine_data
         if not minion_ids:
             minion_ids = self.cache.list("minions")
+        minion_ids = [
+            minion_id
+            for minion_id in minion_ids
+            if salt.utils.verify.valid_id(self.opts, minion_id)
+        ]
+        cdata = self.cache.fetch_many(
+            ("minions/{0}".format(minion_id), "mine") for minion_id in minion_ids
+        )
         for minion_id in minion_ids:
-            if not salt.utils.verify.valid_id(self.opts, minion_id):
-                continue
-            mdata = self.cache.fetch("minions/{0}".format(minion_id), "mine")
+            mdata = cdata[("minions/{0}".format(minion_id), "mine")]
             if isinstance(mdata, dict):
                 mine_data[minion_id] = mdata
         return mine_data
@@ -231,10 +237,16 @@ class MasterPillarUtil(object):
             return grains, pillars
         if not minion_ids:
             minion_ids = self.cache.list("minions")
+        minion_ids = [
+            minion_id
+            for minion_id in minion_ids
+            if salt.utils.verify.valid_id(self.opts, minion_id)
+        ]
+        cdata = self.cache.fetch_many(
+            ("minions/{0}".format(minion_id), "data") for minion_id in minion_ids
+        )
         for minion_id in minion_ids:
-            if not salt.utils.verify.valid_id(self.opts, minion_id):
-                continue
-            mdata = self.cache.fetch("minions/{0}".format(minion_id), "data")
+            mdata = cdata[("minions/{0}".format(minion_id), "data")]
             if not isinstance(mdata, dict):
                 log.warning(
                     "cache.fetch should always return a dict. ReturnedType: %s, MinionId: %s",
@@ -0,0 +1,366 @@
+"""
+Latency and size histograms backing the master statistics, and their
+exposition in the Prometheus text format.
+
+.. versionadded:: 3003
+"""
+
+import bisect
+import logging
+import os
+
+import salt.payload
+import salt.utils.atomicfile
+import salt.utils.files
+
+log = logging.getLogger(__name__)
+
+# Upper bounds, in seconds, of the request latency histogram buckets
+LATENCY_BUCKETS = (
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+    60.0,
+)
+
+# Upper bounds, in bytes, of the payload size histogram buckets
+SIZE_BUCKETS = (
+    1024,
+    4096,
+    16384,
+    65536,
+    262144,
+    1048576,
+    4194304,
+    16777216,
+)
+
+# Quantiles reported along with the histograms
+QUANTILES = (("p50", 0.5), ("p95", 0.95), ("p99", 0.99))
+
+
+class Histogram:
+    """
+    Histogram of observations over fixed bucket upper bounds. The last bucket
+    counts the observations above the highest bound.
+    """
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        """
+        Record one observation
+        """
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def merge(self, data):
+        """
+        Add the observations of a histogram serialized by ``to_dict``
+        """
+        if tuple(data["buckets"]) != self.buckets:
+            raise ValueError("Cannot merge histograms with different buckets")
+        for idx, count in enumerate(data["counts"]):
+            self.counts[idx] += count
+        self.count += data["count"]
+        self.sum += data["sum"]
+
+    def quantile(self, quantile):
+        """
+        Estimate a quantile by linear interpolation within the bucket holding
+        it, as Prometheus' ``histogram_quantile`` does. Observations above the
+        highest bound are reported as the highest bound.
+        """
+        if not self.count:
+            return None
+        rank = quantile * self.count
+        cumulative = 0
+        for idx, count in enumerate(self.counts):
+            if count and cumulative + count >= rank:
+                if idx == len(self.buckets):
+                    break
+                lower = self.buckets[idx - 1] if idx else 0.0
+                upper = self.buckets[idx]
+                return lower + (upper - lower) * (rank - cumulative) / count
+            cumulative += count
+        return self.buckets[-1]
+
+    def to_dict(self):
+        return {
+            "buckets": list(self.buckets),
+            "counts": list(self.counts),
+            "count": self.count,
+            "sum": self.sum,
+        }
+
+
+class RequestStats:
+    """
+    Latency histogram and error count of each command handled by the master
+    workers, and size histogram of the payloads of the commands reporting it,
+    such as the requests received by the workers.
+    Also holds gauges, such as the depth of queues, which are only written to
+    the Prometheus exposition.
+    """
+
+    def __init__(self):
+        self.commands = {}
+        # {(name, ((label, value), ...)): value}
+        self.gauges = {}
+
+    def _command(self, cmd):
+        stats = self.commands.get(cmd)
+        if stats is None:
+            stats = self.commands[cmd] = {
+                "latency": Histogram(),
+                "size": None,
+                "errors": 0,
+            }
+        return stats
+
+    def observe(self, cmd, duration, error=False, size=None):
+        """
+        Record a request handling duration for ``cmd``, and the size in bytes
+        of its payload if given
+        """
+        stats = self._command(cmd)
+        stats["latency"].observe(duration)
+        if error:
+            stats["errors"] += 1
+        if size is not None:
+            if stats["size"] is None:
+                stats["size"] = Histogram(buckets=SIZE_BUCKETS)
+            stats["size"].observe(size)
+
+    def set_gauge(self, name, value, **labels):
+        """
+        Set the current value of a gauge
+        """
+        self.gauges[(name, tuple(sorted(labels.items())))] = value
+
+    def gauges_to_list(self):
+        """
+        Return the gauges as a list of ``[name, labels, value]``
+        """
+        return [
+            [name, dict(labels), value]
+            for (name, labels), value in sorted(self.gauges.items())
+        ]
+
+    def merge_gauges(self, gauges):
+        """
+        Add the gauges serialized by ``gauges_to_list``
+        """
+        for name, labels, value in gauges:
+            key = (name, tuple(sorted(labels.items())))
+            self.gauges[key] = self.gauges.get(key, 0) + value
+
+    def merge(self, data):
+        """
+        Add the statistics serialized by ``to_dict``
+        """
+        for cmd, cmd_data in data.items():
+            stats = self._command(cmd)
+            stats["latency"].merge(cmd_data["latency"])
+            stats["errors"] += cmd_data["errors"]
+            if cmd_data.get("size"):
+                if stats["size"] is None:
+                    stats["size"] = Histogram(buckets=SIZE_BUCKETS)
+                stats["size"].merge(cmd_data["size"])
+
+    def to_dict(self):
+        """
+        Return the statistics of each command. The ``mean`` and ``runs`` keys
+        are kept for the consumers of the former master stats events.
+        """
+        ret = {}
+        for cmd, stats in self.commands.items():
+            latency = stats["latency"]
+            ret[cmd] = {
+                "mean": latency.sum / latency.count if latency.count else 0,
+                "runs": latency.count,
+                "errors": stats["errors"],
+                "latency": latency.to_dict(),
+            }
+            for name, quantile in QUANTILES:
+                ret[cmd][name] = latency.quantile(quantile)
+            if stats["size"] is not None:
+                ret[cmd]["size"] = stats["size"].to_dict()
+        return ret
+
+    def to_prometheus(self, prefix="salt_master"):
+        """
+        Return the statistics in the Prometheus text exposition format
+        """
+        duration = "{}_request_duration_seconds".format(prefix)
+        size = "{}_payload_size_bytes".format(prefix)
+        errors = "{}_request_errors_total".format(prefix)
+        lines = [
+            "# HELP {} Time spent by the master workers handling requests.".format(
+                duration
+            ),
+            "# TYPE {} histogram".format(duration),
+        ]
+        for cmd in sorted(self.commands):
+            lines.extend(_histogram_lines(duration, cmd, self.commands[cmd]["latency"]))
+        sized = sorted(
+            cmd for cmd, stats in self.commands.items() if stats["size"] is not None
+        )
+        if sized:
+            lines.extend(
+                [
+                    "# HELP {} Size of the payloads handled by the master.".format(
+                        size
+                    ),
+                    "# TYPE {} histogram".format(size),
+                ]
+            )
+            for cmd in sized:
+                lines.extend(_histogram_lines(size, cmd, self.commands[cmd]["size"]))
+        lines.extend(
+            [
+                "# HELP {} Requests which failed in the master workers.".format(errors),
+                "# TYPE {} counter".format(errors),
+            ]
+        )
+        for cmd in sorted(self.commands):
+            lines.append(
+                '{}{{cmd="{}"}} {}'.format(
+                    errors, _escape_label(cmd), self.commands[cmd]["errors"]
+                )
+            )
+        last_name = None
+        for (name, labels), value in sorted(self.gauges.items()):
+            name = "{}_{}".format(prefix, name)
+            if name != last_name:
+                lines.append("# TYPE {} gauge".format(name))
+                last_name = name
+            label = ",".join(
+                '{}="{}"'.format(key, _escape_label(str(val))) for key, val in labels
+            )
+            lines.append("{}{{{}}} {}".format(name, label, value))
+        return "\n".join(lines) + "\n"
+
+
+def _histogram_lines(name, cmd, hist):
+    label = 'cmd="{}"'.format(_escape_label(cmd))
+    lines = []
+    cumulative = 0
+    for bound, count in zip(hist.buckets, hist.counts):
+        cumulative += count
+        lines.append(
+            '{}_bucket{{{},le="{}"}} {}'.format(name, label, bound, cumulative)
+        )
+    lines.append('{}_bucket{{{},le="+Inf"}} {}'.format(name, label, hist.count))
+    lines.append("{}_sum{{{}}} {}".format(name, label, hist.sum))
+    lines.append("{}_count{{{}}} {}".format(name, label, hist.count))
+    return lines
+
+
+# Durations of the stages of the operations run in this process, such as the
+# encoding of a publication, which the master worker adds to its statistics
+_STAGE_STATS = RequestStats()
+
+
+def observe_stage(stage, duration, size=None):
+    """
+    Record the duration of a stage of an operation, and the size in bytes of
+    the payload it handled if given
+    """
+    _STAGE_STATS.observe(stage, duration, size=size)
+
+
+def pop_stage_stats():
+    """
+    Return the statistics of the stages recorded in this process since the
+    last call
+    """
+    global _STAGE_STATS
+    stats, _STAGE_STATS = _STAGE_STATS, RequestStats()
+    return stats
+
+
+def _escape_label(value):
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _worker_stats_dir(opts):
+    return os.path.join(opts["cachedir"], "master_stats")
+
+
+def store_worker_stats(opts, worker, stats):
+    """
+    Write the cumulative statistics of a master worker, for the maintenance
+    process to aggregate them
+    """
+    stats_dir = _worker_stats_dir(opts)
+    try:
+        if not os.path.isdir(stats_dir):
+            os.makedirs(stats_dir)
+        with salt.utils.atomicfile.atomic_open(
+            os.path.join(stats_dir, "{}.p".format(worker)), "wb"
+        ) as fp_:
+            salt.payload.Serial(opts).dump(
+                {"commands": stats.to_dict(), "gauges": stats.gauges_to_list()}, fp_
+            )
+    except OSError as exc:
+        log.error("Unable to write the master stats of %s: %s", worker, exc)
+
+
+def load_worker_stats(opts):
+    """
+    Return the statistics of all the master workers, aggregated
+    """
+    stats = RequestStats()
+    stats_dir = _worker_stats_dir(opts)
+    try:
+        names = os.listdir(stats_dir)
+    except OSError:
+        return stats
+    serial = salt.payload.Serial(opts)
+    for name in names:
+        if not name.endswith(".p"):
+            # Skip the files being written
+            continue
+        path = os.path.join(stats_dir, name)
+        try:
+            with salt.utils.files.fopen(path, "rb") as fp_:
+                data = serial.load(fp_)
+            stats.merge(data["commands"])
+            stats.merge_gauges(data["gauges"])
+        except Exception as exc:  # pylint: disable=broad-except
+            log.error("Unable to read the master stats in %s: %s", path, exc)
+    return stats
+
+
+def clear_worker_stats(opts):
+    """
+    Remove the statistics left by the master workers of a previous run
+    """
+    stats_dir = _worker_stats_dir(opts)
+    try:
+        names = os.listdir(stats_dir)
+    except OSError:
+        return
+    for name in names:
+        try:
+            os.remove(os.path.join(stats_dir, name))
+        except OSError:
+            pass
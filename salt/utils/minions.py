@@ -8,6 +8,7 @@ import fnmatch
 import logging
 import os
 import re
+import time
 
 import salt.auth.ldap
 import salt.cache
@@ -107,10 +108,13 @@ def get_minion_data(minion, opts):
     if opts.get("minion_data_cache", False):
         cache = salt.cache.factory(opts)
         if minion is None:
-            for id_ in cache.list("minions"):
-                data = cache.fetch("minions/{}".format(id_), "data")
-                if data is None:
-                    continue
+            cdata = cache.fetch_many(
+                ("minions/{}".format(id_), "data") for id_ in cache.list("minions")
+            )
+            data = None
+            for mdata in cdata.values():
+                if mdata is not None:
+                    data = mdata
         else:
             data = cache.fetch("minions/{}".format(minion), "data")
         if data is not None:
@@ -197,6 +201,448 @@ def nodegroup_comp(nodegroup, nodegroups, skip=None, first_call=True):
         return ret
 
 
+def _index_value(value):
+    """
+    Normalize a leaf value the same way ``salt.utils.data.subdict_match``
+    does before comparing it against a target pattern
+    """
+    try:
+        return str(value).lower()
+    except UnicodeDecodeError:
+        return salt.utils.stringutils.to_unicode(value).lower()
+
+
+class MinionDataIndex:
+    """
+    In-memory inverted index over the grains and pillar kept in the minion
+    data cache.
+
+    For every search type (``grains`` and ``pillar``) the colon-delimited
+    path of each leaf is mapped to the distinct values found at that path,
+    and each value to the set of minions carrying it. Resolving a grain or
+    pillar target then becomes a set union over the distinct values of a
+    path instead of fetching and walking the cached data of every minion.
+
+    Some data shapes are walked by ``subdict_match`` in ways the index does
+    not model (lists of dicts, traversal through list indexes, wildcard
+    subkeys, dict keys which are not strings or contain the delimiter).
+    Minions with such data are reported as undecided so the caller can fall
+    back to ``subdict_match`` for just those minions.
+
+    The index is synchronized with the minion data cache on demand. Only
+    minions whose ``updated`` timestamp changed since they were last indexed
+    are fetched again.
+
+    .. versionadded:: 3003
+    """
+
+    search_types = ("grains", "pillar")
+
+    def __init__(self, opts, cache=None):
+        self.opts = opts
+        self.cache = cache if cache is not None else salt.cache.factory(opts)
+        self.refresh_interval = opts.get("minion_data_index_refresh", 0)
+        self._last_refresh = None
+        # {minion_id: (updated, indexed_at)}
+        self._stamps = {}
+        # {minion_id: set((search_type, table, path, value), ...)}
+        self._postings = {}
+        # Minions which have data in the cache
+        self._minions = set()
+        # {search_type: {table: {path: ...}}}
+        #   values:  {path: {value: set(minion_ids)}}  scalar leaves and list members
+        #   keys:    {path: {key: set(minion_ids)}}    keys of the dicts found at path
+        #   dicts:   {path: set(minion_ids)}           non-empty dict found at path
+        #   lists:   {path: set(minion_ids)}           list found at path
+        #   complex: {path: set(minion_ids)}           list containing dicts at path
+        self._tables = {
+            search_type: {
+                "values": {},
+                "keys": {},
+                "dicts": {},
+                "lists": {},
+                "complex": {},
+            }
+            for search_type in self.search_types
+        }
+        # {search_type: set(minion_ids)} whose data cannot be indexed
+        self._opaque = {search_type: set() for search_type in self.search_types}
+
+    def minions(self):
+        """
+        Return the set of minion ids which have data in the index
+        """
+        return set(self._minions)
+
+    def refresh(self, force=False):
+        """
+        Synchronize the index with the minion data cache. Unless ``force`` is
+        set this is a no-op when the last synchronization happened less than
+        ``minion_data_index_refresh`` seconds ago.
+        """
+        now = time.time()
+        if (
+            not force
+            and self._last_refresh is not None
+            and now - self._last_refresh < self.refresh_interval
+        ):
+            return
+        self._last_refresh = now
+        current = set(self.cache.list("minions") or [])
+        for minion_id in set(self._stamps) - current:
+            self.remove(minion_id)
+        # Drivers without ``updated`` support are fully re-read every time
+        has_updated = "{}.updated".format(self.cache.driver) in self.cache.modules
+        stale = {}
+        for minion_id in current:
+            bank = "minions/{}".format(minion_id)
+            updated = self.cache.updated(bank, "data") if has_updated else None
+            stamp = self._stamps.get(minion_id)
+            # Cache timestamps have a resolution of one second, so an entry
+            # indexed within the same second it was written is re-checked.
+            if (
+                stamp is not None
+                and updated is not None
+                and stamp[0] == updated
+                and updated < stamp[1]
+            ):
+                continue
+            stale[bank] = (minion_id, updated)
+        cdata = self.cache.fetch_many((bank, "data") for bank in stale)
+        for (bank, _), data in cdata.items():
+            minion_id, updated = stale[bank]
+            self.update(minion_id, data, updated=updated, indexed_at=int(now))
+
+    def update(self, minion_id, data, updated=None, indexed_at=None):
+        """
+        Replace the indexed data for ``minion_id`` with ``data``, the dict
+        stored in the ``data`` key of the minion's cache bank
+        """
+        self._drop(minion_id)
+        if indexed_at is None:
+            indexed_at = int(time.time())
+        self._stamps[minion_id] = (updated, indexed_at)
+        if data is None:
+            return
+        self._minions.add(minion_id)
+        postings = set()
+        for search_type in self.search_types:
+            entries, opaque = self._flatten(data.get(search_type))
+            if opaque:
+                self._opaque[search_type].add(minion_id)
+            for table, path, value in entries:
+                postings.add((search_type, table, path, value))
+        for search_type, table, path, value in postings:
+            target = self._tables[search_type][table]
+            if value is None:
+                target.setdefault(path, set()).add(minion_id)
+            else:
+                target.setdefault(path, {}).setdefault(value, set()).add(minion_id)
+        self._postings[minion_id] = postings
+
+    def remove(self, minion_id):
+        """
+        Drop ``minion_id`` from the index
+        """
+        self._drop(minion_id)
+        self._stamps.pop(minion_id, None)
+
+    def _drop(self, minion_id):
+        self._minions.discard(minion_id)
+        for search_type in self.search_types:
+            self._opaque[search_type].discard(minion_id)
+        for search_type, table, path, value in self._postings.pop(minion_id, ()):
+            target = self._tables[search_type][table]
+            if value is None:
+                ids = target.get(path)
+            else:
+                ids = target.get(path, {}).get(value)
+            if ids is None:
+                continue
+            ids.discard(minion_id)
+            if ids:
+                continue
+            if value is None:
+                del target[path]
+            else:
+                del target[path][value]
+                if not target[path]:
+                    del target[path]
+
+    @staticmethod
+    def _flatten(data):
+        """
+        Return the list of ``(table, path, value)`` entries describing
+        ``data`` and whether ``data`` contains keys the index cannot address
+        """
+        entries = []
+        opaque = False
+        if not isinstance(data, dict):
+            return entries, opaque
+        stack = [(None, data)]
+        while stack:
+            path, value = stack.pop()
+            if isinstance(value, dict):
+                if path is not None and value:
+                    entries.append(("dicts", path, None))
+                for key, child in value.items():
+                    if not isinstance(key, str) or DEFAULT_TARGET_DELIM in key:
+                        opaque = True
+                        continue
+                    if path is None:
+                        stack.append((key, child))
+                    else:
+                        entries.append(("keys", path, key))
+                        stack.append((DEFAULT_TARGET_DELIM.join((path, key)), child))
+            elif isinstance(value, (list, tuple)):
+                entries.append(("lists", path, None))
+                for member in value:
+                    if isinstance(member, dict):
+                        entries.append(("complex", path, None))
+                    else:
+                        entries.append(("values", path, _index_value(member)))
+            else:
+                entries.append(("values", path, _index_value(value)))
+        return entries, opaque
+
+    @staticmethod
+    def _match_values(values, pattern, regex_match=False, exact_match=False):
+        """
+        Return the minions holding any of the distinct ``values`` which match
+        ``pattern``
+        """
+        pattern = _index_value(pattern)
+        if regex_match:
+            try:
+                regex = re.compile(pattern)
+            except Exception:  # pylint: disable=broad-except
+                log.error("Invalid regex '%s' in match", pattern)
+                return set()
+            hits = [value for value in values if regex.match(value)]
+        elif exact_match:
+            hits = [pattern] if pattern in values else []
+        else:
+            hits = fnmatch.filter(values, pattern)
+        ret = set()
+        for value in hits:
+            ret.update(values[value])
+        return ret
+
+    def match(
+        self,
+        search_type,
+        expr,
+        delimiter=DEFAULT_TARGET_DELIM,
+        regex_match=False,
+        exact_match=False,
+    ):
+        """
+        Evaluate ``expr`` with the semantics of
+        ``salt.utils.data.subdict_match`` against the indexed data.
+
+        Returns a tuple of the set of minions known to match and the set of
+        minions the index could not decide on, or ``None`` if the expression
+        cannot be served by the index at all.
+        """
+        if delimiter != DEFAULT_TARGET_DELIM or search_type not in self._tables:
+            return None
+        tables = self._tables[search_type]
+        matched = set()
+        undecided = set(self._opaque[search_type])
+        splits = expr.split(delimiter)
+        # Same order as subdict_match: deeper keys first
+        for idx in range(len(splits) - 1, 0, -1):
+            key = delimiter.join(splits[:idx])
+            if key == "*":
+                undecided.update(self._minions)
+                continue
+            matchstr = delimiter.join(splits[idx:])
+            # Traversing through a list means index or embedded dict lookups
+            for pidx in range(1, idx):
+                undecided.update(tables["lists"].get(delimiter.join(splits[:pidx]), ()))
+            undecided.update(tables["complex"].get(key, ()))
+            if key in tables["dicts"]:
+                if matchstr.startswith("*:"):
+                    undecided.update(tables["dicts"][key])
+                elif matchstr == "*":
+                    matched.update(tables["dicts"][key])
+                else:
+                    matched.update(tables["keys"].get(key, {}).get(matchstr, ()))
+            values = tables["values"].get(key)
+            if values:
+                matched.update(
+                    self._match_values(
+                        values,
+                        matchstr,
+                        regex_match=regex_match,
+                        exact_match=exact_match,
+                    )
+                )
+        return matched, undecided - matched
+
+
+# Minion data indexes are shared by all CkMinions instances of a process
+# {(cache_driver, cachedir): MinionDataIndex}
+_MINION_DATA_INDEXES = {}
+
+# Accepted minion ids, shared by all CkMinions instances of a process
+# {accepted_keys_dir: (dir_stamp, ids, sorted_ids)}
+_ACCEPTED_MINIONS = {}
+
+# Seconds during which a directory modification time is not trusted, to cover
+# filesystems with a coarse timestamp resolution
+_DIR_STAMP_SETTLE = 2
+
+
+def accepted_minions(path):
+    """
+    Return the sorted list of the minion ids with a key in the accepted keys
+    directory ``path``.
+
+    The ids are kept in memory and the directory is only listed again when its
+    modification time changes, which happens whenever a key is accepted,
+    rejected or deleted, whatever process did it. Only the entries which were
+    not known to be accepted keys yet are then checked on disk.
+    """
+    try:
+        stat = os.stat(path)
+    except OSError:
+        _ACCEPTED_MINIONS.pop(path, None)
+        raise
+    stamp = (stat.st_ino, stat.st_mtime_ns)
+    cached = _ACCEPTED_MINIONS.get(path)
+    if cached is not None and cached[0] == stamp:
+        return list(cached[2])
+
+    known = cached[1] if cached is not None else frozenset()
+    ids = frozenset(
+        fn_
+        for fn_ in os.listdir(path)
+        if not fn_.startswith(".")
+        and (fn_ in known or os.path.isfile(os.path.join(path, fn_)))
+    )
+    sorted_ids = salt.utils.data.sorted_ignorecase(ids)
+    if time.time() - stat.st_mtime_ns / 1e9 < _DIR_STAMP_SETTLE:
+        # Another change within the same timestamp tick would go unnoticed
+        stamp = None
+    _ACCEPTED_MINIONS[path] = (stamp, ids, sorted_ids)
+    return list(sorted_ids)
+
+
+# Resolved targets, shared by all CkMinions instances of a process
+# {(pki_dir, cachedir, expr, tgt_type, delimiter, greedy): (expires, stamp, result)}
+_TARGET_CACHE = {}
+
+# Maximum number of resolved targets kept in memory by a process
+_TARGET_CACHE_SIZE = 1024
+
+# Target types whose resolution only depends on the accepted keys and on the
+# minion data cache
+_CACHED_TARGET_TYPES = frozenset(
+    (
+        "compound",
+        "compound_pillar_exact",
+        "glob",
+        "grain",
+        "grain_pcre",
+        "ipcidr",
+        "list",
+        "nodegroup",
+        "pcre",
+        "pillar",
+        "pillar_exact",
+        "pillar_pcre",
+    )
+)
+
+# Cached target types whose resolution only depends on the accepted keys
+_KEY_TARGET_TYPES = frozenset(("glob", "list", "pcre"))
+
+# Size over which the minion data stamp file is emptied again
+_MINION_DATA_STAMP_MAX = 1 << 20
+
+
+def _minion_data_stamp_path(opts):
+    return os.path.join(opts["cachedir"], ".minion_data_stamp")
+
+
+def minion_data_updated(opts):
+    """
+    Signal to the target caches of all the master processes that the data of
+    a minion changed in the minion data cache.
+
+    Each update appends a byte to the stamp file, so that its size tells
+    updates apart regardless of the timestamp resolution of the filesystem.
+    """
+    path = _minion_data_stamp_path(opts)
+    try:
+        with salt.utils.files.fopen(path, "ab") as fp_:
+            fp_.write(b".")
+            fp_.flush()
+            if fp_.tell() >= _MINION_DATA_STAMP_MAX:
+                # The modification time still differs from the last time
+                # the file had this size
+                fp_.truncate(0)
+    except OSError as exc:
+        log.error("Unable to update %s: %s", path, exc)
+
+
+def _uses_range(expr, tgt_type, nodegroups):
+    """
+    Check whether a compound or nodegroup target contains range expressions,
+    in the nodegroups it refers to included
+    """
+    if tgt_type == "nodegroup":
+        expr = nodegroup_comp(expr, nodegroups)
+    words = list(expr.split() if isinstance(expr, str) else expr)
+    expanded = set()
+    while words:
+        word = words.pop(0)
+        if not isinstance(word, str):
+            continue
+        target_info = parse_target(word)
+        if target_info["engine"] == "R":
+            return True
+        if target_info["engine"] == "N" and target_info["pattern"] not in expanded:
+            expanded.add(target_info["pattern"])
+            group = nodegroup_comp(target_info["pattern"], nodegroups)
+            words.extend(group.split() if isinstance(group, str) else group)
+    return False
+
+
+def _cached_target(key, stamp):
+    """
+    Return a copy of the cached resolution of a target, or ``None`` if it is
+    missing, expired or was resolved with another state of the accepted keys
+    or the minion data cache
+    """
+    cached = _TARGET_CACHE.get(key)
+    if cached is None or cached[1] != stamp or cached[0] <= time.time():
+        return None
+    return {
+        "minions": list(cached[2]["minions"]),
+        "missing": list(cached[2]["missing"]),
+        "ssh_minions": False,
+    }
+
+
+def _cache_target(key, stamp, res, ttl):
+    """
+    Cache the resolution of a target for ``ttl`` seconds
+    """
+    now = time.time()
+    if len(_TARGET_CACHE) >= _TARGET_CACHE_SIZE:
+        for expired in [k for k, entry in _TARGET_CACHE.items() if entry[0] <= now]:
+            del _TARGET_CACHE[expired]
+        if len(_TARGET_CACHE) >= _TARGET_CACHE_SIZE:
+            _TARGET_CACHE.clear()
+    _TARGET_CACHE[key] = (
+        now + ttl,
+        stamp,
+        {"minions": list(res["minions"]), "missing": list(res.get("missing", []))},
+    )
+
+
 class CkMinions:
     """
     Used to check what minions should respond from a target
@@ -255,6 +701,12 @@ class CkMinions:
             "missing": [],
         }
 
+    def _accepted_minions(self):
+        """
+        Return the sorted list of the minions with an accepted key
+        """
+        return accepted_minions(os.path.join(self.opts["pki_dir"], self.acc))
+
     def _pki_minions(self):
         """
         Retreive complete minion list from PKI dir.
@@ -271,15 +723,7 @@ class CkMinions:
                 log.debug("Returning cached minion list")
                 with salt.utils.files.fopen(pki_cache_fn, mode="rb") as fn_:
                     return self.serial.load(fn_)
-            else:
-                for fn_ in salt.utils.data.sorted_ignorecase(
-                    os.listdir(os.path.join(self.opts["pki_dir"], self.acc))
-                ):
-                    if not fn_.startswith(".") and os.path.isfile(
-                        os.path.join(self.opts["pki_dir"], self.acc, fn_)
-                    ):
-                        minions.append(fn_)
-            return minions
+            return self._accepted_minions()
         except OSError as exc:
             log.error(
                 "Encountered OSError while evaluating minions in PKI dir: %s", exc
@@ -296,24 +740,34 @@ class CkMinions:
         data and matched by the condition.
         """
         cache_enabled = self.opts.get("minion_data_cache", False)
+        index = self._minion_data_index() if cache_enabled else None
 
         def list_cached_minions():
+            if index is not None:
+                return list(index.minions())
             return self.cache.list("minions")
 
         if greedy:
-            minions = []
-            for fn_ in salt.utils.data.sorted_ignorecase(
-                os.listdir(os.path.join(self.opts["pki_dir"], self.acc))
-            ):
-                if not fn_.startswith(".") and os.path.isfile(
-                    os.path.join(self.opts["pki_dir"], self.acc, fn_)
-                ):
-                    minions.append(fn_)
+            minions = self._accepted_minions()
         elif cache_enabled:
             minions = list_cached_minions()
         else:
             return {"minions": [], "missing": []}
 
+        if index is not None:
+            indexed = self._check_indexed_minions(
+                index,
+                minions,
+                expr,
+                delimiter,
+                greedy,
+                search_type,
+                regex_match=regex_match,
+                exact_match=exact_match,
+            )
+            if indexed is not None:
+                return {"minions": indexed, "missing": []}
+
         if cache_enabled:
             if greedy:
                 cminions = list_cached_minions()
@@ -322,10 +776,11 @@ class CkMinions:
             if not cminions:
                 return {"minions": minions, "missing": []}
             minions = set(minions)
+            if greedy:
+                cminions = [id_ for id_ in cminions if id_ in minions]
+            cdata = self._fetch_minion_data(cminions)
             for id_ in cminions:
-                if greedy and id_ not in minions:
-                    continue
-                mdata = self.cache.fetch("minions/{}".format(id_), "data")
+                mdata = cdata[id_]
                 if mdata is None:
                     if not greedy:
                         minions.remove(id_)
@@ -342,6 +797,91 @@ class CkMinions:
             minions = list(minions)
         return {"minions": minions, "missing": []}
 
+    def _fetch_minion_data(self, minion_ids):
+        """
+        Fetch the cached data of several minions at once. Returns a dict
+        mapping each minion id to its data.
+        """
+        banks = {"minions/{}".format(id_): id_ for id_ in minion_ids}
+        cdata = self.cache.fetch_many((bank, "data") for bank in banks)
+        return {banks[bank]: mdata for (bank, _), mdata in cdata.items()}
+
+    def _minion_data_index(self):
+        """
+        Return the synchronized minion data index of this process, or
+        ``None`` if ``minion_data_index`` is disabled
+        """
+        if not self.opts.get("minion_data_index", False):
+            return None
+        index_id = (self.cache.driver, self.cache.cachedir)
+        index = _MINION_DATA_INDEXES.get(index_id)
+        if index is None:
+            index = _MINION_DATA_INDEXES[index_id] = MinionDataIndex(
+                self.opts, cache=self.cache
+            )
+        index.refresh()
+        return index
+
+    def update_minion_data_index(self, minion_id, data):
+        """
+        Update the minion data index of this process after ``data`` has been
+        stored in the minion data cache for ``minion_id``, and invalidate the
+        resolved targets of all the master processes
+        """
+        if self.opts.get("target_cache_ttl"):
+            minion_data_updated(self.opts)
+        if not self.opts.get("minion_data_index", False):
+            return
+        index_id = (self.cache.driver, self.cache.cachedir)
+        index = _MINION_DATA_INDEXES.get(index_id)
+        if index is not None:
+            index.update(minion_id, data)
+
+    def _check_indexed_minions(
+        self,
+        index,
+        minions,
+        expr,
+        delimiter,
+        greedy,
+        search_type,
+        regex_match=False,
+        exact_match=False,
+    ):
+        """
+        Filter ``minions`` through the minion data index. Only the minions the
+        index could not decide on are fetched from the cache and matched with
+        ``subdict_match``. Returns ``None`` if the index cannot serve the
+        expression.
+        """
+        res = index.match(
+            search_type,
+            expr,
+            delimiter=delimiter,
+            regex_match=regex_match,
+            exact_match=exact_match,
+        )
+        if res is None:
+            return None
+        matched, undecided = res
+        for id_, mdata in self._fetch_minion_data(
+            undecided.intersection(minions)
+        ).items():
+            if mdata is None:
+                continue
+            if salt.utils.data.subdict_match(
+                mdata.get(search_type),
+                expr,
+                delimiter=delimiter,
+                regex_match=regex_match,
+                exact_match=exact_match,
+            ):
+                matched.add(id_)
+        if greedy:
+            cached = index.minions()
+            return [id_ for id_ in minions if id_ not in cached or id_ in matched]
+        return [id_ for id_ in minions if id_ in matched]
+
     def _check_grain_minions(self, expr, delimiter, greedy):
         """
         Return the minions found by looking via grains
@@ -413,8 +953,9 @@ class CkMinions:
             proto = "ipv{}".format(tgt.version)
 
             minions = set(minions)
+            cdata = self._fetch_minion_data(cminions)
             for id_ in cminions:
-                mdata = self.cache.fetch("minions/{}".format(id_), "data")
+                mdata = cdata[id_]
                 if mdata is None:
                     if not greedy:
                         minions.remove(id_)
@@ -449,15 +990,7 @@ class CkMinions:
             log.error("Range exception in compound match: %s", exc)
             cache_enabled = self.opts.get("minion_data_cache", False)
             if greedy:
-                mlist = []
-                for fn_ in salt.utils.data.sorted_ignorecase(
-                    os.listdir(os.path.join(self.opts["pki_dir"], self.acc))
-                ):
-                    if not fn_.startswith(".") and os.path.isfile(
-                        os.path.join(self.opts["pki_dir"], self.acc, fn_)
-                    ):
-                        mlist.append(fn_)
-                return {"minions": mlist, "missing": []}
+                return {"minions": self._accepted_minions(), "missing": []}
             elif cache_enabled:
                 return {"minions": self.cache.list("minions"), "missing": []}
             else:
@@ -677,15 +1210,64 @@ class CkMinions:
         """
         Return a list of all minions that have auth'd
         """
-        mlist = []
-        for fn_ in salt.utils.data.sorted_ignorecase(
-            os.listdir(os.path.join(self.opts["pki_dir"], self.acc))
+        return {"minions": self._accepted_minions(), "missing": []}
+
+    def _target_stamp(self, tgt_type):
+        """
+        Return the state of the accepted keys, and of the minion data cache
+        unless ``tgt_type`` only depends on the keys, which the resolved
+        targets depend on. ``None`` is returned if the keys changed too
+        recently to tell a later change apart.
+        """
+        try:
+            stat = os.stat(os.path.join(self.opts["pki_dir"], self.acc))
+        except OSError:
+            stamp = [None]
+        else:
+            if time.time() - stat.st_mtime_ns / 1e9 < _DIR_STAMP_SETTLE:
+                return None
+            stamp = [(stat.st_ino, stat.st_mtime_ns)]
+        if tgt_type not in _KEY_TARGET_TYPES:
+            try:
+                stat = os.stat(_minion_data_stamp_path(self.opts))
+            except OSError:
+                stamp.append(None)
+            else:
+                stamp.append((stat.st_ino, stat.st_size, stat.st_mtime_ns))
+        return tuple(stamp)
+
+    def _target_cache_key(self, expr, tgt_type, delimiter, greedy):
+        """
+        Return the key of a target in the target cache, or ``None`` if its
+        resolution must not be cached
+        """
+        if (
+            not self.opts.get("target_cache_ttl")
+            or tgt_type not in _CACHED_TARGET_TYPES
+            or self.opts.get("enable_ssh_minions", False) is True
         ):
-            if not fn_.startswith(".") and os.path.isfile(
-                os.path.join(self.opts["pki_dir"], self.acc, fn_)
-            ):
-                mlist.append(fn_)
-        return {"minions": mlist, "missing": []}
+            return None
+        if isinstance(expr, list):
+            expr = tuple(expr)
+        try:
+            hash(expr)
+        except TypeError:
+            return None
+        if tgt_type in (
+            "compound",
+            "compound_pillar_exact",
+            "nodegroup",
+        ) and _uses_range(expr, tgt_type, self.opts.get("nodegroups", {})):
+            # Range expressions are resolved by the range server
+            return None
+        return (
+            self.opts["pki_dir"],
+            self.opts["cachedir"],
+            expr,
+            tgt_type,
+            delimiter,
+            greedy,
+        )
 
     def check_minions(
         self, expr, tgt_type="glob", delimiter=DEFAULT_TARGET_DELIM, greedy=True
@@ -695,8 +1277,18 @@ class CkMinions:
         stored for authentication. This should return a set of ids which
         match the regex, this will then be used to parse the returns to
         make sure everyone has checked back in.
-        """
 
+        With ``target_cache_ttl`` set, the resolved targets are kept in memory
+        until they expire, a key is accepted or removed, or the data of a
+        minion changes in the minion data cache.
+        """
+        cache_key = self._target_cache_key(expr, tgt_type, delimiter, greedy)
+        if cache_key is not None:
+            stamp = self._target_stamp(tgt_type)
+            if stamp is not None:
+                cached = _cached_target(cache_key, stamp)
+                if cached is not None:
+                    return cached
         try:
             if expr is None:
                 expr = ""
@@ -724,6 +1316,8 @@ class CkMinions:
                 if ssh_minions:
                     _res["minions"].extend(ssh_minions)
                     _res["ssh_minions"] = True
+            if cache_key is not None and stamp is not None:
+                _cache_target(cache_key, stamp, _res, self.opts["target_cache_ttl"])
         except Exception:  # pylint: disable=broad-except
             log.exception(
                 "Failed matching available minions with %s pattern: %s", tgt_type, expr
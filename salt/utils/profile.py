@@ -6,11 +6,14 @@ Decorator and functions to profile Salt using cProfile
 from __future__ import absolute_import, print_function, unicode_literals
 
 # Import Python libs
+import contextlib
 import datetime
 import logging
 import os
 import pstats
 import subprocess
+import threading
+import time
 
 # Import Salt libs
 import salt.utils.files
@@ -108,3 +111,187 @@ def output_profile(pr, stats_path="/tmp/stats", stop=False, id_=None):
             if not stop:
                 pr.enable()
     return pr
+
+
+class _Phase(object):
+    """
+    Node of a PhaseProfile
+    """
+
+    __slots__ = ("name", "duration", "count", "children")
+
+    def __init__(self, name):
+        self.name = name
+        self.duration = 0.0
+        self.count = 0
+        self.children = {}
+
+    def child(self, name):
+        node = self.children.get(name)
+        if node is None:
+            node = self.children[name] = _Phase(name)
+        return node
+
+    def to_dict(self):
+        return {
+            "name": self.name,
+            "duration": self.duration,
+            "count": self.count,
+            "children": [child.to_dict() for child in self.children.values()],
+        }
+
+    def folded(self, stack, lines):
+        # Flame graph tools split the stacks on semicolons
+        stack = stack + [self.name.replace(";", ":")]
+        own = self.duration - sum(child.duration for child in self.children.values())
+        # Microseconds, as the tools only take integer sample counts
+        if own > 0:
+            lines.append("{0} {1}".format(";".join(stack), int(own * 1000000)))
+        for child in self.children.values():
+            child.folded(stack, lines)
+
+
+class PhaseProfile(object):
+    """
+    Tree of the wall clock time spent in the nested phases of an operation,
+    such as a state run. The phases with the same name under the same parent
+    are merged, the nodes report their total duration in seconds and how many
+    times they were entered.
+
+    .. versionadded:: 3003
+    """
+
+    def __init__(self, name):
+        self.root = _Phase(name)
+        self.root.count = 1
+        self._stack = [self.root]
+        self._start = time.time()
+        self.details = []
+
+    @contextlib.contextmanager
+    def phase(self, name, details=None):
+        node = self._stack[-1].child(name)
+        self._stack.append(node)
+        start = time.time()
+        try:
+            yield node
+        finally:
+            duration = time.time() - start
+            node.duration += duration
+            node.count += 1
+            self._stack.pop()
+            if details is not None:
+                self.details.append(dict(details, phase=name, duration=duration))
+
+    def add(self, name, duration):
+        """
+        Add a phase timed elsewhere, such as in another process
+        """
+        node = self._stack[-1].child(name)
+        node.duration += duration
+        node.count += 1
+
+    def stop(self):
+        self.root.duration = time.time() - self._start
+
+    def slowest(self, count=10):
+        """
+        Return the ``count`` longest phases which were given details
+        """
+        return sorted(self.details, key=lambda item: item["duration"], reverse=True)[
+            :count
+        ]
+
+    def to_dict(self):
+        return self.root.to_dict()
+
+    def folded(self):
+        """
+        Return the phases in the folded stacks format read by flame graph
+        tools such as ``flamegraph.pl``, with their own time in microseconds
+        """
+        lines = []
+        self.root.folded([], lines)
+        return "\n".join(lines) + "\n"
+
+
+# The profiles being recorded in each thread, see start_phases
+_PHASE_PROFILES = threading.local()
+
+
+def _phase_profiles():
+    try:
+        return _PHASE_PROFILES.profiles
+    except AttributeError:
+        _PHASE_PROFILES.profiles = []
+        return _PHASE_PROFILES.profiles
+
+
+class _NullPhase(object):
+    def __enter__(self):
+        return None
+
+    def __exit__(self, *args):
+        return False
+
+
+_NULL_PHASE = _NullPhase()
+
+
+def start_phases(name):
+    """
+    Start recording the phases timed with ``phase`` in a new PhaseProfile,
+    until ``stop_phases`` is called with it
+
+    .. versionadded:: 3003
+    """
+    profile = PhaseProfile(name)
+    _phase_profiles().append(profile)
+    return profile
+
+
+def stop_phases(profile):
+    """
+    Stop recording the phases in ``profile``
+
+    .. versionadded:: 3003
+    """
+    profile.stop()
+    profiles = _phase_profiles()
+    if profile in profiles:
+        profiles.remove(profile)
+
+
+def recording():
+    """
+    Return whether a profile is being recorded in this thread, sparing the
+    callers of ``phase`` to build details which would not be used
+
+    .. versionadded:: 3003
+    """
+    return bool(_phase_profiles())
+
+
+def phase(name, details=None):
+    """
+    Return a context manager timing the phase ``name`` in the profile being
+    recorded, if any. When a dict of details is passed, such as the command
+    run by the phase, the phase is also reported among the slowest ones.
+
+    .. versionadded:: 3003
+    """
+    profiles = _phase_profiles()
+    if not profiles:
+        return _NULL_PHASE
+    return profiles[-1].phase(name, details)
+
+
+def add_phase(name, duration):
+    """
+    Add a phase timed elsewhere to the profile being recorded, if any
+
+    .. versionadded:: 3003
+    """
+    profiles = _phase_profiles()
+    if profiles:
+        profiles[-1].add(name, duration)
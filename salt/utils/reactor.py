@@ -7,7 +7,6 @@ Functions which implement running reactor jobs
 # Import python libs
 from __future__ import absolute_import, print_function, unicode_literals
 
-import fnmatch
 import glob
 import logging
 import os
@@ -24,6 +23,7 @@ import salt.utils.event
 import salt.utils.files
 import salt.utils.master
 import salt.utils.process
+import salt.utils.tagmatch
 import salt.utils.yaml
 import salt.wheel
 
@@ -56,6 +56,8 @@ class Reactor(salt.utils.process.SignalHandlingProcess, salt.state.Compiler):
         self.minion = salt.minion.MasterMinion(local_minion_opts)
         salt.state.Compiler.__init__(self, opts, self.minion.rend)
         self.is_leader = True
+        self._matcher = None
+        self._matcher_version = None
 
     # We need __setstate__ and __getstate__ to avoid pickling errors since
     # 'self.rend' (from salt.state.Compiler) contains a function reference
@@ -114,6 +116,35 @@ class Reactor(salt.utils.process.SignalHandlingProcess, salt.state.Compiler):
         """
         log.debug("Gathering reactors for tag %s", tag)
         reactors = []
+        for val in self._reactor_matcher().match(tag):
+            if isinstance(val, six.string_types):
+                reactors.append(val)
+            elif isinstance(val, list):
+                reactors.extend(val)
+        return reactors
+
+    def _reactor_matcher(self):
+        """
+        Return the tag matcher of the reactor map, compiled again whenever the
+        reactor map file or list changes
+        """
+        if isinstance(self.opts["reactor"], six.string_types):
+            try:
+                stat = os.stat(self.opts["reactor"])
+                version = (
+                    self.opts["reactor"],
+                    stat.st_ino,
+                    stat.st_size,
+                    stat.st_mtime_ns,
+                )
+            except OSError:
+                version = None
+        else:
+            version = (id(self.opts["reactor"]), len(self.opts["reactor"]))
+        if version is not None and version == self._matcher_version:
+            return self._matcher
+
+        react_map = []
         if isinstance(self.opts["reactor"], six.string_types):
             try:
                 with salt.utils.files.fopen(self.opts["reactor"]) as fp_:
@@ -126,19 +157,18 @@ class Reactor(salt.utils.process.SignalHandlingProcess, salt.state.Compiler):
                 )
         else:
             react_map = self.opts["reactor"]
-        for ropt in react_map:
+        matcher = salt.utils.tagmatch.TagMatcher()
+        for ropt in react_map or []:
             if not isinstance(ropt, dict):
                 continue
             if len(ropt) != 1:
                 continue
             key = next(six.iterkeys(ropt))
-            val = ropt[key]
-            if fnmatch.fnmatch(tag, key):
-                if isinstance(val, six.string_types):
-                    reactors.append(val)
-                elif isinstance(val, list):
-                    reactors.extend(val)
-        return reactors
+            if isinstance(ropt[key], (six.string_types, list)):
+                matcher.add(key, "fnmatch", ropt[key])
+        self._matcher = matcher
+        self._matcher_version = version
+        return matcher
 
     def list_all(self):
         """
@@ -171,6 +201,7 @@ class Reactor(salt.utils.process.SignalHandlingProcess, salt.state.Compiler):
                 return {"status": False, "comment": "Reactor already exists."}
 
         self.minion.opts["reactor"].append({tag: reaction})
+        self._matcher_version = None
         return {"status": True, "comment": "Reactor added."}
 
     def delete_reactor(self, tag):
@@ -182,6 +213,7 @@ class Reactor(salt.utils.process.SignalHandlingProcess, salt.state.Compiler):
             _tag = next(six.iterkeys(reactor))
             if _tag == tag:
                 self.minion.opts["reactor"].remove(reactor)
+                self._matcher_version = None
                 return {"status": True, "comment": "Reactor deleted."}
 
         return {"status": False, "comment": "Reactor does not exists."}
@@ -0,0 +1,217 @@
+"""
+Match event tags against many patterns at once.
+
+.. versionadded:: 3003
+
+The patterns are indexed by their literal prefix in a character trie, so
+matching a tag only walks the characters of the tag and only tests the
+compiled globs and regular expressions whose literal prefix the tag starts
+with, instead of testing every pattern in turn.
+"""
+
+import fnmatch
+import itertools
+import os
+import re
+
+# The match types of SaltEvent.get_event
+MATCH_TYPES = ("startswith", "endswith", "find", "regex", "fnmatch")
+
+
+def glob_prefix(pattern):
+    """
+    Return the literal prefix of all the strings matched by the glob
+    ``pattern``
+    """
+    for idx, char in enumerate(pattern):
+        if char in "*?[":
+            return pattern[:idx]
+    return pattern
+
+
+def regex_prefix(pattern):
+    """
+    Return the literal prefix of all the strings matched from their start by
+    the regular expression ``pattern``. An empty string is returned when the
+    strings may start with anything.
+    """
+    if "|" in pattern:
+        # Alternatives can match unrelated strings
+        return ""
+    for idx, char in enumerate(pattern):
+        if char in "*?+{":
+            # Quantifiers apply to the previous character
+            return pattern[: max(idx - 1, 0)]
+        if char in "[]()^$.\\":
+            return pattern[:idx]
+    return pattern
+
+
+class _Trie:
+    """
+    Character trie holding the entries of the patterns under their literal
+    prefix
+    """
+
+    def __init__(self):
+        self.root = {}
+
+    def add(self, key, entry):
+        node = self.root
+        for char in key:
+            node = node.setdefault(char, {})
+        node.setdefault(None, []).append(entry)
+
+    def remove(self, key, pattern, value):
+        path = [self.root]
+        for char in key:
+            node = path[-1].get(char)
+            if node is None:
+                return False
+            path.append(node)
+        entries = path[-1].get(None, [])
+        for idx, entry in enumerate(entries):
+            if entry[1] == pattern and entry[2] == value:
+                del entries[idx]
+                break
+        else:
+            return False
+        if not entries:
+            del path[-1][None]
+            # Prune the nodes left empty
+            for idx in range(len(key) - 1, -1, -1):
+                if path[idx + 1]:
+                    break
+                del path[idx][key[idx]]
+        return True
+
+    def walk(self, text):
+        """
+        Yield the entries stored under all the prefixes of ``text``
+        """
+        node = self.root
+        if None in node:
+            yield from node[None]
+        for char in text:
+            node = node.get(char)
+            if node is None:
+                return
+            if None in node:
+                yield from node[None]
+
+
+class TagMatcher:
+    """
+    Set of tag patterns of the match types of ``SaltEvent.get_event``, each
+    one associated with a value, returning the values of all the patterns
+    matching a tag in one pass.
+
+    .. code-block:: python
+
+        matcher = TagMatcher()
+        matcher.add("salt/job/*/ret/*", "fnmatch", "returns")
+        matcher.add("salt/auth", "startswith", "auth")
+        matcher.match("salt/job/20210101/ret/minion")  # ['returns']
+    """
+
+    def __init__(self):
+        self._seq = itertools.count()
+        self._count = 0
+        self._startswith = _Trie()
+        # Indexed by the reversed suffix
+        self._endswith = _Trie()
+        self._globs = _Trie()
+        self._regexes = _Trie()
+        self._finds = []
+
+    def __len__(self):
+        return self._count
+
+    def _index(self, pattern, match_type):
+        """
+        Return the trie indexing the patterns of ``match_type`` and the key of
+        ``pattern`` in it
+        """
+        if match_type == "startswith":
+            return self._startswith, pattern
+        if match_type == "endswith":
+            return self._endswith, pattern[::-1]
+        if match_type == "fnmatch":
+            # fnmatch.fnmatch is case insensitive on Windows
+            return self._globs, glob_prefix(os.path.normcase(pattern))
+        if match_type == "regex":
+            return self._regexes, regex_prefix(pattern)
+        if match_type == "find":
+            return None, pattern
+        raise ValueError("Unknown tag match type '{}'".format(match_type))
+
+    def add(self, pattern, match_type="fnmatch", value=None):
+        """
+        Add a pattern, returning ``value`` when it matches. The value defaults
+        to the pattern.
+        """
+        if value is None:
+            value = pattern
+        trie, key = self._index(pattern, match_type)
+        if match_type == "fnmatch":
+            check = re.compile(fnmatch.translate(os.path.normcase(pattern))).match
+        elif match_type == "regex":
+            # Regular expressions match from the start of the tags
+            check = re.compile("^" + pattern).search
+        else:
+            check = None
+        entry = (next(self._seq), pattern, value, check)
+        if trie is None:
+            self._finds.append(entry)
+        else:
+            trie.add(key, entry)
+        self._count += 1
+
+    def remove(self, pattern, match_type="fnmatch", value=None):
+        """
+        Remove a pattern added with the same value. Return False if there is
+        no such pattern.
+        """
+        if value is None:
+            value = pattern
+        trie, key = self._index(pattern, match_type)
+        if trie is None:
+            for idx, entry in enumerate(self._finds):
+                if entry[1] == pattern and entry[2] == value:
+                    del self._finds[idx]
+                    break
+            else:
+                return False
+        elif not trie.remove(key, pattern, value):
+            return False
+        self._count -= 1
+        return True
+
+    def _iter_matches(self, tag):
+        yield from self._startswith.walk(tag)
+        yield from self._endswith.walk(tag[::-1])
+        for entry in self._finds:
+            if entry[1] in tag:
+                yield entry
+        normtag = os.path.normcase(tag)
+        for entry in self._globs.walk(normtag):
+            if entry[3](normtag):
+                yield entry
+        for entry in self._regexes.walk(tag):
+            if entry[3](tag) is not None:
+                yield entry
+
+    def match(self, tag):
+        """
+        Return the values of all the patterns matching ``tag``, in the order
+        the patterns were added
+        """
+        return [entry[2] for entry in sorted(self._iter_matches(tag))]
+
+    def matches(self, tag):
+        """
+        Return True if any pattern matches ``tag``
+        """
+        for _ in self._iter_matches(tag):
+            return True
+        return False
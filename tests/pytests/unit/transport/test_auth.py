@@ -0,0 +1,95 @@
+import os
+import threading
+
+import salt.crypt
+import salt.transport.mixins.auth
+from tests.support.mock import MagicMock, patch
+
+
+def test_minion_pub_cache(tmp_path):
+    """
+    test that the minion public keys are only read and parsed again once
+    their file changes
+    """
+    for name in ("minion1", "minion2"):
+        salt.crypt.gen_keys(str(tmp_path), name, 2048)
+    pubfn = str(tmp_path / "minion1.pub")
+    mixin = salt.transport.mixins.auth.AESReqServerMixin()
+    load = MagicMock(side_effect=salt.crypt.load_rsa_pub_key)
+    with patch("salt.crypt.load_rsa_pub_key", load):
+        text, key = mixin._minion_pub(pubfn)
+        assert mixin._minion_pub(pubfn) == (text, key)
+        assert load.call_count == 1
+        assert key.can_encrypt()
+
+        with salt.utils.files.fopen(str(tmp_path / "minion2.pub")) as fp_:
+            other = fp_.read()
+        with salt.utils.files.fopen(pubfn, "w") as fp_:
+            fp_.write(other)
+        stat = os.stat(pubfn)
+        os.utime(pubfn, (stat.st_atime, stat.st_mtime + 10))
+        assert mixin._minion_pub(pubfn)[0] == other
+        assert load.call_count == 2
+
+
+def test_auth_busy():
+    """
+    test that the minions are told to retry once auth_workers workers are
+    authenticating minions, and that the older clients wait instead
+    """
+    mixin = salt.transport.mixins.auth.AESReqServerMixin()
+    mixin.opts = {"auth_workers": 1}
+    mixin.pre_fork(None)
+    load = {"id": "minion", "busy_retry": True}
+    with patch.object(mixin, "_auth_minion", MagicMock(return_value="ret")):
+        assert mixin._auth(load) == "ret"
+        assert mixin._auth_slots.acquire(False)
+        assert mixin._auth(load) == {
+            "enc": "clear",
+            "load": {"ret": "busy"},
+        }
+        timer = threading.Timer(0.1, mixin._auth_slots.release)
+        timer.start()
+        assert mixin._auth({"id": "minion"}) == "ret"
+        timer.join()
+        assert mixin._auth(load) == "ret"
+        assert mixin._auth_minion.call_count == 3
+        # The slots were all released
+        assert mixin._auth_slots.acquire(False)
+
+
+def test_sign_in_busy_caller():
+    """
+    test that salt-call waits and signs in again when the master is busy,
+    instead of exiting as if its key was not accepted
+    """
+    auth = object.__new__(salt.crypt.SAuth)
+    auth.opts = {
+        "caller": True,
+        "acceptance_wait_time": 10,
+        "acceptance_wait_time_max": 0,
+    }
+    creds = {"aes": salt.crypt.Crypticle.generate_key_string()}
+    sign_in = MagicMock(side_effect=["busy", "busy", creds])
+    sleep = MagicMock()
+    with patch.object(auth, "sign_in", sign_in), patch(
+        "salt.transport.client.ReqChannel.factory", MagicMock()
+    ), patch("time.sleep", sleep), patch("random.uniform", MagicMock(return_value=2)):
+        auth.authenticate()
+    assert sign_in.call_count == 3
+    assert [call[0][0] for call in sleep.call_args_list] == [12, 12]
+    assert auth._creds is creds
+
+
+def test_sign_in_payload_busy_retry(tmp_path):
+    """
+    test that the minions tell the master they retry on a busy reply
+    """
+    salt.crypt.gen_keys(str(tmp_path), "minion", 2048)
+    auth = object.__new__(salt.crypt.AsyncAuth)
+    auth.opts = {"id": "minion", "pki_dir": str(tmp_path)}
+    auth.pub_path = str(tmp_path / "minion.pub")
+    auth.mpub = "minion_master.pub"
+    payload = auth.minion_sign_in_payload()
+    assert payload["cmd"] == "_auth"
+    assert payload["busy_retry"] is True
@@ -0,0 +1,35 @@
+import salt.ext.tornado.concurrent
+import salt.ext.tornado.iostream
+import salt.transport.frame
+import salt.transport.tcp
+from tests.support.mock import MagicMock
+
+
+def test_message_server_sizes():
+    """
+    test that the messages are handed over with their size on the wire
+    """
+    msgs = [
+        salt.transport.frame.frame_msg({"enc": "clear", "load": {"cmd": "a"}}),
+        salt.transport.frame.frame_msg({"enc": "aes", "load": "x" * 100}),
+    ]
+    wire = b"".join(msgs)
+    chunks = [wire[:10], wire[10:]]
+
+    def _read_bytes(*args, **kwargs):
+        future = salt.ext.tornado.concurrent.Future()
+        if chunks:
+            future.set_result(chunks.pop(0))
+        else:
+            future.set_exception(salt.ext.tornado.iostream.StreamClosedError())
+        return future
+
+    stream = MagicMock()
+    stream.read_bytes.side_effect = _read_bytes
+    handler = MagicMock()
+    io_loop = MagicMock()
+    server = salt.transport.tcp.SaltMessageServer(handler, io_loop=io_loop)
+    server.handle_stream(stream, ("127.0.0.1", 4506))
+    calls = io_loop.spawn_callback.call_args_list
+    assert [call[1]["size"] for call in calls] == [len(msg) for msg in msgs]
+    assert [call[0][3]["enc"] for call in calls] == ["clear", "aes"]
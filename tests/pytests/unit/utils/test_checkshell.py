@@ -0,0 +1,84 @@
+import os
+
+import pytest
+
+import salt.utils.checkshell
+import salt.utils.platform
+from salt.exceptions import CommandExecutionError
+from tests.support.mock import patch
+
+pytestmark = pytest.mark.skipif(
+    salt.utils.platform.is_windows(), reason="The check shells are not used on Windows"
+)
+
+
+def test_retcodes(tmp_path):
+    """
+    test running commands in the persistent shells, and caching their exit
+    codes until invalidated
+    """
+    shells = salt.utils.checkshell.CheckShells("/bin/sh", 2)
+    marker = tmp_path / "marker"
+    try:
+        assert shells.retcodes(
+            ["true", "exit 3", "cd /; echo out; echo err >&2; false", "true"]
+        ) == [0, 3, 1, 0]
+        assert len(shells.shells) == 2
+        # The commands cannot change the shells they run in
+        assert shells.retcodes(['test "$(pwd)" = /']) == [1]
+        assert shells.retcodes(["test -e '{}'".format(marker)]) == [1]
+        marker.touch()
+        assert shells.retcodes(["test -e '{}'".format(marker)]) == [1]
+        shells.invalidate()
+        assert shells.retcodes(["test -e '{}'".format(marker)]) == [0]
+        assert shells.retcodes(["test -e marker"], cwd=str(tmp_path)) == [0]
+        assert shells.retcodes(['test "$LC_MESSAGES" = C']) == [0]
+    finally:
+        shells.close()
+    assert shells.shells == []
+
+
+def test_environ_changed():
+    """
+    test that the shells are restarted when the environment changed
+    """
+    shells = salt.utils.checkshell.CheckShells("/bin/sh", 1)
+    try:
+        with patch.dict(os.environ, {}):
+            os.environ.pop("SALT_CHECK_SHELL_TEST", None)
+            assert shells.retcodes(['test -n "$SALT_CHECK_SHELL_TEST"']) == [1]
+            shell = shells.shells[0]
+            os.environ["SALT_CHECK_SHELL_TEST"] = "1"
+            assert shells.retcodes(['test -n "$SALT_CHECK_SHELL_TEST"']) == [0]
+            assert shells.shells[0] is not shell
+            assert shell.proc.poll() is not None
+            # The shells are kept while the environment is the same
+            shell = shells.shells[0]
+            assert shells.retcodes(["true"]) == [0]
+            assert shells.shells[0] is shell
+    finally:
+        shells.close()
+
+
+def test_broken_shell():
+    """
+    test that the shells are dropped when one of them exits
+    """
+    shells = salt.utils.checkshell.CheckShells("/bin/sh", 1)
+    with pytest.raises(CommandExecutionError):
+        shells.retcodes(["kill -9 $$"])
+    assert shells.shells == []
+    assert shells.retcodes(["true"]) == [0]
+    shells.close()
+
+
+def test_usable():
+    """
+    test the shells which can be used
+    """
+    assert salt.utils.checkshell.CheckShells.usable("/bin/sh")
+    assert not salt.utils.checkshell.CheckShells.usable("sh")
+    assert not salt.utils.checkshell.CheckShells.usable(None)
+    assert not salt.utils.checkshell.CheckShells.usable(
+        os.path.join(os.sep, "nonexistent", "sh")
+    )
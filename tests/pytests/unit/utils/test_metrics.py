@@ -0,0 +1,133 @@
+import pytest
+
+import salt.utils.metrics
+
+
+def test_histogram_quantile():
+    """
+    test the quantile estimation of a histogram
+    """
+    hist = salt.utils.metrics.Histogram(buckets=(1.0, 2.0, 4.0))
+    assert hist.quantile(0.5) is None
+    for value in (0.5, 0.5, 1.5, 3.0):
+        hist.observe(value)
+    assert hist.count == 4
+    assert hist.sum == 5.5
+    assert hist.counts == [2, 1, 1, 0]
+    assert hist.quantile(0.5) == 1.0
+    assert hist.quantile(0.75) == 2.0
+    assert hist.quantile(0.9) == pytest.approx(3.2)
+    hist.observe(10.0)
+    assert hist.quantile(0.99) == 4.0
+
+
+def test_histogram_merge():
+    """
+    test merging serialized histograms
+    """
+    hist = salt.utils.metrics.Histogram()
+    other = salt.utils.metrics.Histogram()
+    hist.observe(0.002)
+    other.observe(0.2)
+    other.observe(0.3)
+    hist.merge(other.to_dict())
+    assert hist.count == 3
+    assert sum(hist.counts) == 3
+    with pytest.raises(ValueError):
+        hist.merge(salt.utils.metrics.Histogram(buckets=(1.0,)).to_dict())
+
+
+def test_request_stats():
+    """
+    test the aggregation and exposition of the request statistics
+    """
+    worker1 = salt.utils.metrics.RequestStats()
+    worker1.observe("_return", 0.002)
+    worker1.observe("_return", 0.02, error=True)
+    worker2 = salt.utils.metrics.RequestStats()
+    worker2.observe("_return", 0.2)
+    worker2.observe("publish", 0.0001)
+
+    stats = salt.utils.metrics.RequestStats()
+    stats.merge(worker1.to_dict())
+    stats.merge(worker2.to_dict())
+    data = stats.to_dict()
+    assert data["_return"]["runs"] == 3
+    assert data["_return"]["errors"] == 1
+    assert data["_return"]["mean"] == pytest.approx(0.074)
+    assert data["_return"]["p50"] <= data["_return"]["p95"] <= 0.25
+    assert data["publish"]["runs"] == 1
+
+    text = stats.to_prometheus()
+    lines = text.splitlines()
+    assert "# TYPE salt_master_request_duration_seconds histogram" in lines
+    assert (
+        'salt_master_request_duration_seconds_bucket{cmd="_return",le="0.0025"} 1'
+        in lines
+    )
+    assert (
+        'salt_master_request_duration_seconds_bucket{cmd="_return",le="+Inf"} 3'
+        in lines
+    )
+    assert 'salt_master_request_duration_seconds_count{cmd="publish"} 1' in lines
+    assert 'salt_master_request_errors_total{cmd="_return"} 1' in lines
+
+
+def test_worker_stats(tmp_path):
+    """
+    test that the master aggregates the statistics stored by the workers
+    """
+    opts = {"cachedir": str(tmp_path)}
+    for worker in ("MWorker-0", "MWorker-1"):
+        stats = salt.utils.metrics.RequestStats()
+        stats.observe("_pillar", 0.5)
+        stats.set_gauge("queue_depth", 2, queue="returns")
+        salt.utils.metrics.store_worker_stats(opts, worker, stats)
+    stats = salt.utils.metrics.load_worker_stats(opts)
+    assert stats.to_dict()["_pillar"]["runs"] == 2
+    assert stats.gauges_to_list() == [["queue_depth", {"queue": "returns"}, 4]]
+    salt.utils.metrics.clear_worker_stats(opts)
+    assert salt.utils.metrics.load_worker_stats(opts).to_dict() == {}
+
+
+def test_stage_stats():
+    """
+    test the statistics of the stages recorded in the process, with payload
+    sizes
+    """
+    salt.utils.metrics.pop_stage_stats()
+    salt.utils.metrics.observe_stage("publish_encode", 0.001)
+    salt.utils.metrics.observe_stage("publish_send", 0.002, size=2000)
+    stats = salt.utils.metrics.pop_stage_stats()
+    assert salt.utils.metrics.pop_stage_stats().to_dict() == {}
+
+    data = stats.to_dict()
+    assert "size" not in data["publish_encode"]
+    assert data["publish_send"]["size"]["count"] == 1
+    merged = salt.utils.metrics.RequestStats()
+    merged.merge(data)
+    merged.merge(data)
+    lines = merged.to_prometheus().splitlines()
+    assert "# TYPE salt_master_payload_size_bytes histogram" in lines
+    assert (
+        'salt_master_payload_size_bytes_bucket{cmd="publish_send",le="4096"} 2' in lines
+    )
+    assert not any(
+        line.startswith('salt_master_payload_size_bytes_count{cmd="publish_encode"')
+        for line in lines
+    )
+
+
+def test_gauges():
+    """
+    test the exposition of the gauges
+    """
+    stats = salt.utils.metrics.RequestStats()
+    stats.set_gauge("event_return_queue_depth", 3, returner="mysql")
+    stats.set_gauge("event_return_queue_depth", 5, returner="kafka")
+    stats.set_gauge("event_return_queue_depth", 4, returner="mysql")
+    lines = stats.to_prometheus().splitlines()
+    assert lines.count("# TYPE salt_master_event_return_queue_depth gauge") == 1
+    assert 'salt_master_event_return_queue_depth{returner="mysql"} 4' in lines
+    assert 'salt_master_event_return_queue_depth{returner="kafka"} 5' in lines
+    assert "event_return_queue_depth" not in stats.to_dict()
@@ -1,6 +1,10 @@
+import os
+import time
+
+import salt.utils.data
 import salt.utils.minions
 import salt.utils.network
-from tests.support.mock import patch
+from tests.support.mock import MagicMock, patch
 
 
 def test_connected_ids():
@@ -20,3 +24,267 @@ def test_connected_ids():
         with patch_net, patch_list, patch_fetch:
             ret = ckminions.connected_ids()
             assert ret == {minion}
+
+
+MINION_DATA = {
+    "web1": {
+        "grains": {"os": "Ubuntu", "roles": ["web", "db"], "ip": {"eth0": "10.0.0.1"}},
+        "pillar": {"env": "prod"},
+    },
+    "web2": {
+        "grains": {"os": "CentOS", "roles": ["web"], "ip": {"eth0": "10.0.0.2"}},
+        "pillar": {"env": "dev"},
+    },
+    "db1": {
+        "grains": {"os": "Ubuntu", "disks": [{"name": "sda"}]},
+        "pillar": {"env": "prod"},
+    },
+}
+
+
+def _minion_data_index():
+    index = salt.utils.minions.MinionDataIndex({}, cache=MagicMock())
+    for minion_id, data in MINION_DATA.items():
+        index.update(minion_id, data)
+    return index
+
+
+def test_minion_data_index_match():
+    """
+    test that the minion data index agrees with subdict_match
+    """
+    index = _minion_data_index()
+    exprs = [
+        ("grains", "os:ubuntu", False, False),
+        ("grains", "os:Cent*", False, False),
+        ("grains", "roles:web", False, False),
+        ("grains", "roles:d?", False, False),
+        ("grains", "ip:eth0:10.0.0.*", False, False),
+        ("grains", "ip:eth0", False, False),
+        ("grains", "ip:*", False, False),
+        ("grains", "os:(ubuntu|centos)", True, False),
+        ("pillar", "env:prod", False, True),
+        ("pillar", "env:pro*", False, True),
+    ]
+    for search_type, expr, regex_match, exact_match in exprs:
+        matched, undecided = index.match(
+            search_type, expr, regex_match=regex_match, exact_match=exact_match
+        )
+        assert not undecided
+        expected = {
+            minion_id
+            for minion_id, data in MINION_DATA.items()
+            if salt.utils.data.subdict_match(
+                data[search_type],
+                expr,
+                regex_match=regex_match,
+                exact_match=exact_match,
+            )
+        }
+        assert matched == expected, expr
+
+
+def test_minion_data_index_undecided():
+    """
+    test that data the index cannot model is left to subdict_match
+    """
+    index = _minion_data_index()
+    assert index.match("grains", "disks:name:sda") == (set(), {"db1"})
+    assert index.match("grains", "roles:0:web") == (set(), {"web1", "web2"})
+    assert index.match("grains", "os:ubuntu", delimiter="|") is None
+
+
+def test_minion_data_index_update_remove():
+    """
+    test that updating and removing minions keeps the index consistent
+    """
+    index = _minion_data_index()
+    index.update("web2", {"grains": {"os": "Ubuntu"}, "pillar": {}})
+    assert index.match("grains", "os:centos") == (set(), set())
+    assert index.match("grains", "os:ubuntu")[0] == {"web1", "web2", "db1"}
+    index.remove("web1")
+    assert index.match("grains", "os:ubuntu")[0] == {"web2", "db1"}
+    assert index.minions() == {"web2", "db1"}
+
+
+def test_minion_data_index_refresh():
+    """
+    test that refresh only fetches minions whose cache entry changed
+    """
+    now = int(time.time())
+    fetched = []
+
+    def fetch_many(bank_key_pairs):
+        ret = {}
+        for bank, key in bank_key_pairs:
+            fetched.append(bank)
+            ret[(bank, key)] = MINION_DATA[bank.split("/")[1]]
+        return ret
+
+    cache = MagicMock(driver="localfs", modules={"localfs.updated": None})
+    cache.list.return_value = list(MINION_DATA)
+    cache.updated.return_value = now - 10
+    cache.fetch_many.side_effect = fetch_many
+    index = salt.utils.minions.MinionDataIndex({}, cache=cache)
+    index.refresh()
+    assert len(fetched) == 3
+    index.refresh()
+    assert len(fetched) == 3
+    cache.list.return_value = ["web1", "db1"]
+    cache.updated.side_effect = (
+        lambda bank, key: now if bank == "minions/db1" else now - 10
+    )
+    index.refresh()
+    assert fetched[3:] == ["minions/db1"]
+    assert index.minions() == {"web1", "db1"}
+
+
+def test_check_grain_minions_minion_data_index(tmp_path):
+    """
+    test grain targeting through the minion data index
+    """
+    accepted = tmp_path / "minions"
+    accepted.mkdir()
+    for minion_id in ("web1", "web2", "db1", "new1"):
+        (accepted / minion_id).touch()
+    opts = {
+        "minion_data_cache": True,
+        "minion_data_index": True,
+        "pki_dir": str(tmp_path),
+        "cachedir": str(tmp_path / "cache"),
+    }
+    ckminions = salt.utils.minions.CkMinions(opts)
+    ckminions.cache._modules = {
+        "localfs.list": MagicMock(return_value=list(MINION_DATA)),
+        "localfs.updated": MagicMock(return_value=0),
+        "localfs.fetch": MagicMock(
+            side_effect=lambda bank, key, **kwargs: MINION_DATA[bank.split("/")[1]]
+        ),
+    }
+    ret = ckminions.check_minions("os:Ubuntu", "grain")
+    assert sorted(ret["minions"]) == ["db1", "new1", "web1"]
+    ret = ckminions.check_minions("os:Ubuntu", "grain", greedy=False)
+    assert sorted(ret["minions"]) == ["db1", "web1"]
+    ret = ckminions.check_minions("disks:name:sda", "grain", greedy=False)
+    assert ret["minions"] == ["db1"]
+    salt.utils.minions._MINION_DATA_INDEXES.clear()
+    salt.utils.minions._ACCEPTED_MINIONS.clear()
+
+
+def test_accepted_minions(tmp_path):
+    """
+    test that the accepted minions are only listed again when the accepted
+    keys directory changes
+    """
+    accepted = tmp_path / "minions"
+    accepted.mkdir()
+    for minion_id in ("web1", "DB1", ".key_cache"):
+        (accepted / minion_id).touch()
+    (accepted / "subdir").mkdir()
+    path = str(accepted)
+    # Pretend the directory was last modified long ago
+    os.utime(path, (time.time() - 60, time.time() - 60))
+    try:
+        assert salt.utils.minions.accepted_minions(path) == ["DB1", "web1"]
+        with patch("os.listdir") as listdir, patch("os.path.isfile") as isfile:
+            assert salt.utils.minions.accepted_minions(path) == ["DB1", "web1"]
+        listdir.assert_not_called()
+        isfile.assert_not_called()
+
+        os.rename(str(accepted / "DB1"), str(tmp_path / "DB1"))
+        (accepted / "web2").touch()
+        with patch("os.path.isfile", MagicMock(wraps=os.path.isfile)) as isfile:
+            assert salt.utils.minions.accepted_minions(path) == ["web1", "web2"]
+        # Only the new entries are checked
+        assert sorted(call[0][0] for call in isfile.call_args_list) == [
+            os.path.join(path, "subdir"),
+            os.path.join(path, "web2"),
+        ]
+    finally:
+        salt.utils.minions._ACCEPTED_MINIONS.clear()
+
+
+def test_check_minions_target_cache(tmp_path):
+    """
+    test that the resolved targets are cached until a key is accepted or,
+    for the targets depending on it, the minion data cache is updated
+    """
+    pki_dir = tmp_path / "pki"
+    accepted = pki_dir / "minions"
+    accepted.mkdir(parents=True)
+    for minion_id in ("web1", "web2", "db1"):
+        (accepted / minion_id).touch()
+    cachedir = tmp_path / "cache"
+    cachedir.mkdir()
+    opts = {
+        "pki_dir": str(pki_dir),
+        "cachedir": str(cachedir),
+        "key_cache": "",
+        "minion_data_cache": False,
+        "target_cache_ttl": 60,
+    }
+    # Pretend the directory was last modified long ago
+    past = time.time() - 60
+    os.utime(str(accepted), (past, past))
+    ckminions = salt.utils.minions.CkMinions(opts)
+    check_glob = MagicMock(wraps=ckminions._check_glob_minions)
+    check_grain = MagicMock(wraps=ckminions._check_grain_minions)
+    try:
+        with patch.object(ckminions, "_check_glob_minions", check_glob), patch.object(
+            ckminions, "_check_grain_minions", check_grain
+        ):
+            assert ckminions.check_minions("web*")["minions"] == ["web1", "web2"]
+            ret = ckminions.check_minions("web*")
+            assert ret["minions"] == ["web1", "web2"]
+            assert check_glob.call_count == 1
+            # The cached result is not shared with the caller
+            ret["minions"].append("db1")
+            assert ckminions.check_minions("web*")["minions"] == ["web1", "web2"]
+            assert check_glob.call_count == 1
+
+            # A new key invalidates the cache
+            (accepted / "web3").touch()
+            os.utime(str(accepted), (past + 1, past + 1))
+            assert ckminions.check_minions("web*")["minions"] == [
+                "web1",
+                "web2",
+                "web3",
+            ]
+            assert check_glob.call_count == 2
+
+            # An update of the minion data cache invalidates the targets
+            # depending on it, even right after the previous update
+            ckminions.check_minions("os:Linux", "grain")
+            ckminions.check_minions("os:Linux", "grain")
+            assert check_grain.call_count == 1
+            ckminions.update_minion_data_index("web1", {"grains": {}})
+            assert os.path.exists(os.path.join(str(cachedir), ".minion_data_stamp"))
+            ckminions.check_minions("os:Linux", "grain")
+            ckminions.check_minions("os:Linux", "grain")
+            assert check_grain.call_count == 2
+            ckminions.update_minion_data_index("web1", {"grains": {}})
+            ckminions.check_minions("os:Linux", "grain")
+            assert check_grain.call_count == 3
+            # The targets only depending on the keys are kept
+            ckminions.check_minions("web*")
+            assert check_glob.call_count == 2
+
+            # Range expressions are not cached
+            opts["nodegroups"] = {"group1": "web1 or R@%cluster", "group2": "N@group1"}
+            for expr, tgt_type in (
+                ("web1 or R@%cluster", "compound"),
+                ("group2", "nodegroup"),
+                ("L@web1 or N@group1", "compound"),
+            ):
+                assert ckminions._target_cache_key(expr, tgt_type, ":", True) is None
+            assert ckminions._target_cache_key(
+                "web1 or G@os:Linux", "compound", ":", True
+            )
+
+            # Disabled by default
+            opts["target_cache_ttl"] = 0
+            ckminions.check_minions("web*")
+            assert check_glob.call_count == 3
+    finally:
+        salt.utils.minions._TARGET_CACHE.clear()
+        salt.utils.minions._ACCEPTED_MINIONS.clear()
@@ -0,0 +1,86 @@
+import threading
+
+import salt.utils.profile
+from tests.support.mock import patch
+
+
+def test_phase_profile():
+    """
+    test the timing tree of the phases, merging the phases of the same name
+    """
+    times = iter([0.0, 1.0, 1.5, 2.0, 2.0, 3.0, 3.25, 3.5, 3.5, 4.0, 5.0, 5.0])
+    with patch("time.time", lambda: next(times)):
+        profile = salt.utils.profile.start_phases("state.apply")
+        try:
+            with salt.utils.profile.phase("render"):
+                with salt.utils.profile.phase("sls base:foo"):
+                    pass
+            with salt.utils.profile.phase("call_chunks"):
+                with salt.utils.profile.phase("cmd.run", {"id": "a"}):
+                    pass
+                with salt.utils.profile.phase("cmd.run", {"id": "b"}):
+                    pass
+        finally:
+            salt.utils.profile.stop_phases(profile)
+    # Not recorded anymore
+    with salt.utils.profile.phase("render"):
+        pass
+
+    tree = profile.to_dict()
+    assert tree["name"] == "state.apply"
+    assert tree["duration"] == 5.0
+    render, call_chunks = tree["children"]
+    assert render["duration"] == 1.0
+    assert render["children"][0]["name"] == "sls base:foo"
+    assert render["children"][0]["duration"] == 0.5
+    assert call_chunks["duration"] == 2.0
+    assert call_chunks["children"] == [
+        {"name": "cmd.run", "duration": 0.75, "count": 2, "children": []}
+    ]
+    assert [check["id"] for check in profile.slowest(1)] == ["b"]
+    assert [check["duration"] for check in profile.slowest()] == [0.5, 0.25]
+
+
+def test_folded():
+    """
+    test the folded stacks of the phases
+    """
+    profile = salt.utils.profile.PhaseProfile("state.apply")
+    profile.add("load_modules", 0.25)
+    with profile.phase("render"):
+        profile.add("sls base:a;b", 0.5)
+    profile.root.duration = 2.0
+    profile.root.children["render"].duration = 1.0
+    assert profile.folded().splitlines() == [
+        "state.apply 750000",
+        "state.apply;load_modules 250000",
+        "state.apply;render 500000",
+        "state.apply;render;sls base:a:b 500000",
+    ]
+
+
+def test_phases_per_thread():
+    """
+    test that the phases are recorded in the profile of their own thread
+    """
+    profile = salt.utils.profile.start_phases("state.apply")
+    assert salt.utils.profile.recording()
+    seen = []
+
+    def _other():
+        seen.append(salt.utils.profile.recording())
+        with salt.utils.profile.phase("other", {"id": "other"}):
+            pass
+
+    try:
+        thread = threading.Thread(target=_other)
+        thread.start()
+        thread.join()
+        with salt.utils.profile.phase("render"):
+            pass
+    finally:
+        salt.utils.profile.stop_phases(profile)
+    assert not salt.utils.profile.recording()
+    assert seen == [False]
+    assert list(profile.root.children) == ["render"]
+    assert profile.details == []
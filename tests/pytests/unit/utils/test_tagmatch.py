@@ -0,0 +1,108 @@
+import fnmatch
+import re
+
+import pytest
+
+import salt.utils.tagmatch
+
+TAGS = (
+    "salt/auth",
+    "salt/job/20210101000000000000/new",
+    "salt/job/20210101000000000000/ret/minion1",
+    "salt/minion/minion1/start",
+    "salt/run/20210101000000000000/ret",
+    "minion_start",
+    "",
+)
+
+PATTERNS = (
+    ("salt/job/", "startswith"),
+    ("salt/", "startswith"),
+    ("", "startswith"),
+    ("/start", "endswith"),
+    ("ret", "find"),
+    ("salt/job/*/ret/*", "fnmatch"),
+    ("salt/*/start", "fnmatch"),
+    ("salt/auth", "fnmatch"),
+    ("*", "fnmatch"),
+    ("salt/(job|run)/[0-9]+/ret", "regex"),
+    ("salt/jobs?/", "regex"),
+    ("minion_", "regex"),
+)
+
+
+def _match(tag, pattern, match_type):
+    if match_type == "startswith":
+        return tag.startswith(pattern)
+    if match_type == "endswith":
+        return tag.endswith(pattern)
+    if match_type == "find":
+        return tag.find(pattern) >= 0
+    if match_type == "fnmatch":
+        return fnmatch.fnmatch(tag, pattern)
+    return re.search("^" + pattern, tag) is not None
+
+
+def test_match():
+    """
+    test that the matcher returns the patterns matched as the tag match
+    functions of SaltEvent do, in the order they were added
+    """
+    matcher = salt.utils.tagmatch.TagMatcher()
+    for pattern, match_type in PATTERNS:
+        matcher.add(pattern, match_type, (pattern, match_type))
+    assert len(matcher) == len(PATTERNS)
+    for tag in TAGS:
+        expected = [
+            (pattern, match_type)
+            for pattern, match_type in PATTERNS
+            if _match(tag, pattern, match_type)
+        ]
+        assert matcher.match(tag) == expected, tag
+        assert matcher.matches(tag) is bool(expected)
+
+
+def test_remove():
+    """
+    test removing patterns
+    """
+    matcher = salt.utils.tagmatch.TagMatcher()
+    matcher.add("salt/job/")
+    matcher.add("salt/job/", "startswith")
+    matcher.add("salt/job/", "startswith")
+    matcher.add("salt/jo", "startswith")
+    assert matcher.match("salt/job/1") == ["salt/job/", "salt/job/", "salt/jo"]
+    assert matcher.remove("salt/job/", "startswith")
+    assert matcher.match("salt/job/1") == ["salt/job/", "salt/jo"]
+    assert matcher.remove("salt/job/", "startswith")
+    assert not matcher.remove("salt/job/", "startswith")
+    assert matcher.remove("salt/jo", "startswith")
+    assert not matcher.remove("salt/", "startswith")
+    assert matcher.match("salt/job/1") == []
+    assert matcher.match("salt/job/") == ["salt/job/"]
+    assert matcher.remove("salt/job/")
+    assert len(matcher) == 0
+    assert not matcher.matches("salt/job/")
+    with pytest.raises(ValueError):
+        matcher.add("salt/job/", "glob")
+
+
+@pytest.mark.parametrize(
+    "pattern,prefix",
+    [
+        ("salt/job/123", "salt/job/123"),
+        ("salt/job/*/ret/*", "salt/job"),
+        ("salt/jobs?/", "salt/job"),
+        ("salt/job/\\d+", "salt/job/"),
+        ("salt/(job|run)/", ""),
+        ("^salt/", ""),
+    ],
+)
+def test_regex_prefix(pattern, prefix):
+    """
+    test the literal prefixes of regular expressions
+    """
+    assert salt.utils.tagmatch.regex_prefix(pattern) == prefix
+    for tag in ("salt/job/123", "salt/jo", "salt/run/"):
+        if re.match(pattern, tag):
+            assert tag.startswith(prefix)
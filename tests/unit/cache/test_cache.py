@@ -10,7 +10,7 @@ import salt.cache
 
 # Import Salt libs
 import salt.payload
-from tests.support.mock import patch
+from tests.support.mock import ANY, MagicMock, patch
 
 # Import Salt Testing libs
 # import integration
@@ -41,6 +41,43 @@ class CacheFunctionsTest(TestCase):
         self.assertIsInstance(ret, salt.cache.MemCache)
 
 
+class CacheTest(TestCase):
+    """
+    Validate Cache class methods
+    """
+
+    def setUp(self):
+        self.opts = {"cache": "fake_driver"}
+        self.cache = salt.cache.Cache(self.opts)
+
+    def tearDown(self):
+        del self.opts
+        del self.cache
+
+    def test_fetch_many_native(self):
+        fetch_many = MagicMock(return_value={("bank", "key"): "fake_data"})
+        self.cache._modules = {"fake_driver.fetch_many": fetch_many}
+        ret = self.cache.fetch_many([("bank", "key")])
+        self.assertEqual(ret, {("bank", "key"): "fake_data"})
+        fetch_many.assert_called_once_with([("bank", "key")], cachedir=ANY)
+
+    def test_fetch_many_fallback(self):
+        fetch = MagicMock(side_effect=lambda bank, key, **kwargs: bank + key)
+        self.cache._modules = {"fake_driver.fetch": fetch}
+        ret = self.cache.fetch_many(iter([("bank1", "key1"), ("bank2", "key2")]))
+        self.assertEqual(
+            ret, {("bank1", "key1"): "bank1key1", ("bank2", "key2"): "bank2key2"}
+        )
+        self.assertEqual(fetch.call_count, 2)
+
+    def test_store_many_fallback(self):
+        store = MagicMock()
+        self.cache._modules = {"fake_driver.store": store}
+        self.cache.store_many({("bank1", "key1"): 1, ("bank2", "key2"): 2})
+        store.assert_any_call("bank1", "key1", 1, cachedir=ANY)
+        store.assert_any_call("bank2", "key2", 2, cachedir=ANY)
+
+
 class MemCacheTest(TestCase):
     """
     Validate Cache class methods
@@ -210,6 +247,32 @@ class MemCacheTest(TestCase):
             },
         )
 
+    @patch("salt.cache.Cache.store")
+    @patch("salt.cache.Cache.fetch_many")
+    @patch("salt.loader.cache", return_value={})
+    def test_fetch_many(self, loader_mock, cache_fetch_many_mock, cache_store_mock):
+        cache_fetch_many_mock.side_effect = lambda pairs: {
+            pair: "fake_data" for pair in pairs
+        }
+        with patch("time.time", return_value=0):
+            self.cache.store("bank", "key1", "fake_data1")
+        # Only the key missing from memory is fetched from the driver
+        with patch("time.time", return_value=1):
+            ret = self.cache.fetch_many([("bank", "key1"), ("bank", "key2")])
+        self.assertEqual(
+            ret, {("bank", "key1"): "fake_data1", ("bank", "key2"): "fake_data"}
+        )
+        cache_fetch_many_mock.assert_called_once_with([("bank", "key2")])
+        self.assertDictEqual(
+            salt.cache.MemCache.data,
+            {
+                "fake_driver": {
+                    ("bank", "key1"): [1, "fake_data1"],
+                    ("bank", "key2"): [1, "fake_data"],
+                }
+            },
+        )
+
     @patch("salt.cache.Cache.fetch", return_value="fake_data")
     @patch("salt.loader.cache", return_value={})
     def test_fetch_debug(self, loader_mock, cache_fetch_mock):
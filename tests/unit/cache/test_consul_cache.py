@@ -0,0 +1,85 @@
+"""
+unit tests for the consul cache
+"""
+
+import base64
+
+import salt.cache.consul as consul_cache
+import salt.payload
+from tests.support.mixins import LoaderModuleMockMixin
+from tests.support.mock import MagicMock, patch
+from tests.support.unit import TestCase
+
+
+class ConsulCacheTest(TestCase, LoaderModuleMockMixin):
+    """
+    Validate the functions in the consul cache
+    """
+
+    def setup_loader_modules(self):
+        self.serial = salt.payload.Serial({})
+        return {consul_cache: {"__context__": {"serial": self.serial}}}
+
+    def test_fetch_many_txn(self):
+        """
+        Tests that a few keys of a large bank are read with a transaction,
+        without reading the whole bank.
+        """
+        value = base64.b64encode(self.serial.dumps({"foo": "bar"})).decode("ascii")
+        api = MagicMock()
+        api.kv.get.return_value = (
+            1,
+            ["minions/{}/".format(idx) for idx in range(10)],
+        )
+        api.txn.put.return_value = {
+            "Results": [
+                {"KV": {"Key": "minions/1/data", "Value": value}},
+                {"KV": {"Key": "minions/1/database", "Value": "garbage"}},
+            ],
+            "Errors": None,
+        }
+        with patch.object(consul_cache, "api", api):
+            ret = consul_cache.fetch_many(
+                [("minions/1", "data"), ("minions/2", "data")]
+            )
+        self.assertEqual(
+            ret, {("minions/1", "data"): {"foo": "bar"}, ("minions/2", "data"): {}}
+        )
+        api.kv.get.assert_called_once_with("minions/", keys=True, separator="/")
+        api.txn.put.assert_called_once_with(
+            [
+                {"KV": {"Verb": "get-tree", "Key": "minions/1/data"}},
+                {"KV": {"Verb": "get-tree", "Key": "minions/2/data"}},
+            ]
+        )
+
+    def test_fetch_many_recursive(self):
+        """
+        Tests that the whole bank is read at once when most of it is requested.
+        """
+        api = MagicMock()
+        api.kv.get.side_effect = [
+            (1, ["minions/1/", "minions/2/", "minions/3/"]),
+            (
+                1,
+                [
+                    {"Key": "minions/1/data", "Value": self.serial.dumps({"a": 1})},
+                    {"Key": "minions/2/data", "Value": self.serial.dumps({"b": 2})},
+                    {"Key": "minions/2/mine", "Value": self.serial.dumps({})},
+                ],
+            ),
+        ]
+        with patch.object(consul_cache, "api", api):
+            ret = consul_cache.fetch_many(
+                [("minions/1", "data"), ("minions/2", "data"), ("minions/3", "data")]
+            )
+        self.assertEqual(
+            ret,
+            {
+                ("minions/1", "data"): {"a": 1},
+                ("minions/2", "data"): {"b": 2},
+                ("minions/3", "data"): {},
+            },
+        )
+        api.kv.get.assert_called_with("minions/", recurse=True)
+        api.txn.put.assert_not_called()
@@ -0,0 +1,98 @@
+"""
+unit tests for the etcd cache
+"""
+
+import base64
+
+import salt.cache.etcd_cache as etcd_cache
+import salt.payload
+from tests.support.mixins import LoaderModuleMockMixin
+from tests.support.mock import MagicMock, patch
+from tests.support.unit import TestCase, skipIf
+
+
+def _node(key, value=None, is_dir=False, leaves=()):
+    node = MagicMock(key=key, value=value, dir=is_dir)
+    node.leaves = list(leaves) or [node]
+    return node
+
+
+@skipIf(not etcd_cache.HAS_ETCD, "python-etcd is not installed")
+class EtcdCacheTest(TestCase, LoaderModuleMockMixin):
+    """
+    Validate the functions in the etcd cache
+    """
+
+    def setup_loader_modules(self):
+        self.serial = salt.payload.Serial({})
+        return {etcd_cache: {"__context__": {"serial": self.serial}}}
+
+    def _value(self, data):
+        return base64.b64encode(self.serial.dumps(data))
+
+    def _client(self, banks):
+        minions = _node(
+            "/salt_cache/minions",
+            is_dir=True,
+            leaves=[
+                _node("/salt_cache/minions/{}".format(bank), is_dir=True)
+                for bank in banks
+            ],
+        )
+        client = MagicMock()
+        client.read.side_effect = lambda key, recursive=False: {
+            ("/salt_cache/minions", False): minions,
+            ("/salt_cache/minions", True): _node(
+                "/salt_cache/minions",
+                is_dir=True,
+                leaves=[
+                    _node("/salt_cache/minions/1/data", self._value({"a": 1})),
+                    _node("/salt_cache/minions/2/data", self._value({"b": 2})),
+                ],
+            ),
+            ("/salt_cache/minions/1/data", False): _node(
+                "/salt_cache/minions/1/data", self._value({"a": 1})
+            ),
+            ("/salt_cache/minions/2/data", False): _node(
+                "/salt_cache/minions/2/data", self._value({"b": 2})
+            ),
+        }[(key, recursive)]
+        return client
+
+    def test_fetch_many_per_key(self):
+        """
+        Tests that a few keys of a large bank are read one by one, without
+        reading the whole bank.
+        """
+        client = self._client(range(10))
+        with patch.object(etcd_cache, "client", client), patch.object(
+            etcd_cache, "path_prefix", "/salt_cache"
+        ):
+            ret = etcd_cache.fetch_many([("minions/1", "data"), ("minions/2", "data")])
+        self.assertEqual(
+            ret, {("minions/1", "data"): {"a": 1}, ("minions/2", "data"): {"b": 2}}
+        )
+        self.assertNotIn(
+            (("/salt_cache/minions",), {"recursive": True}), client.read.call_args_list,
+        )
+
+    def test_fetch_many_recursive(self):
+        """
+        Tests that the whole bank is read at once when most of it is requested.
+        """
+        client = self._client(range(1, 4))
+        with patch.object(etcd_cache, "client", client), patch.object(
+            etcd_cache, "path_prefix", "/salt_cache"
+        ):
+            ret = etcd_cache.fetch_many(
+                [("minions/1", "data"), ("minions/2", "data"), ("minions/3", "data")]
+            )
+        self.assertEqual(
+            ret,
+            {
+                ("minions/1", "data"): {"a": 1},
+                ("minions/2", "data"): {"b": 2},
+                ("minions/3", "data"): {},
+            },
+        )
+        client.read.assert_called_with("/salt_cache/minions", recursive=True)
@@ -156,6 +156,29 @@ class LocalFSTest(TestCase, LoaderModuleMockMixin):
                     localfs.fetch(bank="bank", key="key", cachedir=tmp_dir),
                 )
 
+    # 'store_many' and 'fetch_many' function tests: 1
+
+    def test_store_many_fetch_many(self):
+        """
+        Tests that several keys stored with store_many are returned by fetch_many,
+        along with an empty dict for a missing key.
+        """
+        tmp_dir = tempfile.mkdtemp(dir=RUNTIME_VARS.TMP)
+        self.addCleanup(shutil.rmtree, tmp_dir)
+        data = {
+            ("minions/one", "data"): {"grains": {"id": "one"}},
+            ("minions/one", "mine"): {"test.ping": True},
+            ("minions/two", "data"): {"grains": {"id": "two"}},
+        }
+        with patch.dict(localfs.__context__, {"serial": salt.payload.Serial(self)}):
+            localfs.store_many(data, cachedir=tmp_dir)
+            ret = localfs.fetch_many(
+                list(data) + [("minions/three", "data")], cachedir=tmp_dir
+            )
+        expected = dict(data)
+        expected[("minions/three", "data")] = {}
+        self.assertEqual(ret, expected)
+
     # 'updated' function tests: 3
 
     def test_updated_return_when_cache_file_does_not_exist(self):
@@ -0,0 +1,117 @@
+"""
+unit tests for the sqlite cache
+"""
+
+import shutil
+import tempfile
+
+import salt.cache.sqlite_cache as sqlite_cache
+import salt.payload
+from tests.support.mixins import LoaderModuleMockMixin
+from tests.support.mock import patch
+from tests.support.runtests import RUNTIME_VARS
+from tests.support.unit import TestCase
+
+
+class SQLiteCacheTest(TestCase, LoaderModuleMockMixin):
+    """
+    Validate the functions in the sqlite cache
+    """
+
+    def setup_loader_modules(self):
+        return {sqlite_cache: {"__context__": {"serial": salt.payload.Serial({})}}}
+
+    def setUp(self):
+        self.cachedir = tempfile.mkdtemp(dir=RUNTIME_VARS.TMP)
+        self.addCleanup(shutil.rmtree, self.cachedir)
+        self.addCleanup(sqlite_cache._CONNECTIONS.clear)
+
+    def tearDown(self):
+        del self.cachedir
+
+    def test_store_fetch(self):
+        """
+        Tests that stored data is fetched back and that a missing key returns an
+        empty dict.
+        """
+        sqlite_cache.store("minions/one", "data", {"foo": "bar"}, self.cachedir)
+        self.assertEqual(
+            sqlite_cache.fetch("minions/one", "data", self.cachedir), {"foo": "bar"}
+        )
+        self.assertEqual(sqlite_cache.fetch("minions/one", "mine", self.cachedir), {})
+
+    def test_store_many_fetch_many(self):
+        """
+        Tests that several keys stored in one transaction are fetched at once.
+        """
+        data = {
+            ("minions/one", "data"): {"id": "one"},
+            ("minions/two", "data"): {"id": "two"},
+        }
+        sqlite_cache.store_many(data, self.cachedir)
+        ret = sqlite_cache.fetch_many(
+            list(data) + [("minions/three", "data")], self.cachedir
+        )
+        expected = dict(data)
+        expected[("minions/three", "data")] = {}
+        self.assertEqual(ret, expected)
+
+    def test_updated(self):
+        """
+        Tests that the update time is stored along with the data.
+        """
+        self.assertIsNone(sqlite_cache.updated("minions/one", "data", self.cachedir))
+        with patch("time.time", return_value=1234.5):
+            sqlite_cache.store("minions/one", "data", {}, self.cachedir)
+        self.assertEqual(
+            sqlite_cache.updated("minions/one", "data", self.cachedir), 1234
+        )
+
+    def test_list_contains(self):
+        """
+        Tests that listing a bank returns its keys and sub-banks in order.
+        """
+        sqlite_cache.store_many(
+            {
+                ("minions/two", "data"): {},
+                ("minions/one", "data"): {},
+                ("minions/one", "mine"): {},
+                ("minions", "index"): {},
+                ("minions0", "data"): {},
+            },
+            self.cachedir,
+        )
+        self.assertEqual(
+            sqlite_cache.list_("minions", self.cachedir), ["index", "one", "two"]
+        )
+        self.assertEqual(
+            sqlite_cache.list_("minions/one", self.cachedir), ["data", "mine"]
+        )
+        self.assertEqual(sqlite_cache.list_("nothing", self.cachedir), [])
+        self.assertTrue(sqlite_cache.contains("minions", None, self.cachedir))
+        self.assertTrue(sqlite_cache.contains("minions/one", "mine", self.cachedir))
+        self.assertFalse(sqlite_cache.contains("minions/two", "mine", self.cachedir))
+        self.assertFalse(sqlite_cache.contains("nothing", None, self.cachedir))
+
+    def test_flush(self):
+        """
+        Tests flushing a single key and a bank with all its sub-banks.
+        """
+        sqlite_cache.store_many(
+            {
+                ("minions/one", "data"): {},
+                ("minions/one", "mine"): {},
+                ("minions/two", "data"): {},
+                ("minions0", "data"): {},
+            },
+            self.cachedir,
+        )
+        self.assertTrue(
+            sqlite_cache.flush("minions/one", "mine", cachedir=self.cachedir)
+        )
+        self.assertFalse(
+            sqlite_cache.flush("minions/one", "mine", cachedir=self.cachedir)
+        )
+        self.assertTrue(sqlite_cache.flush("minions", cachedir=self.cachedir))
+        self.assertEqual(sqlite_cache.list_("minions", self.cachedir), [])
+        self.assertTrue(sqlite_cache.contains("minions0", "data", self.cachedir))
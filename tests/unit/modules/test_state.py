@@ -22,6 +22,7 @@ import salt.utils.hashutils
 import salt.utils.json
 import salt.utils.odict
 import salt.utils.platform
+import salt.utils.profile
 import salt.utils.state
 from salt.exceptions import CommandExecutionError, SaltInvocationError
 from salt.ext import six
@@ -225,6 +226,7 @@ class MockState(object):
             force=None,
             whitelist=None,
             orchestration_jid=None,
+            no_cache=False,
         ):
             """
                 Mock call_highstate method
@@ -505,6 +507,39 @@ class StateTestCase(TestCase, LoaderModuleMockMixin):
                 with patch.object(os, "remove", mock):
                     self.assertEqual(state.clear_cache(), ["A.cache.p", "B.cache.p"])
 
+    def test_show_profile(self):
+        """
+            Test to save and show the profile of a state run
+        """
+        cachedir = tempfile.mkdtemp(dir=RUNTIME_VARS.TMP)
+        self.addCleanup(shutil.rmtree, cachedir, ignore_errors=True)
+        with patch.dict(state.__opts__, {"cachedir": cachedir}):
+            self.assertRaises(CommandExecutionError, state.show_profile)
+            for jid in ("20210101000000000000", "20210102000000000000"):
+                with state._profile_state_run(
+                    "state.highstate", {"profile": True, "__pub_jid": jid}
+                ):
+                    with salt.utils.profile.phase("render"):
+                        pass
+                    for check in ("onlyif", "unless"):
+                        with salt.utils.profile.phase(check, {"id": check}):
+                            pass
+
+            ret = state.show_profile(top=1)
+            self.assertEqual(ret["jid"], "20210102000000000000")
+            self.assertEqual(ret["profile"]["name"], "state.highstate")
+            self.assertEqual(
+                [phase["name"] for phase in ret["profile"]["children"]],
+                ["render", "onlyif", "unless"],
+            )
+            self.assertEqual(len(ret["checks"]), 1)
+            self.assertTrue(os.path.isfile(ret["flamegraph"]))
+            self.assertEqual(
+                state.show_profile(jid="20210101000000000000")["jid"],
+                "20210101000000000000",
+            )
+            self.assertRaises(CommandExecutionError, state.show_profile, jid="1")
+
     def test_single(self):
         """
             Test to execute single state function
@@ -382,3 +382,165 @@ class Local_CacheTest(
         self._check_dir_files(
             "new_jid_dir was not removed", self.EMPTY_JID_DIR, status="removed"
         )
+
+
+class LocalCacheJobIndexTestCase(TestCase, LoaderModuleMockMixin):
+    """
+    Tests for the local_cache job index
+    """
+
+    def setup_loader_modules(self):
+        self.cachedir = tempfile.mkdtemp(
+            prefix="salt_test_job_index", dir=RUNTIME_VARS.TMP
+        )
+        self.addCleanup(shutil.rmtree, self.cachedir, ignore_errors=True)
+        return {
+            local_cache: {
+                "__opts__": {
+                    "cachedir": self.cachedir,
+                    "keep_jobs": 24,
+                    "hash_type": "sha256",
+                    "job_cache_index": True,
+                    "job_cache_store_endtime": True,
+                }
+            }
+        }
+
+    def tearDown(self):
+        for _, conn, _ in local_cache._INDEX_CONNECTIONS.values():
+            conn.close()
+        local_cache._INDEX_CONNECTIONS.clear()
+
+    def _add_jobs(self):
+        for fun in ("test.ping", "saltutil.find_job", "state.apply"):
+            jid = local_cache.prep_jid()
+            load = {
+                "jid": jid,
+                "fun": fun,
+                "arg": [],
+                "tgt": ["web1", "web2"],
+                "tgt_type": "list",
+                "user": "root",
+            }
+            local_cache.save_load(jid, load, minions=["web1", "web2"])
+            local_cache.update_endtime(jid, "2020, Oct 18 12:00:00.000000")
+            # Keep the job ids ordered
+            time.sleep(0.01)
+
+    def test_get_jids(self):
+        """
+        Test that the job index lists the same jobs as the jobs directory
+        """
+        self._add_jobs()
+        walked_jids = local_cache.get_jids()
+        walked_filter = local_cache.get_jids_filter(2)
+        self.assertEqual(len(walked_jids), 3)
+        self.assertEqual(len(walked_filter), 2)
+
+        # The first cleanup builds the job index
+        local_cache.clean_old_jobs()
+        with patch.object(
+            local_cache, "_walk_through", MagicMock(side_effect=AssertionError)
+        ):
+            self.assertEqual(local_cache.get_jids(), walked_jids)
+            self.assertEqual(local_cache.get_jids_filter(2), walked_filter)
+            self.assertEqual(
+                [job["Function"] for job in local_cache.get_jids_filter(5, False)],
+                ["test.ping", "saltutil.find_job", "state.apply"],
+            )
+
+            # New jobs are indexed when they are saved
+            jid = local_cache.prep_jid()
+            local_cache.save_load(jid, {"jid": jid, "fun": "test.echo"}, minions=[])
+            self.assertEqual(local_cache.get_jids_filter(1)[0]["JID"], jid)
+
+    def test_clean_old_jobs(self):
+        """
+        Test that old jobs are removed using the job index
+        """
+        self._add_jobs()
+        local_cache.clean_old_jobs()
+        jids = local_cache.get_jids()
+        with patch.object(
+            local_cache, "_clean_old_jobs_walk", MagicMock(side_effect=AssertionError)
+        ):
+            local_cache.clean_old_jobs()
+            self.assertEqual(local_cache.get_jids(), jids)
+            with patch.dict(local_cache.__opts__, {"keep_jobs": 0.0000000001}):
+                local_cache.clean_old_jobs()
+        self.assertEqual(local_cache.get_jids(), {})
+        for jid in jids:
+            jid_dir = salt.utils.jid.jid_dir(jid, local_cache._job_dir(), "sha256")
+            self.assertFalse(os.path.exists(jid_dir))
+
+    def test_clean_old_jobs_limit(self):
+        """
+        Test that the oldest jobs are removed first, up to
+        job_cache_clean_limit jobs per cleanup
+        """
+        self._add_jobs()
+        local_cache.clean_old_jobs()
+        jids = sorted(local_cache.get_jids())
+        opts = {"keep_jobs": 0.0000000001, "job_cache_clean_limit": 2}
+        with patch.dict(local_cache.__opts__, opts):
+            local_cache.clean_old_jobs()
+            self.assertEqual(list(local_cache.get_jids()), jids[2:])
+            local_cache.clean_old_jobs()
+            self.assertEqual(local_cache.get_jids(), {})
+
+    def test_returner_many(self):
+        """
+        Test that the returns of a batch are written, and that the jobs new to
+        the job cache are indexed in one transaction
+        """
+        jid = local_cache.prep_jid()
+        new_jid = salt.utils.jid.gen_jid({})
+        loads = [
+            {"jid": jid, "id": "web1", "return": True, "out": "txt"},
+            {"jid": jid, "id": "web2", "return": False},
+            {"jid": new_jid, "id": "web1", "return": True},
+            # An extra return is dropped
+            {"jid": jid, "id": "web1", "return": False},
+        ]
+        with patch.object(
+            local_cache, "_index_jobs", MagicMock(wraps=local_cache._index_jobs)
+        ) as index_jobs:
+            local_cache.returner_many(loads)
+            local_cache.update_endtime_many({jid: "end1", new_jid: "end2"})
+        self.assertEqual(
+            [call[0][0] for call in index_jobs.call_args_list],
+            [
+                [(new_jid, 0, {})],
+                [(jid, 0, {"endtime": "end1"}), (new_jid, 0, {"endtime": "end2"})],
+            ],
+        )
+        self.assertEqual(
+            local_cache.get_jid(jid),
+            {"web1": {"return": True, "out": "txt"}, "web2": {"return": False}},
+        )
+        self.assertEqual(local_cache.get_jid(new_jid), {"web1": {"return": True}})
+        self.assertEqual(local_cache.get_endtime(new_jid), "end2")
+        self.assertEqual(
+            sorted(
+                row[0]
+                for row in local_cache._index_query(
+                    local_cache._index(), "SELECT jid FROM jobs"
+                )
+            ),
+            sorted([jid, new_jid]),
+        )
+
+    def test_rebuild_index(self):
+        """
+        Test that the job index is built again when the jobs directory is
+        replaced
+        """
+        self._add_jobs()
+        local_cache.clean_old_jobs()
+        shutil.rmtree(local_cache._job_dir())
+        os.makedirs(local_cache._job_dir())
+        self.assertEqual(local_cache.get_jids(), {})
+        local_cache.clean_old_jobs()
+        self.assertEqual(
+            local_cache._index_query(local_cache._index(), "SELECT jid FROM jobs"), []
+        )
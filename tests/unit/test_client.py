@@ -55,6 +55,38 @@ class LocalClientTestCase(TestCase, SaltClientTestCaseMixin):
         with self.assertRaises(StopIteration):
             next(ret)
 
+    def test_get_iter_returns_heartbeat(self):
+        """
+        The minions sending heartbeats for the job are not sent find_job
+        """
+        jid = "20210101000000000000"
+        events = iter(
+            [
+                {"tag": "", "data": {"id": "m1", "jid": jid, "heartbeat": 60}},
+                None,
+                {"tag": "", "data": {"id": "m1", "jid": jid, "return": True}},
+            ]
+        )
+
+        def get_returns_no_block(*args, **kwargs):
+            while True:
+                yield next(events, None)
+
+        local_client = client.LocalClient(mopts=self.get_temp_config("master"))
+        local_client.returners = MagicMock()
+        local_client.get_returns_no_block = get_returns_no_block
+        local_client.gather_job_info = MagicMock(return_value={})
+        ret = [
+            item
+            for item in local_client.get_iter_returns(
+                jid, ["m1", "m2"], timeout=0, gather_job_timeout=0, block=False
+            )
+            if item
+        ]
+        self.assertEqual(ret, [{"m1": {"ret": True, "jid": jid}}])
+        for call in local_client.gather_job_info.call_args_list:
+            self.assertEqual(call[0][1], ["m2"])
+
     def test_create_local_client(self):
         local_client = client.LocalClient(mopts=self.get_temp_config("master"))
         self.assertIsInstance(
@@ -397,3 +397,68 @@ V\x80+b\xca\x06M\xb6\x12\xc6\xe8\xf2\xb5\xbb\xd8m\xc0\x97\x9a\xeb\xb9q\x19\xc3\
 \x07\xa5\xa1\x058\xc7\xce\xbeb\x92\xbf\x0bL\xec\xdf\xc3M\x83\xfb$\xec\xd5\xf9\
 """
         self.assertEqual("1234", salt.crypt.pwdata_decrypt(key_string, pwdata))
+
+
+class AsyncAuthReauthenticateTestCase(TestCase):
+    """
+    Test picking up the rotated AES key of the master
+    """
+
+    def setUp(self):
+        self.opts = {
+            "id": "minion",
+            "serial": "msgpack",
+            "pki_dir": "/etc/salt/pki/minion",
+            "master_uri": "tcp://127.0.0.1:4506",
+        }
+        self.current = salt.crypt.Crypticle.generate_key_string()
+        self.next = salt.crypt.Crypticle.generate_key_string()
+        self.auth = object.__new__(salt.crypt.AsyncAuth)
+        self.auth.opts = self.opts
+        self.auth.io_loop = MagicMock()
+        self.auth._creds = {
+            "aes": self.current,
+            "next_aes": self.next,
+            "rotate_spread": 60,
+        }
+        self.auth._crypticle = salt.crypt.Crypticle(self.opts, self.current)
+        self.addCleanup(
+            salt.crypt.AsyncAuth.creds_map.pop,
+            (self.opts["pki_dir"], self.opts["id"], self.opts["master_uri"]),
+            None,
+        )
+
+    def test_rotate_delay(self):
+        delay = self.auth.rotate_delay()
+        self.assertTrue(0 <= delay < 60)
+        self.assertEqual(self.auth.rotate_delay(), delay)
+        self.auth._creds["rotate_spread"] = 0
+        self.assertEqual(self.auth.rotate_delay(), 0)
+
+    def test_reauthenticate_next(self):
+        """
+        The next AES key is used when it decrypts the payload
+        """
+        data = salt.crypt.Crypticle(self.opts, self.next).dumps({"fun": "test.ping"})
+        future = self.auth.reauthenticate(data)
+        self.assertTrue(future.done())
+        self.assertEqual(self.auth.crypticle.loads(data), {"fun": "test.ping"})
+        self.assertEqual(self.auth.creds, {"aes": self.next, "rotate_spread": 60})
+        self.auth.io_loop.call_later.assert_called_once_with(
+            self.auth.rotate_delay(), self.auth.authenticate
+        )
+
+    def test_reauthenticate_spread(self):
+        """
+        The minion signs in again in its slot when the next AES key does not
+        decrypt the payload
+        """
+        other = salt.crypt.Crypticle.generate_key_string()
+        data = salt.crypt.Crypticle(self.opts, other).dumps({"fun": "test.ping"})
+        future = self.auth.reauthenticate(data)
+        self.assertFalse(future.done())
+        self.assertIs(self.auth.reauthenticate(data), future)
+        self.assertEqual(self.auth.creds["aes"], self.current)
+        self.auth.io_loop.call_later.assert_called_once_with(
+            self.auth.rotate_delay(), self.auth._authenticate
+        )
@@ -786,6 +786,114 @@ class LazyLoaderVirtualAliasTest(TestCase):
             self.assertTrue(getattr(self.loader, mod_name).test())
 
 
+index_modules = {
+    "another": """
+def ping():
+    return "another"
+""",
+    "broken": """
+def __virtual__():
+    return (False, "broken is not available")
+
+def ping():
+    return "broken"
+""",
+    "loadertest": """
+__virtualname__ = "virtualtest"
+
+def __virtual__():
+    return __virtualname__
+
+def ping():
+    return "loadertest"
+""",
+}
+
+
+class LazyLoaderIndexTest(TestCase):
+    """
+    Test the loader index kept in the cachedir
+    """
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp(dir=RUNTIME_VARS.TMP)
+        self.addCleanup(shutil.rmtree, self.tmp_dir, ignore_errors=True)
+        self.module_dir = os.path.join(self.tmp_dir, "modules")
+        os.makedirs(self.module_dir)
+        for name, source in index_modules.items():
+            self.write_module(name, source)
+        self.opts = {
+            "cachedir": os.path.join(self.tmp_dir, "cache"),
+            "grains": {"os": "Linux"},
+            "loader_index": True,
+            "optimization_order": [0, 1, 2],
+        }
+
+    def write_module(self, name, source):
+        path = os.path.join(self.module_dir, "{}.py".format(name))
+        with salt.utils.files.fopen(path, "w") as fh:
+            fh.write(source)
+        remove_bytecode(path)
+        # Files added within the modification time of the module directory
+        # are not noticed, make it older
+        for path in (self.module_dir, os.path.join(self.module_dir, "__pycache__")):
+            if os.path.exists(path):
+                stat = os.stat(path)
+                os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns - 10 ** 10))
+
+    def load(self, fun):
+        loader = salt.loader.LazyLoader([self.module_dir], self.opts, tag="module")
+        with patch.object(
+            loader, "_import_module", wraps=loader._import_module
+        ) as import_module:
+            ret = loader[fun]()
+        return loader, ret, [call[0][0] for call in import_module.call_args_list]
+
+    def test_virtual_names(self):
+        """
+        Test that the modules which failed to load or provide other names are
+        not imported again
+        """
+        loader, ret, imported = self.load("virtualtest.ping")
+        self.assertEqual(ret, "loadertest")
+        self.assertEqual(imported, ["another", "broken", "loadertest"])
+
+        loader, ret, imported = self.load("virtualtest.ping")
+        self.assertEqual(ret, "loadertest")
+        self.assertEqual(imported, ["loadertest"])
+        self.assertEqual(
+            loader.missing_fun_string("broken.ping"),
+            "'broken' __virtual__ returned False: broken is not available",
+        )
+        self.assertEqual(loader["another.ping"](), "another")
+
+        # Modifying a module invalidates its outcome
+        self.write_module("broken", index_modules["another"])
+        loader, ret, imported = self.load("broken.ping")
+        self.assertEqual(ret, "another")
+        self.assertEqual(imported, ["broken"])
+
+        # So does changing the grains
+        self.opts["grains"] = {"os": "Windows"}
+        loader, ret, imported = self.load("virtualtest.ping")
+        self.assertEqual(imported, ["another", "broken", "loadertest"])
+
+    def test_file_mapping(self):
+        """
+        Test that the module directories are only listed again when modified
+        """
+        salt.loader.LazyLoader([self.module_dir], self.opts, tag="module")
+        with patch("os.listdir", wraps=os.listdir) as listdir:
+            loader = salt.loader.LazyLoader([self.module_dir], self.opts, tag="module")
+        self.assertEqual(listdir.call_count, 0)
+        self.assertEqual(list(loader.file_mapping), sorted(index_modules))
+
+        self.write_module("newmod", index_modules["another"])
+        loader = salt.loader.LazyLoader([self.module_dir], self.opts, tag="module")
+        self.assertIn("newmod", loader.file_mapping)
+        self.assertEqual(loader["newmod.ping"](), "another")
+
+
 submodule_template = """
 from __future__ import absolute_import
 
@@ -1,7 +1,12 @@
+import ctypes
+import multiprocessing
+import os
 import time
 
 import salt.config
 import salt.master
+import salt.utils.files
+import salt.utils.metrics
 from tests.support.helpers import slowTest
 from tests.support.mixins import AdaptedConfigurationTestCaseMixin
 from tests.support.mock import MagicMock, patch
@@ -752,3 +757,106 @@ class MaintenanceTestCase(TestCase, AdaptedConfigurationTestCaseMixin):
             self.assertEqual(mocked_handle_presence.call_times, [0, 60, 120, 180])
             self.assertEqual(mocked_handle_key_rotate.call_times, [0, 60, 120, 180])
             self.assertEqual(mocked_check_max_open_files.call_times, [0, 60, 120, 180])
+
+    def test_handle_clean_old_jobs_stats(self):
+        """
+        Test that the job cache cleanup duration is fired as a master stat
+        """
+        self.main_class.event = MagicMock()
+        with patch("salt.daemons.masterapi.clean_old_jobs") as clean_old_jobs:
+            self.main_class.handle_clean_old_jobs()
+            clean_old_jobs.assert_called_once_with(self.main_class.opts)
+            self.main_class.event.fire_event.assert_not_called()
+
+            with patch.dict(self.main_class.opts, {"master_stats": True}):
+                self.main_class.handle_clean_old_jobs()
+        data, tag = self.main_class.event.fire_event.call_args[0]
+        self.assertEqual(tag, "salt/stats/Maintenance")
+        self.assertEqual(data["stats"]["clean_old_jobs"]["runs"], 1)
+        self.assertEqual(data["stats"]["clean_old_jobs"]["mean"], data["time"])
+
+    def test_handle_master_stats(self):
+        """
+        Test that the stats of the master workers are aggregated
+        """
+        self.main_class.event = MagicMock()
+        opts = self.main_class.opts
+        for worker in ("MWorker-0", "MWorker-1"):
+            stats = salt.utils.metrics.RequestStats()
+            stats.observe("_return", 0.01)
+            salt.utils.metrics.store_worker_stats(opts, worker, stats)
+        self.addCleanup(salt.utils.metrics.clear_worker_stats, opts)
+
+        self.main_class.handle_master_stats()
+        self.main_class.event.fire_event.assert_not_called()
+
+        with patch.dict(opts, {"master_stats": True}):
+            self.main_class.handle_master_stats()
+        data, tag = self.main_class.event.fire_event.call_args[0]
+        self.assertEqual(tag, "salt/stats/master")
+        self.assertEqual(data["stats"]["_return"]["runs"], 2)
+        with salt.utils.files.fopen(
+            os.path.join(opts["cachedir"], "master_stats.prom")
+        ) as fp_:
+            self.assertIn(
+                'salt_master_request_duration_seconds_count{cmd="_return"} 2',
+                fp_.read().splitlines(),
+            )
+
+    def test_handle_key_rotate_next(self):
+        """
+        Test that the master rotates to the AES key sent ahead to the minions,
+        unless a minion key was removed
+        """
+        self.main_class.event = MagicMock()
+        self.main_class.rotate = 0
+        secrets = {
+            "secret": multiprocessing.Array(ctypes.c_char, b"current"),
+            "next": multiprocessing.Array(ctypes.c_char, b"next000"),
+            "reload": lambda: "fresh00",
+        }
+        opts = self.main_class.opts
+        with patch.dict(salt.master.SMaster.secrets, {"aes": secrets}), patch.dict(
+            opts, {"publish_session": 60}
+        ):
+            self.main_class.handle_key_rotate(60)
+            self.assertEqual(secrets["secret"].value, b"next000")
+            self.assertEqual(secrets["next"].value, b"fresh00")
+
+            secrets["next"].value = b"next001"
+            dfn = os.path.join(opts["cachedir"], ".dfn")
+            with salt.utils.files.fopen(dfn, "w"):
+                pass
+            os.chmod(dfn, 0o400)
+            self.main_class.handle_key_rotate(61)
+            self.assertEqual(secrets["secret"].value, b"fresh00")
+            self.assertEqual(secrets["next"].value, b"fresh00")
+
+
+class MWorkerTestCase(TestCase, AdaptedConfigurationTestCaseMixin):
+    def test_handle_payload_stats(self):
+        """
+        Test that the size of the requests is recorded in the master stats
+        """
+        opts = self.get_temp_config("master", master_stats=True)
+        worker = salt.master.MWorker(opts, {}, {}, [], "MWorker-0")
+        worker.clear_funcs = MagicMock()
+        worker.clear_funcs.get_method.return_value = MagicMock(return_value={})
+        worker.aes_funcs = MagicMock()
+        worker.aes_funcs.run_func.return_value = ({}, {"fun": "send"})
+        worker._handle_payload(
+            {"enc": "clear", "load": {"cmd": "publish"}, "size": 2000}
+        ).result()
+        worker._handle_payload(
+            {"enc": "aes", "load": {"cmd": "_return"}, "size": 100}
+        ).result()
+        worker._handle_payload({"enc": "aes", "load": {"cmd": "_return"}}).result()
+        stats = worker.stats.to_dict()
+        self.assertEqual(stats["publish"]["size"]["count"], 1)
+        self.assertEqual(stats["publish"]["size"]["sum"], 2000)
+        self.assertEqual(stats["_return"]["runs"], 2)
+        self.assertEqual(stats["_return"]["size"]["count"], 1)
+        self.assertIn(
+            'salt_master_payload_size_bytes_count{cmd="_return"} 1',
+            worker.stats.to_prometheus().splitlines(),
+        )
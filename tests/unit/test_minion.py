@@ -5,6 +5,7 @@
 import copy
 import logging
 import os
+import time
 
 import salt.ext.tornado
 import salt.ext.tornado.testing
@@ -189,6 +190,31 @@ class MinionTestCase(TestCase, AdaptedConfigurationTestCaseMixin):
         finally:
             minion.destroy()
 
+    def test_job_heartbeat(self):
+        """
+        Tests that the minion fires heartbeats for a job while it runs
+        """
+        mock_opts = salt.config.DEFAULT_MINION_OPTS.copy()
+        mock_opts["id"] = "minion"
+        mock_opts["job_heartbeat_interval"] = 0.01
+        mock_data = {"fun": "foo.bar", "jid": "20210101000000000000"}
+        minion = MagicMock()
+        with salt.minion.Minion._job_heartbeat(minion, mock_opts, mock_data):
+            time.sleep(0.1)
+        calls = minion._fire_master.call_count
+        self.assertTrue(calls > 0)
+        data, tag = minion._fire_master.call_args[0]
+        self.assertEqual(tag, "salt/job/20210101000000000000/heartbeat/minion")
+        self.assertEqual(data["heartbeat"], 0.01)
+        time.sleep(0.05)
+        self.assertEqual(minion._fire_master.call_count, calls)
+
+        mock_opts["job_heartbeat_interval"] = 0
+        minion._fire_master.reset_mock()
+        with salt.minion.Minion._job_heartbeat(minion, mock_opts, mock_data):
+            time.sleep(0.05)
+        minion._fire_master.assert_not_called()
+
     @slowTest
     def test_handle_decoded_payload_jid_queue_addition(self):
         """
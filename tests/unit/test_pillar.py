@@ -1376,3 +1376,154 @@ class PillarCacheTestCase(TestCase):
                     "mocked_minion": {"base": {"foo": "bar"}, "dev": {"foo": "baz"}}
                 }
                 self.assertEqual(pillar.cache._dict, expected_cache)
+
+
+@patch("salt.transport.client.ReqChannel.factory", MagicMock())
+class PillarCompileCacheTestCase(TestCase):
+    """
+    Tests for the compiled pillar cache in salt.pillar
+    """
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp(dir=RUNTIME_VARS.TMP)
+        self.addCleanup(shutil.rmtree, self.tmp_dir, ignore_errors=True)
+        self.pillar_root = os.path.join(self.tmp_dir, "pillar")
+        os.makedirs(self.pillar_root)
+        self.top_file = os.path.join(self.pillar_root, "top.sls")
+        with fopen(self.top_file, "w") as fp_:
+            fp_.write("base: {'*': [foo]}\n")
+        self.opts = salt.config.DEFAULT_MASTER_OPTS.copy()
+        self.opts.update(
+            {
+                "cachedir": os.path.join(self.tmp_dir, "cache"),
+                "pillar_roots": {"base": [self.pillar_root]},
+                "pillar_compile_cache": True,
+            }
+        )
+        self.grains = {"os": "Ubuntu"}
+
+    def _compile(self, pillar, *fresh):
+        with patch(
+            "salt.pillar.PillarCompileCache.fetch_pillar", side_effect=fresh
+        ) as fetch:
+            ret = pillar.compile_pillar()
+        return ret, fetch.call_count
+
+    def test_get_pillar(self):
+        pillar = salt.pillar.get_pillar(self.opts, self.grains, "mocked_minion")
+        self.assertIsInstance(pillar, salt.pillar.PillarCompileCache)
+        self.opts["pillar_cache"] = True
+        pillar = salt.pillar.get_pillar(self.opts, self.grains, "mocked_minion")
+        self.assertIsInstance(pillar, salt.pillar.PillarCache)
+
+    @patch("salt.pillar.PILLAR_ROOTS_STAMP_TTL", 0)
+    def test_compile_pillar(self):
+        pillar = salt.pillar.PillarCompileCache(
+            self.opts, self.grains, "mocked_minion", "base"
+        )
+        self.assertEqual(self._compile(pillar, {"foo": "bar"}), ({"foo": "bar"}, 1))
+        # Cache hit
+        self.assertEqual(self._compile(pillar), ({"foo": "bar"}, 0))
+
+        # Another minion or other grains do not use the cached pillar
+        other = salt.pillar.PillarCompileCache(
+            self.opts, {"os": "CentOS"}, "mocked_minion", "base"
+        )
+        self.assertEqual(self._compile(other, {"foo": "qux"}), ({"foo": "qux"}, 1))
+        other = salt.pillar.PillarCompileCache(
+            self.opts, self.grains, "other_minion", "base"
+        )
+        self.assertEqual(self._compile(other, {"foo": "qux"}), ({"foo": "qux"}, 1))
+
+        # Modifying a pillar file invalidates the cache
+        stat = os.stat(self.top_file)
+        os.utime(self.top_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+        self.assertEqual(self._compile(pillar, {"foo": "baz"}), ({"foo": "baz"}, 1))
+        self.assertEqual(self._compile(pillar), ({"foo": "baz"}, 0))
+
+        # So does adding one
+        with fopen(os.path.join(self.pillar_root, "foo.sls"), "w") as fp_:
+            fp_.write("foo: bar\n")
+        self.assertEqual(self._compile(pillar, {"foo": "bar"}), ({"foo": "bar"}, 1))
+
+        # Pillars with errors are not cached
+        pillar.pillarenv = "dev"
+        self.assertEqual(
+            self._compile(pillar, {"_errors": ["error"]}), ({"_errors": ["error"]}, 1)
+        )
+        self.assertEqual(
+            self._compile(pillar, {"_errors": ["error"]}), ({"_errors": ["error"]}, 1)
+        )
+
+    def test_compile_pillar_ext_pillar(self):
+        self.opts["ext_pillar"] = [{"cmd_yaml": "cat /etc/salt/yaml"}]
+        pillar = salt.pillar.PillarCompileCache(
+            self.opts, self.grains, "mocked_minion", "base"
+        )
+        # The external pillar did not opt in to caching
+        self.assertEqual(self._compile(pillar, {"foo": "bar"}), ({"foo": "bar"}, 1))
+        self.assertEqual(self._compile(pillar, {"foo": "bar"}), ({"foo": "bar"}, 1))
+
+        self.opts["pillar_compile_cache_ext_pillar_versions"] = {"cmd_yaml": 1}
+        self.assertEqual(self._compile(pillar, {"foo": "bar"}), ({"foo": "bar"}, 1))
+        self.assertEqual(self._compile(pillar), ({"foo": "bar"}, 0))
+        # Bumping the version invalidates the cache
+        self.opts["pillar_compile_cache_ext_pillar_versions"] = {"cmd_yaml": 2}
+        self.assertEqual(self._compile(pillar, {"foo": "baz"}), ({"foo": "baz"}, 1))
+
+
+@patch("salt.transport.client.ReqChannel.factory", MagicMock())
+class PillarTopCacheTestCase(TestCase):
+    """
+    Tests for the merged pillar top files shared across the minions
+    """
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp(dir=RUNTIME_VARS.TMP)
+        self.addCleanup(shutil.rmtree, self.tmp_dir, ignore_errors=True)
+        self.addCleanup(salt.pillar._TOP_CACHE.clear)
+        self.pillar_root = os.path.join(self.tmp_dir, "pillar")
+        os.makedirs(self.pillar_root)
+        self.top_file = os.path.join(self.pillar_root, "top.sls")
+        with fopen(self.top_file, "w") as fp_:
+            fp_.write("base: {'*': [foo], 'minion2': [bar]}\n")
+        self.opts = salt.config.DEFAULT_MASTER_OPTS.copy()
+        self.opts.update(
+            {
+                "cachedir": os.path.join(self.tmp_dir, "cache"),
+                "file_client": "local",
+                "pillar_roots": {"base": [self.pillar_root]},
+                "pillar_top_cache": True,
+            }
+        )
+
+    def _top_matches(self, minion_id):
+        pillar = salt.pillar.Pillar(self.opts, {}, minion_id, "base")
+        top, errors = pillar.get_top()
+        self.assertEqual(errors, [])
+        return pillar.top_matches(top)
+
+    @patch("salt.pillar.PILLAR_ROOTS_STAMP_TTL", 0)
+    def test_get_top(self):
+        with patch(
+            "salt.pillar.Pillar.get_tops",
+            autospec=True,
+            wraps=salt.pillar.Pillar.get_tops,
+        ) as get_tops:
+            self.assertEqual(self._top_matches("minion1"), {"base": ["foo"]})
+            # The top files are only matched against the other minions
+            self.assertEqual(self._top_matches("minion2"), {"base": ["foo", "bar"]})
+            self.assertEqual(get_tops.call_count, 1)
+
+            # Modifying a file under pillar_roots invalidates the cache
+            with fopen(self.top_file, "w") as fp_:
+                fp_.write("base: {'*': [baz]}\n")
+            stat = os.stat(self.top_file)
+            os.utime(self.top_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+            self.assertEqual(self._top_matches("minion2"), {"base": ["baz"]})
+            self.assertEqual(get_tops.call_count, 2)
+
+            # The cache is not used unless enabled
+            self.opts["pillar_top_cache"] = False
+            self.assertEqual(self._top_matches("minion1"), {"base": ["baz"]})
+            self.assertEqual(get_tops.call_count, 3)
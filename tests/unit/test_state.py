@@ -5,11 +5,14 @@
 import os
 import shutil
 import tempfile
+import time
 
 import salt.exceptions
 import salt.state
 import salt.utils.files
+import salt.utils.jid
 import salt.utils.platform
+import salt.utils.profile
 from salt.exceptions import CommandExecutionError
 from salt.utils.decorators import state as statedecorators
 from salt.utils.odict import OrderedDict
@@ -437,6 +440,106 @@ class StateCompilerTestCase(TestCase, AdaptedConfigurationTestCaseMixin):
                     shell="/bin/dash",
                 )
 
+    @skipIf(
+        salt.utils.platform.is_windows(), "The check shells are not used on Windows"
+    )
+    def test_verify_checks_in_shells(self):
+        """
+        Verify that the onlyif and unless commands run in the check shells when
+        enabled, and that their exit codes are reused until a state runs
+        """
+        low_data = {
+            "onlyif": ["true", "exit 2"],
+            "unless": ["exit 3", {"fun": "test.false"}],
+            "success_retcodes": [2],
+            "name": "echo something",
+            "shell": "/bin/sh",
+            "state": "cmd",
+            "__id__": "check shells",
+            "fun": "run",
+            "__env__": "base",
+            "__sls__": "sometest",
+            "order": 10000,
+        }
+        with patch("salt.state.State._gather_pillar"):
+            minion_opts = self.get_temp_config("minion", state_check_shells=2)
+            state_obj = salt.state.State(minion_opts)
+            mock = MagicMock(return_value=0)
+            try:
+                with patch.dict(state_obj.functions, {"cmd.retcode": mock}):
+                    ret = state_obj._run_check(low_data)
+                    self.assertFalse(ret["result"])
+                    self.assertEqual(
+                        ret["comment"],
+                        ["onlyif condition is true", "unless condition is false"],
+                    )
+                    mock.assert_not_called()
+                    shells = state_obj._check_shells["/bin/sh"]
+                    self.assertEqual(
+                        shells.cache,
+                        {("true", None): 0, ("exit 2", None): 2, ("exit 3", None): 3},
+                    )
+                    state_obj._invalidate_checks()
+                    self.assertEqual(shells.cache, {})
+
+                    # The commands run as another user are left to cmd.retcode
+                    low_data["runas"] = "doesntexist"
+                    state_obj._run_check(low_data)
+                    self.assertEqual(mock.call_count, 3)
+                    self.assertEqual(shells.cache, {})
+            finally:
+                state_obj._close_check_shells()
+            self.assertEqual(state_obj._check_shells, {})
+
+    @skipIf(
+        salt.utils.platform.is_windows(), "The check shells are not used on Windows"
+    )
+    def test_check_shells_closed(self):
+        """
+        Verify that the check shells are closed once the outermost state call
+        returns or raises, and when the state is destroyed
+        """
+        low_data = {
+            "onlyif": ["true"],
+            "shell": "/bin/sh",
+            "name": "echo something",
+            "state": "cmd",
+            "__id__": "check shells",
+            "fun": "run",
+        }
+        with patch("salt.state.State._gather_pillar"):
+            minion_opts = self.get_temp_config("minion", state_check_shells=1)
+            state_obj = salt.state.State(minion_opts)
+            opened = []
+
+            def _call(low, *args, **kwargs):
+                state_obj._run_check(low)
+                opened.append(state_obj._check_shells["/bin/sh"].shells[0])
+                if low.get("raise"):
+                    raise CommandExecutionError("broken state")
+                if low.get("nested"):
+                    state_obj.call(dict(low_data))
+                    # The shells are kept until the outermost call returns
+                    self.assertEqual(len(state_obj._check_shells), 1)
+                return {}
+
+            with patch.object(state_obj, "_call", side_effect=_call):
+                state_obj.call(dict(low_data, nested=True))
+                self.assertEqual(state_obj._check_shells, {})
+                self.assertIs(opened[0], opened[1])
+                self.assertIsNotNone(opened[0].proc.poll())
+
+                with self.assertRaises(CommandExecutionError):
+                    state_obj.call(dict(low_data, **{"raise": True}))
+                self.assertEqual(state_obj._check_shells, {})
+                self.assertIsNotNone(opened[2].proc.poll())
+
+            state_obj._run_check(low_data)
+            shells = state_obj._check_shells["/bin/sh"].shells
+            state_obj.destroy()
+            self.assertEqual(state_obj._check_shells, {})
+            self.assertIsNotNone(shells[0].proc.poll())
+
     @with_tempfile()
     def test_verify_unless_parse_slots(self, name):
         with salt.utils.files.fopen(name, "w") as fp:
@@ -644,6 +747,199 @@ class StateCompilerTestCase(TestCase, AdaptedConfigurationTestCaseMixin):
                 self.assertEqual(sub_state["__state_ran__"], True)
                 self.assertEqual(sub_state["__sls__"], "external")
 
+    def test_requisite_index(self):
+        """
+        Test that the requisite index finds the chunks the requisites match
+        """
+        chunks = [
+            {"state": "file", "__id__": "conf", "name": "/etc/foo.conf"},
+            {"state": "pkg", "__id__": "foo", "name": "foo"},
+            {"state": "service", "__id__": "foo-service", "name": "foo"},
+            {"state": "file", "__id__": "/etc/bar.conf", "name": "/etc/bar.conf"},
+        ]
+        for idx, chunk in enumerate(chunks):
+            chunk["__sls__"] = "foo.init" if idx < 3 else "bar"
+        index = salt.state.RequisiteIndex(chunks)
+        for req_key, req_val, expected in (
+            ("id", "conf", [0]),
+            ("id", "foo", [1, 2]),
+            ("pkg", "foo", [1]),
+            ("file", "/etc/*.conf", [0, 3]),
+            ("service", "foo*", [2]),
+            ("id", "missing", []),
+            ("file", "foo", []),
+            ("sls", "foo.init", [0, 1, 2]),
+            ("sls", "*", [0, 1, 2, 3]),
+            ("sls", "foo", []),
+            ("id", None, []),
+        ):
+            self.assertEqual(
+                index.find(req_key, req_val),
+                [chunks[idx] for idx in expected],
+                (req_key, req_val),
+            )
+        self.assertTrue(index.indexes(chunks))
+        self.assertFalse(index.indexes(list(chunks)))
+
+    def test_call_chunks_requisites(self):
+        """
+        Test that the requisites are resolved with a single index per run
+        """
+        chunks = [
+            {
+                "state": "test",
+                "fun": "succeed_without_changes",
+                "__id__": state_id,
+                "name": state_id,
+                "__sls__": "one" if order < 2 else "two",
+                "order": order,
+            }
+            for order, state_id in enumerate(("first", "second", "third", "fourth"))
+        ]
+        chunks[0]["require"] = [{"test": "second"}]
+        chunks[2]["require"] = [{"sls": "o*"}]
+        chunks[3]["require"] = ["missing"]
+
+        def _call(low, chunks=None, running=None, retries=1):
+            called.append(low["__id__"])
+            return {"result": True, "changes": {}, "comment": "", "name": low["name"]}
+
+        called = []
+        with patch("salt.state.State._gather_pillar"):
+            state_obj = salt.state.State(self.get_temp_config("minion"))
+        with patch.object(state_obj, "call", side_effect=_call), patch(
+            "salt.state.RequisiteIndex", wraps=salt.state.RequisiteIndex
+        ) as index:
+            ret = state_obj.call_chunks(chunks)
+        self.assertEqual(index.call_count, 1)
+        self.assertEqual(called, ["second", "first", "third"])
+        missing = ret["test_|-fourth_|-fourth_|-succeed_without_changes"]
+        self.assertFalse(missing["result"])
+        self.assertIn("id: missing", missing["comment"])
+
+    def _concurrent_chunks(self, state_obj, chunks):
+        def _call(low, chunks=None, running=None, retries=1):
+            return {
+                "result": low["__id__"] != "fail",
+                "changes": {},
+                "comment": sorted(running or ()),
+                "name": low["name"],
+                "__run_num__": 0,
+            }
+
+        with patch.object(state_obj, "call", side_effect=_call), patch.object(
+            state_obj, "_mod_aggregate", side_effect=lambda low, *args: low
+        ):
+            return state_obj.call_chunks(chunks)
+
+    def test_call_chunks_concurrent(self):
+        """
+        Test running the chunks concurrently as their requisites allow
+        """
+        chunks = [
+            {
+                "state": "test",
+                "fun": "nop",
+                "__id__": state_id,
+                "name": state_id,
+                "__sls__": "concurrent",
+                "order": order,
+            }
+            for order, state_id in enumerate(("first", "second", "third", "fail"))
+        ]
+        chunks[1]["require"] = [{"test": "first"}]
+        chunks[2]["require"] = [{"test": "fail"}]
+        tags = [salt.state._gen_tag(chunk) for chunk in chunks]
+        minion_opts = self.get_temp_config("minion")
+        minion_opts["state_concurrency"] = 2
+        with patch("salt.state.State._gather_pillar"):
+            state_obj = salt.state.State(minion_opts)
+        with patch(
+            "salt.state.State._start_chunk_worker",
+            autospec=True,
+            wraps=salt.state.State._start_chunk_worker,
+        ) as start_worker:
+            ret = self._concurrent_chunks(state_obj, chunks)
+        self.assertEqual(start_worker.call_count, 4)
+        self.assertEqual(sorted(ret), sorted(tags))
+        self.assertEqual(
+            sorted(data["__run_num__"] for data in ret.values()), [0, 1, 2, 3]
+        )
+        # The requisites were done before the chunks requiring them
+        self.assertIn(tags[0], ret[tags[1]]["comment"])
+        self.assertFalse(ret[tags[2]]["result"])
+        self.assertIn("One or more requisite failed", ret[tags[2]]["comment"])
+
+        # Failhard stops starting chunks
+        chunks[3]["failhard"] = True
+        chunks[3]["order"] = -1
+        chunks.insert(0, chunks.pop())
+        chunks[2]["require"] = [{"test": "first"}, {"test": "fail"}]
+        minion_opts["state_concurrency"] = 1
+        with patch("salt.state.State._gather_pillar"):
+            state_obj = salt.state.State(minion_opts)
+        ret = self._concurrent_chunks(state_obj, chunks)
+        self.assertEqual(list(ret), [tags[3]])
+
+    def test_call_chunks_concurrent_parallel(self):
+        """
+        Test that the parallel chunks are only done once their process is, and
+        that the workers started meanwhile do not reconcile it
+        """
+        chunks = [
+            {
+                "state": "test",
+                "fun": "slow" if state_id == "slow" else "nop",
+                "__id__": state_id,
+                "name": state_id,
+                "__sls__": "concurrent",
+                "order": order,
+            }
+            for order, state_id in enumerate(("slow", "first", "other", "after"))
+        ]
+        chunks[0]["parallel"] = True
+        chunks[2]["require"] = [{"test": "first"}]
+        chunks[3]["require"] = [{"test": "slow"}]
+        tags = [salt.state._gen_tag(chunk) for chunk in chunks]
+        marker = os.path.join(RUNTIME_VARS.TMP, "concurrent_parallel")
+        self.addCleanup(lambda: os.path.exists(marker) and os.remove(marker))
+
+        def _slow(name):
+            time.sleep(1)
+            with salt.utils.files.fopen(marker, "w"):
+                pass
+            return {"result": True, "changes": {}, "comment": "slow", "name": name}
+
+        def _call(low, chunks=None, running=None, retries=1):
+            if low.get("parallel"):
+                cdata = {"full": "test.slow", "args": [low["name"]], "kwargs": {}}
+                return state_obj.call_parallel(cdata, low)
+            return {
+                "result": True,
+                "changes": {},
+                "comment": os.path.exists(marker),
+                "name": low["name"],
+                "__run_num__": 0,
+            }
+
+        minion_opts = self.get_temp_config("minion")
+        minion_opts["state_concurrency"] = 2
+        with patch("salt.state.State._gather_pillar"):
+            state_obj = salt.state.State(minion_opts, jid=salt.utils.jid.gen_jid({}))
+        with patch.dict(state_obj.states, {"test.slow": _slow}), patch.object(
+            state_obj, "call", side_effect=_call
+        ), patch.object(state_obj, "_mod_aggregate", side_effect=lambda low, *a: low):
+            ret = state_obj.call_chunks(chunks)
+        self.assertEqual(sorted(ret), sorted(tags))
+        self.assertEqual(ret[tags[0]]["comment"], "slow")
+        self.assertNotIn("proc", ret[tags[0]])
+        # The worker of other did not fail on the process of slow
+        self.assertTrue(ret[tags[2]]["result"])
+        self.assertFalse(ret[tags[2]]["comment"])
+        # after only started once slow was done
+        self.assertTrue(ret[tags[3]]["result"])
+        self.assertTrue(ret[tags[3]]["comment"])
+
 
 class HighStateTestCase(TestCase, AdaptedConfigurationTestCaseMixin):
     def setUp(self):
@@ -738,6 +1034,90 @@ class HighStateTestCase(TestCase, AdaptedConfigurationTestCaseMixin):
         ret = salt.state.find_sls_ids("issue-47182.stateA.newer", high)
         self.assertEqual(ret, [("somestuff", "cmd")])
 
+    def test_call_highstate_compile_cache(self):
+        """
+        test that the compiled highstate is run from the cache until a file
+        it is rendered from or the pillar changes
+        """
+
+        def _write(name, contents):
+            path = os.path.join(self.state_tree_dir, name)
+            with salt.utils.files.fopen(path, "w") as fp_:
+                fp_.write(contents)
+            # Make sure the fileserver sees a new modification time
+            mtime = os.stat(path).st_mtime + len(contents)
+            os.utime(path, (mtime, mtime))
+
+        _write("top.sls", "base:\n  '*':\n    - foo\n")
+        _write(
+            "foo.sls",
+            '{% from "map.jinja" import name %}\n'
+            "{{ name }}:\n  test.succeed_without_changes\n",
+        )
+        _write("map.jinja", "{% set name = 'first' %}\n")
+        self.highstate.opts["state_compile_cache"] = True
+        self.highstate.opts["autoload_dynamic_modules"] = False
+
+        def _call(**kwargs):
+            with patch.object(
+                self.highstate,
+                "render_highstate",
+                wraps=self.highstate.render_highstate,
+            ) as render:
+                ret = self.highstate.call_highstate(**kwargs)
+            self.highstate.building_highstate = OrderedDict()
+            return [tag.split("_|-")[1] for tag in ret], render.call_count
+
+        self.assertEqual(_call(), (["first"], 1))
+        self.assertEqual(_call(), (["first"], 0))
+        self.assertEqual(_call(no_cache=True), (["first"], 1))
+
+        _write("map.jinja", "{% set name = 'second' %}\n")
+        self.assertEqual(_call(), (["second"], 1))
+        self.assertEqual(_call(), (["second"], 0))
+
+        self.highstate.state.opts["pillar"]["key"] = "value"
+        self.assertEqual(_call(), (["second"], 1))
+        self.assertEqual(_call(whitelist=["foo"]), (["second"], 1))
+        self.assertEqual(_call(), (["second"], 0))
+
+    def test_call_highstate_profile(self):
+        """
+        test the phases of a highstate recorded in its profile
+        """
+        with salt.utils.files.fopen(
+            os.path.join(self.state_tree_dir, "top.sls"), "w"
+        ) as fp_:
+            fp_.write("base:\n  '*':\n    - foo\n")
+        with salt.utils.files.fopen(
+            os.path.join(self.state_tree_dir, "foo.sls"), "w"
+        ) as fp_:
+            fp_.write("foo:\n  test.succeed_without_changes:\n    - unless: 'false'\n")
+        self.highstate.opts["autoload_dynamic_modules"] = False
+
+        profile = salt.utils.profile.start_phases("state.highstate")
+        try:
+            ret = self.highstate.call_highstate()
+        finally:
+            salt.utils.profile.stop_phases(profile)
+        self.assertTrue(all(state["result"] for state in ret.values()))
+
+        phases = {node["name"]: node for node in profile.to_dict()["children"]}
+        for name in ("top", "render", "requisite_in", "call_chunks"):
+            self.assertIn(name, phases)
+        sls = phases["render"]["children"][0]
+        self.assertEqual(sls["name"], "sls base:foo")
+        self.assertEqual(
+            [node["name"] for node in sls["children"]], ["render jinja", "render yaml"]
+        )
+        state = phases["call_chunks"]["children"][0]
+        self.assertEqual(state["name"], "test.succeed_without_changes")
+        self.assertEqual(state["children"][0]["name"], "unless")
+        checks = profile.slowest()
+        self.assertEqual(len(checks), 1)
+        self.assertEqual(checks[0]["id"], "foo")
+        self.assertEqual(checks[0]["command"], "false")
+
 
 class MultiEnvHighStateTestCase(TestCase, AdaptedConfigurationTestCaseMixin):
     def setUp(self):
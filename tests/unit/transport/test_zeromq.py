@@ -10,12 +10,16 @@ import time
 from concurrent.futures.thread import ThreadPoolExecutor
 
 import salt.config
+import salt.crypt
 import salt.exceptions
 import salt.ext.tornado.gen
 import salt.ext.tornado.ioloop
 import salt.log.setup
+import salt.master
+import salt.payload
 import salt.transport.client
 import salt.transport.server
+import salt.transport.zeromq
 import salt.utils.platform
 import salt.utils.process
 import zmq.eventloop.ioloop
@@ -805,3 +809,58 @@ class AsyncZeroMQReqChannelTests(TestCase):
             self.assertIs(
                 zmq_objects, salt.transport.zeromq.AsyncZeroMQReqChannel.instance_map
             )
+
+
+class ZeroMQPubServerChannelPublishTest(TestCase):
+    def setUp(self):
+        self.opts = dict(
+            salt.config.DEFAULT_MASTER_OPTS,
+            sock_dir=RUNTIME_VARS.TMP,
+            sign_pub_messages=False,
+            zmq_filtering=True,
+        )
+        self.key = salt.crypt.Crypticle.generate_key_string()
+        secrets = {
+            "aes": {
+                "secret": multiprocessing.Array(ctypes.c_char, self.key.encode()),
+                "reload": None,
+            }
+        }
+        patcher = patch.dict(salt.master.SMaster.secrets, secrets)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        salt.transport.zeromq.ZeroMQPubServerChannel._sock_data.sock = MagicMock()
+        self.addCleanup(
+            delattr, salt.transport.zeromq.ZeroMQPubServerChannel._sock_data, "sock"
+        )
+
+    def test_publish(self):
+        """
+        test that the load is encrypted once per AES key and sent to the
+        publisher process along with the targeted minions
+        """
+        serial = salt.payload.Serial(self.opts)
+        server_channel = salt.transport.zeromq.ZeroMQPubServerChannel(self.opts)
+        with patch(
+            "salt.crypt.Crypticle", MagicMock(wraps=salt.crypt.Crypticle)
+        ) as crypticle, patch.object(
+            server_channel.ckminions,
+            "check_minions",
+            MagicMock(return_value={"minions": ["minion"], "missing": []}),
+        ):
+            server_channel.publish({"tgt_type": "glob", "tgt": "*", "jid": 1})
+            server_channel = salt.transport.zeromq.ZeroMQPubServerChannel(self.opts)
+            server_channel.publish({"tgt_type": "grain", "tgt": "os:Linux", "jid": 2})
+        self.assertEqual(crypticle.call_count, 1)
+
+        calls = server_channel.pub_sock.send_multipart.call_args_list
+        self.assertEqual(len(calls), 2)
+        frames = calls[0][0][0]
+        self.assertEqual(serial.loads(frames[1]), ["minion"])
+        payload = serial.loads(frames[0])
+        self.assertEqual(payload["enc"], "aes")
+        self.assertEqual(
+            salt.crypt.Crypticle(self.opts, self.key).loads(payload["load"])["jid"], 1
+        )
+        # Only glob, pcre and list targets are filtered
+        self.assertEqual(len(calls[1][0][0]), 1)
@@ -9,11 +9,14 @@
 import hashlib
 import os
 import shutil
+import tempfile
 import time
 
 import salt.config
 import salt.ext.tornado.ioloop
+import salt.payload
 import salt.utils.event
+import salt.utils.platform
 import salt.utils.stringutils
 import zmq
 import zmq.eventloop.ioloop
@@ -300,6 +303,131 @@ class TestSaltEvent(TestCase):
                 {"data": data, "tag": "test_master", "events": None, "pretag": None},
             )
 
+    @slowTest
+    def test_event_subscribe_prefixes(self):
+        """Test the publisher only sends the events matching the prefixes"""
+        with eventpublisher_process(self.sock_dir):
+            me1 = salt.utils.event.MasterEvent(self.sock_dir, listen=True)
+            me2 = salt.utils.event.MasterEvent(self.sock_dir, listen=True)
+            me1.subscribe_prefixes(["salt/job/"])
+            # Send the prefixes, and give the publisher the time to read them
+            self.assertIsNone(me1.get_event(no_block=True))
+            time.sleep(0.5)
+            me2.fire_event({"data": "foo1"}, "salt/auth")
+            me2.fire_event({"data": "foo2"}, "salt/job/1/ret/minion")
+            evt1 = me1.get_event(tag="")
+            self.assertGotEvent(evt1, {"data": "foo2"})
+            evt2 = me2.get_event(tag="")
+            self.assertGotEvent(evt2, {"data": "foo1"})
+
+            me1.subscribe_prefixes([])
+            self.assertIsNone(me1.get_event(no_block=True))
+            time.sleep(0.5)
+            me2.fire_event({"data": "foo3"}, "salt/auth")
+            evt1 = me1.get_event(tag="")
+            self.assertGotEvent(evt1, {"data": "foo3"})
+
+    @slowTest
+    def test_event_lazy(self):
+        """Test events returned with lazily deserialized data"""
+        with eventpublisher_process(self.sock_dir):
+            me = salt.utils.event.MasterEvent(self.sock_dir, listen=True)
+            me.subscribe("evt1")
+            me.fire_event({"data": "foo1"}, "evt1")
+            me.fire_event({"data": "foo2"}, "evt2")
+            evt2 = me.get_event(tag="evt2", full=True, lazy=True)
+            self.assertIsInstance(evt2["data"], salt.utils.event.LazyEventData)
+            self.assertEqual(evt2["data"]["data"], "foo2")
+            # Cached events are deserialized
+            evt1 = me.get_event(tag="evt1", lazy=True)
+            self.assertIs(type(evt1), dict)
+            self.assertGotEvent(evt1, {"data": "foo1"})
+
+            # Forward the event
+            me.fire_event(evt2["data"], "evt3")
+            evt3 = me.get_event(tag="evt3")
+            self.assertEqual(evt3, evt2["data"])
+
+    @skipIf(salt.utils.platform.is_windows(), "Globs are case insensitive")
+    def test_expr_prefix(self):
+        """Test the literal prefixes of the tag globs and regular expressions"""
+        for expr, prefix in (
+            ("salt/job/123/ret/minion", "salt/job/123/ret/minion"),
+            ("salt/job/*/ret/*", "salt/job"),
+            ("salt/job/[0-9]*", "salt/job/"),
+            ("salt/job/\\d+", "salt/job/"),
+            ("salt/jobs?/", "salt/job"),
+            ("salt/(job|run)/", ""),
+            ("*", ""),
+            ("^salt/", ""),
+        ):
+            self.assertEqual(salt.utils.event.expr_prefix(expr), prefix, expr)
+
+
+class TestLazyEventData(TestCase):
+    def setUp(self):
+        self.serial = salt.payload.Serial({"serial": "msgpack"})
+        self.data = {
+            "fun": "test.ping",
+            "return": {"ret": [True, {"bin": b"\xff"}]},
+            "_stamp": "2021-01-01T00:00:00.000000",
+        }
+        self.raw = self.serial.dumps(self.data, use_bin_type=True)
+
+    def test_access(self):
+        """Test the data is deserialized one key at a time"""
+        data = salt.utils.event.LazyEventData(self.raw)
+        self.assertEqual(list(data), ["fun", "return", "_stamp"])
+        self.assertEqual(len(data), 3)
+        self.assertEqual(data["fun"], "test.ping")
+        self.assertEqual(list(data._values), ["fun"])
+        self.assertIsNone(data.get("jid"))
+        self.assertEqual(data, self.data)
+        self.assertEqual(data.to_dict(), self.data)
+
+    def test_pack(self):
+        """Test the data is serialized again from the original bytes"""
+        data = salt.utils.event.LazyEventData(self.raw)
+        self.assertIs(data.pack(), self.raw)
+        data["return"]["ret"].append(False)
+        data["jid"] = "20210101000000000000"
+        del data["fun"]
+        expected = {
+            "return": {"ret": [True, {"bin": b"\xff"}, False]},
+            "_stamp": "2021-01-01T00:00:00.000000",
+            "jid": "20210101000000000000",
+        }
+        self.assertEqual(self.serial.loads(data.pack(), encoding="utf-8"), expected)
+        self.assertEqual(data.to_dict(), expected)
+
+    def test_delete_unread(self):
+        """Test deleting and popping keys which were never read"""
+        data = salt.utils.event.LazyEventData(self.raw)
+        del data["fun"]
+        self.assertEqual(list(data), ["return", "_stamp"])
+        expected = {
+            "return": {"ret": [True, {"bin": b"\xff"}]},
+            "_stamp": "2021-01-01T00:00:00.000000",
+        }
+        self.assertEqual(data.to_dict(), expected)
+        self.assertEqual(self.serial.loads(data.pack(), encoding="utf-8"), expected)
+
+        data = salt.utils.event.LazyEventData(self.raw)
+        self.assertEqual(data.pop("_stamp"), "2021-01-01T00:00:00.000000")
+        expected = {"fun": "test.ping", "return": {"ret": [True, {"bin": b"\xff"}]}}
+        self.assertEqual(data.to_dict(), expected)
+        self.assertEqual(self.serial.loads(data.pack(), encoding="utf-8"), expected)
+
+    def test_unpack(self):
+        """Test only mappings are deserialized lazily"""
+        tag, data = salt.utils.event.SaltEvent.unpack(b"evt1\n\n" + self.raw, lazy=True)
+        self.assertEqual(tag, "evt1")
+        self.assertIsInstance(data, salt.utils.event.LazyEventData)
+        tag, data = salt.utils.event.SaltEvent.unpack(
+            b"evt1\n\n" + self.serial.dumps([1, 2]), lazy=True
+        )
+        self.assertEqual(data, [1, 2])
+
 
 class TestAsyncEventPublisher(AsyncTestCase):
     def get_new_ioloop(self):
@@ -345,6 +473,76 @@ class TestAsyncEventPublisher(AsyncTestCase):
         me.unsubscribe("tag_does_not_exist")
 
 
+class TestEventReturnWorker(TestCase):
+    def setUp(self):
+        self.cachedir = tempfile.mkdtemp(dir=RUNTIME_VARS.TMP)
+        self.addCleanup(shutil.rmtree, self.cachedir, ignore_errors=True)
+        self.opts = {
+            "cachedir": self.cachedir,
+            "event_return_queue": 3,
+            "event_return_queue_max_seconds": 1,
+            "event_return_async_queue_size": 10,
+            "event_return_retries": 1,
+            "event_return_retry_backoff": 0.01,
+            "event_return_overflow": "drop",
+        }
+        self.calls = []
+
+    def _event(self, idx):
+        raw = salt.payload.Serial({}).dumps({"idx": idx}, use_bin_type=True)
+        return {"tag": "evt", "data": salt.utils.event.LazyEventData(raw)}
+
+    def _returner(self, fail=0):
+        def event_return(events):
+            self.calls.append([event["data"]["idx"] for event in events])
+            if len(self.calls) <= fail:
+                raise Exception("returner unavailable")
+
+        return event_return
+
+    def test_batch_retry(self):
+        """Test the events are returned in batches, retrying the failures"""
+        worker = salt.utils.event.EventReturnWorker(
+            self.opts, "test", self._returner(fail=1)
+        )
+        for idx in range(4):
+            worker.put(self._event(idx))
+        worker.stop(timeout=10)
+        self.assertEqual(self.calls, [[0, 1, 2], [0, 1, 2], [3]])
+        self.assertEqual(worker.dropped, 0)
+
+    def test_drop(self):
+        """Test the events which could not be returned are dropped"""
+        worker = salt.utils.event.EventReturnWorker(
+            self.opts, "test", self._returner(fail=10)
+        )
+        for idx in range(3):
+            worker.put(self._event(idx))
+        worker.stop(timeout=10)
+        self.assertEqual(self.calls, [[0, 1, 2], [0, 1, 2]])
+        self.assertEqual(worker.dropped, 3)
+
+    def test_spill(self):
+        """Test the events which could not be returned are spilled and replayed"""
+        self.opts["event_return_overflow"] = "spill"
+        self.opts["event_return_retries"] = 0
+        worker = salt.utils.event.EventReturnWorker(
+            self.opts, "test", self._returner(fail=10)
+        )
+        for idx in range(3):
+            worker.put(self._event(idx))
+        worker.stop(timeout=10)
+        spill_dir = os.path.join(self.cachedir, "event_return_spill", "test")
+        self.assertEqual(len(os.listdir(spill_dir)), 1)
+
+        self.calls = []
+        worker = salt.utils.event.EventReturnWorker(self.opts, "test", self._returner())
+        worker.put(self._event(3))
+        worker.stop(timeout=10)
+        self.assertEqual(self.calls, [[3], [0, 1, 2]])
+        self.assertEqual(os.listdir(spill_dir), [])
+
+
 class TestEventReturn(TestCase):
     @slowTest
     def test_event_return(self):
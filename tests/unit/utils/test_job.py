@@ -6,7 +6,12 @@ unit tests for salt.utils.job
 # Import Python Libs
 from __future__ import absolute_import, print_function, unicode_literals
 
+import os
+import shutil
+import tempfile
+
 import salt.minion
+import salt.payload
 
 # Import Salt Libs
 import salt.utils.job as job
@@ -16,6 +21,7 @@ from salt.ext import six
 
 # Import Salt Testing Libs
 from tests.support.mock import patch
+from tests.support.runtests import RUNTIME_VARS
 from tests.support.unit import TestCase, skipIf
 
 
@@ -69,3 +75,137 @@ class JobTest(TestCase):
                         "The specified 'foo' returner threw a stack trace",
                         logged.output[0],
                     )
+
+    def test_store_job_batched(self):
+        """
+        test that batched returns store the jid and end time of each job once
+        """
+        opts = dict(
+            MockMasterMinion.opts,
+            job_cache_store_endtime=True,
+            return_batch_size=10,
+            return_batch_interval=5,
+        )
+        calls = []
+        returners = {
+            "foo.save_load": lambda *args, **kwargs: calls.append("save_load"),
+            "foo.prep_jid": lambda *args, **kwargs: calls.append("prep_jid"),
+            "foo.get_load": lambda *args, **kwargs: True,
+            "foo.returner": lambda load: calls.append(("returner", load["id"])),
+            "foo.update_endtime": lambda *args: calls.append("update_endtime"),
+        }
+        mminion = MockMasterMinion()
+        batcher = job.ReturnBatcher(opts, mminion=mminion)
+        with patch.dict(MockMasterMinion.returners, returners), patch(
+            "salt.utils.verify.valid_id", return_value=True
+        ):
+            for minion_id in ("a", "b", "c"):
+                job.store_job(
+                    opts,
+                    {
+                        "jid": "20190618090114890985",
+                        "return": {"success": True},
+                        "id": minion_id,
+                    },
+                    mminion=mminion,
+                    batcher=batcher,
+                )
+            # Nothing is written until the batch is full or the interval elapsed
+            self.assertEqual(calls, [])
+            batcher.stop()
+        self.assertEqual(
+            calls,
+            [
+                "prep_jid",
+                "save_load",
+                ("returner", "a"),
+                "save_load",
+                ("returner", "b"),
+                "save_load",
+                ("returner", "c"),
+                "update_endtime",
+            ],
+        )
+
+    def test_store_returns_many(self):
+        """
+        test that the returners providing returner_many write the returns and
+        end times of a batch at once
+        """
+        opts = dict(MockMasterMinion.opts, job_cache_store_endtime=True)
+        calls = []
+        returners = {
+            "foo.save_load": lambda *args, **kwargs: calls.append("save_load"),
+            "foo.returner": lambda load: calls.append(("returner", load["id"])),
+            "foo.returner_many": lambda loads: calls.append(
+                ("returner_many", [load["id"] for load in loads])
+            ),
+            "foo.update_endtime_many": lambda endtimes: calls.append(
+                ("update_endtime_many", sorted(endtimes))
+            ),
+        }
+        returns = [
+            ({"jid": "20190618090114890985", "return": {}, "id": "a"}, "t1", True),
+            ({"jid": "20190618090114890985", "return": {}, "id": "b"}, "t2", True),
+            ({"jid": "20190618090114890986", "return": {}, "id": "a"}, "t3", False),
+        ]
+        mminion = MockMasterMinion()
+        with patch.dict(MockMasterMinion.returners, returners):
+            job.store_returns(opts, returns, mminion=mminion)
+        self.assertEqual(
+            calls,
+            [
+                "save_load",
+                "save_load",
+                "save_load",
+                ("returner_many", ["a", "b", "a"]),
+                (
+                    "update_endtime_many",
+                    ["20190618090114890985", "20190618090114890986"],
+                ),
+            ],
+        )
+
+    @skipIf(not job.HAS_FCNTL, "The return journal requires fcntl")
+    def test_return_journal(self):
+        """
+        test that the returns left in the journal by a killed worker are
+        written by the next batcher
+        """
+        cachedir = tempfile.mkdtemp(dir=RUNTIME_VARS.TMP)
+        self.addCleanup(shutil.rmtree, cachedir, ignore_errors=True)
+        path = os.path.join(cachedir, "return_journal")
+        journal = job.ReturnJournal(path, 2, salt.payload.Serial({}))
+        segments = [
+            journal.append(
+                ({"jid": "20190618090114890985", "id": minion_id}, "t", True)
+            )
+            for minion_id in ("a", "b", "c")
+        ]
+        self.assertEqual(segments[0], segments[1])
+        self.assertNotEqual(segments[1], segments[2])
+        # The first segment is removed once its returns are written
+        journal.done(segments[:2])
+        self.assertEqual(os.listdir(path), [os.path.basename(segments[2])])
+
+        calls = []
+        returners = {
+            "foo.prep_jid": lambda *args, **kwargs: calls.append("prep_jid"),
+            "foo.returner": lambda load: calls.append(("returner", load["id"])),
+        }
+        opts = dict(
+            MockMasterMinion.opts,
+            cachedir=cachedir,
+            return_batch_size=2,
+            return_batch_journal=True,
+        )
+        with patch.dict(MockMasterMinion.returners, returners):
+            # The segment is still used
+            job.ReturnBatcher(opts, mminion=MockMasterMinion()).stop()
+            self.assertEqual(calls, [])
+            # The worker was killed
+            for fp_, _ in journal._segments.values():
+                fp_.close()
+            job.ReturnBatcher(opts, mminion=MockMasterMinion()).stop()
+        self.assertEqual(calls, ["prep_jid", ("returner", "c")])
+        self.assertEqual(os.listdir(path), [])